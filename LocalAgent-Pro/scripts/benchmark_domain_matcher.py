@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Domain-Matcher (Hash-Sets) vs. alte Schleife über allowed_domains
+
+Simuliert eine Auto-Whitelist mit 100.000 Domains und misst Aufbauzeit sowie
+Prüfungen pro Sekunde für erlaubte Domains, Subdomains und blockierte Domains.
+
+Aufruf: python scripts/benchmark_domain_matcher.py [--domains N] [--lookups N]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from domain_matcher import DomainMatcher
+
+ALLOWED_DOMAINS = ["example.com", "github.com", "ubuntu.com", "wikipedia.org", "docs.python.org"]
+TLDS = ["com", "org", "net", "de", "io", "dev"]
+
+
+def random_domain(rng: random.Random) -> str:
+    name = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+    return f"{name}.{rng.choice(TLDS)}"
+
+
+def legacy_allowed(domain: str, allowed_domains, whitelist_cache) -> bool:
+    """Alte Prüfung aus fetch() (Stand vor dem Domain-Matcher)"""
+    allowed = any(domain == d.lower() or domain.endswith('.' + d.lower()) for d in allowed_domains)
+    return allowed or domain in whitelist_cache
+
+
+def measure(check, domains) -> float:
+    """Liefert Mikrosekunden pro Prüfung"""
+    started = time.perf_counter()
+    for domain in domains:
+        check(domain)
+    return (time.perf_counter() - started) / len(domains) * 1e6
+
+
+def benchmark(count: int, lookups: int) -> None:
+    print("\n" + "=" * 70)
+    print(f"  DOMAIN-MATCHER BENCHMARK ({count:,} Domains)")
+    print("=" * 70 + "\n")
+
+    rng = random.Random(42)
+    approved = {random_domain(rng) for _ in range(count)}
+    approved_list = list(approved)
+    queries = (
+        [rng.choice(approved_list) for _ in range(lookups // 3)]
+        + [f"api.{rng.choice(ALLOWED_DOMAINS)}" for _ in range(lookups // 3)]
+        + [random_domain(rng) for _ in range(lookups // 3)]
+    )
+
+    started = time.perf_counter()
+    matcher = DomainMatcher(ALLOWED_DOMAINS, approved)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    print(f"🏗️  Aufbau: {build_ms:8.1f} ms ({len(matcher):,} Einträge)")
+
+    # Szenario 1: Auto-Whitelist als Set, wenige allowed_domains
+    legacy_us = measure(lambda d: legacy_allowed(d, ALLOWED_DOMAINS, approved), queries)
+    matcher_us = measure(matcher.match, queries)
+    print(f"\n⏱️  Alt (5 allowed + Set):       {legacy_us:8.2f} µs/Prüfung")
+    print(f"⏱️  Matcher:                     {matcher_us:8.2f} µs/Prüfung")
+
+    # Szenario 2: alle Domains in allowed_domains (Subdomain-Regel)
+    big_allowed = ALLOWED_DOMAINS + approved_list
+    big_matcher = DomainMatcher(big_allowed)
+    sample = queries[:max(lookups // 100, 30)]
+    legacy_big_us = measure(lambda d: legacy_allowed(d, big_allowed, set()), sample)
+    matcher_big_us = measure(big_matcher.match, queries)
+    print(f"\n⏱️  Alt ({len(big_allowed):,} allowed, linear): {legacy_big_us:10.2f} µs/Prüfung")
+    print(f"⏱️  Matcher ({len(big_allowed):,} allowed):     {matcher_big_us:10.2f} µs/Prüfung")
+    print(f"📈 Faktor: {legacy_big_us / matcher_big_us:,.0f}x")
+
+    mismatches = sum(
+        (legacy_allowed(d, big_allowed, set())) != (big_matcher.match(d) is not None) for d in sample
+    )
+    print(f"\n✅ Abweichungen zur alten Prüfung: {mismatches}/{len(sample)}")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--domains", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=30_000)
+    args = parser.parse_args()
+    benchmark(args.domains, args.lookups)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Latenz eines Log-Aufrufs im Request-Thread (synchron vs. Writer-Thread)
+
+Mehrere Threads loggen wie Request-Threads über Tools-, Ollama- und API-Logger;
+gemessen wird die Dauer jedes einzelnen logger.info()-Aufrufs (p50/p99/max)
+mit direkt angehängten Datei-Handlern und mit Queue + Writer-Thread (drop/block).
+Die Threads loggen ohne Pause, die Queue läuft also absichtlich über.
+
+Aufruf: python scripts/benchmark_logging.py [--records N] [--threads N] [--queue-size N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from logging_config import LoggingManager
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(async_logging: bool, records: int, threads: int, queue_size: int, policy: str = "drop") -> None:
+    root = logging.getLogger()
+    saved = list(root.handlers)
+    with tempfile.TemporaryDirectory() as log_dir:
+        manager = LoggingManager(
+            app_name="Bench", log_dir=log_dir, log_level="INFO", console_output=False,
+            async_logging=async_logging, queue_size=queue_size, queue_policy=policy
+        )
+        loggers = [manager.create_tool_logger(), manager.create_ollama_logger(), manager.create_request_logger()]
+        latencies = [[] for _ in range(threads)]
+
+        def worker(index):
+            samples = latencies[index]
+            for i in range(records // threads):
+                logger = loggers[i % len(loggers)]
+                started = time.perf_counter()
+                logger.info(f"🧪 Thread {index} Eintrag {i}: read_file('/sandbox/datei_{i}.txt') → 1234 Zeichen")
+                samples.append(time.perf_counter() - started)
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        duration = time.perf_counter() - started
+        manager.shutdown()
+        drained = time.perf_counter() - started
+        dropped = manager.stats()["dropped"]
+        root.handlers[:] = saved
+
+    values = [v * 1e6 for samples in latencies for v in samples]
+    label = f"Queue ({policy:5})" if async_logging else "synchron     "
+    print(
+        f"⏱️  {label}  p50 {percentile(values, 0.5):7.1f} µs   p99 {percentile(values, 0.99):8.1f} µs   "
+        f"max {max(values) / 1000:7.1f} ms   {len(values) / duration:9,.0f} Einträge/s"
+        + (f"   (geschrieben nach {drained:.2f}s, {dropped} verworfen)" if async_logging else "")
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=40_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("  LOGGING BENCHMARK")
+    print("=" * 70 + "\n")
+    run(False, args.records, args.threads, args.queue_size)
+    run(True, args.records, args.threads, args.queue_size, "drop")
+    run(True, args.records, args.threads, args.queue_size, "block")
+    print("\n" + "=" * 70 + "\n")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Durchsatz und Latenz des Ollama-Clients ohne echte Inferenz
+
+Startet einen oder mehrere Mock-Ollama-Server (src/mock_ollama.py) mit festem
+Zeitverhalten und schickt von --concurrency Threads gleichzeitig Anfragen über
+OllamaClient (bzw. OllamaBackendPool bei --backends > 1). Gemessen werden
+Requests/s, Latenz (p50/p95) und bei Streams die Zeit bis zum ersten Token –
+also der Overhead von Client, Pool und HTTP, nicht die des Modells.
+
+Aufruf: python scripts/benchmark_ollama_client.py [--requests N] [--concurrency 1,4,16]
+        [--backends N] [--tokens-per-second N] [--max-concurrent N] [--stream]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from mock_ollama import MockOllama
+from ollama_integration import OllamaClient
+from ollama_pool import create_ollama_pool
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(client, total: int, concurrency: int, stream: bool):
+    latencies, first_tokens, failures = [], [], []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            prompt = f"Anfrage {index} an den Mock-Server"
+            started = time.perf_counter()
+            first = None
+            try:
+                if stream:
+                    for _ in client.chat_stream([{"role": "user", "content": prompt}], conversation_id=str(index)):
+                        if first is None:
+                            first = time.perf_counter() - started
+                    ok = first is not None
+                else:
+                    ok = client.generate(prompt, conversation_id=str(index)) is not None
+            except Exception:
+                ok = False
+            with lock:
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                    if first is not None:
+                        first_tokens.append(first)
+                else:
+                    failures.append(index)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, first_tokens, failures
+
+
+def benchmark(args) -> None:
+    mocks = [
+        MockOllama(
+            tokens_per_second=args.tokens_per_second,
+            prompt_eval_rate=args.prompt_eval_rate,
+            response_tokens=args.response_tokens,
+            max_concurrent=args.max_concurrent,
+        ).start()
+        for _ in range(args.backends)
+    ]
+    if args.backends > 1:
+        client = create_ollama_pool({
+            "backends": [mock.url for mock in mocks],
+            "default_model": "llama3.1",
+            "max_retries": 0,
+            "max_inflight_per_backend": args.max_concurrent or 4,
+            "pool_size": max(args.concurrency),
+        })
+    else:
+        client = OllamaClient(base_url=mocks[0].url, default_model="llama3.1", max_retries=0, pool_size=max(args.concurrency))
+
+    print("\n" + "=" * 70)
+    print("  OLLAMA-CLIENT BENCHMARK (Mock-Ollama)")
+    print("=" * 70)
+    print(
+        f"\n🧪 {args.backends} Backend(s), {args.response_tokens} Tokens/Antwort, "
+        f"{args.tokens_per_second or '∞'} Tokens/s, max. {args.max_concurrent or '∞'} parallel je Backend, "
+        f"{'Stream' if args.stream else 'ohne Stream'}\n"
+    )
+    try:
+        for concurrency in args.concurrency:
+            duration, latencies, first_tokens, failures = run(client, args.requests, concurrency, args.stream)
+            line = (
+                f"⏱️  {concurrency:>3} Threads: {len(latencies) / duration:8.1f} req/s   "
+                f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms   p95 {percentile(latencies, 0.95) * 1000:7.1f} ms"
+            ) if latencies else f"⏱️  {concurrency:>3} Threads: keine erfolgreichen Requests"
+            if first_tokens:
+                line += f"   erstes Token p50 {percentile(first_tokens, 0.5) * 1000:6.1f} ms"
+            if failures:
+                line += f"   ❌ {len(failures)} Fehler"
+            print(line)
+    finally:
+        for mock in mocks:
+            mock.stop()
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 4, 16])
+    parser.add_argument("--backends", type=int, default=1)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--prompt-eval-rate", type=float, default=0.0)
+    parser.add_argument("--response-tokens", type=int, default=24)
+    parser.add_argument("--max-concurrent", type=int, default=0)
+    parser.add_argument("--stream", action="store_true")
+    benchmark(parser.parse_args())
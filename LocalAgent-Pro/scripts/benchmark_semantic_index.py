@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Semantischer Index (Aufbau, inkrementelles Update, Suchlatenz)
+
+Ohne Ollama: Embeddings kommen aus einem deterministischen Zufallsgenerator,
+gemessen wird nur der Index selbst (Chunking, Hashing, Ablage, Top-k-Suche).
+
+1. Aufbau über --files generierte Textdateien, danach Update ohne Änderung und
+   nach Änderung einer Datei
+2. Suchlatenz (p50/p95) bei --chunks synthetischen Abschnitten der Dimension --dim
+
+Aufruf: python scripts/benchmark_semantic_index.py [--files N] [--chunks N] [--dim N] [--queries N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from semantic_index import SemanticIndex
+
+WORDS = [
+    "server", "request", "cache", "index", "vector", "login", "password", "invoice", "customer",
+    "report", "config", "thread", "queue", "socket", "token", "model", "stream", "buffer", "retry",
+]
+
+
+def fake_embedder(dim: int):
+    rng = np.random.default_rng(0)
+
+    def embed(texts):
+        return rng.standard_normal((len(texts), dim), dtype=np.float32).tolist()
+    return embed
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def benchmark_build(files: int, dim: int) -> None:
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as root:
+        for i in range(files):
+            lines = [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(rng.randint(20, 200))]
+            sub = os.path.join(root, f"pkg{i % 20}")
+            os.makedirs(sub, exist_ok=True)
+            with open(os.path.join(sub, f"module_{i}.py"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+
+        index = SemanticIndex(root, os.path.join(root, ".localagent", "semantic_index"), fake_embedder(dim), "bench")
+        started = time.perf_counter()
+        result = index.update()
+        build = time.perf_counter() - started
+        print(f"🏗️  Aufbau:             {build * 1000:9.1f} ms ({result['files']:,} Dateien, {result['chunks']:,} Abschnitte)")
+
+        started = time.perf_counter()
+        index.update()
+        print(f"🔁 Update ohne Änderung: {(time.perf_counter() - started) * 1000:7.1f} ms")
+
+        with open(os.path.join(root, "pkg0", "module_0.py"), "a", encoding="utf-8") as f:
+            f.write("\nneue zeile mit cache und vector\n")
+        started = time.perf_counter()
+        result = index.update()
+        print(f"✏️  Update 1 Datei:       {(time.perf_counter() - started) * 1000:7.1f} ms ({result['chunks']} Abschnitte neu)")
+
+
+def benchmark_query(chunks: int, dim: int, queries: int) -> None:
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as root:
+        index = SemanticIndex(root, os.path.join(root, "idx"), fake_embedder(dim), "bench")
+        per_file = 1000
+        started = time.perf_counter()
+        for start in range(0, chunks, per_file):
+            count = min(per_file, chunks - start)
+            vectors = rng.standard_normal((count, dim), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            index.add_chunks(f"file_{start // per_file}.txt", [(i + 1, i + 1, "") for i in range(count)], vectors)
+        index.save()
+        fill = time.perf_counter() - started
+        size_mb = index.stats()["bytes"] / 1024 / 1024
+        print(f"\n📦 {chunks:,} Abschnitte × {dim} Dim. ({size_mb:,.0f} MB memory-mapped) in {fill:.1f}s abgelegt")
+
+        for top_k in (5, 50):
+            latencies = []
+            for _ in range(queries):
+                query = rng.standard_normal(dim, dtype=np.float32)
+                query /= np.linalg.norm(query)
+                started = time.perf_counter()
+                index.search_vector(query, top_k)
+                latencies.append((time.perf_counter() - started) * 1000)
+            print(f"⏱️  Suche top_k={top_k:<3}     p50 {percentile(latencies, 0.5):7.2f} ms   p95 {percentile(latencies, 0.95):7.2f} ms")
+
+
+def benchmark(files: int, chunks: int, dim: int, queries: int) -> None:
+    print("\n" + "=" * 70)
+    print("  SEMANTISCHER INDEX BENCHMARK")
+    print("=" * 70 + "\n")
+    benchmark_build(files, dim)
+    benchmark_query(chunks, dim, queries)
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--chunks", type=int, default=300_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    benchmark(args.files, args.chunks, args.dim, args.queries)
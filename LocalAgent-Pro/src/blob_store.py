@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Blob-Store für LocalAgent-Pro
+Dedupliziert wiederholte Schreibvorgänge über SHA-256 und Reflinks (Copy-on-Write)
+"""
+
+import errno
+import fcntl
+import hashlib
+import os
+import threading
+import uuid
+from typing import Dict, Any, Optional, Tuple
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+# Linux ioctl für Reflinks (btrfs, xfs, ...)
+FICLONE = 0x40049409
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Fehler, an denen erkennbar ist, dass das Dateisystem keine Reflinks kann
+REFLINK_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS}
+
+
+def _hash_file(path: str) -> str:
+    """Berechnet den SHA-256-Hash einer Datei blockweise"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(src: str, dst: str) -> None:
+    """Erzeugt eine Reflink-Kopie (wirft OSError, wenn das Dateisystem das nicht kann)"""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+class BlobStore:
+    """
+    Speichert identische Inhalte genau einmal und legt Zieldateien als Reflink an
+
+    Blobs bleiben privat: Zieldateien sind eigenständige Copy-on-Write-Kopien,
+    Änderungen an einer Datei erreichen weder den Blob noch andere Dateien.
+    Kann das Dateisystem keine Reflinks, wird direkt geschrieben (nur das
+    Überspringen unveränderter Inhalte bleibt aktiv).
+    """
+
+    def __init__(self, root: str, min_size: int = 1024, gc_interval: int = 256):
+        """
+        Initialisiert den Blob-Store
+
+        Args:
+            root: Verzeichnis für Blobs (muss auf demselben Dateisystem wie die Ziele liegen)
+            min_size: Mindestgröße in Bytes, ab der Inhalte als Blob abgelegt werden
+            gc_interval: Anzahl Schreibvorgänge zwischen zwei Aufräumläufen (0 = nie)
+        """
+        self.root = root
+        self.min_size = min_size
+        self.gc_interval = gc_interval
+        self._lock = threading.Lock()
+        self._writes_since_gc = 0
+        self._reflink_supported: Optional[bool] = None  # None = noch nicht geprüft
+        # Zielpfad → (digest, size, mtime_ns, inode) des zuletzt geschriebenen Inhalts
+        self._refs: Dict[str, Tuple[str, int, int, int]] = {}
+        self._stats = {
+            "writes": 0,
+            "skipped_writes": 0,
+            "deduplicated_writes": 0,
+            "bytes_saved": 0,
+            "clone_fallbacks": 0,
+        }
+
+    def _blob_path(self, digest: str) -> str:
+        """Blob-Pfad mit zweistelligem Präfix-Verzeichnis (vermeidet riesige Verzeichnisse)"""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def write(self, path: str, data: bytes) -> Dict[str, Any]:
+        """
+        Schreibt Daten deduplizierend nach path
+
+        Args:
+            path: Zielpfad
+            data: Zu schreibende Bytes
+
+        Returns:
+            Dict mit digest, skipped, deduplicated und bytes_saved
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        result = {"digest": digest, "skipped": False, "deduplicated": False, "bytes_saved": 0}
+
+        if self._has_same_content(path, digest, len(data)):
+            result["skipped"] = True
+            result["bytes_saved"] = len(data)
+            tool_logger.debug(f"♻️ Inhalt unverändert, Schreiben übersprungen: {path}")
+        elif len(data) < self.min_size or self._reflink_supported is False:
+            self._write_plain(path, data)
+        else:
+            blob_path = self._blob_path(digest)
+            existed = os.path.exists(blob_path)
+            if not existed:
+                self._store_blob(blob_path, data)
+
+            if self._clone(blob_path, path):
+                if existed:
+                    result["deduplicated"] = True
+                    result["bytes_saved"] = len(data)
+                    tool_logger.debug(f"🔗 Blob wiederverwendet: {digest[:12]} → {path}")
+            else:
+                with self._lock:
+                    self._stats["clone_fallbacks"] += 1
+                if not existed and self._reflink_supported is False:
+                    # Ohne Reflinks spart der Blob nichts, sondern verdoppelt den Speicher
+                    self._remove(blob_path)
+                self._write_plain(path, data)
+
+        self._remember(path, digest)
+
+        with self._lock:
+            self._stats["writes"] += 1
+            self._stats["skipped_writes"] += int(result["skipped"])
+            self._stats["deduplicated_writes"] += int(result["deduplicated"])
+            self._stats["bytes_saved"] += result["bytes_saved"]
+            self._writes_since_gc += 1
+            run_gc = self.gc_interval and self._writes_since_gc >= self.gc_interval
+            if run_gc:
+                self._writes_since_gc = 0
+
+        if run_gc:
+            self.gc()
+
+        return result
+
+    @staticmethod
+    def _signature(st: os.stat_result) -> Tuple[int, int, int]:
+        return st.st_size, st.st_mtime_ns, st.st_ino
+
+    def _remember(self, path: str, digest: str) -> None:
+        try:
+            signature = self._signature(os.stat(path))
+        except OSError:
+            return
+        with self._lock:
+            self._refs[os.path.abspath(path)] = (digest, *signature)
+
+    def _has_same_content(self, path: str, digest: str, size: int) -> bool:
+        """Prüft, ob path bereits exakt diesen Inhalt hat"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+
+        if st.st_size != size or not os.path.isfile(path):
+            return False
+
+        # Schneller Pfad: seit unserem letzten Schreiben unverändert (Größe, mtime, Inode)
+        with self._lock:
+            ref = self._refs.get(os.path.abspath(path))
+        if ref and ref[0] == digest and ref[1:] == self._signature(st):
+            return True
+
+        return _hash_file(path) == digest
+
+    def _store_blob(self, blob_path: str, data: bytes) -> None:
+        """Legt einen neuen Blob atomar an (tmp + rename)"""
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_path = f"{blob_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, blob_path)
+
+    def _clone(self, blob_path: str, path: str) -> bool:
+        """Ersetzt path atomar durch eine Reflink-Kopie des Blobs"""
+        tmp_path = os.path.join(os.path.dirname(path) or ".", f".{uuid.uuid4().hex}.clone")
+        try:
+            _reflink(blob_path, tmp_path)
+            self._keep_mode(path, tmp_path)
+            os.replace(tmp_path, path)
+            self._reflink_supported = True
+            return True
+        except OSError as e:
+            if e.errno in REFLINK_UNSUPPORTED and self._reflink_supported is None:
+                self._reflink_supported = False
+                tool_logger.info(f"ℹ️ Dateisystem unterstützt keine Reflinks - Blob-Store speichert nur noch unveränderte Inhalte nicht erneut")
+            tool_logger.debug(f"⚠️ Reflink nicht möglich ({e}), schreibe direkt: {path}")
+            self._remove(tmp_path)
+            return False
+
+    @staticmethod
+    def _keep_mode(path: str, tmp_path: str) -> None:
+        """Übernimmt die Rechte einer bestehenden Zieldatei"""
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _write_plain(self, path: str, data: bytes) -> None:
+        """Schreibt ohne Blob (kleine Dateien oder Fallback) atomar per tmp + rename"""
+        # Neuer Inode: Hardlinks auf den alten Stand (z.B. Snapshots) bleiben unverändert
+        tmp_path = os.path.join(os.path.dirname(path) or ".", f".{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            self._keep_mode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            raise
+
+    def gc(self) -> int:
+        """
+        Entfernt Blobs, deren Inhalt keine geschriebene Datei mehr hat
+
+        Eine Datei zählt nur, solange Größe, mtime und Inode seit dem Schreiben
+        unverändert sind; Blobs aus früheren Läufen gelten als verwaist.
+
+        Returns:
+            Anzahl entfernter Blobs
+        """
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+
+        with self._lock:
+            refs = list(self._refs.items())
+        live = set()
+        for path, (digest, *signature) in refs:
+            try:
+                current = self._signature(os.stat(path))
+            except OSError:
+                current = None
+            if current == tuple(signature):
+                live.add(digest)
+            else:
+                with self._lock:
+                    if self._refs.get(path) == (digest, *signature):
+                        del self._refs[path]
+
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if name in live:
+                    continue
+                try:
+                    os.remove(os.path.join(prefix_dir, name))
+                    removed += 1
+                except OSError:
+                    continue
+
+        if removed:
+            tool_logger.info(f"🧹 Blob-Store aufgeräumt: {removed} verwaiste Blobs entfernt")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Liefert Zähler des Blob-Stores"""
+        with self._lock:
+            return dict(self._stats)
+
+
+def create_blob_store(root: str, blob_config: Optional[Dict[str, Any]] = None) -> Optional[BlobStore]:
+    """
+    Erstellt einen Blob-Store aus dem Config-Abschnitt `blob_store`
+
+    Returns:
+        BlobStore oder None, wenn deaktiviert
+    """
+    blob_config = blob_config or {}
+    if not blob_config.get("enabled", False):
+        return None
+
+    return BlobStore(
+        root=blob_config.get("path", root),
+        min_size=blob_config.get("min_size", 1024),
+        gc_interval=blob_config.get("gc_interval", 256),
+    )
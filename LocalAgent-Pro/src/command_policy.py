@@ -0,0 +1,655 @@
+#!/usr/bin/env python3
+"""
+Command-Policy für Shell-Kommandos in LocalAgent-Pro
+Zerlegt Kommandos mit shlex (Pipes, &&, ;, Redirects, Subshells, $(...) und
+Backticks) und prüft jedes Programm samt Flags gegen eine Allow/Deny-Tabelle.
+Entscheidungen werden pro Kommando-String in einem LRU-Cache gehalten.
+"""
+
+import fnmatch
+import os
+import re
+import shlex
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+# Programme, die immer blockiert werden (fnmatch-Muster auf den Programmnamen)
+DEFAULT_DENY_PROGRAMS = [
+    "sudo", "su", "doas", "pkexec",
+    "mkfs*", "mkswap", "fdisk", "sfdisk", "parted", "wipefs", "dd", "shred", "format",
+    "shutdown", "reboot", "halt", "poweroff", "init", "telinit",
+    "nc", "ncat", "netcat", "socat", "telnet",
+    "mount", "umount", "chroot", "passwd", "useradd", "userdel", "usermod", "visudo", "crontab",
+]
+
+# Flag-Regeln pro Programm: alle Gruppen müssen zutreffen, "|" trennt Alternativen
+DEFAULT_DENY_FLAGS = {
+    "rm": ["-r|-R|--recursive -f|--force", "--no-preserve-root"],
+    "chmod": ["*+*x*", "777|0777|a+rwx", "-R|--recursive"],
+    "chown": ["-R|--recursive"],
+    "git": ["push --force|-f"],
+}
+
+# Redirect-Ziele, auf die nicht geschrieben werden darf
+DEFAULT_DENY_REDIRECTS = ["/dev/sd*", "/dev/nvme*", "/dev/hd*", "/dev/mem", "/etc/*", "/boot/*", "/proc/*", "/sys/*"]
+
+# Interpreter, die ohne Skript-Argument Code von stdin ausführen ("curl ... | sh")
+DEFAULT_INTERPRETERS = ["sh", "bash", "zsh", "dash", "ksh", "fish", "python", "python3", "perl", "ruby", "node", "php"]
+
+# Shells, deren "-c"-Argument selbst ein Shell-Kommando ist
+SHELLS = {"sh", "bash", "zsh", "dash", "ksh", "fish"}
+
+# Programme, die ein weiteres Kommando ausführen; geprüft wird das innere Kommando.
+# Wrapper → (Optionen ohne Wert, Optionen mit Wert, Positionsargumente vor dem Kommando).
+# Unbekannte Optionen werden abgelehnt, sonst könnte ihr Wert als Kommando durchgehen.
+WRAPPERS = {
+    "env": ({"-", "-i", "--ignore-environment", "-0", "--null", "-v", "--debug"},
+            {"-u", "--unset", "-C", "--chdir", "-S", "--split-string"}, 0),
+    "nohup": (set(), set(), 0),
+    "nice": (set(), {"-n", "--adjustment"}, 0),
+    "ionice": ({"-t", "--ignore"}, {"-c", "--class", "-n", "--classdata"}, 0),
+    "timeout": ({"-v", "--verbose", "--preserve-status", "--foreground"}, {"-s", "--signal", "-k", "--kill-after"}, 1),
+    "time": ({"-p", "--portability", "-v", "--verbose", "-a", "--append", "-q", "--quiet"}, {"-f", "--format", "-o", "--output"}, 0),
+    "command": ({"-p", "-v", "-V"}, set(), 0),
+    "exec": ({"-c", "-l"}, {"-a"}, 0),
+    "stdbuf": (set(), {"-i", "--input", "-o", "--output", "-e", "--error"}, 0),
+    "setsid": ({"-c", "--ctty", "-f", "--fork", "-w", "--wait"}, set(), 0),
+    # -i, -e und -l haben nur angehängte optionale Werte (-i{}), getrennt sind es Flags
+    "xargs": ({"-0", "--null", "-r", "--no-run-if-empty", "-t", "--verbose", "-p", "--interactive", "-x", "--exit",
+               "-o", "--open-tty", "-i", "-e", "-l"},
+              {"-d", "--delimiter", "-a", "--arg-file", "-E", "--eof", "-I", "--replace", "-n", "--max-args",
+               "-L", "--max-lines", "-P", "--max-procs", "-s", "--max-chars", "--process-slot-var"}, 0),
+    "watch": ({"-d", "--differences", "-t", "--no-title", "-b", "--beep", "-e", "--errexit", "-g", "--chgexit",
+               "-c", "--color", "-x", "--exec", "-p", "--precise"}, {"-n", "--interval"}, 0),
+    "strace": ({"-f", "-ff", "-c", "-C", "-q", "-qq", "-t", "-tt", "-ttt", "-T", "-v", "-x", "-xx", "-y", "-yy",
+                "-r", "-i", "-w", "-z", "-Z", "-k"},
+               {"-o", "-e", "-s", "-p", "-P", "-a", "-E", "-u", "-S", "-b", "-X", "-O", "-U"}, 0),
+    "builtin": (set(), set(), 0),
+    # Multi-Call-Binaries: das erste Argument ist das eigentliche Programm
+    "busybox": (set(), set(), 0),
+    "toybox": (set(), set(), 0),
+}
+
+# Wrapper, deren Option den Rest der Kommandozeile als String enthält (env -S 'rm -rf /')
+SPLIT_STRING_OPTIONS = {("env", "-S"), ("env", "--split-string")}
+
+# Wrapper, die ihre Argumente zusammengefügt an "sh -c" übergeben
+SHELL_JOIN_WRAPPERS = {"watch"}
+
+# Shell-Optionen mit Wert (bash -o pipefail, --rcfile datei)
+SHELL_VALUE_OPTIONS = {"-o", "+o", "-O", "+O", "--rcfile", "--init-file"}
+
+# Skript-Pfade, über die ein Interpreter doch wieder stdin liest
+STDIN_PATHS = {"-", "/dev/stdin", "/dev/fd/0", "/proc/self/fd/0"}
+
+# Shell-Schlüsselwörter vor dem eigentlichen Programm
+KEYWORDS = {"!", "{", "}", "if", "then", "else", "elif", "fi", "do", "done", "while", "until", "case", "esac"}
+
+# Kopfzeilen von Schleifen (for x in ...; select x in ...) führen kein Programm aus
+LOOP_HEADERS = {"for", "select"}
+
+# Glob-Zeichen, deren Expansion erst die Shell kennt
+GLOB_CHARS = "*?["
+
+# Bekannte Kommandos für is_command() (mit bzw. ohne Argumente)
+KNOWN_COMMANDS = {"ls", "pwd", "cat", "echo", "grep", "find", "date", "whoami", "df", "du", "free", "top", "ps"}
+BARE_COMMANDS = {"ls", "pwd", "date", "whoami"}
+
+SEPARATORS = {";", "&", "&&", "||", "|", "|&", "(", ")", ";;"}
+PIPES = {"|", "|&"}
+REDIRECTS = {">", ">>", "<", "<<", "<<<", ">&", "<&", "&>", "&>>", ">|", "<>"}
+# Längste Operatoren zuerst, damit z.B. ")>" korrekt in ")" und ">" zerfällt
+OPERATORS = sorted(SEPARATORS | REDIRECTS, key=len, reverse=True)
+# Operatoren, die _is_valid_command als Shell-Syntax wertet
+COMMAND_OPERATORS = PIPES | {"||", "&&", ">", ">>", ">&", "&>", "&>>"}
+
+SUBST_PLACEHOLDER = "$__subst__"
+MAX_NESTING = 16
+
+ENV_ASSIGNMENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+
+
+class CommandParseError(ValueError):
+    """Kommando kann nicht eindeutig zerlegt werden"""
+
+
+def _compile_patterns(patterns: Iterable[str]) -> Optional[re.Pattern]:
+    """Fasst fnmatch-Muster zu einem vorkompilierten Regex zusammen"""
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns))
+
+
+def _compile_flag_rule(rule: str) -> List[re.Pattern]:
+    """'-r|-R -f|--force' → [Regex(-r|-R), Regex(-f|--force)]"""
+    return [_compile_patterns(group.split("|")) for group in rule.split()]
+
+
+def _find_closing(cmd: str, start: int, closing: str) -> int:
+    """Sucht das schließende Zeichen (Backtick oder Klammer) unter Beachtung von Quotes"""
+    depth = 0
+    quote = None
+    i = start
+    while i < len(cmd):
+        c = cmd[i]
+        if quote == "'":
+            if c == "'":
+                quote = None
+        elif c == "\\":
+            i += 1
+        elif c in "'\"" and closing == ")":
+            if quote is None and c == "'":
+                quote = "'"
+            elif c == '"':
+                quote = None if quote == '"' else '"'
+        elif quote is None or closing == "`":
+            if closing == ")" and c == "(":
+                depth += 1
+            elif c == closing:
+                if depth == 0:
+                    return i
+                depth -= 1
+        i += 1
+    raise CommandParseError(f"Nicht geschlossenes '{closing}'")
+
+
+def extract_substitutions(cmd: str) -> Tuple[str, List[str]]:
+    """
+    Ersetzt $(...), `...`, <(...) und >(...) durch einen Platzhalter und
+    wandelt ungequotete Zeilenumbrüche in ';' um
+
+    Returns:
+        (umgeschriebenes Kommando, Liste der inneren Kommandos)
+    """
+    out: List[str] = []
+    inner: List[str] = []
+    quote = None
+    i = 0
+    while i < len(cmd):
+        c = cmd[i]
+        nxt = cmd[i + 1] if i + 1 < len(cmd) else ""
+
+        if quote == "'":
+            out.append(c)
+            if c == "'":
+                quote = None
+            i += 1
+            continue
+
+        if c == "\\" and nxt:
+            out.append(cmd[i:i + 2])
+            i += 2
+            continue
+
+        if c == "`":
+            end = _find_closing(cmd, i + 1, "`")
+            inner.append(cmd[i + 1:end])
+            out.append(SUBST_PLACEHOLDER)
+            i = end + 1
+            continue
+
+        if nxt == "(" and (c == "$" or (c in "<>" and quote is None)):
+            end = _find_closing(cmd, i + 2, ")")
+            inner.append(cmd[i + 2:end])
+            out.append(SUBST_PLACEHOLDER if c == "$" else f"{c} {SUBST_PLACEHOLDER}")
+            i = end + 1
+            continue
+
+        if c == "'" and quote is None:
+            quote = "'"
+        elif c == '"':
+            quote = None if quote == '"' else '"'
+        elif c == "\n" and quote is None:
+            c = ";"
+        out.append(c)
+        i += 1
+
+    if quote:
+        raise CommandParseError("Nicht geschlossenes Anführungszeichen")
+    return "".join(out), inner
+
+
+def _split_operator(token: str) -> List[str]:
+    """Zerlegt zusammengeklebte Operatoren (z.B. ')>' oder ';;&')"""
+    parts = []
+    while token:
+        for op in OPERATORS:
+            if token.startswith(op):
+                parts.append(op)
+                token = token[len(op):]
+                break
+        else:
+            parts.append(token[0])
+            token = token[1:]
+    return parts
+
+
+def tokenize(cmd: str) -> List[str]:
+    """Zerlegt ein Kommando (ohne Substitutionen) in Wörter und Operatoren"""
+    lexer = shlex.shlex(cmd, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    lexer.commenters = ""  # '#' nicht als Kommentar werten: lieber zu viel prüfen
+    try:
+        raw = list(lexer)
+    except ValueError as e:
+        raise CommandParseError(str(e))
+
+    tokens = []
+    for token in raw:
+        if token and all(c in "();<>|&" for c in token):
+            tokens.extend(_split_operator(token))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def split_commands(tokens: List[str]) -> List[Dict[str, Any]]:
+    """
+    Teilt Tokens in einfache Kommandos auf
+
+    Returns:
+        Liste von {"argv": [...], "redirects": [(op, ziel)], "piped": bool}
+    """
+    commands = []
+    current = {"argv": [], "redirects": [], "piped": False}
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in SEPARATORS:
+            if current["argv"] or current["redirects"]:
+                commands.append(current)
+            current = {"argv": [], "redirects": [], "piped": token in PIPES}
+        elif token in REDIRECTS:
+            target = tokens[i + 1] if i + 1 < len(tokens) else ""
+            current["redirects"].append((token, target))
+            i += 1
+        elif token.isdigit() and i + 1 < len(tokens) and tokens[i + 1] in REDIRECTS:
+            pass  # File-Deskriptor vor Redirect (2>&1)
+        else:
+            current["argv"].append(token)
+        i += 1
+
+    if current["argv"] or current["redirects"]:
+        commands.append(current)
+    return commands
+
+
+def _is_dynamic(word: str) -> bool:
+    """True, wenn die Shell das Wort erst zur Laufzeit expandiert (Variable, Substitution, Glob)"""
+    return "$" in word or any(c in word for c in GLOB_CHARS)
+
+
+def expand_flags(args: List[str], long_options: Iterable[str] = ()) -> List[str]:
+    """
+    '-rf' → ['-r', '-f'], '--force=yes' → ['--force'], andere Argumente unverändert
+
+    Abgekürzte Langoptionen ('--f', '--recur') werden wie bei getopt auf alle
+    passenden Schreibweisen aus long_options erweitert.
+    """
+    expanded = []
+    for arg in args:
+        if arg.startswith("--"):
+            option = arg.split("=", 1)[0]
+            expanded.append(option)
+            if len(option) > 2:
+                expanded.extend(o for o in long_options if o != option and o.startswith(option))
+        elif arg.startswith("-") and len(arg) > 2 and arg[1:].isalpha():
+            expanded.extend(f"-{c}" for c in arg[1:])
+        else:
+            expanded.append(arg)
+    return expanded
+
+
+def strip_wrapper_options(name: str, args: List[str]) -> Tuple[List[str], Optional[str]]:
+    """
+    Entfernt die Optionen eines Wrappers samt Werten (timeout -s KILL 5, stdbuf -oL, -vk 5)
+
+    Returns:
+        (inneres Kommando, Blockier-Grund bei unbekannter Option)
+    """
+    flags, values, positional = WRAPPERS[name]
+    prefix: List[str] = []  # Aus env -S zerlegtes Kommando
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--":
+            i += 1
+            break
+        if name == "env" and ENV_ASSIGNMENT.match(arg):
+            i += 1
+            continue
+        if not arg.startswith("-") or (arg == "-" and "-" not in flags):
+            break
+
+        value = None
+        if arg.startswith("--") or arg in flags or arg in values:
+            option, eq, attached = arg.partition("=") if arg.startswith("--") else (arg, "", "")
+            if option in values:
+                value = attached if eq else (args[i + 1] if i + 1 < len(args) else "")
+                i += 1 if eq else 2
+            elif option in flags:
+                i += 1
+            else:
+                return [], f"Unbekannte Option '{option}' für '{name}'"
+        elif name == "nice" and arg[1:].isdigit():
+            i += 1  # nice -10 kommando
+            continue
+        else:
+            # Gebündelte Kurzoptionen: Flags, zuletzt evtl. eine mit Wert (-vk 5, -sKILL)
+            option = None
+            for j in range(1, len(arg)):
+                option = f"-{arg[j]}"
+                if option in values:
+                    value = arg[j + 1:] or (args[i + 1] if i + 1 < len(args) else "")
+                    i += 1 if arg[j + 1:] else 2
+                    break
+                if option not in flags:
+                    return [], f"Unbekannte Option '{option}' für '{name}'"
+            else:
+                i += 1
+                continue
+
+        if (name, option) in SPLIT_STRING_OPTIONS:
+            try:
+                prefix.extend(shlex.split(value or ""))
+            except ValueError as e:
+                raise CommandParseError(str(e))
+
+    return prefix + args[i + positional:], None
+
+
+def parse_shell_args(args: List[str]) -> Tuple[bool, bool, List[str]]:
+    """
+    Wertet die Optionen einer Shell aus (bash -lc, sh -ec, bash -s, bash -o pipefail)
+
+    Returns:
+        (Kommando per -c, liest Skript von stdin per -s, Positionsargumente)
+    """
+    has_c = reads_stdin = False
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ("--", "-"):
+            i += 1
+            break
+        if arg in SHELL_VALUE_OPTIONS:
+            i += 2
+            continue
+        if arg.startswith("--"):
+            i += 1
+            continue
+        if len(arg) < 2 or arg[0] not in "-+":
+            break
+        letters = arg[1:]
+        if arg[0] == "-":
+            has_c = has_c or "c" in letters
+            reads_stdin = reads_stdin or "s" in letters
+        # -o in einem Bündel (-euo pipefail) nimmt das nächste Argument als Wert
+        i += 2 if ("o" in letters or "O" in letters) else 1
+    return has_c, reads_stdin, args[i:]
+
+
+class CommandPolicy:
+    """Allow/Deny-Prüfung von Shell-Kommandos auf Token-Ebene mit Entscheidungs-Cache"""
+
+    def __init__(
+        self,
+        mode: str = "denylist",
+        allow_programs: Optional[Iterable[str]] = None,
+        deny_programs: Optional[Iterable[str]] = None,
+        deny_flags: Optional[Dict[str, List[str]]] = None,
+        deny_redirects: Optional[Iterable[str]] = None,
+        interpreters: Optional[Iterable[str]] = None,
+        cache_size: int = 1024
+    ):
+        """
+        Initialisiert die Policy und kompiliert die Tabellen vor
+
+        Args:
+            mode: "denylist" (alles außer Deny erlaubt) oder "allowlist" (nur allow_programs)
+            allow_programs: Erlaubte Programme im allowlist-Modus (fnmatch-Muster)
+            deny_programs: Immer blockierte Programme (fnmatch-Muster)
+            deny_flags: Programm → Liste von Flag-Regeln ("-r|-R -f" = -r oder -R, und -f)
+            deny_redirects: Verbotene Redirect-Ziele (fnmatch-Muster)
+            interpreters: Programme, die nicht aus einer Pipe gespeist werden dürfen
+            cache_size: Anzahl gecachter Entscheidungen (0 = kein Cache)
+        """
+        if mode not in ("denylist", "allowlist"):
+            raise ValueError(f"Unbekannter Policy-Modus: {mode}")
+
+        self.mode = mode
+        self.allow_programs = _compile_patterns(allow_programs or [])
+        self.deny_programs = _compile_patterns(DEFAULT_DENY_PROGRAMS if deny_programs is None else deny_programs)
+        self.deny_flags = {
+            program: [_compile_flag_rule(rule) for rule in rules]
+            for program, rules in (DEFAULT_DENY_FLAGS if deny_flags is None else deny_flags).items()
+        }
+        # Ausgeschriebene Langoptionen je Programm, gegen die Abkürzungen geprüft werden
+        self.long_flags = {
+            program: sorted({
+                flag
+                for rule in rules
+                for group in rule.split()
+                for flag in group.split("|")
+                if flag.startswith("--") and not any(c in flag for c in GLOB_CHARS)
+            })
+            for program, rules in (DEFAULT_DENY_FLAGS if deny_flags is None else deny_flags).items()
+        }
+        self.deny_redirects = _compile_patterns(DEFAULT_DENY_REDIRECTS if deny_redirects is None else deny_redirects)
+        self.interpreters = set(DEFAULT_INTERPRETERS if interpreters is None else interpreters)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def check(self, cmd: str) -> Dict[str, Any]:
+        """
+        Prüft ein Kommando gegen die Policy
+
+        Returns:
+            Dict mit allowed, reason (None wenn erlaubt), programs und cached
+        """
+        with self._lock:
+            decision = self._cache.get(cmd)
+            if decision is not None:
+                self._cache.move_to_end(cmd)
+                self._hits += 1
+                return {**decision, "cached": True}
+            self._misses += 1
+
+        programs: List[str] = []
+        try:
+            reason = self._evaluate(cmd, programs, depth=0)
+        except CommandParseError as e:
+            reason = f"Kommando nicht eindeutig parsebar: {e}"
+
+        decision = {"allowed": reason is None, "reason": reason, "programs": programs}
+
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[cmd] = decision
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return {**decision, "cached": False}
+
+    def _evaluate(self, cmd: str, programs: List[str], depth: int) -> Optional[str]:
+        """Prüft ein (Teil-)Kommando rekursiv; liefert Blockier-Grund oder None"""
+        if depth > MAX_NESTING:
+            return "Zu tief verschachteltes Kommando"
+
+        rewritten, substitutions = extract_substitutions(cmd)
+        for inner in substitutions:
+            reason = self._evaluate(inner, programs, depth + 1)
+            if reason:
+                return reason
+
+        for simple in split_commands(tokenize(rewritten)):
+            reason = self._check_redirects(simple["redirects"])
+            if reason:
+                return reason
+            # Eingabe per Pipe oder Redirect (bash < skript.sh, bash <<< '...')
+            fed = simple["piped"] or any(op in ("<", "<<", "<<<", "<>", "<&") for op, _ in simple["redirects"])
+            reason = self._check_argv(simple["argv"], fed, programs, depth)
+            if reason:
+                return reason
+        return None
+
+    def _check_redirects(self, redirects: List[Tuple[str, str]]) -> Optional[str]:
+        if not self.deny_redirects:
+            return None
+        for op, target in redirects:
+            if ">" in op and self.deny_redirects.match(target):
+                return f"Schreiben nach '{target}' nicht erlaubt"
+        return None
+
+    def _check_argv(self, argv: List[str], piped: bool, programs: List[str], depth: int) -> Optional[str]:
+        """Prüft ein einfaches Kommando (Programm + Argumente); piped = stdin kommt aus Pipe oder Redirect"""
+        # Variablen-Zuweisungen und Schlüsselwörter vor dem Programm überspringen
+        while argv:
+            if ENV_ASSIGNMENT.match(argv[0]) or argv[0] in KEYWORDS:
+                argv = argv[1:]
+            elif argv[0] == "function":
+                # function f { ...; } – der Rumpf folgt nach dem Namen
+                argv = argv[2:]
+            elif argv[0] == "coproc":
+                # Benannter Coprozess nur mit zusammengesetztem Kommando: coproc NAME { ...; }
+                argv = argv[2:] if len(argv) > 2 and argv[2] == "{" else argv[1:]
+            else:
+                break
+        if not argv or argv[0] in LOOP_HEADERS:
+            return None
+
+        program = argv[0]
+        if _is_dynamic(program):
+            return f"Dynamischer Programmname '{program}' nicht erlaubt"
+
+        name = os.path.basename(program)
+        programs.append(name)
+        args = argv[1:]
+
+        if self.deny_programs and self.deny_programs.match(name):
+            return f"Programm '{name}' ist gesperrt"
+
+        # Wrapper (nohup, timeout, xargs, busybox, ...) führen das folgende Kommando aus
+        if name in WRAPPERS:
+            inner, reason = strip_wrapper_options(name, args)
+            if reason:
+                return reason
+            if name in SHELL_JOIN_WRAPPERS:
+                return self._evaluate(" ".join(inner), programs, depth + 1)
+            return self._check_argv(inner, piped, programs, depth)
+
+        # sh -c '...' (auch -lc, -ec) und eval '...' enthalten ein weiteres Kommando
+        if name == "eval":
+            return self._evaluate(" ".join(args), programs, depth + 1)
+        if name in SHELLS:
+            has_c, reads_stdin, positional = parse_shell_args(args)
+            if has_c:
+                if positional:
+                    reason = self._evaluate(positional[0], programs, depth + 1)
+                    if reason:
+                        return reason
+            elif piped and (reads_stdin or not positional or positional[0] in STDIN_PATHS):
+                return f"Ausführen von Pipe-Eingabe mit '{name}' nicht erlaubt"
+
+        # find -exec rm ... führt Programme aus
+        for exec_flag in ("-exec", "-execdir", "-ok", "-okdir"):
+            if exec_flag in args:
+                reason = self._check_argv(args[args.index(exec_flag) + 1:], False, programs, depth)
+                if reason:
+                    return reason
+
+        if self.mode == "allowlist" and not (self.allow_programs and self.allow_programs.match(name)):
+            return f"Programm '{name}' ist nicht freigegeben"
+
+        if piped and name in self.interpreters and name not in SHELLS:
+            positional = [a for a in args if not a.startswith("-") or a == "-"]
+            if not positional or positional[0] in STDIN_PATHS or "-s" in args:
+                return f"Ausführen von Pipe-Eingabe mit '{name}' nicht erlaubt"
+
+        rules = self.deny_flags.get(name)
+        if rules:
+            # Erst zur Laufzeit expandierte Argumente ($IFS, $(...), Globs) können Flags enthalten
+            for arg in args:
+                if _is_dynamic(arg):
+                    return f"Dynamisches Argument '{arg}' für '{name}' nicht erlaubt"
+            flags = expand_flags(args, self.long_flags.get(name, ()))
+            for rule in rules:
+                if all(any(group.match(flag) for flag in flags) for group in rule):
+                    return f"'{name}' mit diesen Flags ist gesperrt"
+        return None
+
+    def is_command(self, cmd: str) -> bool:
+        """
+        Prüft ob ein String ein Shell-Kommando ist (und nicht nur ein Pfad oder Dateiname)
+
+        Returns:
+            True bei bekanntem Programm bzw. Pipe/Redirect/Verkettung
+        """
+        cmd = cmd.strip()
+        if not cmd:
+            return False
+
+        # Nur Pfad oder nur Dateiname → KEIN Command
+        if " " not in cmd and (cmd.startswith("/") or ("." in cmd and not any(c in cmd for c in "|<>&"))):
+            return False
+
+        try:
+            tokens = tokenize(extract_substitutions(cmd)[0])
+        except CommandParseError:
+            return False
+
+        if any(token in COMMAND_OPERATORS for token in tokens):
+            return True
+
+        commands = split_commands(tokens)
+        if not commands or not commands[0]["argv"]:
+            return False
+
+        argv = commands[0]["argv"]
+        if self.mode == "allowlist":
+            return bool(self.allow_programs and self.allow_programs.match(argv[0]))
+        if argv[0] in KNOWN_COMMANDS and len(argv) > 1:
+            return True
+        return argv[0] in BARE_COMMANDS and len(argv) == 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "cache_entries": len(self._cache),
+                "cache_hits": self._hits,
+                "cache_misses": self._misses,
+            }
+
+
+def create_command_policy(cfg: Optional[Dict[str, Any]] = None) -> CommandPolicy:
+    """
+    Erstellt die Command-Policy aus dem Config-Abschnitt 'shell_policy'
+
+    Fehlende Tabellen fallen auf die eingebauten Defaults zurück.
+    """
+    cfg = cfg or {}
+    policy = CommandPolicy(
+        mode=cfg.get("mode", "denylist"),
+        allow_programs=cfg.get("allow_programs"),
+        deny_programs=cfg.get("deny_programs"),
+        deny_flags=cfg.get("deny_flags"),
+        deny_redirects=cfg.get("deny_redirects"),
+        interpreters=cfg.get("interpreters"),
+        cache_size=cfg.get("cache_size", 1024),
+    )
+    tool_logger.info(f"🛡️ Command-Policy aktiv (Modus: {policy.mode})")
+    return policy
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Domain-Whitelist-Matcher für LocalAgent-Pro
+Fasst allowed_domains (inkl. Subdomains) und die Auto-Whitelist (exakte Domains)
+in Hash-Sets normalisierter Domains zusammen: Prüfung in O(Anzahl Labels),
+unabhängig von der Listengröße, IDNA/Punycode-normalisiert
+"""
+
+import re
+import threading
+from typing import Dict, Any, Iterable, Optional
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+# Label nach IDNA-Kodierung (Unterstrich kommt in der Praxis in Hostnamen vor)
+_LABEL = re.compile(r"^(?!-)[a-z0-9_-]{1,63}(?<!-)$")
+_IPV4 = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+
+
+def _canonical(domain: str) -> Optional[str]:
+    """Kleinschreibung, ohne abschließenden Punkt, Unicode → Punycode (nur wenn nötig)"""
+    domain = domain.strip().rstrip(".").lower()
+    if domain.isascii():
+        return domain or None
+    try:
+        return domain.encode("idna").decode("ascii")
+    except UnicodeError:
+        return None
+
+
+def normalize_domain(domain: str) -> Optional[str]:
+    """
+    Normalisiert und validiert eine Domain für die Whitelist
+
+    'Bücher.Example.COM.' → 'xn--bcher-kva.example.com'
+
+    Returns:
+        Normalisierte Domain oder None, wenn ungültig (z.B. 'example.com"')
+    """
+    if not isinstance(domain, str):
+        return None
+    domain = _canonical(domain)
+    if domain is None:
+        return None
+    if _IPV4.match(domain) or (domain.startswith("[") and domain.endswith("]")):
+        return domain
+    if len(domain) > 253 or not all(_LABEL.match(label) for label in domain.split(".")):
+        return None
+    return domain
+
+
+class DomainMatcher:
+    """
+    Unveränderlicher Schnappschuss der Whitelist
+
+    allowed_domains erlauben die Domain und alle Subdomains, Einträge der
+    Auto-Whitelist nur die exakte Domain. '*' in allowed_domains erlaubt alles.
+    """
+
+    def __init__(self, allowed: Iterable[str] = (), approved: Iterable[str] = ()):
+        """
+        Args:
+            allowed: Domains aus allowed_domains (Subdomains eingeschlossen)
+            approved: Domains der Auto-Whitelist (exakt)
+        """
+        self.wildcard = False
+        suffixes = set()
+        exact = set()
+        self.invalid = []
+
+        for domain in allowed:
+            if domain == "*":
+                self.wildcard = True
+                continue
+            normalized = normalize_domain(domain)
+            if normalized is None:
+                self.invalid.append(domain)
+            else:
+                suffixes.add(normalized)
+
+        for domain in approved:
+            normalized = normalize_domain(domain)
+            if normalized is None:
+                self.invalid.append(domain)
+            else:
+                exact.add(normalized)
+
+        self._suffixes = frozenset(suffixes)
+        self._exact = frozenset(exact)
+
+    def __len__(self) -> int:
+        return len(self._suffixes) + len(self._exact)
+
+    def match(self, domain: str) -> Optional[str]:
+        """
+        Prüft eine Domain
+
+        Returns:
+            'wildcard', 'allowed', 'approved' oder None (nicht erlaubt)
+        """
+        # Ungültige Eingaben können keinen (validierten) Eintrag treffen
+        normalized = _canonical(domain)
+        if normalized is None:
+            return None
+        if normalized in self._suffixes:
+            return "allowed"
+        if normalized in self._exact:
+            return "approved"
+        # Übergeordnete Domains: a.b.example.com → b.example.com → example.com → com
+        dot = normalized.find(".")
+        while dot != -1:
+            if normalized[dot + 1:] in self._suffixes:
+                return "allowed"
+            dot = normalized.find(".", dot + 1)
+        return "wildcard" if self.wildcard else None
+
+    def is_approved(self, domain: str) -> bool:
+        """True, wenn die Domain bereits in der Auto-Whitelist steht"""
+        return _canonical(domain) in self._exact
+
+    def with_approved(self, domain: str) -> "DomainMatcher":
+        """Neuer Schnappschuss mit zusätzlicher Auto-Whitelist-Domain"""
+        matcher = DomainMatcher.__new__(DomainMatcher)
+        matcher.wildcard = self.wildcard
+        matcher.invalid = self.invalid
+        matcher._suffixes = self._suffixes
+        normalized = normalize_domain(domain)
+        matcher._exact = self._exact | {normalized} if normalized else self._exact
+        return matcher
+
+
+class DomainWhitelist:
+    """Hält den aktuellen DomainMatcher; Änderungen ersetzen ihn atomar"""
+
+    def __init__(self, allowed: Iterable[str] = (), approved: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._matcher = DomainMatcher()
+        self.allowed_source: Iterable[str] = ()
+        self.rebuild(allowed, approved)
+
+    @property
+    def matcher(self) -> DomainMatcher:
+        return self._matcher
+
+    def rebuild(self, allowed: Iterable[str], approved: Iterable[str]) -> DomainMatcher:
+        """Baut den Matcher neu auf und tauscht ihn erst danach aus"""
+        matcher = DomainMatcher(allowed, approved)
+        for domain in matcher.invalid:
+            tool_logger.warning(f"⚠️ Ungültiger Whitelist-Eintrag ignoriert: {domain!r}")
+        with self._lock:
+            self._matcher = matcher
+            self.allowed_source = allowed
+        return matcher
+
+    def add(self, domain: str) -> None:
+        """Nimmt eine Domain in die Auto-Whitelist auf (Copy-on-Write)"""
+        with self._lock:
+            self._matcher = self._matcher.with_approved(domain)
+
+    def match(self, domain: str) -> Optional[str]:
+        return self._matcher.match(domain)
+
+    def stats(self) -> Dict[str, Any]:
+        matcher = self._matcher
+        return {
+            "allowed": len(matcher._suffixes),
+            "approved": len(matcher._exact),
+            "wildcard": matcher.wildcard,
+            "invalid": len(matcher.invalid),
+        }
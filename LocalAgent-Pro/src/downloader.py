@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Downloads in die Sandbox für LocalAgent-Pro
+Streamt eine URL blockweise in eine Datei (ohne Pufferung im Speicher), prüft
+Größenlimit und Sandbox-Kontingent und setzt abgebrochene Downloads per HTTP
+Range fort (<ziel>.part + <ziel>.part.json mit Validatoren)
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterator, Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+    from src.http_pool import HttpPool
+except ImportError:
+    from logging_config import get_logging_manager
+    from http_pool import HttpPool
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_REDIRECTS = 5
+
+
+class DownloadError(Exception):
+    """Download abgelehnt oder abgebrochen (Limit, Kontingent, HTTP-Status)"""
+
+
+def directory_usage(root: str) -> int:
+    """Belegter Speicher unter root in Bytes (Hardlinks einmal gezählt)"""
+    total = 0
+    seen = set()
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                st = os.lstat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            if st.st_nlink > 1:
+                if (st.st_dev, st.st_ino) in seen:
+                    continue
+                seen.add((st.st_dev, st.st_ino))
+            total += st.st_size
+    return total
+
+
+class DirectoryUsage:
+    """
+    Zwischengespeicherte Belegung je Verzeichnis: directory_usage() läuft
+    höchstens alle ttl Sekunden, eigene Downloads werden direkt hinzugerechnet
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._cache: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, root: str) -> int:
+        with self._lock:
+            cached = self._cache.get(root)
+            if cached and time.monotonic() - cached[1] < self.ttl:
+                return cached[0]
+        total = directory_usage(root)
+        with self._lock:
+            self._cache[root] = (total, time.monotonic())
+        return total
+
+    def add(self, root: str, delta: int) -> None:
+        with self._lock:
+            if root in self._cache:
+                total, at = self._cache[root]
+                self._cache[root] = (max(total + delta, 0), at)
+
+    def invalidate(self, root: str) -> None:
+        with self._lock:
+            self._cache.pop(root, None)
+
+
+@contextmanager
+def _open_following(
+    pool: HttpPool, url: str, headers: Dict[str, str],
+    url_allowed: Optional[Callable[[str], bool]], max_redirects: int
+) -> Iterator[requests.Response]:
+    """Öffnet url und folgt Weiterleitungen selbst, damit jeder Hop die Domain-Prüfung durchläuft"""
+    for _ in range(max_redirects + 1):
+        with pool.stream("GET", url, headers=headers, allow_redirects=False) as response:
+            if not response.is_redirect:
+                yield response
+                return
+            location = urljoin(url, response.headers["Location"])
+        parsed = urlparse(location)
+        host = (parsed.hostname or "").lower()
+        if parsed.scheme not in ("http", "https"):
+            raise DownloadError(f"Weiterleitung auf nicht unterstütztes Schema: {location}")
+        if url_allowed is not None and not url_allowed(host):
+            raise DownloadError(f"Weiterleitung auf nicht erlaubte Domain: {host}")
+        tool_logger.debug(f"↪️ Weiterleitung: {url} → {location}")
+        url = location
+    raise DownloadError(f"Mehr als {max_redirects} Weiterleitungen")
+
+
+def _content_range(header: Optional[str]) -> tuple:
+    """'bytes 100-199/1000' → (100, 1000); unbekannte Gesamtgröße → (100, None)"""
+    try:
+        _, _, spec = (header or "").partition(" ")
+        span, _, total = spec.partition("/")
+        start = int(span.split("-")[0]) if span != "*" else None
+        return start, (int(total) if total.isdigit() else None)
+    except ValueError:
+        return None, None
+
+
+def _iter_available(response, chunk_size: int):
+    """
+    Liefert empfangene Daten sofort (read1), damit bei einem Abbruch alles
+    bereits Empfangene in der Teildatei landet
+    """
+    raw = response.raw
+    if not hasattr(raw, "read1"):
+        yield from response.iter_content(chunk_size=chunk_size)
+        return
+    try:
+        while True:
+            chunk = raw.read1(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+
+
+def _read_meta(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remove(*paths: str) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def download_to_file(
+    pool: HttpPool,
+    url: str,
+    dest: str,
+    max_bytes: int,
+    available_bytes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    resume: bool = True,
+    url_allowed: Optional[Callable[[str], bool]] = None,
+    max_redirects: int = DEFAULT_MAX_REDIRECTS
+) -> Dict[str, Any]:
+    """
+    Lädt eine URL gestreamt nach dest
+
+    Args:
+        pool: HTTP-Pool für die Verbindung
+        url: Ziel-URL
+        dest: Zieldatei (wird erst nach vollständigem Download ersetzt)
+        max_bytes: Max. Dateigröße
+        available_bytes: Freies Sandbox-Kontingent (None = unbegrenzt)
+        chunk_size: Blockgröße beim Schreiben
+        resume: Vorhandenes <dest>.part per Range fortsetzen
+        url_allowed: Prüft den Host jeder Weiterleitung (None = alle erlaubt)
+        max_redirects: Max. Anzahl gefolgter Weiterleitungen
+
+    Returns:
+        Dict mit path, bytes_written, size, resumed_from, elapsed, bytes_per_second,
+        status_code, content_type und verified (False = Server nannte keine Länge,
+        ein Verbindungsabbruch ist vom regulären Ende nicht zu unterscheiden)
+
+    Raises:
+        DownloadError: Größenlimit/Kontingent überschritten, HTTP-Fehler oder unzulässige Weiterleitung
+        requests.exceptions.RequestException: Netzwerkfehler (Teildownload bleibt zum Fortsetzen erhalten)
+    """
+    part_path = f"{dest}.part"
+    meta_path = f"{part_path}.json"
+    started = time.monotonic()
+
+    offset = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+    meta = _read_meta(meta_path) if offset else {}
+    if offset and meta.get("url") != url:
+        offset, meta = 0, {}
+
+    # Byte-genaue Offsets nur ohne Transfer-Kompression
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        validator = meta.get("etag") or meta.get("last_modified")
+        if validator:
+            headers["If-Range"] = validator  # Datei geändert → Server liefert alles neu (200)
+
+    with _open_following(pool, url, headers, url_allowed, max_redirects) as response:
+        if response.status_code == 416 and offset:
+            # Teildatei bereits vollständig (oder ungültig): Gesamtgröße prüfen
+            _, total = _content_range(response.headers.get("Content-Range"))
+            if total != offset:
+                _remove(part_path, meta_path)
+                raise DownloadError("Fortsetzen nicht möglich (HTTP 416), Teildownload verworfen")
+            size, status_code, content_type = offset, 416, meta.get("content_type", "")
+            written = 0
+            verified = True
+        else:
+            if response.status_code >= 400:
+                raise DownloadError(f"HTTP {response.status_code}")
+
+            if response.status_code == 206:
+                start, total = _content_range(response.headers.get("Content-Range"))
+                if start != offset:
+                    raise DownloadError(f"Server lieferte Bereich ab {start} statt {offset}")
+            else:
+                # 200: Server ignoriert Range oder Datei wurde geändert → von vorn
+                offset = 0
+                length = response.headers.get("Content-Length", "")
+                total = int(length) if length.isdigit() else None
+
+            limit = max_bytes
+            if available_bytes is not None:
+                limit = min(limit, offset + available_bytes)
+            if total is not None and total > limit:
+                reason = "Größenlimit" if total > max_bytes else "Sandbox-Kontingent"
+                raise DownloadError(f"{reason} überschritten: {total} Bytes > {limit} Bytes")
+
+            content_type = response.headers.get("Content-Type", "")
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "content_type": content_type,
+                }, f)
+
+            written = 0
+            with open(part_path, "ab" if offset else "wb") as f:
+                for chunk in _iter_available(response, chunk_size):
+                    if not chunk:
+                        continue
+                    if offset + written + len(chunk) > limit:
+                        f.close()
+                        _remove(part_path, meta_path)
+                        reason = "Größenlimit" if offset + written + len(chunk) > max_bytes else "Sandbox-Kontingent"
+                        raise DownloadError(f"{reason} überschritten nach {offset + written} Bytes (Limit {limit})")
+                    f.write(chunk)
+                    written += len(chunk)
+
+            size = offset + written
+            if total is not None and size < total:
+                raise requests.exceptions.ConnectionError(f"Verbindung nach {size}/{total} Bytes beendet")
+            # Chunked-Encoding endet mit eigenem Abschluss-Chunk (Abbruch → ChunkedEncodingError)
+            verified = total is not None or "chunked" in response.headers.get("Transfer-Encoding", "").lower()
+            if not verified:
+                tool_logger.warning(f"⚠️ Download ohne Längenangabe: {url} ({size} Bytes, Vollständigkeit nicht prüfbar)")
+            status_code = response.status_code
+
+    os.replace(part_path, dest)
+    _remove(meta_path)
+
+    elapsed = time.monotonic() - started
+    return {
+        "path": dest,
+        "bytes_written": written,
+        "size": size,
+        "resumed_from": offset,
+        "elapsed": elapsed,
+        "bytes_per_second": written / elapsed if elapsed > 0 else 0.0,
+        "status_code": status_code,
+        "content_type": content_type,
+        "verified": verified,
+    }
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Embeddings für LocalAgent-Pro
+Gleichzeitige Anfragen, die innerhalb weniger Millisekunden eintreffen, werden
+zu einem Ollama-Aufruf (/api/embed) gebündelt. Bereits berechnete Texte kommen
+aus einem Cache (LRU im Speicher, optional auf Platte), Schlüssel ist der Hash
+aus Modell und Text.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+ollama_logger = logging_manager.create_ollama_logger()
+
+
+class EmbeddingError(Exception):
+    """Ollama konnte die Embeddings nicht berechnen"""
+
+
+def embedding_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU-Cache für Vektoren; mit disk_dir zusätzlich als float32-Dateien auf Platte"""
+
+    def __init__(self, max_entries: int = 10000, disk_dir: Optional[str] = None):
+        """
+        Args:
+            max_entries: Max. Vektoren im Speicher
+            disk_dir: Verzeichnis für den Platten-Cache (None = nur Speicher)
+        """
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.f32")
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        """Erwartet _lock"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._stats["hits"] += 1
+                return vector
+        if self.disk_dir:
+            try:
+                values = array("f")
+                with open(self._disk_path(key), "rb") as f:
+                    values.frombytes(f.read())
+                vector = values.tolist()
+            except (OSError, ValueError):
+                vector = None
+            if vector:
+                with self._lock:
+                    self._remember(key, vector)
+                    self._stats["disk_hits"] += 1
+                return vector
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._remember(key, vector)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+                with open(tmp, "wb") as f:
+                    f.write(array("f", vector).tobytes())
+                os.replace(tmp, path)
+            except OSError as e:
+                ollama_logger.warning(f"⚠️ Embedding-Cache nicht geschrieben: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._memory)}
+
+
+class EmbeddingBatcher:
+    """
+    Bündelt gleichzeitige Anfragen pro Modell zu einem Upstream-Aufruf
+
+    Der erste Text eines Modells startet ein Zeitfenster von max_wait Sekunden;
+    was bis dahin (oder bis max_batch Texte) eintrifft, geht in einen Aufruf.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str], str], Optional[List[List[float]]]],
+        max_batch: int = 64,
+        max_wait: float = 0.005,
+        on_batch: Optional[Callable[[str, int, float], None]] = None
+    ):
+        """
+        Args:
+            embed_fn: embed_fn(texts, model) → Vektoren oder None (z.B. OllamaClient.embed)
+            max_batch: Max. Texte pro Upstream-Aufruf
+            max_wait: Wartezeit auf weitere Anfragen nach dem ersten Text (Sekunden)
+            on_batch: Callback (model, batch_size, duration) für Metriken
+        """
+        self.embed_fn = embed_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.on_batch = on_batch
+        self._cond = threading.Condition()
+        self._pending: "OrderedDict[str, List[Tuple[str, Future]]]" = OrderedDict()
+        self._first_at: Dict[str, float] = {}
+        self._stats = {"batches": 0, "texts": 0}
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, texts: List[str], model: str) -> List[Future]:
+        """Reiht Texte ein; jedes Future liefert den Vektor (oder EmbeddingError)"""
+        futures = []
+        with self._cond:
+            queue = self._pending.setdefault(model, [])
+            if not queue:
+                self._first_at[model] = time.monotonic()
+            for text in texts:
+                future: Future = Future()
+                queue.append((text, future))
+                futures.append(future)
+            self._cond.notify()
+        return futures
+
+    def embed(self, texts: List[str], model: str, timeout: Optional[float] = None) -> List[List[float]]:
+        """Blockierend: Vektoren in Reihenfolge der Texte"""
+        return [future.result(timeout) for future in self.submit(texts, model)]
+
+    def _next_batch(self) -> Tuple[str, List[Tuple[str, Future]]]:
+        """Wartet, bis ein Modell voll ist oder sein Zeitfenster abgelaufen ist"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = None
+                for model, queue in self._pending.items():
+                    due = self._first_at[model] + self.max_wait
+                    if len(queue) >= self.max_batch or now >= due:
+                        batch, rest = queue[:self.max_batch], queue[self.max_batch:]
+                        if rest:
+                            self._pending[model] = rest
+                            self._first_at[model] = now
+                        else:
+                            del self._pending[model]
+                            del self._first_at[model]
+                        return model, batch
+                    wait = due - now if wait is None else min(wait, due - now)
+                self._cond.wait(wait)
+
+    def _run(self) -> None:
+        while True:
+            model, batch = self._next_batch()
+            try:
+                self._process(model, batch)
+            except Exception as e:
+                # Worker darf nicht sterben, sonst warten alle folgenden Aufrufer bis zum Timeout
+                ollama_logger.error(f"❌ Embedding-Bündel nicht verarbeitet: {e}", exc_info=True)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(EmbeddingError(f"Embedding-Bündel fehlgeschlagen ({model}): {e}"))
+
+    def _process(self, model: str, batch: List[Tuple[str, Future]]) -> None:
+        # Identische Texte im Bündel nur einmal senden
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        started = time.monotonic()
+        try:
+            vectors = self.embed_fn(unique, model)
+        except Exception as e:
+            ollama_logger.error(f"❌ Embedding-Bündel fehlgeschlagen: {e}", exc_info=True)
+            vectors = None
+        duration = time.monotonic() - started
+
+        with self._cond:
+            self._stats["batches"] += 1
+            self._stats["texts"] += len(unique)
+        if self.on_batch:
+            self.on_batch(model, len(unique), duration)
+
+        if vectors is None:
+            error = EmbeddingError(f"Ollama lieferte keine Embeddings ({model})")
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        if len(vectors) != len(unique):
+            raise EmbeddingError(f"{len(vectors)} statt {len(unique)} Embeddings erhalten")
+        by_text = dict(zip(unique, vectors))
+        for text, future in batch:
+            future.set_result(by_text[text])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {**self._stats, "pending": sum(len(q) for q in self._pending.values())}
+
+
+class EmbeddingService:
+    """Cache vor dem Batcher: nur unbekannte Texte gehen an Ollama"""
+
+    def __init__(self, batcher: EmbeddingBatcher, cache: Optional[EmbeddingCache] = None, timeout: float = 120.0):
+        self.batcher = batcher
+        self.cache = cache
+        self.timeout = timeout
+
+    def embed(self, texts: List[str], model: str) -> Tuple[List[List[float]], int]:
+        """
+        Liefert je Text einen Vektor
+
+        Returns:
+            (Vektoren in Eingabereihenfolge, Anzahl Treffer aus dem Cache)
+
+        Raises:
+            EmbeddingError: Ollama-Aufruf fehlgeschlagen
+        """
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        keys = [embedding_key(model, text) for text in texts]
+        missing: Dict[str, List[int]] = OrderedDict()
+        for index, (text, key) in enumerate(zip(texts, keys)):
+            cached = self.cache.get(key) if self.cache else None
+            if cached is not None:
+                vectors[index] = cached
+            else:
+                missing.setdefault(text, []).append(index)
+
+        if missing:
+            computed = self.batcher.embed(list(missing), model, timeout=self.timeout)
+            for (text, indices), vector in zip(missing.items(), computed):
+                if self.cache:
+                    self.cache.put(keys[indices[0]], vector)
+                for index in indices:
+                    vectors[index] = vector
+
+        cached_count = len(texts) - sum(len(indices) for indices in missing.values())
+        return vectors, cached_count
+
+    def stats(self) -> Dict[str, Any]:
+        return {"batcher": self.batcher.stats(), "cache": self.cache.stats() if self.cache else None}
+
+
+def create_embedding_service(
+    embed_fn: Callable[[List[str], str], Optional[List[List[float]]]],
+    cache_dir: str,
+    cfg: Optional[Dict[str, Any]] = None,
+    on_batch: Optional[Callable[[str, int, float], None]] = None
+) -> EmbeddingService:
+    """Erstellt den Dienst aus dem Config-Abschnitt 'embeddings'"""
+    cfg = cfg or {}
+    batcher = EmbeddingBatcher(
+        embed_fn,
+        max_batch=cfg.get("max_batch", 64),
+        max_wait=cfg.get("max_wait_ms", 5) / 1000.0,
+        on_batch=on_batch,
+    )
+    cache = None
+    if cfg.get("cache_entries", 10000) > 0:
+        cache = EmbeddingCache(cfg.get("cache_entries", 10000), cache_dir if cfg.get("disk_cache", False) else None)
+    return EmbeddingService(batcher, cache, timeout=cfg.get("timeout_seconds", 120.0))
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Inhaltsextraktion für fetch in LocalAgent-Pro
+Wandelt HTML inkrementell in lesbaren Text/Markdown um (ohne Skripte, Styles,
+Navigation und andere Boilerplate), formatiert JSON und normalisiert Klartext,
+damit das Zeichenbudget mit eigentlichem Inhalt gefüllt wird
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+from typing import Dict, Any, List, Optional
+from urllib.parse import urljoin
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+# Inhalt dieser Elemente wird komplett verworfen
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object",
+    "nav", "aside", "form", "button", "select", "dialog",
+}
+# Seitenkopf/-fuß: nur außerhalb von <main>/<article> Boilerplate (dort z.B. Titel, Autor)
+CHROME_TAGS = {"header", "footer"}
+CHROME_ROLES = {"banner", "contentinfo"}
+# Elemente ohne End-Tag
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "blockquote", "figure", "figcaption",
+    "ul", "ol", "dl", "dt", "dd", "table", "tr", "details", "summary", "address", "body",
+}
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+# Hauptinhalt: wenn vorhanden, wird nur dieser Bereich ausgegeben
+MAIN_TAGS = {"main", "article"}
+# Unter dieser Länge gilt <main>/<article> als zu dünn (z.B. Teaser)
+MIN_MAIN_CHARS = 200
+
+FEED_CHUNK = 16 * 1024
+
+_WHITESPACE = re.compile(r"\s+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_TRAILING_SPACE = re.compile(r"[ \t]+\n")
+
+
+class HtmlExtractor(HTMLParser):
+    """
+    Inkrementeller HTML→Markdown-Konverter (feed() blockweise, dann close())
+
+    Überschriften werden zu '#', Links zu [Text](URL), Listen zu '- '.
+    Liegt <main>/<article> vor, wird nur dieser Bereich ausgegeben.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, max_chars: Optional[int] = None, markdown: bool = True):
+        """
+        Args:
+            base_url: Basis für relative Links
+            max_chars: Zeichenbudget; ist es mit Hauptinhalt gefüllt, gilt der Parser als fertig
+            markdown: False = reiner Text (ohne '#' und Link-URLs)
+        """
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.max_chars = max_chars
+        self.markdown = markdown
+        self.title = ""
+        self._in_title = False
+        # Offene Elemente; _skip_at = Index des verworfenen Elements im Stack
+        self._stack: List[str] = []
+        self._skip_at: Optional[int] = None
+        self._pre_depth = 0
+        self._main_depth = 0
+        self._link: Optional[Dict[str, Any]] = None
+        self._all: List[str] = []
+        self._all_len = 0
+        self._main: List[str] = []
+        self._main_len = 0
+
+    @property
+    def done(self) -> bool:
+        """True, sobald das Budget mit Hauptinhalt gefüllt ist (weiteres Parsen unnötig)"""
+        return self.max_chars is not None and self._main_len >= self.max_chars
+
+    def _emit(self, text: str) -> None:
+        if self._link is not None:
+            self._link["text"].append(text)
+            return
+        if self.max_chars is None or self._all_len < self.max_chars:
+            self._all.append(text)
+            self._all_len += len(text)
+        if self._main_depth and (self.max_chars is None or self._main_len < self.max_chars):
+            self._main.append(text)
+            self._main_len += len(text)
+
+    def _break(self, newlines: str = "\n\n") -> None:
+        self._emit(newlines)
+
+    def _skipped(self, tag: str, attrs: Dict[str, Any]) -> bool:
+        role = attrs.get("role")
+        if tag in SKIP_TAGS or "hidden" in attrs or attrs.get("aria-hidden") == "true" or role == "navigation":
+            return True
+        return not self._main_depth and (tag in CHROME_TAGS or role in CHROME_ROLES)
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_TAGS:
+            self._stack.append(tag)
+        if self._skip_at is not None:
+            return
+        attrs = dict(attrs)
+        if tag not in VOID_TAGS and self._skipped(tag, attrs):
+            self._skip_at = len(self._stack) - 1
+            return
+
+        if tag == "title":
+            self._in_title = True
+        elif tag in MAIN_TAGS:
+            self._main_depth += 1
+            self._break()
+        elif tag in HEADING_TAGS:
+            self._break()
+            if self.markdown:
+                self._emit("#" * HEADING_TAGS[tag] + " ")
+        elif tag == "li":
+            self._break("\n")
+            self._emit("- ")
+        elif tag in ("td", "th"):
+            self._emit("| " if not self._all or self._all[-1].endswith("\n") else " | ")
+        elif tag == "br":
+            self._break("\n")
+        elif tag == "hr":
+            self._break()
+        elif tag == "pre":
+            self._pre_depth += 1
+            self._break()
+            if self.markdown:
+                self._emit("```\n")
+        elif tag == "code" and not self._pre_depth and self.markdown:
+            self._emit("`")
+        elif tag == "a" and attrs.get("href") and self._link is None:
+            self._link = {"href": attrs["href"], "text": []}
+        elif tag in BLOCK_TAGS:
+            self._break()
+
+    def handle_endtag(self, tag):
+        # End-Tag schließt auch alle darin noch offenen Elemente
+        index = next((i for i in range(len(self._stack) - 1, -1, -1) if self._stack[i] == tag), None)
+        if index is not None:
+            del self._stack[index:]
+        if self._skip_at is not None:
+            if index is None or index > self._skip_at:
+                return
+            # Nicht geschlossenes verworfenes Element (z.B. loses <nav>) endet mit seinem Elternelement
+            parent_closed = index < self._skip_at
+            self._skip_at = None
+            if not parent_closed:
+                return
+
+        if tag == "title":
+            self._in_title = False
+        elif tag in MAIN_TAGS and self._main_depth:
+            self._break()
+            self._main_depth -= 1
+        elif tag in HEADING_TAGS or tag in BLOCK_TAGS:
+            self._break()
+        elif tag == "pre" and self._pre_depth:
+            if self.markdown:
+                self._emit("\n```")
+            self._break()
+            self._pre_depth -= 1
+        elif tag == "code" and not self._pre_depth and self.markdown:
+            self._emit("`")
+        elif tag == "a" and self._link is not None:
+            link, self._link = self._link, None
+            text = _WHITESPACE.sub(" ", "".join(link["text"])).strip()
+            href = link["href"]
+            if not text:
+                return
+            if self.markdown and not href.startswith(("#", "javascript:")):
+                self._emit(f"[{text}]({urljoin(self.base_url or '', href)})")
+            else:
+                self._emit(text)
+
+    def handle_data(self, data):
+        if self._skip_at is not None:
+            return
+        if self._in_title:
+            self.title += data
+            return
+        if not self._pre_depth:
+            data = _WHITESPACE.sub(" ", data)
+            # Einrückung zwischen Tags und am Zeilenanfang entfällt
+            last = self._link["text"] if self._link is not None else self._all
+            if not last or last[-1].endswith((" ", "\n")):
+                data = data.lstrip(" ")
+        if data:
+            self._emit(data)
+
+    def result(self) -> Dict[str, Any]:
+        """Liefert {'text', 'title', 'main', 'truncated'} (nach close())"""
+        use_main = self._main_len >= min(MIN_MAIN_CHARS, self.max_chars or MIN_MAIN_CHARS)
+        parts, length = (self._main, self._main_len) if use_main else (self._all, self._all_len)
+        text = "".join(parts)
+        text = _BLANK_LINES.sub("\n\n", _TRAILING_SPACE.sub("\n", text)).strip()
+        truncated = self.max_chars is not None and (length >= self.max_chars or len(text) > self.max_chars)
+        if self.max_chars is not None:
+            text = text[:self.max_chars]
+        return {
+            "text": text,
+            "title": _WHITESPACE.sub(" ", self.title).strip(),
+            "main": use_main,
+            "truncated": truncated,
+        }
+
+
+def looks_like_html(text: str) -> bool:
+    head = text[:1024].lstrip().lower()
+    return head.startswith(("<!doctype html", "<html")) or "<body" in head
+
+
+def extract_html(text: str, base_url: Optional[str] = None, max_chars: Optional[int] = None, markdown: bool = True) -> Dict[str, Any]:
+    """
+    Extrahiert lesbaren Inhalt aus HTML; bricht ab, sobald das Budget voll ist
+
+    Returns:
+        Dict mit text, title, main (Hauptinhalt erkannt) und truncated
+    """
+    parser = HtmlExtractor(base_url=base_url, max_chars=max_chars, markdown=markdown)
+    for start in range(0, len(text), FEED_CHUNK):
+        parser.feed(text[start:start + FEED_CHUNK])
+        if parser.done:
+            break
+    parser.close()
+    return parser.result()
+
+
+def extract_json(text: str, max_chars: Optional[int] = None) -> Dict[str, Any]:
+    """Formatiert JSON lesbar; passt es eingerückt nicht ins Budget, kompakt"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        # Abgeschnittenes/ungültiges JSON unverändert weitergeben
+        return extract_text(text, max_chars)
+    formatted = json.dumps(data, indent=2, ensure_ascii=False)
+    if max_chars is not None and len(formatted) > max_chars:
+        formatted = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    truncated = max_chars is not None and len(formatted) > max_chars
+    return {"text": formatted[:max_chars] if max_chars else formatted, "title": "", "truncated": truncated}
+
+
+def extract_text(text: str, max_chars: Optional[int] = None) -> Dict[str, Any]:
+    """Normalisiert Zeilenenden, entfernt Leerzeichen am Zeilenende und leere Zeilenblöcke"""
+    text = _BLANK_LINES.sub("\n\n", _TRAILING_SPACE.sub("\n", text.replace("\r\n", "\n").replace("\r", "\n"))).strip()
+    truncated = max_chars is not None and len(text) > max_chars
+    return {"text": text[:max_chars] if max_chars else text, "title": "", "truncated": truncated}
+
+
+def extract_content(
+    text: str,
+    content_type: str,
+    base_url: Optional[str] = None,
+    max_chars: Optional[int] = None,
+    mode: str = "markdown"
+) -> Dict[str, Any]:
+    """
+    Wählt die Extraktion passend zum Content-Type
+
+    Args:
+        text: Dekodierter Body
+        content_type: Content-Type ohne Parameter (z.B. 'text/html')
+        base_url: Basis für relative Links
+        max_chars: Zeichenbudget der Ausgabe
+        mode: 'markdown', 'text' (HTML ohne Markdown-Syntax) oder 'raw' (unverändert)
+
+    Returns:
+        Dict mit text, title, truncated und format ('markdown' | 'text' | 'json' | 'raw')
+    """
+    if mode == "raw":
+        truncated = max_chars is not None and len(text) > max_chars
+        return {"text": text[:max_chars] if max_chars else text, "title": "", "truncated": truncated, "format": "raw"}
+
+    if content_type in ("text/html", "application/xhtml+xml") or (
+        content_type in ("", "text/plain", "application/octet-stream") and looks_like_html(text)
+    ):
+        result = extract_html(text, base_url, max_chars, markdown=(mode == "markdown"))
+        result["format"] = mode
+    elif content_type == "application/json" or content_type.endswith("+json"):
+        result = extract_json(text, max_chars)
+        result["format"] = "json"
+    else:
+        result = extract_text(text, max_chars)
+        result["format"] = "text"
+
+    tool_logger.debug(f"📄 Extraktion ({result['format']}): {len(text)} → {len(result['text'])} Zeichen")
+    return result
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Persistenter HTTP-Cache für fetch in LocalAgent-Pro
+Speichert Antworten pro URL, beachtet Cache-Control/Expires, revalidiert mit
+If-None-Match/If-Modified-Since und begrenzt die Größe per LRU-Verdrängung
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+# Header, die mit dem Eintrag gespeichert werden
+STORED_HEADERS = ("etag", "last-modified", "cache-control", "expires", "date", "age", "content-type", "vary")
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """'max-age=60, no-cache' → {'max-age': '60', 'no-cache': None}"""
+    directives = {}
+    for part in (value or "").split(","):
+        key, _, arg = part.strip().partition("=")
+        if key:
+            directives[key.lower()] = arg.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def freshness_lifetime(headers: Dict[str, str], now: float, heuristic_max: float) -> float:
+    """
+    Frische-Dauer in Sekunden nach RFC 9111 (max-age vor Expires, sonst Heuristik
+    10% seit Last-Modified, begrenzt auf heuristic_max)
+    """
+    directives = parse_cache_control(headers.get("cache-control"))
+    if "no-cache" in directives:
+        return 0.0
+    if directives.get("max-age", "").isdigit():
+        return float(directives["max-age"])
+
+    date = _http_date(headers.get("date")) or now
+    expires = _http_date(headers.get("expires"))
+    if headers.get("expires") is not None:
+        # Ungültiges Expires (z.B. "0") bedeutet: bereits abgelaufen
+        return max(expires - date, 0.0) if expires is not None else 0.0
+
+    last_modified = _http_date(headers.get("last-modified"))
+    if last_modified is not None:
+        return min(max(date - last_modified, 0.0) * 0.1, heuristic_max)
+    return 0.0
+
+
+def is_storable(status_code: int, headers: Dict[str, str]) -> bool:
+    directives = parse_cache_control(headers.get("cache-control"))
+    vary = headers.get("vary", "").lower().replace(" ", "")
+    return status_code == 200 and "no-store" not in directives and vary in ("", "accept-encoding")
+
+
+class HttpCache:
+    """URL-basierter Cache auf der Platte mit LRU-Größenbegrenzung"""
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 100 * 1024 * 1024,
+        stale_if_error: bool = True,
+        heuristic_max: float = 86400.0
+    ):
+        """
+        Initialisiert den Cache
+
+        Args:
+            root: Verzeichnis für Einträge (<sha256>.json + <sha256>.body)
+            max_bytes: Max. Gesamtgröße der Bodies, danach LRU-Verdrängung
+            stale_if_error: Abgelaufene Einträge bei Netzwerk-/Serverfehlern ausliefern
+            heuristic_max: Obergrenze für heuristische Frische (Sekunden)
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.stale_if_error = stale_if_error
+        self.heuristic_max = heuristic_max
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key → Body-Größe, LRU-Reihenfolge
+        self._total_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "stale": 0, "stores": 0, "evictions": 0, "bytes_saved": 0}
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        return os.path.join(self.root, f"{key}.json"), os.path.join(self.root, f"{key}.body")
+
+    def _load_index(self) -> None:
+        """Baut den LRU-Index aus den Metadateien auf (Reihenfolge nach mtime)"""
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.root, name)
+            body_path = meta_path[:-5] + ".body"
+            try:
+                entries.append((os.path.getmtime(meta_path), name[:-5], os.path.getsize(body_path)))
+            except OSError:
+                continue
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        tmp = f"{path}.tmp.{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Liefert den gespeicherten Eintrag (Metadaten + result) oder None
+
+        Der Eintrag enthält 'fresh' (ohne Revalidierung nutzbar) und 'validators'
+        (Header für einen Conditional Request).
+        """
+        key = self.key(url)
+        with self._lock:
+            if key not in self._index:
+                return None
+            meta_path, body_path = self._paths(key)
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                with open(body_path, "r", encoding="utf-8") as f:
+                    meta["result"]["text"] = f.read()
+            except (OSError, ValueError):
+                self._drop(key)
+                return None
+            self._index.move_to_end(key)
+            try:
+                os.utime(meta_path)  # LRU-Reihenfolge über Neustarts erhalten
+            except OSError:
+                pass
+
+        now = time.time()
+        meta["fresh"] = now < meta["expires_at"]
+        validators = {}
+        if meta["headers"].get("etag"):
+            validators["If-None-Match"] = meta["headers"]["etag"]
+        if meta["headers"].get("last-modified"):
+            validators["If-Modified-Since"] = meta["headers"]["last-modified"]
+        meta["validators"] = validators
+        return meta
+
+    def _expires_at(self, headers: Dict[str, str], now: float) -> float:
+        age = headers.get("age", "")
+        age = float(age) if age.isdigit() else 0.0
+        return now + freshness_lifetime(headers, now, self.heuristic_max) - age
+
+    def store(self, url: str, response_headers, result: Dict[str, Any], max_bytes: int) -> bool:
+        """
+        Speichert ein fetch-Ergebnis, sofern die Antwort cachebar ist
+
+        Args:
+            url: Angefragte URL
+            response_headers: Header der Antwort
+            result: Ergebnis von fetch_url (text wird separat als Body gespeichert)
+            max_bytes: Byte-Limit, mit dem das Ergebnis gelesen wurde
+
+        Returns:
+            True wenn gespeichert
+        """
+        headers = {name: response_headers[name] for name in STORED_HEADERS if name in response_headers}
+        if not is_storable(result["status_code"], headers):
+            return False
+
+        now = time.time()
+        body = result["text"].encode("utf-8")
+        meta = {
+            "url": url,
+            "stored_at": now,
+            "expires_at": self._expires_at(headers, now),
+            "max_bytes": max_bytes,
+            "headers": headers,
+            "result": {k: v for k, v in result.items() if k not in ("text", "elapsed", "cache")},
+        }
+        if len(body) > self.max_bytes:
+            return False
+
+        key = self.key(url)
+        meta_path, body_path = self._paths(key)
+        with self._lock:
+            self._write_atomic(body_path, body)
+            self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+            self._total_bytes += len(body) - self._index.get(key, 0)
+            self._index[key] = len(body)
+            self._index.move_to_end(key)
+            self._stats["stores"] += 1
+            self._evict()
+        return True
+
+    def revalidated(self, url: str, response_headers) -> None:
+        """Aktualisiert Frische und Validatoren nach 304 Not Modified"""
+        key = self.key(url)
+        meta_path, _ = self._paths(key)
+        with self._lock:
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return
+            for name in STORED_HEADERS:
+                if name in response_headers:
+                    meta["headers"][name] = response_headers[name]
+            now = time.time()
+            meta["expires_at"] = self._expires_at(meta["headers"], now)
+            self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def record(self, outcome: str, bytes_saved: int = 0) -> None:
+        """Zählt hit/miss/revalidated/stale für die Statistik"""
+        with self._lock:
+            key = {"hit": "hits", "miss": "misses"}.get(outcome, outcome)
+            self._stats[key] += 1
+            self._stats["bytes_saved"] += bytes_saved
+
+    def _drop(self, key: str) -> None:
+        size = self._index.pop(key, 0)
+        self._total_bytes -= size
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        """Verdrängt die am längsten nicht genutzten Einträge über max_bytes hinaus"""
+        while self._total_bytes > self.max_bytes and self._index:
+            key = next(iter(self._index))
+            self._drop(key)
+            self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._index), "total_bytes": self._total_bytes}
+
+
+def create_http_cache(root: str, cfg: Optional[Dict[str, Any]] = None) -> Optional[HttpCache]:
+    """
+    Erstellt den HTTP-Cache aus dem Config-Abschnitt 'http_cache'
+
+    Returns:
+        HttpCache oder None, wenn deaktiviert
+    """
+    cfg = cfg or {}
+    if not cfg.get("enabled", True):
+        return None
+
+    cache = HttpCache(
+        root,
+        max_bytes=int(cfg.get("max_mb", 100) * 1024 * 1024),
+        stale_if_error=cfg.get("stale_if_error", True),
+        heuristic_max=cfg.get("heuristic_max_seconds", 86400),
+    )
+    tool_logger.info(f"🗄️ HTTP-Cache aktiv: {root} ({cache.stats()['entries']} Einträge)")
+    return cache
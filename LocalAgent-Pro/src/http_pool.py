@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Gemeinsamer HTTP-Verbindungspool für LocalAgent-Pro
+Keep-Alive-Verbindungen, getrennte Connect/Read-Timeouts, Limit pro Host und
+Circuit Breaker pro Domain (schnelles Fehlschlagen bei wiederholten Timeouts)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterator, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+DEFAULT_USER_AGENT = "LocalAgent-Pro/1.0"
+
+# Ab dieser Anzahl Hosts werden unbenutzte Slots und geschlossene Breaker verworfen
+MAX_TRACKED_HOSTS = 1024
+
+# Fehler, die dem Host angelastet werden (auch beim Lesen des Bodies)
+HOST_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Host ist nach wiederholten Fehlern vorübergehend gesperrt"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} vorübergehend gesperrt (wiederholte Fehler), neuer Versuch in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class HostBusyError(requests.exceptions.ConnectionError):
+    """Alle Verbindungen zu einem Host sind belegt"""
+
+
+class CircuitBreaker:
+    """
+    Circuit Breaker pro Host: closed → open (nach failure_threshold Fehlern in Folge)
+    → half_open (nach reset_timeout ein Testaufruf) → closed bei Erfolg
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def allow(self) -> bool:
+        """True, wenn ein Aufruf durchgelassen wird (half_open: nur ein Testaufruf)"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release(self) -> None:
+        """Gibt einen Testaufruf frei, ohne Erfolg oder Fehler zu werten (z.B. Abbruch)"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> bool:
+        """Zählt einen Fehler; liefert True, wenn der Breaker dadurch (erneut) öffnet"""
+        with self._lock:
+            self.failures += 1
+            trial_failed = self._trial_running
+            self._trial_running = False
+            if trial_failed or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class HttpPool:
+    """Thread-sicherer HTTP-Pool: ein Adapter (urllib3-Pools) für alle Threads"""
+
+    def __init__(
+        self,
+        max_per_host: int = 4,
+        max_hosts: int = 32,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 15.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 60.0,
+        user_agent: str = DEFAULT_USER_AGENT,
+        on_request: Optional[Callable[[str, str, float], None]] = None
+    ):
+        """
+        Initialisiert den Pool
+
+        Args:
+            max_per_host: Max. gleichzeitige Verbindungen pro Host
+            max_hosts: Anzahl Hosts, deren Verbindungen offen gehalten werden
+            connect_timeout: Timeout für den Verbindungsaufbau (Sekunden)
+            read_timeout: Timeout zwischen zwei empfangenen Bytes (Sekunden)
+            failure_threshold: Fehler in Folge, nach denen ein Host gesperrt wird
+            reset_timeout: Sperrdauer, danach ein Testaufruf (Sekunden)
+            user_agent: Standard-User-Agent
+            on_request: Callback (host, status, dauer) nach jedem Request (z.B. für Metriken)
+        """
+        self.max_per_host = max_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.user_agent = user_agent
+        self.on_request = on_request
+
+        # Ein Adapter = ein urllib3-PoolManager; Sessions pro Thread teilen ihn,
+        # damit Cookies/Header nicht zwischen Threads geteilt werden
+        self._adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max_per_host)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_users: Dict[str, int] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._inflight = 0
+        self._requests = 0
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = self.user_agent
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._local.session = session
+        return session
+
+    def _acquire_slot(self, host: str) -> Optional[threading.BoundedSemaphore]:
+        """Reserviert einen Verbindungsplatz für host (None bei Timeout)"""
+        with self._lock:
+            if host not in self._host_slots and len(self._host_slots) >= MAX_TRACKED_HOSTS:
+                for idle in [h for h, users in self._host_users.items() if users == 0]:
+                    del self._host_slots[idle], self._host_users[idle]
+            slot = self._host_slots.setdefault(host, threading.BoundedSemaphore(self.max_per_host))
+            self._host_users[host] = self._host_users.get(host, 0) + 1
+
+        if slot.acquire(timeout=self.connect_timeout):
+            return slot
+        self._release_slot(host, None)
+        return None
+
+    def _release_slot(self, host: str, slot: Optional[threading.BoundedSemaphore]) -> None:
+        if slot is not None:
+            slot.release()
+        with self._lock:
+            self._host_users[host] -= 1
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                if len(self._breakers) >= MAX_TRACKED_HOSTS:
+                    for closed in [h for h, b in self._breakers.items() if b.opened_at is None and b.failures == 0]:
+                        del self._breakers[closed]
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _record(self, host: str, status: str, started: float) -> None:
+        if self.on_request:
+            try:
+                self.on_request(host, status, time.monotonic() - started)
+            except Exception as e:
+                tool_logger.error(f"❌ on_request-Callback fehlgeschlagen: {e}")
+
+    @contextmanager
+    def stream(self, method: str, url: str, **kwargs) -> Iterator[requests.Response]:
+        """
+        Öffnet einen Streaming-Request; Verbindungsplatz und Response bleiben
+        belegt, bis der with-Block verlassen wird
+
+        Raises:
+            CircuitOpenError: Host ist wegen wiederholter Fehler gesperrt
+            HostBusyError: Kein freier Verbindungsplatz innerhalb connect_timeout
+            requests.exceptions.RequestException: Fehler beim Request oder beim Lesen
+        """
+        host = (urlparse(url).hostname or "").lower()
+        started = time.monotonic()
+
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            self._record(host, "circuit_open", started)
+            raise CircuitOpenError(host, breaker.retry_in())
+
+        slot = self._acquire_slot(host)
+        if slot is None:
+            breaker.release()
+            self._record(host, "host_busy", started)
+            raise HostBusyError(f"Alle {self.max_per_host} Verbindungen zu {host} belegt")
+
+        with self._lock:
+            self._inflight += 1
+            self._requests += 1
+        response = None
+        try:
+            kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+            try:
+                response = self._session().request(method, url, stream=True, **kwargs)
+            except HOST_ERRORS as e:
+                self._settle(host, breaker, started, "timeout" if isinstance(e, requests.exceptions.Timeout) else "error", failed=True)
+                raise
+            except BaseException:
+                breaker.release()
+                self._record(host, "error", started)
+                raise
+
+            # Jede Ausnahme im with-Block (raise_for_status, Größenlimit, Abbruch)
+            # muss den Breaker abschließen, sonst bleibt ein Testaufruf für immer belegt
+            status = str(response.status_code)
+            try:
+                yield response
+            except HOST_ERRORS as e:
+                self._settle(host, breaker, started, "timeout" if isinstance(e, requests.exceptions.Timeout) else "error", failed=True)
+                raise
+            except BaseException:
+                self._settle(host, breaker, started, status, failed=response.status_code >= 500)
+                raise
+            else:
+                self._settle(host, breaker, started, status, failed=response.status_code >= 500)
+        finally:
+            if response is not None:
+                response.close()
+            with self._lock:
+                self._inflight -= 1
+            self._release_slot(host, slot)
+
+    def _settle(self, host: str, breaker: CircuitBreaker, started: float, status: str, failed: bool) -> None:
+        """Wertet einen Request für den Breaker (5xx/Timeout/Verbindungsfehler = Fehler) und die Metriken"""
+        if not failed:
+            breaker.record_success()
+        elif breaker.record_failure():
+            tool_logger.warning(
+                f"⚡ Circuit Breaker offen für {host} ({breaker.failures} Fehler in Folge, "
+                f"Sperre {self.reset_timeout:.0f}s)"
+            )
+        self._record(host, status, started)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Führt einen Request über den Pool aus und liest den Body vollständig (siehe stream())"""
+        with self.stream(method, url, **kwargs) as response:
+            response.content
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool-Statistik: Verbindungen (neu/wiederverwendet), laufende Requests, Breaker"""
+        created = 0
+        pool_requests = 0
+        pools = self._adapter.poolmanager.pools
+        with pools.lock:
+            host_pools = list(pools._container.values())
+        for pool in host_pools:
+            created += pool.num_connections
+            pool_requests += pool.num_requests
+
+        with self._lock:
+            circuits = {host: b.state for host, b in self._breakers.items() if b.opened_at is not None}
+            return {
+                "requests": self._requests,
+                "inflight": self._inflight,
+                "host_pools": len(host_pools),
+                "connections_created": created,
+                "connections_reused": max(pool_requests - created, 0),
+                "circuits": circuits,
+                "circuits_open": sum(1 for state in circuits.values() if state == "open"),
+            }
+
+    def close(self) -> None:
+        self._adapter.close()
+
+
+def create_http_pool(cfg: Optional[Dict[str, Any]] = None, on_request=None) -> HttpPool:
+    """Erstellt den HTTP-Pool aus dem Config-Abschnitt 'http_pool'"""
+    cfg = cfg or {}
+    return HttpPool(
+        max_per_host=cfg.get("max_per_host", 4),
+        max_hosts=cfg.get("max_hosts", 32),
+        connect_timeout=cfg.get("connect_timeout", 5.0),
+        read_timeout=cfg.get("read_timeout", 15.0),
+        failure_threshold=cfg.get("failure_threshold", 3),
+        reset_timeout=cfg.get("reset_timeout_seconds", 60.0),
+        user_agent=cfg.get("user_agent", DEFAULT_USER_AGENT),
+        on_request=on_request,
+    )
@@ -2,14 +2,23 @@
 """
 LocalAgent-Pro Logging-Konfiguration
 Umfassendes Logging für Backend und Ollama-Integration
+
+Log-Einträge werden im aufrufenden Thread nur in eine begrenzte Queue gelegt;
+ein Writer-Thread (QueueListener) formatiert und schreibt sie in Haupt-Log,
+Konsole und die Spezial-Logs (Tools, Ollama, API-Requests). Jeder Eintrag
+durchläuft die Queue genau einmal, die Spezial-Logs wählen ihre Einträge per
+Filter aus.
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import sys
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 # =================
 # LOGGING CONFIG
@@ -45,6 +54,42 @@ class ColoredFormatter(logging.Formatter):
         return formatted
 
 
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler für eine begrenzte Queue mit Überlauf-Strategie"""
+
+    def __init__(self, log_queue: queue.Queue, policy: str = "drop", block_timeout: float = 5.0):
+        """
+        Args:
+            log_queue: Begrenzte Queue des Writer-Threads
+            policy: "drop" = bei voller Queue Einträge unter WARNING verwerfen
+                (Warnungen und Fehler warten bis block_timeout), "block" = alle warten
+            block_timeout: Max. Wartezeit in Sekunden, danach wird verworfen
+        """
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.policy == "block" or record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class _WriterThread(logging.handlers.QueueListener):
+    """QueueListener, dessen Stop-Signal auch bei voller Queue ankommt"""
+
+    def enqueue_sentinel(self):
+        # Standard ist put_nowait und scheitert an einer vollen, begrenzten Queue
+        self.queue.put(self._sentinel)
+
+
 class LoggingManager:
     """Zentrale Logging-Verwaltung für LocalAgent-Pro"""
     
@@ -55,7 +100,10 @@ class LoggingManager:
         log_level: str = "DEBUG",
         max_file_size: int = 10 * 1024 * 1024,  # 10 MB
         backup_count: int = 5,
-        console_output: bool = True
+        console_output: bool = True,
+        async_logging: bool = True,
+        queue_size: int = 10000,
+        queue_policy: str = "drop"
     ):
         """
         Initialisiert Logging-Manager
@@ -67,12 +115,18 @@ class LoggingManager:
             max_file_size: Max. Größe pro Log-Datei in Bytes
             backup_count: Anzahl rotierter Backup-Dateien
             console_output: Logs auch in Konsole ausgeben
+            async_logging: Schreiben im Writer-Thread statt im aufrufenden Thread
+            queue_size: Max. wartende Einträge
+            queue_policy: Verhalten bei voller Queue ("drop" oder "block", siehe BoundedQueueHandler)
         """
         self.app_name = app_name
         self.log_level = getattr(logging, log_level.upper(), logging.DEBUG)
         self.max_file_size = max_file_size
         self.backup_count = backup_count
         self.console_output = console_output
+        self.async_logging = async_logging
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
         
         # Log-Verzeichnis
         if log_dir is None:
@@ -84,7 +138,18 @@ class LoggingManager:
         
         # Logger initialisieren
         self.loggers = {}
+        # Ausgaben (Haupt-Log, Konsole, Spezial-Logs); hängen am Writer-Thread oder direkt am Root-Logger
+        self._handlers: List[logging.Handler] = []
+        self._main_handlers: List[logging.Handler] = []
+        self._dedicated: Dict[str, logging.Handler] = {}
+        self._attached: List[logging.Handler] = []
+        self._queue_handler: Optional[BoundedQueueHandler] = None
+        self._listener: Optional[_WriterThread] = None
+        self._pipeline_lock = threading.RLock()
+        self._closed = False
         self._setup_root_logger()
+        # Beim Beenden Queue leeren und Dateien schließen (vor logging.shutdown)
+        atexit.register(self.shutdown)
     
     def _setup_root_logger(self):
         """Konfiguriert Root-Logger"""
@@ -110,7 +175,7 @@ class LoggingManager:
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_formatter)
-        root_logger.addHandler(file_handler)
+        self._main_handlers.append(file_handler)
         
         # Console Handler (mit Farben)
         if self.console_output:
@@ -122,7 +187,10 @@ class LoggingManager:
                 datefmt='%H:%M:%S'
             )
             console_handler.setFormatter(console_formatter)
-            root_logger.addHandler(console_handler)
+            self._main_handlers.append(console_handler)
+        
+        self._handlers = list(self._main_handlers)
+        self._attach()
         
         # Spezielle Handler für Drittanbieter-Bibliotheken
         self._configure_third_party_loggers()
@@ -133,8 +201,145 @@ class LoggingManager:
         root_logger.info(f"📊 Log-Level: {logging.getLevelName(self.log_level)}")
         root_logger.info(f"💾 Max. Dateigröße: {self.max_file_size / 1024 / 1024:.1f} MB")
         root_logger.info(f"🔄 Backup-Anzahl: {self.backup_count}")
+        root_logger.info(f"🧵 Schreiben: {self._pipeline_description()}")
         root_logger.info("=" * 80)
     
+    def _pipeline_description(self) -> str:
+        if self._listener is None:
+            return "synchron"
+        return f"Writer-Thread (Queue {self.queue_size}, bei Überlauf: {self.queue_policy})"
+    
+    def _attach(self):
+        """Hängt die Ausgaben hinter Queue + Writer-Thread oder direkt an den Root-Logger"""
+        root_logger = logging.getLogger()
+        with self._pipeline_lock:
+            for handler in self._attached:
+                root_logger.removeHandler(handler)
+            if self.async_logging:
+                log_queue: queue.Queue = queue.Queue(self.queue_size)
+                self._queue_handler = BoundedQueueHandler(log_queue, self.queue_policy)
+                self._listener = _WriterThread(log_queue, *self._handlers, respect_handler_level=True)
+                self._listener.start()
+                self._attached = [self._queue_handler]
+            else:
+                self._queue_handler = None
+                self._listener = None
+                self._attached = list(self._handlers)
+            for handler in self._attached:
+                root_logger.addHandler(handler)
+    
+    def _detach(self):
+        """Stoppt den Writer-Thread; wartende Einträge werden vorher geschrieben"""
+        with self._pipeline_lock:
+            if self._listener is not None:
+                # Ab hier synchron weiterschreiben, damit nichts in der Queue liegen bleibt
+                root_logger = logging.getLogger()
+                root_logger.removeHandler(self._queue_handler)
+                for handler in self._handlers:
+                    root_logger.addHandler(handler)
+                self._listener.stop()
+                self._attached = list(self._handlers)
+                self._listener = None
+            for handler in self._handlers:
+                try:
+                    handler.flush()
+                except (OSError, ValueError):
+                    # Stream bereits geschlossen (z.B. stdout beim Beenden), wie in logging.shutdown
+                    pass
+    
+    def configure_pipeline(
+        self,
+        async_logging: Optional[bool] = None,
+        queue_size: Optional[int] = None,
+        queue_policy: Optional[str] = None
+    ):
+        """
+        Ändert die Schreib-Pipeline zur Laufzeit (z.B. aus dem Config-Abschnitt 'logging')
+        
+        Args:
+            async_logging: Writer-Thread verwenden
+            queue_size: Max. wartende Einträge
+            queue_policy: "drop" oder "block"
+        """
+        if queue_policy is not None and queue_policy not in ("drop", "block"):
+            raise ValueError(f"Unbekannte queue_policy: {queue_policy} (erlaubt: drop, block)")
+        with self._pipeline_lock:
+            changed = (
+                (async_logging is not None and async_logging != self.async_logging)
+                or (queue_size is not None and queue_size != self.queue_size)
+                or (queue_policy is not None and queue_policy != self.queue_policy)
+            )
+            if not changed or self._closed:
+                return
+            dropped = self._queue_handler.dropped if self._queue_handler else 0
+            self._detach()
+            self.async_logging = self.async_logging if async_logging is None else async_logging
+            self.queue_size = queue_size or self.queue_size
+            self.queue_policy = queue_policy or self.queue_policy
+            self._attach()
+            if self._queue_handler:
+                self._queue_handler.dropped = dropped
+        logging.getLogger().info(f"🧵 Log-Pipeline: {self._pipeline_description()}")
+    
+    def _add_dedicated_handler(self, name: str, filename: str, formatter: logging.Formatter):
+        """
+        Spezial-Log für den Logger name (und seine Kind-Logger), einmal pro Datei
+        
+        Die Einträge kommen über den Root-Logger (Propagation); ein Filter wählt
+        sie aus, sodass jede Zeile nur einmal pro Datei geschrieben wird.
+        """
+        with self._pipeline_lock:
+            if name in self._dedicated:
+                return
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(self.log_dir, filename),
+                maxBytes=self.max_file_size,
+                backupCount=self.backup_count,
+                encoding='utf-8'
+            )
+            handler.setFormatter(formatter)
+            handler.addFilter(logging.Filter(f"{self.app_name}.{name}"))
+            self._dedicated[name] = handler
+            self._handlers.append(handler)
+            if self._listener is not None:
+                # Der Writer-Thread liest handlers bei jedem Eintrag neu
+                self._listener.handlers = tuple(self._handlers)
+            else:
+                logging.getLogger().addHandler(handler)
+                self._attached.append(handler)
+    
+    def stats(self) -> dict:
+        """Zustand der Log-Pipeline (für Metriken)"""
+        with self._pipeline_lock:
+            return {
+                "async": self._listener is not None,
+                "queued": self._queue_handler.queue.qsize() if self._listener is not None else 0,
+                "queue_size": self.queue_size,
+                "policy": self.queue_policy,
+                "dropped": self._queue_handler.dropped if self._queue_handler else 0,
+            }
+    
+    def flush(self):
+        """Wartet, bis alle bisherigen Einträge geschrieben sind (z.B. vor dem Lesen der Log-Dateien)"""
+        with self._pipeline_lock:
+            listener, handlers = self._listener, list(self._handlers)
+        if listener is not None:
+            # QueueListener bestätigt jeden Eintrag mit task_done
+            listener.queue.join()
+        for handler in handlers:
+            handler.flush()
+    
+    def shutdown(self):
+        """Schreibt alle wartenden Einträge und stoppt den Writer-Thread (idempotent)"""
+        with self._pipeline_lock:
+            if self._closed:
+                return
+            self._closed = True
+            dropped = self._queue_handler.dropped if self._queue_handler else 0
+            self._detach()
+        if dropped:
+            logging.getLogger().warning(f"⚠️ {dropped} Log-Einträge verworfen (Queue voll)")
+    
     def _configure_third_party_loggers(self):
         """Konfiguriert Logging für Drittanbieter-Bibliotheken"""
         # Werkzeug (Flask) auf INFO setzen
@@ -170,21 +375,12 @@ class LoggingManager:
         """Erstellt speziellen Logger für API-Requests"""
         logger = self.get_logger("API-Requests")
         
-        # Zusätzlicher File Handler für API-Requests
-        api_log_file = os.path.join(self.log_dir, "api_requests.log")
-        api_handler = logging.handlers.RotatingFileHandler(
-            api_log_file,
-            maxBytes=self.max_file_size,
-            backupCount=self.backup_count,
-            encoding='utf-8'
-        )
-        
+        # Zusätzliche Datei für API-Requests
         api_formatter = logging.Formatter(
             '%(asctime)s | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
-        api_handler.setFormatter(api_formatter)
-        logger.addHandler(api_handler)
+        self._add_dedicated_handler("API-Requests", "api_requests.log", api_formatter)
         
         return logger
     
@@ -192,21 +388,12 @@ class LoggingManager:
         """Erstellt speziellen Logger für Ollama-Integration"""
         logger = self.get_logger("Ollama")
         
-        # Zusätzlicher File Handler für Ollama
-        ollama_log_file = os.path.join(self.log_dir, "ollama_integration.log")
-        ollama_handler = logging.handlers.RotatingFileHandler(
-            ollama_log_file,
-            maxBytes=self.max_file_size,
-            backupCount=self.backup_count,
-            encoding='utf-8'
-        )
-        
+        # Zusätzliche Datei für Ollama (einmal, auch wenn mehrere Module diesen Logger anfordern)
         ollama_formatter = logging.Formatter(
             '%(asctime)s | %(levelname)-8s | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
-        ollama_handler.setFormatter(ollama_formatter)
-        logger.addHandler(ollama_handler)
+        self._add_dedicated_handler("Ollama", "ollama_integration.log", ollama_formatter)
         
         return logger
     
@@ -214,21 +401,12 @@ class LoggingManager:
         """Erstellt speziellen Logger für Tool-Ausführungen"""
         logger = self.get_logger("Tools")
         
-        # Zusätzlicher File Handler für Tools
-        tool_log_file = os.path.join(self.log_dir, "tool_executions.log")
-        tool_handler = logging.handlers.RotatingFileHandler(
-            tool_log_file,
-            maxBytes=self.max_file_size,
-            backupCount=self.backup_count,
-            encoding='utf-8'
-        )
-        
+        # Zusätzliche Datei für Tools
         tool_formatter = logging.Formatter(
             '%(asctime)s | %(levelname)-8s | %(funcName)-15s | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
-        tool_handler.setFormatter(tool_formatter)
-        logger.addHandler(tool_handler)
+        self._add_dedicated_handler("Tools", "tool_executions.log", tool_formatter)
         
         return logger
     
@@ -262,7 +440,8 @@ class LoggingManager:
         root_logger = logging.getLogger()
         root_logger.setLevel(new_level)
         
-        for handler in root_logger.handlers:
+        # Haupt-Log und Konsole (hängen ggf. am Writer-Thread, nicht am Root-Logger)
+        for handler in self._main_handlers:
             handler.setLevel(new_level)
         
         root_logger.info(f"🔧 Log-Level geändert auf: {level.upper()}")
@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+Deterministischer Ollama-Ersatz für Tests und Benchmarks von LocalAgent-Pro
+Implementiert /api/tags, /api/show, /api/ps, /api/chat, /api/generate und
+/api/embed (jeweils mit Streaming wie Ollama), ohne ein Modell zu laden.
+Ladezeit, Prompt-Auswertung (Tokens/s), Generierung (Tokens/s), Fehler und die
+Zahl paralleler Requests sind einstellbar, sodass Durchsatz und Latenz des
+Servers unabhängig von echter Inferenz gemessen werden können.
+
+Antworten hängen nur von Modell und Prompt ab (gleiche Anfrage → gleicher Text);
+Zufallsfehler folgen einem festen Seed.
+
+Als Prozess: python src/mock_ollama.py [--port 11434] [--tokens-per-second 30] ...
+In Tests: Fixture mock_ollama (tests/conftest.py)
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Iterator, List, Optional
+
+DEFAULT_MODELS = ["llama3.1:latest", "llama3.2:3b", "nomic-embed-text:latest"]
+
+# Wortschatz für die generierten Antworten
+WORDS = [
+    "der", "die", "das", "und", "ist", "ein", "mit", "für", "auf", "nicht", "Datei", "Server", "Modell",
+    "Antwort", "lokal", "schnell", "Anfrage", "Ergebnis", "Sandbox", "Agent", "Beispiel", "also", "dann",
+]
+
+
+def _full_name(model: str) -> str:
+    """Ollama ergänzt fehlende Tags mit :latest"""
+    return model if ":" in model else f"{model}:latest"
+
+
+def _seed(*parts: str) -> int:
+    return int.from_bytes(hashlib.sha256("\x00".join(parts).encode("utf-8")).digest()[:8], "big")
+
+
+def _token_id(word: str) -> int:
+    return _seed(word) % 32000
+
+
+def _count_tokens(text: str) -> int:
+    return len(text.split())
+
+
+class MockOllama:
+    """Lokaler HTTP-Server mit Ollamas API und einstellbarem Zeitverhalten"""
+
+    def __init__(
+        self,
+        models: Optional[List[str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        load_delay: float = 0.0,
+        prompt_eval_rate: float = 0.0,
+        tokens_per_second: float = 0.0,
+        response_tokens: int = 24,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        max_concurrent: int = 0,
+        max_queue: int = 512,
+        keep_alive: float = 300.0,
+        context_length: int = 8192,
+        embedding_dim: int = 384,
+        seed: int = 0
+    ):
+        """
+        Args:
+            models: Installierte Modelle (Namen mit "embed" gelten als Embedding-Modelle)
+            host, port: Adresse (Port 0 = frei wählen, siehe url)
+            load_delay: Sekunden zum Laden eines nicht geladenen Modells
+            prompt_eval_rate: Prompt-Auswertung in Tokens/s (0 = sofort)
+            tokens_per_second: Generierung in Tokens/s (0 = sofort)
+            response_tokens: Länge einer Antwort, wenn num_predict nicht gesetzt ist
+            error_rate: Anteil zufällig fehlschlagender Requests (0.0 - 1.0)
+            error_status: HTTP-Status dieser Fehler
+            max_concurrent: Parallel bearbeitete Requests (OLLAMA_NUM_PARALLEL, 0 = unbegrenzt)
+            max_queue: Wartende Requests, darüber 503 (OLLAMA_MAX_QUEUE)
+            keep_alive: Sekunden, die ein Modell nach dem letzten Request geladen bleibt
+            context_length: Kontextlänge in /api/show
+            embedding_dim: Dimension der Embeddings
+            seed: Seed für Zufallsfehler
+        """
+        self.models = [_full_name(m) for m in (models or DEFAULT_MODELS)]
+        self.load_delay = load_delay
+        self.prompt_eval_rate = prompt_eval_rate
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.keep_alive = keep_alive
+        self.context_length = context_length
+        self.embedding_dim = embedding_dim
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+        self._inflight = 0
+        self._waiting = 0
+        self._loaded: Dict[str, float] = {}  # Modell → Ablauf (monotonic)
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._failures: deque = deque()
+        self._stats: Dict[str, Any] = {"requests": Counter(), "errors": 0, "busy": 0, "loads": 0, "max_inflight": 0}
+
+        self._server = ThreadingHTTPServer((host, port), _MockOllamaHandler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockOllama":
+        """Startet den Server in einem Daemon-Thread"""
+        if self._thread is None:
+            # Kurzes Poll-Intervall: stop() wartet sonst bis zu 0.5s
+            self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), name="mock-ollama", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        """Blockierend im aktuellen Thread (Standalone-Betrieb)"""
+        self._server.serve_forever()
+
+    def __enter__(self) -> "MockOllama":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # === Fehler-Injektion ===
+
+    def fail_next(self, count: int = 1, status: int = 500, after_tokens: Optional[int] = None, path: Optional[str] = None) -> None:
+        """
+        Lässt die nächsten count Requests fehlschlagen
+
+        Args:
+            status: HTTP-Status (bei after_tokens ignoriert)
+            after_tokens: Stream nach so vielen Tokens abbrechen (Verbindung wird geschlossen)
+            path: Nur Requests auf diesen Pfad (z.B. "/api/chat"), None = alle Modell-Requests
+        """
+        with self._lock:
+            for _ in range(count):
+                self._failures.append({"status": status, "after_tokens": after_tokens, "path": path})
+
+    def _take_failure(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for failure in self._failures:
+                if failure["path"] in (None, path):
+                    self._failures.remove(failure)
+                    return failure
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return {"status": self.error_status, "after_tokens": None, "path": path}
+        return None
+
+    # === Parallelität und Modell-Laden ===
+
+    def _acquire(self) -> bool:
+        """Wartet auf einen freien Platz; False bei voller Warteschlange"""
+        with self._slots:
+            if self.max_concurrent and self._inflight >= self.max_concurrent:
+                if self._waiting >= self.max_queue:
+                    self._stats["busy"] += 1
+                    return False
+                self._waiting += 1
+                while self._inflight >= self.max_concurrent:
+                    self._slots.wait()
+                self._waiting -= 1
+            self._inflight += 1
+            self._stats["max_inflight"] = max(self._stats["max_inflight"], self._inflight)
+            return True
+
+    def _release(self) -> None:
+        with self._slots:
+            self._inflight -= 1
+            self._slots.notify()
+
+    def _ensure_loaded(self, model: str, keep_alive: Optional[float]) -> float:
+        """Lädt das Modell bei Bedarf (einmal für alle wartenden Requests); Returns: Ladezeit in Sekunden"""
+        with self._lock:
+            lock = self._load_locks.setdefault(model, threading.Lock())
+        waited = 0.0
+        with lock:
+            with self._lock:
+                loaded = self._loaded.get(model, 0.0) > time.monotonic()
+            if not loaded and self.load_delay:
+                time.sleep(self.load_delay)
+                waited = self.load_delay
+            with self._lock:
+                if not loaded:
+                    self._stats["loads"] += 1
+                ttl = self.keep_alive if keep_alive is None else keep_alive
+                if ttl == 0:
+                    self._loaded.pop(model, None)
+                else:
+                    self._loaded[model] = time.monotonic() + (ttl if ttl > 0 else 10 ** 9)
+        return waited
+
+    def loaded_models(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            return sorted(m for m, expires in self._loaded.items() if expires > now)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "requests": dict(self._stats["requests"]),
+                "inflight": self._inflight,
+                "waiting": self._waiting,
+            }
+
+    # === Modell-Antworten ===
+
+    def _model_entry(self, model: str) -> Dict[str, Any]:
+        family, size = ("nomic-bert", 274_302_450) if "embed" in model else ("llama", 4_920_753_328)
+        return {
+            "name": model,
+            "model": model,
+            "modified_at": "2024-07-25T10:00:00Z",
+            "size": size,
+            "digest": hashlib.sha256(model.encode("utf-8")).hexdigest(),
+            "details": {"format": "gguf", "family": family, "parameter_size": "8.0B", "quantization_level": "Q4_K_M"},
+        }
+
+    def _answer(self, model: str, prompt: str, num_predict: Optional[int]) -> List[str]:
+        rng = random.Random(_seed(model, prompt))
+        count = num_predict if num_predict and num_predict > 0 else self.response_tokens
+        words = [rng.choice(WORDS) for _ in range(count)]
+        return [word + (" " if i < count - 1 else ".") for i, word in enumerate(words)]
+
+    def _embedding(self, model: str, text: str) -> List[float]:
+        digest = b""
+        counter = 0
+        while len(digest) < self.embedding_dim * 4:
+            digest += hashlib.sha256(f"{model}\x00{counter}\x00{text}".encode("utf-8")).digest()
+            counter += 1
+        values = [v / 2 ** 31 for v in struct.unpack(f"<{self.embedding_dim}i", digest[:self.embedding_dim * 4])]
+        norm = sum(v * v for v in values) ** 0.5 or 1.0
+        return [v / norm for v in values]
+
+    def completion(self, path: str, body: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Erzeugt die Antwort auf /api/chat bzw. /api/generate mit Ollamas Zeitverhalten
+
+        Yields:
+            Ein Dict pro Token (Stream), zuletzt das Abschluss-Dict mit done=True
+        """
+        model = _full_name(body["model"])
+        options = body.get("options") or {}
+        started = time.monotonic()
+        keep_alive = body.get("keep_alive")
+        load_duration = self._ensure_loaded(model, _parse_duration(keep_alive) if keep_alive is not None else None)
+
+        if path == "/api/chat":
+            messages = body.get("messages") or []
+            prompt = "\n".join(str(m.get("content", "")) for m in messages)
+            prompt_tokens = sum(_count_tokens(str(m.get("content", ""))) for m in messages)
+        else:
+            prompt = body.get("prompt", "")
+            # Mit context wird nur der neue Prompt ausgewertet
+            prompt_tokens = _count_tokens(prompt) + (0 if body.get("context") else _count_tokens(body.get("system") or ""))
+
+        prompt_eval = prompt_tokens / self.prompt_eval_rate if self.prompt_eval_rate else 0.0
+        time.sleep(prompt_eval)
+
+        tokens = self._answer(model, prompt, options.get("num_predict")) if prompt.strip() or path == "/api/chat" else []
+        eval_started = time.monotonic()
+        for index, token in enumerate(tokens):
+            if self.tokens_per_second:
+                # Takt relativ zum Start, damit sich Sleep-Ungenauigkeiten nicht aufsummieren
+                time.sleep(max(0.0, eval_started + (index + 1) / self.tokens_per_second - time.monotonic()))
+            if path == "/api/chat":
+                yield {"message": {"role": "assistant", "content": token}, "done": False}
+            else:
+                yield {"response": token, "done": False}
+
+        final: Dict[str, Any] = {
+            "done": True,
+            "done_reason": "length" if options.get("num_predict") else "stop",
+            "total_duration": int((time.monotonic() - started) * 1e9),
+            "load_duration": int(load_duration * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((time.monotonic() - eval_started) * 1e9),
+        }
+        if path == "/api/generate":
+            new_tokens = [_token_id(w) for w in prompt.split()] + [_token_id(t) for t in tokens]
+            final["context"] = list(body.get("context") or []) + new_tokens
+        yield final
+
+
+def _parse_duration(value: Any) -> float:
+    """Ollama keep_alive ("5m", "30s", "1h", Zahl in Sekunden, negativ = unbegrenzt) → Sekunden"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    for unit in ("ms", "s", "m", "h"):
+        if value.endswith(unit):
+            return float(value[:-len(unit)]) * units[unit]
+    return float(value)
+
+
+class _MockOllamaHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 mit Keep-Alive; Streams als Transfer-Encoding: chunked wie bei Ollama"""
+    protocol_version = "HTTP/1.1"
+    # Header und Body gehen als getrennte Writes raus; mit Nagle + Delayed ACK kostet das ~40ms pro Antwort
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, data: Any) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def _read_body(self) -> Optional[Dict[str, Any]]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw) if raw else {}
+        except ValueError:
+            return None
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        mock: MockOllama = self.server.mock
+        path = self.path.split("?")[0]
+        with mock._lock:
+            mock._stats["requests"][path] += 1
+        if path == "/":
+            body = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == "/api/version":
+            self._send_json(200, {"version": "0.0.0-mock"})
+        elif path == "/api/tags":
+            self._send_json(200, {"models": [mock._model_entry(m) for m in mock.models]})
+        elif path == "/api/ps":
+            now, monotonic = datetime.now(timezone.utc), time.monotonic()
+            with mock._lock:
+                loaded = sorted((m, e - monotonic) for m, e in mock._loaded.items() if e > monotonic)
+            models = []
+            for model, remaining in loaded:
+                entry = mock._model_entry(model)
+                entry.update({"expires_at": (now + timedelta(seconds=min(remaining, 10 ** 8))).isoformat(), "size_vram": 0})
+                entry.pop("modified_at")
+                models.append(entry)
+            self._send_json(200, {"models": models})
+        else:
+            self._send_error(404, "404 page not found")
+
+    def do_POST(self):
+        mock: MockOllama = self.server.mock
+        path = self.path.split("?")[0]
+        with mock._lock:
+            mock._stats["requests"][path] += 1
+        body = self._read_body()
+        if body is None:
+            self._send_error(400, "invalid JSON body")
+            return
+
+        if path == "/api/show":
+            self._show(mock, body)
+            return
+        if path not in ("/api/chat", "/api/generate", "/api/embed"):
+            self._send_error(404, "404 page not found")
+            return
+
+        model = _full_name(body.get("model") or body.get("name") or "")
+        if model not in mock.models:
+            self._send_error(404, f"model '{body.get('model')}' not found, try pulling it first")
+            return
+
+        failure = mock._take_failure(path)
+        if failure and failure["after_tokens"] is None:
+            with mock._lock:
+                mock._stats["errors"] += 1
+            self._send_error(failure["status"], "mock: injizierter Fehler")
+            return
+
+        if not mock._acquire():
+            self._send_error(503, "server busy, please try again.  maximum pending requests exceeded")
+            return
+        try:
+            if path == "/api/embed":
+                self._embed(mock, model, body)
+            else:
+                self._complete(mock, path, body, failure)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client hat abgebrochen
+            self.close_connection = True
+        finally:
+            mock._release()
+
+    def _show(self, mock: MockOllama, body: Dict[str, Any]) -> None:
+        model = _full_name(body.get("model") or body.get("name") or "")
+        if model not in mock.models:
+            self._send_error(404, f"model '{body.get('model') or body.get('name')}' not found")
+            return
+        entry = mock._model_entry(model)
+        family = entry["details"]["family"]
+        self._send_json(200, {
+            "modelfile": f"FROM {model}\nPARAMETER num_ctx {mock.context_length}",
+            "parameters": f"num_ctx {mock.context_length}",
+            "template": "{{ .Prompt }}",
+            "details": entry["details"],
+            "model_info": {"general.architecture": family, f"{family}.context_length": mock.context_length},
+            "capabilities": ["embedding"] if "embed" in model else ["completion", "tools"],
+            "modified_at": entry["modified_at"],
+        })
+
+    def _embed(self, mock: MockOllama, model: str, body: Dict[str, Any]) -> None:
+        texts = body.get("input") or []
+        if isinstance(texts, str):
+            texts = [texts]
+        started = time.monotonic()
+        load_duration = mock._ensure_loaded(model, None)
+        tokens = sum(_count_tokens(t) for t in texts)
+        if mock.prompt_eval_rate:
+            time.sleep(tokens / mock.prompt_eval_rate)
+        self._send_json(200, {
+            "model": model,
+            "embeddings": [mock._embedding(model, t) for t in texts],
+            "total_duration": int((time.monotonic() - started) * 1e9),
+            "load_duration": int(load_duration * 1e9),
+            "prompt_eval_count": tokens,
+        })
+
+    def _complete(self, mock: MockOllama, path: str, body: Dict[str, Any], failure: Optional[Dict[str, Any]]) -> None:
+        model = _full_name(body["model"])
+        created_at = datetime.now(timezone.utc).isoformat()
+        events = mock.completion(path, body)
+
+        if not body.get("stream", True):
+            if failure:
+                # Verbindungsabbruch vor der Antwort
+                for _ in events:
+                    pass
+                with mock._lock:
+                    mock._stats["errors"] += 1
+                self.close_connection = True
+                return
+            parts, final = [], {}
+            for event in events:
+                if event["done"]:
+                    final = event
+                else:
+                    parts.append(event["message"]["content"] if path == "/api/chat" else event["response"])
+            text = "".join(parts)
+            result = {"model": model, "created_at": created_at, **final}
+            if path == "/api/chat":
+                result["message"] = {"role": "assistant", "content": text}
+            else:
+                result["response"] = text
+            self._send_json(200, result)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for count, event in enumerate(events):
+            if failure and count >= failure["after_tokens"]:
+                # Verbindungsabbruch mitten im Stream
+                with mock._lock:
+                    mock._stats["errors"] += 1
+                self.close_connection = True
+                return
+            if event["done"]:
+                event = {**event, "message": {"role": "assistant", "content": ""}} if path == "/api/chat" else {**event, "response": ""}
+            line = json.dumps({"model": model, "created_at": created_at, **event}).encode("utf-8") + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deterministischer Ollama-Ersatz für Tests und Benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--models", default=",".join(DEFAULT_MODELS), help="Kommagetrennte Modellnamen")
+    parser.add_argument("--load-delay", type=float, default=0.0, help="Sekunden zum Laden eines Modells")
+    parser.add_argument("--prompt-eval-rate", type=float, default=0.0, help="Prompt-Tokens/s (0 = sofort)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Generierte Tokens/s (0 = sofort)")
+    parser.add_argument("--response-tokens", type=int, default=24)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--max-concurrent", type=int, default=0, help="Parallele Requests (0 = unbegrenzt)")
+    parser.add_argument("--max-queue", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockOllama(
+        models=[m.strip() for m in args.models.split(",") if m.strip()],
+        host=args.host,
+        port=args.port,
+        load_delay=args.load_delay,
+        prompt_eval_rate=args.prompt_eval_rate,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        max_concurrent=args.max_concurrent,
+        max_queue=args.max_queue,
+        seed=args.seed,
+    )
+    print(f"🧪 Mock-Ollama auf {mock.url} ({len(mock.models)} Modelle: {', '.join(mock.models)})")
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Modellkatalog für /v1/models in LocalAgent-Pro
+Baut die OpenAI-kompatible Modellliste aus den tatsächlich in Ollama
+installierten Modellen (/api/tags), ergänzt um Fähigkeiten und Kontextlänge aus
+/api/show. Die Liste wird mit TTL gecacht und im Hintergrund erneuert (veraltete
+Daten werden bis dahin weiter ausgeliefert); /api/show wird nur für neue oder
+geänderte Modelle (Digest) abgefragt. Das ETag erlaubt 304-Antworten an den
+Modell-Picker von Open WebUI, der die Liste regelmäßig abfragt.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+ollama_logger = logging_manager.create_ollama_logger()
+
+# Wartezeit bis zum nächsten Versuch, wenn Ollama nicht geantwortet hat
+RETRY_SECONDS = 5.0
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[int]:
+    """Ollama-Zeitstempel (RFC 3339, Nanosekunden) → Unix-Sekunden"""
+    if not value:
+        return None
+    try:
+        value = re.sub(r"(\.\d{6})\d+", r"\1", value).replace("Z", "+00:00")
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError:
+        return None
+
+
+def model_details(info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fähigkeiten und Kontextlänge aus einer /api/show-Antwort
+
+    Returns:
+        Dict mit capabilities (Liste, leer bei älteren Ollama-Versionen) und
+        context_length (maximale Kontextlänge des Modells oder None)
+    """
+    context_length = None
+    for key, value in (info.get("model_info") or {}).items():
+        if key.endswith(".context_length") and isinstance(value, int):
+            context_length = value
+            break
+    if context_length is None:
+        # Fallback: im Modelfile gesetztes num_ctx
+        match = re.search(r"^num_ctx\s+(\d+)", info.get("parameters") or "", re.MULTILINE)
+        context_length = int(match.group(1)) if match else None
+    return {"capabilities": list(info.get("capabilities") or []), "context_length": context_length}
+
+
+class ModelCatalog:
+    """Gecachte Modellliste mit ETag"""
+
+    def __init__(
+        self,
+        client,
+        agent_models: List[str],
+        fallback_models: Optional[List[str]] = None,
+        ttl: float = 60.0,
+        show_details: bool = True
+    ):
+        """
+        Args:
+            client: OllamaClient oder OllamaBackendPool
+            agent_models: Eigene Modell-IDs, die immer vorne stehen (z.B. "localagent-pro")
+            fallback_models: Modelle für die Liste, solange Ollama nie geantwortet hat
+            ttl: Sekunden, bis die Liste als veraltet gilt und im Hintergrund erneuert wird
+            show_details: Fähigkeiten und Kontextlänge per /api/show abfragen
+        """
+        self.client = client
+        self.agent_models = agent_models
+        self.fallback_models = fallback_models or []
+        self.ttl = ttl
+        self.show_details = show_details
+        # created der eigenen Modelle: Serverstart statt time.time() je Anfrage (sonst ändert sich das ETag ständig)
+        self.started_at = int(time.time())
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._payload: Optional[Dict[str, Any]] = None
+        self._etag: Optional[str] = None
+        self._expires_at = 0.0
+        self._refreshed_at = 0.0
+        self._source = "none"
+        self._refreshing = False
+        self._pending = False
+        # /api/show-Ergebnisse je (Modell, Digest)
+        self._details: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._stats = {"refreshes": 0, "failures": 0, "show_calls": 0}
+        self._refresher: Optional[threading.Thread] = None
+        self._refresher_stop = threading.Event()
+
+    def _entry(self, model_id: str, created: int, owned_by: str, **extra) -> Dict[str, Any]:
+        return {"id": model_id, "object": "model", "created": created, "owned_by": owned_by, **extra}
+
+    def _build(self, models: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        data = [self._entry(name, self.started_at, "localagent-pro") for name in self.agent_models]
+        if models is None:
+            data += [self._entry(name, self.started_at, "ollama") for name in self.fallback_models if name not in self.agent_models]
+            return {"object": "list", "data": data}
+
+        for model in sorted(models, key=lambda m: m.get("name", "")):
+            name = model.get("name") or model.get("model")
+            if not name or name in self.agent_models:
+                continue
+            details = model.get("details") or {}
+            extra: Dict[str, Any] = {
+                "size": model.get("size"),
+                "digest": model.get("digest"),
+                "family": details.get("family"),
+                "parameter_size": details.get("parameter_size"),
+                "quantization_level": details.get("quantization_level"),
+            }
+            if self.show_details:
+                extra.update(self._model_details(name, model.get("digest") or ""))
+                # Ohne completion (z.B. Embedding-Modelle) kann der Chat-Endpunkt das Modell nicht bedienen
+                if extra["capabilities"] and "completion" not in extra["capabilities"]:
+                    continue
+            created = _parse_timestamp(model.get("modified_at")) or self.started_at
+            data.append(self._entry(name, created, "ollama", **extra))
+        return {"object": "list", "data": data}
+
+    def _model_details(self, name: str, digest: str) -> Dict[str, Any]:
+        key = (name, digest)
+        cached = self._details.get(key)
+        if cached is not None:
+            return cached
+        info = self.client.get_model_info(name)
+        self._stats["show_calls"] += 1
+        if info is None:
+            # Nicht cachen: beim nächsten Refresh erneut versuchen
+            return {"capabilities": [], "context_length": None}
+        details = model_details(info)
+        self._details = {k: v for k, v in self._details.items() if k[0] != name}
+        self._details[key] = details
+        return details
+
+    def refresh(self) -> bool:
+        """
+        Liest die Modellliste neu (blockierend; parallele Aufrufe warten auf den laufenden)
+
+        Returns:
+            True, wenn Ollama geantwortet hat
+        """
+        requested = time.time()
+        with self._refresh_lock:
+            # Während des Wartens hat ein anderer Thread bereits erneuert
+            if self._refreshed_at >= requested:
+                return self._source == "ollama"
+            started = time.time()
+            models = self.client.list_models()
+            if models is None:
+                with self._lock:
+                    self._stats["failures"] += 1
+                    # Nicht erreichbar: bald erneut versuchen statt erst nach der vollen TTL
+                    self._expires_at = time.time() + min(self.ttl, RETRY_SECONDS)
+                    self._refreshed_at = started
+                    keep = self._payload is not None and self._source == "ollama"
+                if keep:
+                    # Letzte bekannte Liste bleibt gültig
+                    return False
+
+            payload = self._build(models)
+            body = json.dumps(payload, sort_keys=True).encode("utf-8")
+            etag = hashlib.sha256(body).hexdigest()[:32]
+            with self._lock:
+                if etag != self._etag:
+                    ollama_logger.info(f"📋 Modellkatalog aktualisiert: {len(payload['data'])} Modelle")
+                self._payload, self._etag = payload, etag
+                self._refreshed_at = started
+                self._source = "ollama" if models is not None else "fallback"
+                self._stats["refreshes"] += 1
+                if models is not None:
+                    self._expires_at = time.time() + self.ttl
+            return models is not None
+
+    def _refresh_async(self) -> None:
+        """Erneuert im Hintergrund; Anforderungen während eines Laufs lösen genau einen weiteren aus"""
+        with self._lock:
+            self._pending = True
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        self._refreshing = False
+                        return
+                    self._pending = False
+                try:
+                    self.refresh()
+                except Exception as e:
+                    ollama_logger.error(f"❌ Modellkatalog-Refresh fehlgeschlagen: {str(e)}", exc_info=True)
+
+        threading.Thread(target=run, name="model-catalog-refresh", daemon=True).start()
+
+    def get(self) -> Tuple[Dict[str, Any], str]:
+        """
+        Aktuelle Liste und ETag (ohne Anführungszeichen)
+
+        Beim ersten Aufruf wird synchron geladen; ist die Liste abgelaufen, wird
+        sie sofort (veraltet) geliefert und im Hintergrund erneuert.
+        """
+        with self._lock:
+            payload, etag, expires_at = self._payload, self._etag, self._expires_at
+        if payload is None:
+            self.refresh()
+            with self._lock:
+                return self._payload, self._etag
+        if time.time() >= expires_at:
+            self._refresh_async()
+        return payload, etag
+
+    def has_model(self, model_id: str) -> bool:
+        """True, wenn model_id ein gelistetes (bedienbares) Ollama-Modell ist"""
+        payload, _ = self.get()
+        return any(m["id"] == model_id and m["owned_by"] == "ollama" for m in payload["data"])
+
+    def invalidate(self, model: Optional[str] = None) -> None:
+        """Markiert die Liste als veraltet und erneuert sie im Hintergrund (z.B. nach pull_model)"""
+        ollama_logger.debug(f"📋 Modellkatalog invalidiert ({model or 'alle'})")
+        with self._lock:
+            self._expires_at = 0.0
+        self._refresh_async()
+
+    def start(self, interval: float) -> None:
+        """Erneuert die Liste alle interval Sekunden in einem Daemon-Thread"""
+        if self._refresher is not None:
+            return
+        self._refresher_stop.clear()
+
+        def run():
+            while not self._refresher_stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    ollama_logger.error(f"❌ Modellkatalog-Refresh fehlgeschlagen: {str(e)}", exc_info=True)
+
+        self._refresher = threading.Thread(target=run, name="model-catalog", daemon=True)
+        self._refresher.start()
+
+    def stop(self) -> None:
+        self._refresher_stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "models": len(self._payload["data"]) if self._payload else 0,
+                "source": self._source,
+                "age_seconds": round(time.time() - self._refreshed_at, 1) if self._refreshed_at else None,
+            }
+
+
+def create_model_catalog(client, agent_models: List[str], fallback_models: List[str], cfg: Optional[Dict[str, Any]] = None) -> ModelCatalog:
+    """Erstellt den Katalog aus dem Config-Abschnitt 'model_catalog' und meldet ihn für pull_model an"""
+    cfg = cfg or {}
+    catalog = ModelCatalog(
+        client,
+        agent_models,
+        fallback_models,
+        ttl=cfg.get("ttl_seconds", 60),
+        show_details=cfg.get("show_details", True),
+    )
+    client.add_model_listener(catalog.invalidate)
+    if cfg.get("refresh_interval_seconds", 300) > 0:
+        catalog.start(cfg.get("refresh_interval_seconds", 300))
+    return catalog
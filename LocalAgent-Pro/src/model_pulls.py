@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Modell-Downloads als Hintergrund-Jobs für LocalAgent-Pro
+Ein Pull blockiert keinen Request-Thread mehr: Ollamas Fortschrittsmeldungen
+(/api/pull mit stream) werden in einem Job gesammelt (Prozent, Bytes/s) und
+können abgefragt oder per SSE verfolgt werden. Gleichzeitige Pulls sind
+begrenzt, laufende lassen sich abbrechen; nach Erfolg wird das Modell optional
+vorgeladen.
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, Any, List, Optional
+
+import requests
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+    from src.http_pool import CircuitOpenError
+except ImportError:
+    from logging_config import get_logging_manager
+    from http_pool import CircuitOpenError
+
+logging_manager = get_logging_manager()
+ollama_logger = logging_manager.create_ollama_logger()
+
+# Zeitfenster für die Download-Rate (Sekunden)
+RATE_WINDOW_SECONDS = 5.0
+
+
+class PullJob:
+    """Ein Modell-Download im Hintergrund"""
+
+    def __init__(self, job_id: str, model: str):
+        self.id = job_id
+        self.model = model
+        self.status = "running"  # running | warming | success | failed | cancelled
+        self.phase = "starting"  # letzte Statusmeldung von Ollama
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.layers: Dict[str, Dict[str, int]] = {}
+        self.backend: Optional[str] = None
+        self.warmed: Optional[bool] = None
+        self.version = 0  # erhöht bei jeder Änderung (für follow)
+        self.changed = threading.Condition()
+        self.cancel_requested = threading.Event()
+        self._samples: deque = deque()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("success", "failed", "cancelled")
+
+    @property
+    def total(self) -> int:
+        return sum(layer["total"] for layer in self.layers.values())
+
+    @property
+    def completed(self) -> int:
+        return sum(layer["completed"] for layer in self.layers.values())
+
+    @property
+    def runtime(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    def bytes_per_second(self) -> float:
+        """Rate über die letzten RATE_WINDOW_SECONDS (erwartet changed)"""
+        if self.done or len(self._samples) < 2:
+            return 0.0
+        (t0, b0), (t1, b1) = self._samples[0], self._samples[-1]
+        return (b1 - b0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def record(self, event: Dict[str, Any]) -> None:
+        """Übernimmt eine Fortschrittsmeldung von Ollama (erwartet changed)"""
+        self.phase = event.get("status", self.phase)
+        self.backend = event.get("backend", self.backend)
+        digest = event.get("digest")
+        if digest and event.get("total"):
+            key = f"{self.backend or ''}:{digest}"
+            self.layers[key] = {"total": int(event["total"]), "completed": int(event.get("completed") or 0)}
+            now = time.monotonic()
+            self._samples.append((now, self.completed))
+            while len(self._samples) > 2 and now - self._samples[0][0] > RATE_WINDOW_SECONDS:
+                self._samples.popleft()
+        self.version += 1
+        self.changed.notify_all()
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.total
+        return {
+            "id": self.id,
+            "model": self.model,
+            "status": self.status,
+            "phase": self.phase,
+            "backend": self.backend,
+            "total": total,
+            "completed": self.completed,
+            "percent": round(self.completed / total * 100, 1) if total else (100.0 if self.status == "success" else 0.0),
+            "bytes_per_second": round(self.bytes_per_second()),
+            "error": self.error,
+            "warmed": self.warmed,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "runtime": round(self.runtime, 3),
+        }
+
+
+class ModelPullManager:
+    """Startet, verfolgt und bricht Modell-Downloads ab"""
+
+    def __init__(
+        self,
+        client,
+        max_concurrent: int = 2,
+        keep_finished: int = 20,
+        warm_up: bool = False,
+        keep_alive: str = "5m",
+        on_finish: Optional[Callable[[PullJob], None]] = None
+    ):
+        """
+        Args:
+            client: OllamaClient oder OllamaBackendPool (pull_model_stream, warm_up)
+            max_concurrent: Max. gleichzeitige Downloads
+            keep_finished: Anzahl beendeter Jobs, die abrufbar bleiben
+            warm_up: Modell nach erfolgreichem Download in den Speicher laden
+            keep_alive: Verweildauer des vorgeladenen Modells (Ollama keep_alive)
+            on_finish: Callback nach Job-Ende (z.B. für Metriken)
+        """
+        self.client = client
+        self.max_concurrent = max_concurrent
+        self.keep_finished = keep_finished
+        self.warm_up = warm_up
+        self.keep_alive = keep_alive
+        self.on_finish = on_finish
+        self._jobs: Dict[str, PullJob] = {}
+        self._lock = threading.Lock()
+
+    def running_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def start(self, model: str, warm_up: Optional[bool] = None) -> PullJob:
+        """
+        Startet den Download im Hintergrund; läuft für das Modell bereits einer, wird dieser geliefert
+
+        Raises:
+            RuntimeError: Wenn bereits max_concurrent Downloads laufen
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.model == model and not job.done:
+                    return job
+            if sum(1 for job in self._jobs.values() if not job.done) >= self.max_concurrent:
+                raise RuntimeError(f"Maximal {self.max_concurrent} gleichzeitige Modell-Downloads erlaubt")
+            job = PullJob(uuid.uuid4().hex[:12], model)
+            self._jobs[job.id] = job
+            self._prune()
+
+        warm = self.warm_up if warm_up is None else warm_up
+        threading.Thread(target=self._run, args=(job, warm), daemon=True, name=f"pull-{job.id}").start()
+        ollama_logger.info(f"📥 Modell-Download gestartet [{job.id}]: {model}")
+        return job
+
+    def _run(self, job: PullJob, warm: bool) -> None:
+        stream = None
+        try:
+            stream = self.client.pull_model_stream(job.model, request_id=job.id)
+            for event in stream:
+                with job.changed:
+                    job.record(event)
+                if job.cancel_requested.is_set():
+                    break
+        except CircuitOpenError as e:
+            job.error = f"Ollama nicht erreichbar: {e}"
+        except requests.exceptions.RequestException as e:
+            job.error = str(e)
+        except Exception as e:
+            ollama_logger.error(f"❌ Modell-Download [{job.id}] fehlgeschlagen: {e}", exc_info=True)
+            job.error = str(e)
+        finally:
+            if stream is not None:
+                # Schließt die Verbindung zu Ollama (bricht einen laufenden Download ab)
+                stream.close()
+
+        if job.cancel_requested.is_set():
+            status = "cancelled"
+        elif job.error is None and job.phase == "success":
+            status = "success"
+        else:
+            status = "failed"
+            job.error = job.error or f"Download ohne Abschluss beendet ({job.phase})"
+
+        if status == "success" and warm:
+            with job.changed:
+                job.status = "warming"
+                job.version += 1
+                job.changed.notify_all()
+            job.warmed = self.client.warm_up(job.model, self.keep_alive)
+
+        with job.changed:
+            job.status = status
+            job.finished_at = time.time()
+            job.version += 1
+            job.changed.notify_all()
+
+        log = ollama_logger.info if status == "success" else ollama_logger.warning
+        log(f"🏁 Modell-Download [{job.id}] {job.model}: {status} ({job.runtime:.1f}s){' - ' + job.error if job.error else ''}")
+        if self.on_finish:
+            try:
+                self.on_finish(job)
+            except Exception as e:
+                ollama_logger.error(f"❌ on_finish-Callback fehlgeschlagen [{job.id}]: {e}")
+
+    def cancel(self, job_id: str) -> Optional[PullJob]:
+        """
+        Bricht einen laufenden Download ab (wirksam mit der nächsten Meldung von Ollama)
+        """
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        job.cancel_requested.set()
+        ollama_logger.info(f"🛑 Modell-Download abgebrochen [{job.id}]: {job.model}")
+        return job
+
+    def get(self, job_id: str) -> Optional[PullJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with job.changed:
+            return job.to_dict()
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.started_at)
+        result = []
+        for job in jobs:
+            with job.changed:
+                result.append(job.to_dict())
+        return result
+
+    def follow(self, job_id: str, interval: float = 0.5, heartbeat: float = 15.0):
+        """
+        Generator für Live-Streaming (SSE): höchstens alle interval Sekunden ein Fortschritts-Event
+
+        Yields:
+            Dicts mit type ("progress" | "heartbeat" | "done") und dem Job-Status
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+
+        seen = -1
+        while True:
+            with job.changed:
+                if not job.done and job.version == seen:
+                    job.changed.wait(timeout=heartbeat)
+                changed = job.version != seen
+                seen = job.version
+                data = job.to_dict()
+                done = job.done
+
+            if done:
+                yield {"type": "done", **data}
+                return
+            yield {"type": "progress" if changed else "heartbeat", **data}
+            # Ollama meldet viele Male pro Sekunde: Events drosseln
+            time.sleep(interval)
+
+    def _prune(self) -> None:
+        """Entfernt die ältesten beendeten Jobs über keep_finished hinaus (erwartet _lock)"""
+        finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.started_at)
+        for job in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job.id]
+
+    def shutdown(self) -> None:
+        """Bricht alle laufenden Downloads ab"""
+        with self._lock:
+            running = [job for job in self._jobs.values() if not job.done]
+        for job in running:
+            self.cancel(job.id)
+
+
+def create_model_pull_manager(client, cfg: Optional[Dict[str, Any]] = None, on_finish=None) -> ModelPullManager:
+    """Erstellt den Manager aus dem Config-Abschnitt 'model_pulls'"""
+    cfg = cfg or {}
+    return ModelPullManager(
+        client,
+        max_concurrent=cfg.get("max_concurrent", 2),
+        keep_finished=cfg.get("keep_finished", 20),
+        warm_up=cfg.get("warm_up", False),
+        keep_alive=cfg.get("keep_alive", "5m"),
+        on_finish=on_finish,
+    )
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Modell-Routing für LocalAgent-Pro
+Wählt pro Anfrage das Ollama-Modell: kurze, einfache Prompts an ein kleines
+schnelles Modell, Überlauf auf Fallback-Modelle, wenn das Hauptmodell ausgelastet
+ist (Wartezeit auf einen freien Platz) oder seine p95-Latenz zu hoch ist.
+Schlägt ein Modell fehl, wird das nächste der Kette versucht.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+ollama_logger = logging_manager.create_ollama_logger()
+
+
+class ModelSlots:
+    """Latenzen und Parallelitätslimit eines Modells"""
+
+    def __init__(self, max_concurrent: int = 0, window_seconds: float = 300.0, max_samples: int = 1000):
+        self.max_concurrent = max_concurrent
+        self.window_seconds = window_seconds
+        self.inflight = 0
+        self._cond = threading.Condition()
+        self._latencies: deque = deque(maxlen=max_samples)
+
+    def acquire(self, timeout: float) -> Optional[float]:
+        """
+        Belegt einen Platz (wartet höchstens timeout Sekunden)
+
+        Returns:
+            Wartezeit in Sekunden oder None, wenn kein Platz frei wurde
+        """
+        started = time.monotonic()
+        with self._cond:
+            if self.max_concurrent > 0:
+                deadline = started + timeout
+                while self.inflight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+            self.inflight += 1
+        return time.monotonic() - started
+
+    def release(self) -> None:
+        with self._cond:
+            self.inflight -= 1
+            self._cond.notify()
+
+    def record(self, latency: float) -> None:
+        with self._cond:
+            self._latencies.append((time.monotonic(), latency))
+
+    def p95(self, min_samples: int = 1) -> Optional[float]:
+        """p95 der Latenzen im Zeitfenster (None bei zu wenigen Messungen)"""
+        cutoff = time.monotonic() - self.window_seconds
+        with self._cond:
+            values = sorted(latency for at, latency in self._latencies if at >= cutoff)
+        if not values or len(values) < min_samples:
+            return None
+        return values[min(len(values) - 1, math.ceil(0.95 * len(values)) - 1)]
+
+
+class ModelRouter:
+    """
+    Routing-Kette pro Anfrage
+
+    Reihenfolge: kleines Modell (nur einfache Prompts) → Hauptmodell → Fallbacks.
+    Ist das Hauptmodell zu langsam (p95), rückt es hinter die Fallbacks; ist kein
+    Platz frei, wird nach max_queue_wait zum nächsten Modell übergelaufen.
+    """
+
+    def __init__(
+        self,
+        primary: str,
+        small_model: Optional[str] = None,
+        small_max_chars: int = 200,
+        fallback_models: Optional[List[str]] = None,
+        max_concurrent: int = 0,
+        max_queue_wait: float = 2.0,
+        p95_threshold: float = 0.0,
+        min_samples: int = 10,
+        window_seconds: float = 300.0
+    ):
+        """
+        Args:
+            primary: Hauptmodell
+            small_model: Kleines Modell für kurze, einfache Prompts (None = aus)
+            small_max_chars: Max. Prompt-Länge für das kleine Modell
+            fallback_models: Überlauf-Modelle in Reihenfolge
+            max_concurrent: Gleichzeitige Requests pro Modell (0 = unbegrenzt)
+            max_queue_wait: Max. Wartezeit auf einen freien Platz, danach Überlauf (Sekunden)
+            p95_threshold: p95-Latenz des Hauptmodells, ab der übergelaufen wird (0 = aus)
+            min_samples: Messungen im Zeitfenster, bevor p95 berücksichtigt wird
+            window_seconds: Zeitfenster der Latenzmessung (ohne neue Messungen erhält
+                das Hauptmodell wieder Verkehr)
+        """
+        self.primary = primary
+        self.small_model = small_model
+        self.small_max_chars = small_max_chars
+        self.fallback_models = [m for m in (fallback_models or []) if m != primary]
+        self.max_queue_wait = max_queue_wait
+        self.p95_threshold = p95_threshold
+        self.min_samples = min_samples
+        self.max_concurrent = max_concurrent
+        self.window_seconds = window_seconds
+
+        self._slots: Dict[str, ModelSlots] = {}
+        for name in [primary, small_model, *self.fallback_models]:
+            if name and name not in self._slots:
+                self._slots[name] = ModelSlots(max_concurrent, window_seconds)
+
+    @property
+    def models(self) -> List[str]:
+        return list(self._slots)
+
+    def is_simple(self, prompt: str) -> bool:
+        """Kurz, einzeilig genug und ohne Code: geeignet für das kleine Modell"""
+        return len(prompt) <= self.small_max_chars and "```" not in prompt and prompt.count("\n") < 3
+
+    def p95(self, model: str) -> Optional[float]:
+        slots = self._slots.get(model)
+        return slots.p95(self.min_samples) if slots else None
+
+    def plan(self, prompt: str, requested: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Routing-Kette für einen Prompt
+
+        Args:
+            prompt: User-Prompt
+            requested: Vom Client ausdrücklich gewähltes Modell (ersetzt die Kette)
+
+        Returns:
+            Liste (Modell, Grund) in Versuchsreihenfolge; Gründe: 'small', 'primary',
+            'p95' (Hauptmodell zu langsam), 'fallback', 'requested'
+        """
+        if requested:
+            return [(requested, "requested")]
+        chain: List[Tuple[str, str]] = []
+        if self.small_model and self.is_simple(prompt):
+            chain.append((self.small_model, "small"))
+
+        p95 = self.p95(self.primary)
+        if self.p95_threshold > 0 and p95 is not None and p95 > self.p95_threshold and self.fallback_models:
+            chain += [(model, "p95") for model in self.fallback_models]
+            chain.append((self.primary, "primary"))
+        else:
+            chain.append((self.primary, "primary"))
+            chain += [(model, "fallback") for model in self.fallback_models]
+
+        seen = set()
+        return [(m, r) for m, r in chain if not (m in seen or seen.add(m))]
+
+    def run(
+        self,
+        prompt: str,
+        call: Callable[[str], Optional[str]],
+        available: Optional[Callable[[], bool]] = None,
+        requested: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Führt call(model) entlang der Routing-Kette aus, bis ein Modell antwortet
+
+        Args:
+            prompt: User-Prompt (für die Einstufung)
+            call: Generiert mit dem übergebenen Modell, None bei Fehler
+            available: False = Ollama nicht erreichbar, keine weiteren Versuche
+            requested: Ausdrücklich gewähltes Modell, ohne Routing und Überlauf
+
+        Returns:
+            Dict mit text, model (das antwortende bzw. zuletzt versuchte Modell),
+            route (Grund, siehe plan(); 'queue' = wegen Wartezeit übergelaufen),
+            status ('success' | 'failed' | 'overloaded' | 'unavailable') und attempts
+        """
+        chain = self.plan(prompt, requested)
+        attempts: List[Dict[str, Any]] = []
+        overflow = None
+        model, reason = chain[0]
+
+        for model, reason in chain:
+            if overflow:
+                reason = overflow
+            slots = self._slots.get(model)
+            if slots is None:
+                slots = self._slots.setdefault(model, ModelSlots(self.max_concurrent, self.window_seconds))
+            waited = slots.acquire(self.max_queue_wait)
+            if waited is None:
+                attempts.append({"model": model, "result": "busy"})
+                ollama_logger.info(f"🔀 {model} ausgelastet (>{self.max_queue_wait:.1f}s Wartezeit), Überlauf")
+                overflow = "queue"
+                continue
+
+            started = time.monotonic()
+            try:
+                text = call(model)
+            finally:
+                slots.release()
+            duration = time.monotonic() - started
+            # Auch Fehlversuche zählen: ein langsam scheiternder Primary (Timeouts) soll den p95-Überlauf auslösen
+            slots.record(duration)
+
+            if text:
+                attempts.append({"model": model, "result": "success", "seconds": round(duration, 3)})
+                if reason != "primary":
+                    ollama_logger.info(f"🔀 Antwort von {model} (Route: {reason}) in {duration:.2f}s")
+                return {"text": text, "model": model, "route": reason, "status": "success", "attempts": attempts}
+
+            attempts.append({"model": model, "result": "failed", "seconds": round(duration, 3)})
+            if available is not None and not available():
+                return {"text": None, "model": model, "route": reason, "status": "unavailable", "attempts": attempts}
+            overflow = "fallback" if reason != "small" else None
+            ollama_logger.warning(f"⚠️ {model} lieferte keine Antwort, versuche nächstes Modell")
+
+        status = "overloaded" if all(a["result"] == "busy" for a in attempts) else "failed"
+        return {"text": None, "model": model, "route": reason, "status": status, "attempts": attempts}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            model: {"inflight": slots.inflight, "p95": slots.p95(self.min_samples)}
+            for model, slots in self._slots.items()
+        }
+
+
+def create_model_router(primary: str, cfg: Optional[Dict[str, Any]] = None) -> ModelRouter:
+    """
+    Erstellt den Router aus dem Config-Abschnitt 'model_routing'
+
+    Ohne enabled: true nur das Hauptmodell (Verhalten wie bisher).
+    """
+    cfg = cfg or {}
+    if not cfg.get("enabled", False):
+        return ModelRouter(cfg.get("primary") or primary)
+    return ModelRouter(
+        cfg.get("primary") or primary,
+        small_model=cfg.get("small_model"),
+        small_max_chars=cfg.get("small_max_chars", 200),
+        fallback_models=cfg.get("fallback_models", []),
+        max_concurrent=cfg.get("max_concurrent", 0),
+        max_queue_wait=cfg.get("max_queue_wait_seconds", 2.0),
+        p95_threshold=cfg.get("p95_threshold_seconds", 0.0),
+        min_samples=cfg.get("min_samples", 10),
+        window_seconds=cfg.get("latency_window_seconds", 300.0),
+    )
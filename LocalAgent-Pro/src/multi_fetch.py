@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Paralleles Laden mehrerer URLs für LocalAgent-Pro
+URL-Extraktion aus dem Prompt (in Prompt-Reihenfolge), gleichzeitiges Laden mit
+Gesamtfrist, Limit pro Host und gemeinsamem Zeichenbudget
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+# Reihenfolge = Priorität bei überlappenden Treffern (https://www.x vor www.x)
+URL_PATTERNS = [
+    r'(https?://(?!127\.0\.0\.1|localhost)[^\s<>"\']+)',  # NICHT localhost/127.0.0.1
+    r'(www\.[^\s<>"\']+)',
+    r'(?:hole|fetch|lade)\s+([a-zA-Z0-9.-]+\.(?:com|org|net|de|edu|gov|io|co))\b',
+]
+# Satzzeichen am Ende gehören nicht zur URL ("Siehe https://x.org/a.")
+TRAILING_PUNCTUATION = ".,;:!?)]}'\""
+
+
+def extract_urls(prompt: str, max_urls: int = 10) -> List[str]:
+    """
+    Findet alle URLs im Prompt in Reihenfolge ihres Auftretens (ohne Duplikate)
+
+    Args:
+        prompt: Benutzer-Prompt
+        max_urls: Max. Anzahl URLs
+
+    Returns:
+        Liste der URLs (ohne localhost/127.0.0.1)
+    """
+    spans = []
+    for pattern in URL_PATTERNS:
+        for match in re.finditer(pattern, prompt, re.IGNORECASE):
+            start, end = match.span(1)
+            if any(start < s_end and end > s_start for s_start, s_end, _ in spans):
+                continue
+            url = match.group(1).rstrip(TRAILING_PUNCTUATION)
+            # Zusätzliche Sicherheit: Ignoriere localhost auch in anderen Formen
+            if '127.0.0.1' in url or 'localhost' in url.lower():
+                continue
+            spans.append((start, end, url))
+
+    urls = []
+    for _, _, url in sorted(spans):
+        if url not in urls:
+            urls.append(url)
+    if len(urls) > max_urls:
+        tool_logger.warning(f"⚠️ {len(urls)} URLs im Prompt, lade nur die ersten {max_urls}")
+    return urls[:max_urls]
+
+
+def _host(url: str) -> str:
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return (urlparse(url).hostname or "").lower()
+
+
+def fetch_many(
+    fetch_fn: Callable[[str, int], str],
+    urls: List[str],
+    deadline: float = 30.0,
+    max_workers: int = 8,
+    per_host: int = 2,
+    total_chars: int = 30000,
+    max_chars: int = 10000,
+    cancel: Optional[threading.Event] = None
+) -> List[Dict[str, Any]]:
+    """
+    Lädt mehrere URLs gleichzeitig
+
+    Args:
+        fetch_fn: Lädt eine URL: fetch_fn(url, max_chars) → Text
+        urls: URLs in Prompt-Reihenfolge
+        deadline: Gesamtfrist in Sekunden, danach offene URLs als 'timeout'
+        max_workers: Max. gleichzeitige Downloads
+        per_host: Max. gleichzeitige Downloads pro Host
+        total_chars: Gemeinsames Zeichenbudget aller Ergebnisse
+        max_chars: Obergrenze pro URL
+        cancel: Wird nach der Gesamtfrist gesetzt; fetch_fn sollte es beim Lesen prüfen
+            und laufende Downloads abbrechen
+
+    Returns:
+        Liste in Prompt-Reihenfolge: {url, status ('ok' | 'error' | 'timeout'), result, elapsed}
+    """
+    if not urls:
+        return []
+
+    # Budget gleichmäßig verteilen, damit eine große Seite nicht alle anderen verdrängt
+    share = max(min(max_chars, total_chars // len(urls)), 1)
+    cancel = cancel or threading.Event()
+    started = time.monotonic()
+    host_slots: Dict[str, threading.Semaphore] = {}
+    for url in urls:
+        host_slots.setdefault(_host(url), threading.Semaphore(per_host))
+
+    def timed_out(url: str) -> Dict[str, Any]:
+        return {"url": url, "status": "timeout", "result": f"⏰ Nicht innerhalb der Gesamtfrist von {deadline:.0f}s geladen", "elapsed": None}
+
+    def run(url: str) -> Dict[str, Any]:
+        slot = host_slots[_host(url)]
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0 or not slot.acquire(timeout=remaining):
+            return timed_out(url)
+        if cancel.is_set():
+            slot.release()
+            return timed_out(url)
+        url_started = time.monotonic()
+        try:
+            result = {"url": url, "status": "ok", "result": fetch_fn(url, share)}
+        except Exception as e:
+            result = {"url": url, "status": "error", "result": f"❌ Web-Fehler: {str(e)}"}
+        finally:
+            slot.release()
+        result["elapsed"] = time.monotonic() - url_started
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)), thread_name_prefix="fetch")
+    futures = [executor.submit(run, url) for url in urls]
+    _, pending = wait(futures, timeout=deadline)
+    # Laufende Downloads nicht abwarten, aber abbrechen (fetch_fn prüft cancel je Block)
+    cancel.set()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    if pending:
+        tool_logger.warning(f"⏰ Gesamtfrist {deadline:.0f}s überschritten: {len(pending)}/{len(urls)} URLs offen")
+    results = [
+        future.result() if future not in pending else timed_out(url)
+        for url, future in zip(urls, futures)
+    ]
+    tool_logger.info(
+        f"🌐 {len(urls)} URLs geladen in {time.monotonic() - started:.2f}s "
+        f"({sum(r['status'] == 'ok' for r in results)} ok, {sum(r['status'] == 'timeout' for r in results)} Timeout)"
+    )
+    return results
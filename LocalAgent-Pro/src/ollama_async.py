@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Asynchroner Ollama-Client für LocalAgent-Pro
+Gleiche Schnittstelle wie OllamaClient (generate, chat, list_models,
+get_model_info, pull_model), aber als Coroutinen für viele gleichzeitige
+Generierungen in einer Event-Loop. Streams sind async Iteratoren über die
+Text-Stücke; Abbruch (aclose/Task-Cancel) schließt die Verbindung, Ollama
+beendet dann die Generierung.
+"""
+
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional
+
+import httpx
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager, truncate_long_content
+    from src.http_pool import CircuitBreaker, CircuitOpenError
+    from src.ollama_integration import ollama_client_kwargs
+except ImportError:
+    from logging_config import get_logging_manager, truncate_long_content
+    from http_pool import CircuitBreaker, CircuitOpenError
+    from ollama_integration import ollama_client_kwargs
+
+logging_manager = get_logging_manager()
+ollama_logger = logging_manager.create_ollama_logger()
+
+# Wiederholbar: Verbindung kam nicht zustande bzw. brach vor der Antwort ab
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError, httpx.PoolTimeout)
+
+
+def _stream_stats(data: Dict[str, Any], started: float) -> Dict[str, Any]:
+    """Statistik aus der abschließenden Ollama-Nachricht (done: true)"""
+    eval_count = data.get("eval_count", 0)
+    eval_duration = data.get("eval_duration", 0) / 1e9
+    return {
+        "model": data.get("model"),
+        "done_reason": data.get("done_reason"),
+        "prompt_tokens": data.get("prompt_eval_count", 0),
+        "eval_count": eval_count,
+        "eval_duration": eval_duration,
+        "load_duration": data.get("load_duration", 0) / 1e9,
+        "total_duration": data.get("total_duration", 0) / 1e9,
+        "tokens_per_second": eval_count / eval_duration if eval_duration > 0 else 0.0,
+        "elapsed": time.monotonic() - started,
+    }
+
+
+class AsyncOllamaStream:
+    """
+    Async Iterator über die Text-Stücke einer Antwort
+
+    Nach dem Ende enthält stats die Statistik der letzten Ollama-Nachricht
+    (eval_count, tokens_per_second, ...). aclose() bzw. das Verlassen von
+    'async with' bricht ab und schließt die Verbindung.
+    """
+
+    def __init__(self, client: "AsyncOllamaClient", path: str, payload: Dict[str, Any], field: str, request_id: str):
+        self._client = client
+        self._path = path
+        self._payload = payload
+        self._field = field
+        self.request_id = request_id
+        self.stats: Optional[Dict[str, Any]] = None
+        self.chunks = 0
+        self._iterator = self._run()
+
+    def __aiter__(self) -> "AsyncOllamaStream":
+        return self
+
+    async def __anext__(self) -> str:
+        return await self._iterator.__anext__()
+
+    async def __aenter__(self) -> "AsyncOllamaStream":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._iterator.aclose()
+
+    async def text(self) -> str:
+        """Liest den Stream vollständig und liefert den zusammengesetzten Text"""
+        return "".join([piece async for piece in self])
+
+    def _extract(self, data: Dict[str, Any]) -> str:
+        if self._field == "message":
+            return data.get("message", {}).get("content", "")
+        return data.get(self._field, "")
+
+    async def _run(self) -> AsyncIterator[str]:
+        started = time.monotonic()
+        response = await self._client._send(
+            "POST", self._path, self.request_id, stream=True, json=self._payload
+        )
+        try:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise httpx.HTTPStatusError(
+                        f"Ollama-Fehler im Stream: {data['error']}", request=response.request, response=response
+                    )
+                content = self._extract(data)
+                if content:
+                    self.chunks += 1
+                    yield content
+                if data.get("done"):
+                    self.stats = _stream_stats(data, started)
+                    ollama_logger.info(
+                        f"✅ Stream beendet [{self.request_id}]: {self.stats['eval_count']} tokens "
+                        f"in {self.stats['elapsed']:.2f}s ({self.stats['tokens_per_second']:.1f} tokens/s)"
+                    )
+                    return
+        except (asyncio.CancelledError, GeneratorExit):
+            ollama_logger.info(f"🛑 Stream [{self.request_id}] nach {self.chunks} Stücken abgebrochen, Verbindung geschlossen")
+            raise
+        except httpx.HTTPError as e:
+            if self.chunks:
+                ollama_logger.error(f"❌ Stream [{self.request_id}] nach {self.chunks} Stücken abgebrochen: {str(e)}")
+            raise
+        finally:
+            # Nicht vollständig gelesene Antwort: Verbindung wird verworfen statt wiederverwendet
+            await response.aclose()
+
+
+class AsyncOllamaClient:
+    """Asynchroner Client für die Ollama-API (ein Verbindungspool pro Backend)"""
+
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:11434",
+        timeout: int = 60,
+        default_model: str = "llama3.1:8b-instruct-q4_K_M",
+        connect_timeout: float = 5.0,
+        read_timeout: Optional[float] = None,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0
+    ):
+        """
+        Initialisiert den Client (Argumente wie OllamaClient)
+
+        Der Verbindungspool wird mit dem ersten Request in der laufenden Event-Loop
+        angelegt; aclose() bzw. 'async with' gibt ihn frei.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.default_model = default_model
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout if read_timeout is not None else timeout
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        self._http: Optional[httpx.AsyncClient] = None
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+        ollama_logger.info(
+            f"🤖 Async-Ollama-Client: {self.base_url} (connect {self.connect_timeout}s, "
+            f"read {self.read_timeout}s, Pool {pool_size}, Retries {max_retries})"
+        )
+
+    async def __aenter__(self) -> "AsyncOllamaClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Gemeinsamer Keep-Alive-Pool für alle Requests an dieses Backend"""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self._http
+
+    def stats(self) -> Dict[str, Any]:
+        """Request-Statistik: requests, retries, failures, rejected (Circuit offen)"""
+        return dict(self._stats)
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponentielles Backoff mit Full Jitter (wie OllamaClient)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        request_id: str = "-",
+        read_timeout: Optional[float] = None,
+        stream: bool = False,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Sendet einen Request mit Retries bei Verbindungsfehlern und 5xx
+
+        Bei stream=True wird nur bis zum Empfang der Header wiederholt.
+
+        Returns:
+            Response (bei stream=True ungelesen; Aufrufer schließt sie mit aclose())
+
+        Raises:
+            CircuitOpenError: Ollama gilt als nicht erreichbar
+            httpx.HTTPError: Nach dem letzten Versuch
+        """
+        if not self.breaker.allow():
+            self._stats["rejected"] += 1
+            raise CircuitOpenError(self.base_url, self.breaker.retry_in())
+
+        timeout = httpx.Timeout(read_timeout or self.read_timeout, connect=self.connect_timeout)
+        healthy = cancelled = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                self._stats["requests"] += 1
+                try:
+                    request = self.http.build_request(method, path, timeout=timeout, **kwargs)
+                    response = await self.http.send(request, stream=stream)
+                except RETRYABLE_ERRORS as e:
+                    # ReadTimeout wird nicht wiederholt: Generierung läuft evtl. noch
+                    error: Exception = e
+                else:
+                    if response.status_code < 500:
+                        healthy = True
+                        return response
+                    if stream:
+                        await response.aread()
+                    error = httpx.HTTPStatusError(
+                        f"{response.status_code} Server Error: {self.base_url}{path}", request=request, response=response
+                    )
+                    await response.aclose()
+
+                if attempt == self.max_retries:
+                    self._stats["failures"] += 1
+                    if isinstance(error, httpx.HTTPStatusError):
+                        # Letzte Antwort zurückgeben; raise_for_status des Aufrufers meldet den Fehler
+                        return error.response
+                    raise error
+
+                delay = self._backoff(attempt)
+                self._stats["retries"] += 1
+                ollama_logger.warning(
+                    f"🔁 Async-Ollama-Request [{request_id}] fehlgeschlagen ({str(error) or type(error).__name__}), "
+                    f"Versuch {attempt + 2}/{self.max_retries + 1} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if healthy:
+                self.breaker.record_success()
+            elif cancelled:
+                # Abbruch durch den Aufrufer sagt nichts über Ollama: nur den Testaufruf freigeben
+                self.breaker.release()
+            elif self.breaker.record_failure():
+                ollama_logger.warning(
+                    f"⚡ Circuit Breaker offen für Ollama ({self.breaker.failures} Fehler in Folge), "
+                    f"Requests werden {self.breaker.reset_timeout:.0f}s sofort abgelehnt"
+                )
+
+    # === Streams ===
+
+    def generate_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncOllamaStream:
+        """
+        Generiert Text als Stream (POST /api/generate)
+
+        Returns:
+            AsyncOllamaStream: 'async for piece in stream', danach stream.stats
+        """
+        model = model or self.default_model
+        request_id = str(time.time())[-8:]
+        payload: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": True, "options": {"temperature": temperature}}
+        if system:
+            payload["system"] = system
+        if max_tokens:
+            payload["options"]["num_predict"] = max_tokens
+        ollama_logger.info(f"🧠 Async Generate-Stream [{request_id}] gestartet (Model: {model})")
+        ollama_logger.debug(f"👤 Prompt [{request_id}]: {truncate_long_content(prompt, 300)}")
+        return AsyncOllamaStream(self, "/api/generate", payload, "response", request_id)
+
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncOllamaStream:
+        """
+        Chat als Stream (POST /api/chat)
+
+        Returns:
+            AsyncOllamaStream: 'async for piece in stream', danach stream.stats
+        """
+        model = model or self.default_model
+        request_id = str(time.time())[-8:]
+        payload: Dict[str, Any] = {"model": model, "messages": messages, "stream": True, "options": {"temperature": temperature}}
+        if max_tokens:
+            payload["options"]["num_predict"] = max_tokens
+        ollama_logger.info(f"💬 Async Chat-Stream [{request_id}] gestartet (Model: {model}, Messages: {len(messages)})")
+        return AsyncOllamaStream(self, "/api/chat", payload, "message", request_id)
+
+    # === Schnittstelle wie OllamaClient ===
+
+    async def list_models(self) -> Optional[List[Dict[str, Any]]]:
+        """Listet verfügbare Ollama-Modelle auf (None bei Fehler)"""
+        try:
+            response = await self._send("GET", "/api/tags")
+            response.raise_for_status()
+            models = response.json().get("models", [])
+            ollama_logger.info(f"✅ Modelle abgerufen: {len(models)} Modelle")
+            return models
+        except CircuitOpenError as e:
+            ollama_logger.warning(f"⚡ Modelle nicht abgerufen: {str(e)}")
+        except httpx.HTTPError as e:
+            ollama_logger.error(f"❌ Fehler beim Abrufen der Modelle: {str(e) or type(e).__name__}")
+        return None
+
+    async def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        conversation_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Generiert Text (wie OllamaClient.generate); None bei Fehler"""
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        return await self._chat_once(messages, model, temperature, max_tokens, "Generate")
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        stream: bool = False,
+        conversation_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Chat (wie OllamaClient.chat); stream=True liest gestreamt und gibt den Text zurück"""
+        if not stream:
+            return await self._chat_once(messages, model, temperature, None, "Chat")
+        try:
+            async with self.chat_stream(messages, model=model, temperature=temperature) as chat_stream:
+                return await chat_stream.text()
+        except CircuitOpenError as e:
+            ollama_logger.warning(f"⚡ Chat abgelehnt: {str(e)}")
+        except httpx.HTTPError as e:
+            ollama_logger.error(f"❌ Chat-Stream fehlgeschlagen: {str(e) or type(e).__name__}")
+        return None
+
+    async def _chat_once(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        label: str
+    ) -> Optional[str]:
+        model = model or self.default_model
+        request_id = str(time.time())[-8:]
+        payload: Dict[str, Any] = {"model": model, "messages": messages, "stream": False, "options": {"temperature": temperature}}
+        if max_tokens:
+            payload["options"]["num_predict"] = max_tokens
+        ollama_logger.info(f"🧠 Async {label} [{request_id}] gestartet (Model: {model})")
+
+        started = time.monotonic()
+        try:
+            response = await self._send("POST", "/api/chat", request_id, json=payload)
+            response.raise_for_status()
+            result = response.json()
+            stats = _stream_stats(result, started)
+            ollama_logger.info(
+                f"✅ Async {label} erfolgreich [{request_id}]: {stats['eval_count']} tokens "
+                f"in {stats['elapsed']:.2f}s ({stats['tokens_per_second']:.1f} tokens/s)"
+            )
+            return result.get("message", {}).get("content", "")
+        except CircuitOpenError as e:
+            ollama_logger.warning(f"⚡ {label} [{request_id}] abgelehnt: {str(e)}")
+        except httpx.TimeoutException:
+            ollama_logger.error(f"⏰ {label} Timeout [{request_id}] (>{self.read_timeout}s)")
+        except httpx.HTTPError as e:
+            ollama_logger.error(f"❌ {label} Request-Fehler [{request_id}]: {str(e) or type(e).__name__}")
+        except ValueError as e:
+            ollama_logger.error(f"❌ {label} ungültige Antwort [{request_id}]: {str(e)}")
+        return None
+
+    async def pull_model(self, model: str) -> bool:
+        """Lädt ein Modell herunter (wie OllamaClient.pull_model)"""
+        ollama_logger.info(f"📥 Pulling Model: {model}")
+        try:
+            response = await self._send("POST", "/api/pull", read_timeout=600, json={"name": model, "stream": False})
+            response.raise_for_status()
+            ollama_logger.info(f"✅ Model Pull erfolgreich: {model} ({response.json().get('status', '')})")
+            return True
+        except CircuitOpenError as e:
+            ollama_logger.warning(f"⚡ Model Pull abgelehnt: {str(e)}")
+        except (httpx.HTTPError, ValueError) as e:
+            ollama_logger.error(f"❌ Model Pull Fehler: {str(e) or type(e).__name__}")
+        return False
+
+    async def get_model_info(self, model: str) -> Optional[Dict[str, Any]]:
+        """Holt Informationen zu einem Modell (None bei Fehler)"""
+        try:
+            response = await self._send("POST", "/api/show", json={"name": model})
+            response.raise_for_status()
+            return response.json()
+        except (CircuitOpenError, httpx.HTTPError, ValueError) as e:
+            ollama_logger.error(f"❌ Fehler beim Abrufen der Model-Info: {str(e) or type(e).__name__}")
+            return None
+
+
+def create_async_ollama_client(cfg: Optional[Dict[str, Any]] = None) -> AsyncOllamaClient:
+    """Erstellt den Async-Client aus dem Config-Abschnitt 'ollama' (wie der synchrone Client)"""
+    return AsyncOllamaClient(**ollama_client_kwargs(cfg or {}))
@@ -1,25 +1,61 @@
 #!/usr/bin/env python3
 """
 Ollama-Integration für LocalAgent-Pro
-Umfassendes Logging für Ollama-API-Calls
+Umfassendes Logging für Ollama-API-Calls; Erreichbarkeit wird im Hintergrund
+geprüft (Health-Monitor + Circuit Breaker), nicht beim Start
 """
 
 import requests
 import json
+import random
+import threading
 import time
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Any
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
 
 # Dynamischer Import je nach Kontext
 try:
     from src.logging_config import get_logging_manager, truncate_long_content, mask_sensitive_data
+    from src.http_pool import CircuitBreaker, CircuitOpenError
 except ImportError:
     from logging_config import get_logging_manager, truncate_long_content, mask_sensitive_data
+    from http_pool import CircuitBreaker, CircuitOpenError
 
 # Logger erstellen
 logging_manager = get_logging_manager()
 ollama_logger = logging_manager.create_ollama_logger()
 
 
+def _iter_ndjson_lines(response) -> Iterator[bytes]:
+    """
+    Liefert NDJSON-Zeilen, sobald sie empfangen sind (iter_lines puffert
+    512 Byte und würde einzelne Tokens zurückhalten)
+    """
+    raw = response.raw
+    if not hasattr(raw, "read1"):
+        yield from response.iter_lines()
+        return
+    buffer = b""
+    try:
+        while True:
+            data = raw.read1(8192)
+            if not data:
+                break
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield line
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    if buffer:
+        yield buffer
+
+
 class OllamaClient:
     """Client für Ollama-API mit umfassendem Logging"""
     
@@ -27,56 +63,279 @@ class OllamaClient:
         self, 
         base_url: str = "http://127.0.0.1:11434",
         timeout: int = 60,
-        default_model: str = "llama3.1:8b-instruct-q4_K_M"
+        default_model: str = "llama3.1:8b-instruct-q4_K_M",
+        connect_timeout: float = 5.0,
+        read_timeout: Optional[float] = None,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0
     ):
         """
         Initialisiert Ollama-Client
         
         Args:
             base_url: Basis-URL der Ollama-API
-            timeout: Request-Timeout in Sekunden
+            timeout: Request-Timeout in Sekunden (Standard für read_timeout)
             default_model: Standard-Modell
+            connect_timeout: Timeout für den Verbindungsaufbau (Sekunden)
+            read_timeout: Timeout zwischen zwei empfangenen Bytes (None = timeout)
+            pool_size: Keep-Alive-Verbindungen zu Ollama (≈ gleichzeitige Requests)
+            max_retries: Wiederholungen bei Verbindungsfehlern und 5xx (nie nach Stream-Beginn)
+            backoff_base: Basis für exponentielles Backoff mit Jitter (Sekunden)
+            backoff_max: Obergrenze für eine Wartezeit (Sekunden)
+            failure_threshold: Fehlgeschlagene Requests/Probes in Folge, ab denen sofort abgelehnt wird
+            reset_timeout: Sekunden bis zum nächsten Testaufruf bei offenem Circuit
+        
+        Die Erreichbarkeit wird nicht mehr beim Erstellen geprüft (blockierte den
+        Serverstart bei gestopptem Ollama), siehe start_health_monitor().
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
         self.default_model = default_model
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout if read_timeout is not None else timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        
+        # Eine Session mit Keep-Alive-Pool für alle Threads (Ollama setzt keine Cookies)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0}
+        
+        self.host = urlparse(self.base_url).hostname or self.base_url
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        # Ergebnis des letzten Requests je Thread (für Failover im Backend-Pool)
+        self._outcome = threading.local()
+        self._health: Dict[str, Any] = {"status": "unknown", "checked_at": None, "latency_ms": None, "error": None, "models": None}
+        self._monitor: Optional[threading.Thread] = None
+        self._monitor_stop = threading.Event()
+        # Benachrichtigt z.B. den Modellkatalog, wenn sich die Modellliste ändert
+        self._model_listeners: List[Callable[[str], None]] = []
         
         ollama_logger.info("=" * 80)
         ollama_logger.info("🤖 Ollama-Client initialisiert")
         ollama_logger.info(f"🔗 Base URL: {self.base_url}")
-        ollama_logger.info(f"⏱️ Timeout: {self.timeout}s")
+        ollama_logger.info(f"⏱️ Timeout: connect {self.connect_timeout}s, read {self.read_timeout}s")
+        ollama_logger.info(f"🔁 Retries: {self.max_retries} (Backoff {self.backoff_base}s-{self.backoff_max}s), Pool: {pool_size}")
         ollama_logger.info(f"🧠 Default Model: {self.default_model}")
         ollama_logger.info("=" * 80)
+    
+    def _backoff(self, attempt: int) -> float:
+        """Exponentielles Backoff mit Full Jitter: zufällig in [0, min(max, base * 2^attempt)]"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def _request(
+        self,
+        method: str,
+        path: str,
+        request_id: str = "-",
+        read_timeout: Optional[float] = None,
+        stream: bool = False,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Führt einen Request über die Session aus, mit Retries bei Verbindungsfehlern und 5xx
+        
+        Bei stream=True wird nur bis zum Empfang der Header wiederholt; Fehler beim
+        Lesen des Streams (nachdem Tokens geliefert wurden) werden nicht wiederholt.
         
-        # Verbindungstest
-        self._test_connection()
+        Returns:
+            Response (bei stream=True ungelesen; Aufrufer schließt sie)
+        
+        Raises:
+            CircuitOpenError: Ollama gilt als nicht erreichbar (sofortige Ablehnung ohne Verbindungsversuch)
+            requests.exceptions.RequestException: Nach dem letzten Versuch
+        """
+        if not self.breaker.allow():
+            with self._lock:
+                self._stats["rejected"] += 1
+            self._outcome.value = "rejected"
+            raise CircuitOpenError(self.host, self.breaker.retry_in())
+        
+        healthy = False
+        try:
+            response = self._request_with_retries(method, path, request_id, read_timeout, stream, **kwargs)
+            healthy = response.status_code < 500
+            return response
+        finally:
+            self._outcome.value = "ok" if healthy else "failed"
+            # Ein Ergebnis pro Request (nicht pro Versuch), damit Retries den Circuit nicht allein öffnen
+            if healthy:
+                self.breaker.record_success()
+            elif self.breaker.record_failure():
+                self._set_health("down", error=f"{self.breaker.failures} fehlgeschlagene Requests in Folge")
+                ollama_logger.warning(
+                    f"⚡ Circuit Breaker offen für Ollama ({self.breaker.failures} Fehler in Folge), "
+                    f"Requests werden {self.breaker.reset_timeout:.0f}s sofort abgelehnt"
+                )
     
-    def _test_connection(self) -> bool:
+    def _request_with_retries(
+        self,
+        method: str,
+        path: str,
+        request_id: str,
+        read_timeout: Optional[float],
+        stream: bool,
+        **kwargs
+    ) -> requests.Response:
+        url = f"{self.base_url}{path}"
+        timeout = (self.connect_timeout, read_timeout if read_timeout is not None else self.read_timeout)
+        
+        for attempt in range(self.max_retries + 1):
+            with self._lock:
+                self._stats["requests"] += 1
+            try:
+                response = self.session.request(method, url, timeout=timeout, stream=stream, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                # ReadTimeout ist kein ConnectionError: Generierung läuft evtl. noch, nicht doppelt starten
+                error = e
+            else:
+                if response.status_code < 500:
+                    return response
+                error = requests.exceptions.HTTPError(f"{response.status_code} Server Error: {url}", response=response)
+                response.close()
+            
+            if attempt == self.max_retries:
+                with self._lock:
+                    self._stats["failures"] += 1
+                if isinstance(error, requests.exceptions.HTTPError):
+                    # Letzte Antwort zurückgeben; raise_for_status des Aufrufers meldet den Fehler
+                    return error.response
+                raise error
+            
+            delay = self._backoff(attempt)
+            with self._lock:
+                self._stats["retries"] += 1
+            ollama_logger.warning(
+                f"🔁 Ollama-Request [{request_id}] fehlgeschlagen ({str(error)}), "
+                f"Versuch {attempt + 2}/{self.max_retries + 1} in {delay:.2f}s"
+            )
+            time.sleep(delay)
+    
+    def take_outcome(self) -> Optional[str]:
+        """
+        Ergebnis des letzten Requests dieses Threads und setzt es zurück
+
+        Returns:
+            'ok', 'failed' (Verbindung, Timeout, 5xx), 'rejected' (Circuit offen)
+            oder None (kein Request seit dem letzten Aufruf)
         """
-        Testet Verbindung zur Ollama-API
+        outcome = getattr(self._outcome, "value", None)
+        self._outcome.value = None
+        return outcome
+    
+    def stats(self) -> Dict[str, Any]:
+        """Request-Statistik: requests, retries, failures, rejected (Circuit offen)"""
+        with self._lock:
+            return dict(self._stats)
+    
+    def close(self) -> None:
+        self.stop_health_monitor()
+        self.session.close()
+    
+    def add_model_listener(self, callback: Callable[[str], None]) -> None:
+        """Registriert callback(model), aufgerufen nach einem erfolgreichen pull_model"""
+        self._model_listeners.append(callback)
+    
+    def _notify_model_change(self, model: str) -> None:
+        for callback in list(self._model_listeners):
+            try:
+                callback(model)
+            except Exception as e:
+                ollama_logger.error(f"❌ Modell-Listener fehlgeschlagen: {str(e)}", exc_info=True)
+    
+    # === Health-Monitor ===
+    
+    def _set_health(self, status: str, **fields) -> None:
+        with self._lock:
+            previous = self._health["status"]
+            self._health.update(status=status, checked_at=time.time(), **fields)
+        if previous != status:
+            if status == "up":
+                ollama_logger.info(f"✅ Ollama erreichbar auf {self.base_url}")
+            else:
+                ollama_logger.error(
+                    f"❌ Keine Verbindung zu Ollama auf {self.base_url} ({fields.get('error')}). "
+                    "Stelle sicher, dass Ollama läuft (systemctl status ollama)"
+                )
+    
+    def check_health(self, timeout: float = 5.0) -> bool:
+        """
+        Prüft die Erreichbarkeit (GET /api/tags) und aktualisiert Status und Circuit Breaker
+        
+        Die Probe umgeht den Circuit Breaker; ist Ollama wieder da, schließt sie ihn.
         
         Returns:
-            True wenn Verbindung erfolgreich
+            True wenn Ollama antwortet
         """
+        started = time.monotonic()
         try:
-            ollama_logger.debug("🔍 Teste Verbindung zu Ollama...")
-            url = f"{self.base_url}/api/tags"
-            
-            response = requests.get(url, timeout=5)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=(self.connect_timeout, timeout))
             response.raise_for_status()
-            
-            ollama_logger.info(f"✅ Ollama-Verbindung erfolgreich (Status: {response.status_code})")
-            return True
-            
-        except requests.exceptions.ConnectionError:
-            ollama_logger.error(
-                f"❌ Keine Verbindung zu Ollama auf {self.base_url}. "
-                "Stelle sicher, dass Ollama läuft (systemctl status ollama)"
-            )
-            return False
-        except Exception as e:
-            ollama_logger.error(f"❌ Verbindungstest fehlgeschlagen: {str(e)}", exc_info=True)
+            models = len(response.json().get("models", []))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            if self.breaker.record_failure():
+                ollama_logger.warning("⚡ Circuit Breaker offen für Ollama (Health-Probe fehlgeschlagen)")
+            self._set_health("down", latency_ms=None, error=str(e))
             return False
+        self.breaker.record_success()
+        self._set_health("up", latency_ms=round((time.monotonic() - started) * 1000, 1), error=None, models=models)
+        return True
+    
+    def _test_connection(self) -> bool:
+        """Testet Verbindung zur Ollama-API (synchron, siehe check_health)"""
+        return self.check_health()
+    
+    def start_health_monitor(self, interval: float = 15.0) -> None:
+        """
+        Startet die periodische Health-Probe in einem Daemon-Thread (erste Probe sofort)
+        
+        Args:
+            interval: Sekunden zwischen zwei Probes
+        """
+        if self._monitor is not None:
+            return
+        self._monitor_stop.clear()
+        
+        def run():
+            while True:
+                try:
+                    self.check_health()
+                except Exception as e:
+                    ollama_logger.error(f"❌ Health-Probe fehlgeschlagen: {str(e)}", exc_info=True)
+                if self._monitor_stop.wait(interval):
+                    return
+        
+        self._monitor = threading.Thread(target=run, name="ollama-health", daemon=True)
+        self._monitor.start()
+        ollama_logger.info(f"🩺 Ollama-Health-Monitor gestartet (alle {interval:.0f}s)")
+    
+    def stop_health_monitor(self) -> None:
+        self._monitor_stop.set()
+        if self._monitor is not None:
+            self._monitor.join(timeout=self.connect_timeout + 6)
+            self._monitor = None
+    
+    def health(self) -> Dict[str, Any]:
+        """
+        Letzter bekannter Zustand (ohne Live-Aufruf)
+        
+        Returns:
+            Dict mit status ('up' | 'down' | 'unknown'), circuit ('closed' | 'open' | 'half_open'),
+            retry_in, checked_at, latency_ms, error und models
+        """
+        with self._lock:
+            health = dict(self._health)
+        health["circuit"] = self.breaker.state
+        health["retry_in"] = round(self.breaker.retry_in(), 1)
+        return health
     
     def list_models(self) -> Optional[List[Dict[str, Any]]]:
         """
@@ -92,7 +351,7 @@ class OllamaClient:
             ollama_logger.debug(f"📡 GET {url}")
             
             start_time = time.time()
-            response = requests.get(url, timeout=self.timeout)
+            response = self._request("GET", "/api/tags")
             duration = time.time() - start_time
             
             response.raise_for_status()
@@ -111,8 +370,11 @@ class OllamaClient:
             
             return models
             
+        except CircuitOpenError as e:
+            ollama_logger.warning(f"⚡ Modelle nicht abgerufen: {str(e)}")
+            return None
         except requests.exceptions.Timeout:
-            ollama_logger.error(f"⏰ Timeout beim Abrufen der Modelle (>{self.timeout}s)")
+            ollama_logger.error(f"⏰ Timeout beim Abrufen der Modelle (>{self.read_timeout}s)")
             return None
         except requests.exceptions.RequestException as e:
             ollama_logger.error(f"❌ Fehler beim Abrufen der Modelle: {str(e)}", exc_info=True)
@@ -127,7 +389,8 @@ class OllamaClient:
         model: Optional[str] = None,
         system: Optional[str] = None,
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        conversation_id: Optional[str] = None
     ) -> Optional[str]:
         """
         Generiert Text mit Ollama
@@ -138,6 +401,7 @@ class OllamaClient:
             system: System-Prompt
             temperature: Temperatur (0.0 - 2.0)
             max_tokens: Max. Tokens (None = unbegrenzt)
+            conversation_id: Nur für OllamaBackendPool (Backend-Affinität), hier ohne Wirkung
         
         Returns:
             Generierter Text oder None bei Fehler
@@ -176,11 +440,7 @@ class OllamaClient:
             ollama_logger.debug(f"📡 POST {url}")
             
             start_time = time.time()
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._request("POST", "/api/chat", request_id, json=payload)
             duration = time.time() - start_time
             
             ollama_logger.debug(f"📊 Response Status [{request_id}]: {response.status_code}")
@@ -201,7 +461,7 @@ class OllamaClient:
             ollama_logger.info(
                 f"✅ Generate erfolgreich [{request_id}]: "
                 f"{eval_count} tokens in {duration:.2f}s "
-                f"({eval_count / eval_duration:.1f} tokens/s)"
+                f"({eval_count / eval_duration if eval_duration > 0 else 0:.1f} tokens/s)"
             )
             
             ollama_logger.debug(
@@ -216,8 +476,11 @@ class OllamaClient:
             
             return generated_text
             
+        except CircuitOpenError as e:
+            ollama_logger.warning(f"⚡ Generate [{request_id}] abgelehnt: {str(e)}")
+            return None
         except requests.exceptions.Timeout:
-            ollama_logger.error(f"⏰ Generate Timeout [{request_id}] (>{self.timeout}s)")
+            ollama_logger.error(f"⏰ Generate Timeout [{request_id}] (>{self.read_timeout}s)")
             return None
         except requests.exceptions.RequestException as e:
             ollama_logger.error(f"❌ Generate Request-Fehler [{request_id}]: {str(e)}", exc_info=True)
@@ -225,13 +488,102 @@ class OllamaClient:
         except Exception as e:
             ollama_logger.error(f"❌ Generate unerwarteter Fehler [{request_id}]: {str(e)}", exc_info=True)
             return None
-    
+
+    def generate_with_context(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        conversation_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Generiert Text über /api/generate und setzt dabei eine frühere Antwort fort
+
+        Ollama liefert mit jeder Antwort die Token des bisherigen Verlaufs
+        (context). Wird dieser beim nächsten Aufruf mitgeschickt, muss der alte
+        Prompt nicht erneut ausgewertet werden.
+
+        Args:
+            prompt: Neuer User-Prompt
+            model: Modell-Name (None = default_model)
+            context: context aus der vorherigen Antwort (None = neuer Verlauf)
+            system: System-Prompt
+            temperature: Temperatur (0.0 - 2.0)
+            max_tokens: Max. Tokens (None = unbegrenzt)
+            conversation_id: Nur für OllamaBackendPool (Backend-Affinität), hier ohne Wirkung
+
+        Returns:
+            Dict mit text, context (für den nächsten Aufruf), prompt_eval_count und
+            prompt_eval_duration (Sekunden) oder None bei Fehler
+        """
+        model = model or self.default_model
+        request_id = str(time.time())[-8:]
+
+        ollama_logger.info(
+            f"🧠 Generate Request [{request_id}] gestartet "
+            f"({model}, {'Fortsetzung mit ' + str(len(context)) + ' Kontext-Tokens' if context else 'neuer Verlauf'})"
+        )
+        ollama_logger.debug(f"👤 Prompt [{request_id}]: {truncate_long_content(prompt, 300)}")
+
+        payload: Dict[str, Any] = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {"temperature": temperature}
+        }
+        if context:
+            payload["context"] = list(context)
+        if system:
+            payload["system"] = system
+        if max_tokens:
+            payload["options"]["num_predict"] = max_tokens
+
+        try:
+            start_time = time.time()
+            response = self._request("POST", "/api/generate", request_id, json=payload)
+            duration = time.time() - start_time
+            response.raise_for_status()
+
+            result = response.json()
+            prompt_eval_count = result.get("prompt_eval_count", 0)
+            prompt_eval_duration = result.get("prompt_eval_duration", 0) / 1e9
+            eval_count = result.get("eval_count", 0)
+
+            ollama_logger.info(
+                f"✅ Generate erfolgreich [{request_id}]: {eval_count} tokens in {duration:.2f}s "
+                f"(Prompt: {prompt_eval_count} tokens in {prompt_eval_duration:.2f}s)"
+            )
+
+            return {
+                "text": result.get("response", ""),
+                "context": result.get("context") or [],
+                "prompt_eval_count": prompt_eval_count,
+                "prompt_eval_duration": prompt_eval_duration
+            }
+
+        except CircuitOpenError as e:
+            ollama_logger.warning(f"⚡ Generate [{request_id}] abgelehnt: {str(e)}")
+            return None
+        except requests.exceptions.Timeout:
+            ollama_logger.error(f"⏰ Generate Timeout [{request_id}] (>{self.read_timeout}s)")
+            return None
+        except requests.exceptions.RequestException as e:
+            ollama_logger.error(f"❌ Generate Request-Fehler [{request_id}]: {str(e)}", exc_info=True)
+            return None
+        except Exception as e:
+            ollama_logger.error(f"❌ Generate unerwarteter Fehler [{request_id}]: {str(e)}", exc_info=True)
+            return None
+
     def chat(
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
         temperature: float = 0.7,
-        stream: bool = False
+        stream: bool = False,
+        conversation_id: Optional[str] = None
     ) -> Optional[str]:
         """
         Chat mit Ollama (OpenAI-kompatibel)
@@ -241,6 +593,7 @@ class OllamaClient:
             model: Modell-Name
             temperature: Temperatur
             stream: Streaming aktivieren
+            conversation_id: Nur für OllamaBackendPool (Backend-Affinität), hier ohne Wirkung
         
         Returns:
             Chat-Response oder None bei Fehler
@@ -257,12 +610,16 @@ class OllamaClient:
             ollama_logger.debug(f"💬 Message {i+1} [{request_id}] ({role}): {truncate_long_content(content, 200)}")
         
         try:
+            if stream:
+                # Gestreamt empfangen (Retry nur vor dem ersten Token), als Ganzes zurückgeben
+                return "".join(self.chat_stream(messages, model=model, temperature=temperature, request_id=request_id))
+            
             url = f"{self.base_url}/api/chat"
             
             payload = {
                 "model": model,
                 "messages": messages,
-                "stream": stream,
+                "stream": False,
                 "options": {
                     "temperature": temperature
                 }
@@ -272,11 +629,7 @@ class OllamaClient:
             ollama_logger.debug(f"📡 POST {url}")
             
             start_time = time.time()
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._request("POST", "/api/chat", request_id, json=payload)
             duration = time.time() - start_time
             
             ollama_logger.debug(f"📊 Response Status [{request_id}]: {response.status_code}")
@@ -304,8 +657,11 @@ class OllamaClient:
             
             return response_text
             
+        except CircuitOpenError as e:
+            ollama_logger.warning(f"⚡ Chat [{request_id}] abgelehnt: {str(e)}")
+            return None
         except requests.exceptions.Timeout:
-            ollama_logger.error(f"⏰ Chat Timeout [{request_id}] (>{self.timeout}s)")
+            ollama_logger.error(f"⏰ Chat Timeout [{request_id}] (>{self.read_timeout}s)")
             return None
         except requests.exceptions.RequestException as e:
             ollama_logger.error(f"❌ Chat Request-Fehler [{request_id}]: {str(e)}", exc_info=True)
@@ -314,9 +670,115 @@ class OllamaClient:
             ollama_logger.error(f"❌ Chat unerwarteter Fehler [{request_id}]: {str(e)}", exc_info=True)
             return None
     
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        request_id: Optional[str] = None,
+        conversation_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Chat mit Ollama als Token-Stream
+        
+        Verbindungsfehler und 5xx vor dem ersten Token werden wiederholt,
+        Abbrüche danach nicht (bereits ausgelieferte Tokens würden doppelt erscheinen).
+        
+        Args:
+            messages: Liste von Messages (role + content)
+            model: Modell-Name
+            temperature: Temperatur
+            request_id: ID für Logs
+            conversation_id: Nur für OllamaBackendPool (Backend-Affinität), hier ohne Wirkung
+        
+        Yields:
+            Inhalts-Stücke der Antwort
+        
+        Raises:
+            requests.exceptions.RequestException: Verbindungs-/HTTP-Fehler oder Abbruch im Stream
+        """
+        model = model or self.default_model
+        request_id = request_id or str(time.time())[-8:]
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+            "options": {
+                "temperature": temperature
+            }
+        }
+        
+        ollama_logger.debug(f"📡 POST {self.base_url}/api/chat (Stream) [{request_id}]")
+        start_time = time.time()
+        response = self._request("POST", "/api/chat", request_id, stream=True, json=payload)
+        chunks = 0
+        try:
+            response.raise_for_status()
+            for line in _iter_ndjson_lines(response):
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise requests.exceptions.HTTPError(f"Ollama-Fehler im Stream: {data['error']}", response=response)
+                content = data.get("message", {}).get("content", "")
+                if content:
+                    chunks += 1
+                    yield content
+                if data.get("done"):
+                    eval_count = data.get("eval_count", 0)
+                    ollama_logger.info(
+                        f"✅ Chat-Stream beendet [{request_id}]: {eval_count} tokens in {time.time() - start_time:.2f}s"
+                    )
+                    break
+        except requests.exceptions.RequestException as e:
+            if chunks:
+                ollama_logger.error(f"❌ Chat-Stream [{request_id}] nach {chunks} Stücken abgebrochen: {str(e)}")
+            raise
+        finally:
+            response.close()
+    
+    def pull_model_stream(self, model: str, request_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lädt ein Modell herunter und liefert Ollamas Fortschrittsmeldungen
+        
+        Schließen des Generators bricht den Download ab (Verbindung wird getrennt).
+        read_timeout gilt zwischen zwei Meldungen, nicht für den ganzen Download.
+        
+        Args:
+            model: Modell-Name (z.B. "llama3.1")
+            request_id: ID für Logs
+        
+        Yields:
+            Dicts mit status und bei Layern digest, total, completed (Bytes)
+        
+        Raises:
+            CircuitOpenError: Ollama gilt als nicht erreichbar
+            requests.exceptions.RequestException: Verbindungs-/HTTP-Fehler oder Fehlermeldung im Stream
+        """
+        request_id = request_id or str(time.time())[-8:]
+        ollama_logger.info(f"📥 Pulling Model [{request_id}]: {model}")
+        start_time = time.time()
+        response = self._request("POST", "/api/pull", request_id, stream=True, json={"name": model, "stream": True})
+        try:
+            response.raise_for_status()
+            for line in _iter_ndjson_lines(response):
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise requests.exceptions.HTTPError(f"Ollama-Fehler beim Pull: {data['error']}", response=response)
+                yield data
+                if data.get("status") == "success":
+                    ollama_logger.info(f"✅ Model Pull erfolgreich [{request_id}]: {model} in {time.time() - start_time:.1f}s")
+                    self._notify_model_change(model)
+                    return
+            raise requests.exceptions.ConnectionError(f"Pull-Stream für {model} ohne Abschluss beendet")
+        finally:
+            response.close()
+    
     def pull_model(self, model: str) -> bool:
         """
-        Lädt ein Modell von Ollama herunter
+        Lädt ein Modell von Ollama herunter (blockierend, siehe pull_model_stream)
         
         Args:
             model: Modell-Name (z.B. "llama3.1")
@@ -324,36 +786,15 @@ class OllamaClient:
         Returns:
             True wenn erfolgreich
         """
-        ollama_logger.info(f"📥 Pulling Model: {model}")
-        
         try:
-            url = f"{self.base_url}/api/pull"
-            
-            payload = {
-                "name": model,
-                "stream": False
-            }
-            
-            ollama_logger.debug(f"📡 POST {url}")
-            ollama_logger.debug(f"📦 Payload: {payload}")
-            
-            # Längerer Timeout für Downloads
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=600  # 10 Minuten
-            )
-            
-            response.raise_for_status()
-            
-            result = response.json()
-            status = result.get("status", "")
-            
-            ollama_logger.info(f"✅ Model Pull erfolgreich: {model} ({status})")
+            for _ in self.pull_model_stream(model):
+                pass
             return True
-            
+        except CircuitOpenError as e:
+            ollama_logger.warning(f"⚡ Model Pull abgelehnt: {str(e)}")
+            return False
         except requests.exceptions.Timeout:
-            ollama_logger.error(f"⏰ Model Pull Timeout: {model}")
+            ollama_logger.error(f"⏰ Model Pull Timeout: {model} (>{self.read_timeout}s ohne Fortschritt)")
             return False
         except requests.exceptions.RequestException as e:
             ollama_logger.error(f"❌ Model Pull Fehler: {str(e)}", exc_info=True)
@@ -362,6 +803,72 @@ class OllamaClient:
             ollama_logger.error(f"❌ Unerwarteter Fehler beim Model Pull: {str(e)}", exc_info=True)
             return False
     
+    def warm_up(self, model: str, keep_alive: str = "5m") -> bool:
+        """
+        Lädt ein Modell in den Speicher, ohne etwas zu generieren (leerer Prompt)
+        
+        Returns:
+            True wenn Ollama das Modell geladen hat
+        """
+        try:
+            start_time = time.time()
+            response = self._request("POST", "/api/generate", json={"model": model, "prompt": "", "keep_alive": keep_alive, "stream": False})
+            response.raise_for_status()
+            ollama_logger.info(f"🔥 Modell vorgeladen: {model} in {time.time() - start_time:.1f}s")
+            return True
+        except (CircuitOpenError, requests.exceptions.RequestException) as e:
+            ollama_logger.warning(f"⚠️ Vorladen fehlgeschlagen ({model}): {str(e)}")
+            return False
+    
+    def embed(self, texts: List[str], model: str) -> Optional[List[List[float]]]:
+        """
+        Berechnet Embeddings für mehrere Texte in einem Aufruf (POST /api/embed)
+        
+        Args:
+            texts: Eingabetexte
+            model: Embedding-Modell (z.B. "nomic-embed-text")
+        
+        Returns:
+            Ein Vektor pro Text (gleiche Reihenfolge) oder None bei Fehler
+        """
+        request_id = str(time.time())[-8:]
+        ollama_logger.debug(f"🧮 Embed [{request_id}]: {len(texts)} Texte mit {model}")
+        
+        try:
+            start_time = time.time()
+            response = self._request("POST", "/api/embed", request_id, json={"model": model, "input": texts})
+            response.raise_for_status()
+            embeddings = response.json().get("embeddings", [])
+            if len(embeddings) != len(texts):
+                ollama_logger.error(f"❌ Embed [{request_id}]: {len(embeddings)} Vektoren für {len(texts)} Texte")
+                return None
+            ollama_logger.info(f"✅ Embed [{request_id}]: {len(texts)} Texte in {time.time() - start_time:.2f}s ({model})")
+            return embeddings
+        except CircuitOpenError as e:
+            ollama_logger.warning(f"⚡ Embed [{request_id}] abgelehnt: {str(e)}")
+            return None
+        except requests.exceptions.Timeout:
+            ollama_logger.error(f"⏰ Embed Timeout [{request_id}] (>{self.read_timeout}s)")
+            return None
+        except (requests.exceptions.RequestException, ValueError) as e:
+            ollama_logger.error(f"❌ Embed Request-Fehler [{request_id}]: {str(e)}")
+            return None
+    
+    def running_models(self) -> Optional[List[str]]:
+        """
+        Aktuell in den Speicher geladene Modelle (GET /api/ps, ohne Retries)
+        
+        Returns:
+            Modell-Namen oder None, wenn nicht abrufbar (z.B. ältere Ollama-Version)
+        """
+        try:
+            response = self.session.get(f"{self.base_url}/api/ps", timeout=(self.connect_timeout, 5))
+            response.raise_for_status()
+            return [m.get("name") or m.get("model") for m in response.json().get("models", [])]
+        except (requests.exceptions.RequestException, ValueError) as e:
+            ollama_logger.debug(f"🔍 /api/ps nicht abrufbar ({self.base_url}): {str(e)}")
+            return None
+    
     def get_model_info(self, model: str) -> Optional[Dict[str, Any]]:
         """
         Holt Informationen zu einem Modell
@@ -375,15 +882,9 @@ class OllamaClient:
         ollama_logger.debug(f"ℹ️ Hole Model-Info: {model}")
         
         try:
-            url = f"{self.base_url}/api/show"
-            
             payload = {"name": model}
             
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._request("POST", "/api/show", json=payload)
             
             response.raise_for_status()
             
@@ -413,6 +914,29 @@ def create_ollama_client(**kwargs) -> OllamaClient:
     return OllamaClient(**kwargs)
 
 
+def ollama_client_kwargs(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Übersetzt den Config-Abschnitt 'ollama' in Argumente für OllamaClient
+    
+    Returns:
+        kwargs für create_ollama_client()
+    """
+    kwargs = {
+        "base_url": cfg.get("base_url", "http://127.0.0.1:11434"),
+        "connect_timeout": cfg.get("connect_timeout", 5.0),
+        "read_timeout": cfg.get("read_timeout", 60.0),
+        "pool_size": cfg.get("pool_size", 10),
+        "max_retries": cfg.get("max_retries", 2),
+        "backoff_base": cfg.get("backoff_base_seconds", 0.5),
+        "backoff_max": cfg.get("backoff_max_seconds", 8.0),
+        "failure_threshold": cfg.get("failure_threshold", 3),
+        "reset_timeout": cfg.get("reset_timeout_seconds", 30.0),
+    }
+    if cfg.get("default_model"):
+        kwargs["default_model"] = cfg["default_model"]
+    return kwargs
+
+
 def quick_generate(prompt: str, model: str = "llama3.1") -> Optional[str]:
     """
     Schnelle Text-Generierung mit Ollama
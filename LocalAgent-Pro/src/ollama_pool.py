@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Ollama-Backend-Pool für LocalAgent-Pro
+Verteilt Requests auf mehrere Ollama-Hosts: bevorzugt Backends, die das Modell
+bereits geladen haben (/api/ps), mit den wenigsten laufenden Requests. Eine
+Unterhaltung bleibt nach Möglichkeit auf demselben Backend (KV-Cache). Ausgefallene
+Backends werden über den Circuit Breaker des Clients ausgeschlossen und nach einer
+erfolgreichen Health-Probe wieder aufgenommen.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Iterator, List, Optional, Set
+
+import requests
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+    from src.http_pool import CircuitOpenError
+    from src.ollama_integration import OllamaClient, ollama_client_kwargs
+except ImportError:
+    from logging_config import get_logging_manager
+    from http_pool import CircuitOpenError
+    from ollama_integration import OllamaClient, ollama_client_kwargs
+
+logging_manager = get_logging_manager()
+ollama_logger = logging_manager.create_ollama_logger()
+
+
+def model_key(model: str) -> str:
+    """'llama3.1' → 'llama3.1:latest' (so meldet /api/ps Modelle ohne Tag)"""
+    return model if ":" in model else f"{model}:latest"
+
+
+class OllamaBackend:
+    """Ein Ollama-Host im Pool: Client, laufende Requests und geladene Modelle"""
+
+    def __init__(self, client: OllamaClient):
+        self.client = client
+        self.inflight = 0
+        self.served = 0
+        self.resident: Set[str] = set()
+        self.residency_checked_at: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return self.client.base_url
+
+    @property
+    def ejected(self) -> bool:
+        """Circuit offen: Backend erhält keine Requests bis zur nächsten erfolgreichen Probe"""
+        return self.client.breaker.state == "open"
+
+    @property
+    def recovering(self) -> bool:
+        """Circuit halb offen: nur ein Testaufruf, danach lehnt der Client ab"""
+        return self.client.breaker.state == "half_open"
+
+
+class OllamaBackendPool:
+    """
+    Mehrere Ollama-Backends hinter der Schnittstelle von OllamaClient
+
+    Auswahl pro Request: nicht ausgeschlossen → Affinität der Unterhaltung (nur
+    bei geschlossenem Circuit) → nicht halb offen → nicht ausgelastet → Modell
+    geladen → wenigste laufende Requests.
+    """
+
+    def __init__(
+        self,
+        clients: List[OllamaClient],
+        default_model: Optional[str] = None,
+        max_inflight: int = 4,
+        sticky_ttl: float = 1800.0,
+        max_conversations: int = 10000
+    ):
+        """
+        Args:
+            clients: Ein OllamaClient pro Backend
+            default_model: Standard-Modell (None = das des ersten Clients)
+            max_inflight: Ab so vielen laufenden Requests gilt ein Backend als ausgelastet
+            sticky_ttl: Sekunden, die eine Unterhaltung an ihr Backend gebunden bleibt
+            max_conversations: Max. gemerkte Unterhaltungen (älteste werden verworfen)
+        """
+        if not clients:
+            raise ValueError("Mindestens ein Ollama-Backend erforderlich")
+        self.backends = [OllamaBackend(client) for client in clients]
+        self.default_model = default_model or clients[0].default_model
+        self.max_inflight = max_inflight
+        self.sticky_ttl = sticky_ttl
+        self.max_conversations = max_conversations
+
+        self._lock = threading.Lock()
+        self._sticky: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {"rejected": 0, "failovers": 0, "sticky_hits": 0}
+        self._monitors: List[threading.Thread] = []
+        self._monitor_stop = threading.Event()
+
+        ollama_logger.info(
+            f"🧩 Ollama-Backend-Pool: {len(self.backends)} Backends "
+            f"({', '.join(b.name for b in self.backends)})"
+        )
+
+    # === Auswahl ===
+
+    def _acquire(self, model: str, conversation_id: Optional[str], exclude: List[OllamaBackend]) -> Optional[OllamaBackend]:
+        key = model_key(model)
+        now = time.monotonic()
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude and not b.ejected]
+            if not candidates:
+                return None
+
+            backend = None
+            if conversation_id:
+                entry = self._sticky.get(conversation_id)
+                if (
+                    entry and now - entry[1] < self.sticky_ttl and entry[0] in candidates
+                    and not entry[0].recovering and entry[0].inflight < self.max_inflight
+                ):
+                    backend = entry[0]
+                    self._stats["sticky_hits"] += 1
+            if backend is None:
+                backend = min(candidates, key=lambda b: (
+                    b.recovering,
+                    b.client.health()["status"] == "down",
+                    b.inflight >= self.max_inflight,
+                    key not in b.resident,
+                    b.inflight,
+                    b.served,
+                ))
+
+            backend.inflight += 1
+            backend.served += 1
+            if conversation_id:
+                self._sticky[conversation_id] = (backend, now)
+                self._sticky.move_to_end(conversation_id)
+                while len(self._sticky) > self.max_conversations:
+                    self._sticky.popitem(last=False)
+        return backend
+
+    def _release(self, backend: OllamaBackend) -> None:
+        with self._lock:
+            backend.inflight -= 1
+
+    def _reject(self, model: str) -> None:
+        with self._lock:
+            self._stats["rejected"] += 1
+        ollama_logger.warning(f"⚡ Kein Ollama-Backend verfügbar für {model} (alle ausgeschlossen)")
+
+    def _call(self, model: str, conversation_id: Optional[str], call: Callable[[OllamaClient], Any]) -> Any:
+        """
+        Führt call auf dem gewählten Backend aus; schlägt es wegen eines
+        Backend-Fehlers fehl (Verbindung, 5xx, Timeout) oder lehnt der Circuit ab
+        (z.B. Testaufruf bereits vergeben), folgt das nächste Backend
+        """
+        tried: List[OllamaBackend] = []
+        while len(tried) < len(self.backends):
+            backend = self._acquire(model, conversation_id, tried)
+            if backend is None:
+                break
+            backend.client.take_outcome()
+            try:
+                result = call(backend.client)
+            finally:
+                self._release(backend)
+            outcome = backend.client.take_outcome()
+            if result is not None and result is not False:
+                backend.resident.add(model_key(model))
+                return result
+            tried.append(backend)
+            # Fehler ohne Backend-Ausfall (z.B. 4xx) wiederholen sich auch anderswo
+            if outcome not in ("failed", "rejected"):
+                return result
+            with self._lock:
+                self._stats["failovers"] += 1
+            ollama_logger.warning(f"🔀 Backend {backend.name} fehlgeschlagen, versuche nächstes")
+        if not tried:
+            self._reject(model)
+        return None
+
+    # === Schnittstelle wie OllamaClient ===
+
+    def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        conversation_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Wie OllamaClient.generate, auf dem gewählten Backend"""
+        model = model or self.default_model
+        return self._call(model, conversation_id, lambda client: client.generate(
+            prompt, model=model, system=system, temperature=temperature, max_tokens=max_tokens
+        ))
+
+    def generate_with_context(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        conversation_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Wie OllamaClient.generate_with_context; die Backend-Affinität hält den KV-Cache warm"""
+        model = model or self.default_model
+        return self._call(model, conversation_id, lambda client: client.generate_with_context(
+            prompt, model=model, context=context, system=system, temperature=temperature, max_tokens=max_tokens
+        ))
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        stream: bool = False,
+        conversation_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Wie OllamaClient.chat, auf dem gewählten Backend"""
+        model = model or self.default_model
+        return self._call(model, conversation_id, lambda client: client.chat(
+            messages, model=model, temperature=temperature, stream=stream
+        ))
+
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        request_id: Optional[str] = None,
+        conversation_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Wie OllamaClient.chat_stream; Wechsel auf ein anderes Backend nur vor dem ersten Token
+
+        Raises:
+            CircuitOpenError: Alle Backends ausgeschlossen
+            requests.exceptions.RequestException: Fehler auf dem letzten Backend oder Abbruch im Stream
+        """
+        model = model or self.default_model
+        tried: List[OllamaBackend] = []
+        while True:
+            backend = self._acquire(model, conversation_id, tried)
+            if backend is None:
+                self._reject(model)
+                raise CircuitOpenError("ollama-pool", self._retry_in())
+            started = False
+            try:
+                for piece in backend.client.chat_stream(messages, model=model, temperature=temperature, request_id=request_id):
+                    started = True
+                    yield piece
+                backend.resident.add(model_key(model))
+                return
+            except requests.exceptions.RequestException as e:
+                tried.append(backend)
+                if started or len(tried) >= len(self.backends):
+                    raise
+                with self._lock:
+                    self._stats["failovers"] += 1
+                ollama_logger.warning(f"🔀 Stream auf {backend.name} fehlgeschlagen ({str(e)}), versuche nächstes Backend")
+            finally:
+                self._release(backend)
+
+    def embed(self, texts: List[str], model: str) -> Optional[List[List[float]]]:
+        """Wie OllamaClient.embed, auf dem gewählten Backend"""
+        return self._call(model, None, lambda client: client.embed(texts, model))
+
+    def list_models(self) -> Optional[List[Dict[str, Any]]]:
+        """Vereinigung der Modelle aller erreichbaren Backends (None, wenn keines antwortet)"""
+        models: Dict[str, Dict[str, Any]] = {}
+        answered = False
+        for backend in self.backends:
+            if backend.ejected:
+                continue
+            result = backend.client.list_models()
+            if result is None:
+                continue
+            answered = True
+            for model in result:
+                models.setdefault(model.get("name"), model)
+        return list(models.values()) if answered else None
+
+    def pull_model(self, model: str) -> bool:
+        """Lädt das Modell auf alle erreichbaren Backends; True wenn überall erfolgreich"""
+        backends = [b for b in self.backends if not b.ejected]
+        return bool(backends) and all([b.client.pull_model(model) for b in backends])
+
+    def pull_model_stream(self, model: str, request_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Wie OllamaClient.pull_model_stream, nacheinander auf allen erreichbaren Backends
+
+        Meldungen tragen zusätzlich backend; erst nach dem letzten Backend folgt status "success".
+
+        Raises:
+            CircuitOpenError: Alle Backends ausgeschlossen
+            requests.exceptions.RequestException: Fehler auf einem Backend (weitere werden nicht versucht)
+        """
+        backends = [b for b in self.backends if not b.ejected]
+        if not backends:
+            raise CircuitOpenError("ollama-pool", self._retry_in())
+        for index, backend in enumerate(backends):
+            for event in backend.client.pull_model_stream(model, request_id):
+                if event.get("status") == "success" and index < len(backends) - 1:
+                    event = {**event, "status": "pulled"}
+                yield {**event, "backend": backend.name}
+
+    def warm_up(self, model: str, keep_alive: str = "5m") -> bool:
+        """Lädt das Modell auf dem Backend, das es als Nächstes bedienen würde"""
+        return bool(self._call(model, None, lambda client: client.warm_up(model, keep_alive)))
+
+    def add_model_listener(self, callback: Callable[[str], None]) -> None:
+        """Wie OllamaClient.add_model_listener, für alle Backends"""
+        for backend in self.backends:
+            backend.client.add_model_listener(callback)
+
+    def get_model_info(self, model: str) -> Optional[Dict[str, Any]]:
+        for backend in self.backends:
+            if not backend.ejected:
+                info = backend.client.get_model_info(model)
+                if info is not None:
+                    return info
+        return None
+
+    # === Health ===
+
+    def _refresh_backend(self, backend: OllamaBackend) -> None:
+        was_ejected = backend.ejected
+        if backend.client.check_health():
+            running = backend.client.running_models()
+            if running is not None:
+                backend.resident = {model_key(name) for name in running if name}
+                backend.residency_checked_at = time.time()
+        if was_ejected and not backend.ejected:
+            ollama_logger.info(f"♻️ Ollama-Backend {backend.name} wieder aufgenommen")
+        elif not was_ejected and backend.ejected:
+            ollama_logger.warning(f"🚫 Ollama-Backend {backend.name} ausgeschlossen")
+
+    def check_health(self) -> bool:
+        """Prüft alle Backends (inkl. geladener Modelle); True wenn mindestens eines erreichbar"""
+        for backend in self.backends:
+            self._refresh_backend(backend)
+        return any(b.client.health()["status"] == "up" for b in self.backends)
+
+    def start_health_monitor(self, interval: float = 15.0) -> None:
+        """Startet je Backend eine periodische Probe (Erreichbarkeit + /api/ps)"""
+        if self._monitors:
+            return
+        self._monitor_stop.clear()
+
+        def run(backend: OllamaBackend):
+            while True:
+                try:
+                    self._refresh_backend(backend)
+                except Exception as e:
+                    ollama_logger.error(f"❌ Health-Probe {backend.name} fehlgeschlagen: {str(e)}", exc_info=True)
+                if self._monitor_stop.wait(interval):
+                    return
+
+        for index, backend in enumerate(self.backends):
+            thread = threading.Thread(target=run, args=(backend,), name=f"ollama-health-{index}", daemon=True)
+            thread.start()
+            self._monitors.append(thread)
+        ollama_logger.info(f"🩺 Ollama-Health-Monitor gestartet für {len(self.backends)} Backends (alle {interval:.0f}s)")
+
+    def stop_health_monitor(self) -> None:
+        self._monitor_stop.set()
+        for thread in self._monitors:
+            thread.join(timeout=10)
+        self._monitors = []
+
+    def _retry_in(self) -> float:
+        return min(b.client.breaker.retry_in() for b in self.backends)
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Zustand aller Backends ohne Live-Aufruf
+
+        Returns:
+            Dict mit status ('up' sobald ein Backend up ist), circuit ('open' wenn alle
+            ausgeschlossen), retry_in, available und backends (Details je Backend)
+        """
+        backends = []
+        for backend in self.backends:
+            backends.append({
+                **backend.client.health(),
+                "base_url": backend.name,
+                "inflight": backend.inflight,
+                "resident": sorted(backend.resident),
+            })
+        statuses = {b["status"] for b in backends}
+        status = "up" if "up" in statuses else ("down" if statuses == {"down"} else "unknown")
+        available = sum(not b.ejected for b in self.backends)
+        return {
+            "status": status,
+            "circuit": "open" if available == 0 else "closed",
+            "retry_in": round(self._retry_in(), 1) if available == 0 else 0.0,
+            "available": available,
+            "backends": backends,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Summierte Request-Statistik aller Backends plus Pool-Zähler (rejected, failovers, sticky_hits)"""
+        totals = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0}
+        for backend in self.backends:
+            for kind, value in backend.client.stats().items():
+                totals[kind] = totals.get(kind, 0) + value
+        with self._lock:
+            totals["rejected"] += self._stats["rejected"]
+            totals["failovers"] = self._stats["failovers"]
+            totals["sticky_hits"] = self._stats["sticky_hits"]
+            totals["conversations"] = len(self._sticky)
+        return totals
+
+    def close(self) -> None:
+        self.stop_health_monitor()
+        for backend in self.backends:
+            backend.client.close()
+
+
+def create_ollama_pool(cfg: Dict[str, Any]) -> OllamaBackendPool:
+    """
+    Erstellt den Pool aus dem Config-Abschnitt 'ollama'
+
+    'backends' ist eine Liste von URLs oder Dicts mit base_url und abweichenden
+    Client-Einstellungen; übrige Schlüssel gelten für alle Backends.
+    """
+    clients = []
+    for entry in cfg.get("backends") or []:
+        overrides = {"base_url": entry} if isinstance(entry, str) else dict(entry)
+        clients.append(OllamaClient(**ollama_client_kwargs({**cfg, **overrides})))
+    return OllamaBackendPool(
+        clients,
+        max_inflight=cfg.get("max_inflight_per_backend", 4),
+        sticky_ttl=cfg.get("sticky_ttl_seconds", 1800),
+        max_conversations=cfg.get("max_conversations", 10000),
+    )
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Sitzungsmodus für generative Antworten in LocalAgent-Pro
+Ollama gibt bei /api/generate die Token des bisherigen Verlaufs zurück
+(context). Im Sitzungsmodus wird dieser je Unterhaltung gespeichert und beim
+nächsten Turn mitgeschickt, sodass Ollama den alten Prompt nicht erneut
+auswerten muss (auf CPU oft mehrere Sekunden pro Turn).
+
+Der Speicher ist begrenzt (LRU, TTL, max. Tokens je Unterhaltung). Ein Kontext
+wird nur fortgesetzt, wenn der Verlauf der Anfrage genau dem gespeicherten
+entspricht; nach bearbeiteten oder neu generierten Nachrichten beginnt die
+Unterhaltung frisch.
+"""
+
+import hashlib
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+ollama_logger = logging_manager.create_ollama_logger()
+
+
+def history_fingerprint(messages: List[Dict[str, Any]]) -> str:
+    """
+    Hash über Rollen und Inhalte eines Verlaufs
+
+    Leerzeichen werden normalisiert: beim Streaming kommen Antworten
+    wortweise an und Open WebUI schickt sie so zurück.
+    """
+    digest = hashlib.sha256()
+    for msg in messages:
+        content = msg.get("content")
+        if not isinstance(content, str):
+            content = str(content)
+        digest.update(f"{msg.get('role', '')}\x00{' '.join(content.split())}\x01".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SessionContextStore:
+    """Letzter Ollama-Kontext je Unterhaltung (LRU mit TTL)"""
+
+    def __init__(self, max_sessions: int = 256, ttl: float = 1800.0, max_tokens: int = 8192):
+        """
+        Args:
+            max_sessions: Max. gespeicherte Unterhaltungen (älteste werden verworfen)
+            ttl: Sekunden ohne Turn, nach denen ein Kontext verfällt
+            max_tokens: Längere Kontexte werden nicht gespeichert (Unterhaltung beginnt neu)
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_tokens = max_tokens
+        # conversation_id → (Modell, Verlaufs-Hash, Tokens, letzter Zugriff)
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"continued": 0, "fresh": 0, "mismatch": 0, "expired": 0, "evicted": 0, "too_long": 0}
+
+    def _expire(self, now: float) -> None:
+        """Entfernt abgelaufene Einträge von vorne (erwartet _lock)"""
+        while self._sessions:
+            key, entry = next(iter(self._sessions.items()))
+            if now - entry[3] < self.ttl:
+                break
+            del self._sessions[key]
+            self._stats["expired"] += 1
+
+    def get(self, conversation_id: str, model: str, fingerprint: str) -> Optional[List[int]]:
+        """
+        Gespeicherter Kontext, wenn Modell und Verlauf übereinstimmen
+
+        Returns:
+            Token-Liste oder None (neuer Verlauf)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(conversation_id)
+            if entry is None:
+                self._stats["fresh"] += 1
+                return None
+            if entry[0] != model or entry[1] != fingerprint:
+                # Anderes Modell oder geänderter Verlauf: Kontext passt nicht mehr
+                del self._sessions[conversation_id]
+                self._stats["mismatch"] += 1
+                return None
+            self._sessions.move_to_end(conversation_id)
+            self._stats["continued"] += 1
+            return entry[2].tolist()
+
+    def put(self, conversation_id: str, model: str, fingerprint: str, context: List[int]) -> bool:
+        """
+        Speichert den Kontext nach einem Turn
+
+        Returns:
+            False, wenn der Kontext max_tokens überschreitet (nicht gespeichert)
+        """
+        with self._lock:
+            if not context or len(context) > self.max_tokens:
+                self._sessions.pop(conversation_id, None)
+                if context:
+                    self._stats["too_long"] += 1
+                    ollama_logger.info(f"🧵 Kontext von {conversation_id[:12]} zu lang ({len(context)} Tokens), nächster Turn beginnt neu")
+                return False
+            self._sessions[conversation_id] = (model, fingerprint, array("i", context), time.monotonic())
+            self._sessions.move_to_end(conversation_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._stats["evicted"] += 1
+            return True
+
+    def discard(self, conversation_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(conversation_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                **self._stats,
+                "sessions": len(self._sessions),
+                "tokens": sum(len(entry[2]) for entry in self._sessions.values()),
+            }
+
+
+class OllamaSessions:
+    """Generiert über /api/generate und setzt den Kontext der Unterhaltung fort"""
+
+    def __init__(self, client, store: SessionContextStore):
+        """
+        Args:
+            client: OllamaClient oder OllamaBackendPool (generate_with_context)
+            store: Speicher für die Kontexte
+        """
+        self.client = client
+        self.store = store
+
+    def generate(
+        self,
+        conversation_id: Optional[str],
+        messages: List[Dict[str, Any]],
+        prompt: str,
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Beantwortet prompt, fortgesetzt aus dem gespeicherten Kontext
+
+        Args:
+            conversation_id: Kennung der Unterhaltung (None = ohne Sitzung)
+            messages: Verlauf der Anfrage; der Teil vor der letzten User-Nachricht
+                muss zum gespeicherten Kontext passen
+            prompt: Letzte User-Nachricht
+            model: Modell-Name
+
+        Returns:
+            Generierter Text oder None bei Fehler
+        """
+        history = messages
+        for index in range(len(messages) - 1, -1, -1):
+            if messages[index].get("role") == "user":
+                history = messages[:index]
+                break
+
+        context = None
+        if conversation_id:
+            context = self.store.get(conversation_id, model, history_fingerprint(history))
+
+        result = self.client.generate_with_context(
+            prompt, model=model, context=context, temperature=temperature, max_tokens=max_tokens,
+            conversation_id=conversation_id
+        )
+        if result is None:
+            if conversation_id:
+                # Nicht mit einem evtl. ungültigen Kontext erneut versuchen
+                self.store.discard(conversation_id)
+            return None
+
+        if conversation_id:
+            turn = history + [{"role": "user", "content": prompt}, {"role": "assistant", "content": result["text"]}]
+            self.store.put(conversation_id, model, history_fingerprint(turn), result["context"])
+        if context:
+            ollama_logger.debug(
+                f"🧵 Sitzung {conversation_id[:12]} fortgesetzt: {len(context)} Kontext-Tokens übernommen, "
+                f"{result['prompt_eval_count']} neu ausgewertet"
+            )
+        return result["text"]
+
+
+def create_ollama_sessions(client, cfg: Optional[Dict[str, Any]] = None) -> Optional[OllamaSessions]:
+    """Erstellt den Sitzungsmodus aus dem Config-Abschnitt 'ollama_sessions' (None = deaktiviert)"""
+    cfg = cfg or {}
+    if not cfg.get("enabled", False):
+        return None
+    store = SessionContextStore(
+        max_sessions=cfg.get("max_sessions", 256),
+        ttl=cfg.get("ttl_seconds", 1800),
+        max_tokens=cfg.get("max_context_tokens", 8192),
+    )
+    ollama_logger.info(
+        f"🧵 Sitzungsmodus aktiv: max. {store.max_sessions} Unterhaltungen, "
+        f"TTL {store.ttl:.0f}s, max. {store.max_tokens} Kontext-Tokens"
+    )
+    return OllamaSessions(client, store)
@@ -11,8 +11,14 @@ import re
 import json
 import requests
 import subprocess
+import signal
 import time
+import threading
 import uuid
+import sys
+import base64
+from array import array
+import atexit
 from urllib.parse import urlparse
 import logging
 from typing import Dict, Any, List, Optional
@@ -22,7 +28,67 @@ from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTEN
 from logging_config import get_logging_manager, mask_sensitive_data, truncate_long_content
 
 # Ollama-Integration importieren
-from ollama_integration import create_ollama_client
+from ollama_integration import create_ollama_client, ollama_client_kwargs
+
+# Ollama-Backend-Pool (mehrere Ollama-Hosts)
+from ollama_pool import create_ollama_pool
+
+# Modell-Routing (kleines Modell, Überlauf auf Fallback-Modelle)
+from model_router import create_model_router
+
+# Gecachte Modellliste für /v1/models
+from model_catalog import create_model_catalog
+
+# Sitzungsmodus: Ollama-Kontext je Unterhaltung fortsetzen
+from ollama_sessions import create_ollama_sessions
+
+# Modell-Downloads als Hintergrund-Jobs
+from model_pulls import create_model_pull_manager
+
+# Embeddings mit Micro-Batching und Cache
+from embeddings import create_embedding_service, EmbeddingError
+
+# Semantischer Index über die Sandbox-Dateien
+from semantic_index import create_semantic_index, SemanticIndexError
+
+# Content-Addressed Blob-Store
+from blob_store import create_blob_store
+
+# Copy-on-Write Snapshots (Undo/Restore)
+from snapshots import create_snapshot_store
+
+# Hintergrund-Shell-Jobs
+from shell_jobs import ShellJobManager
+
+# Ausgabe- und Ressourcen-Limits für Shell-Kommandos
+from shell_limits import build_limit_prefix, with_limits, read_captured, new_spill_path, discard_spill, prune_spill_dir
+
+# Token-basierte Command-Policy (Allow/Deny-Tabelle)
+from command_policy import create_command_policy
+
+# Gemeinsamer HTTP-Pool (Keep-Alive, Host-Limits, Circuit Breaker)
+from http_pool import create_http_pool, CircuitOpenError, HostBusyError
+
+# Streaming-Fetch mit Byte-Limit
+from web_fetch import fetch_url, FetchCancelled, DEFAULT_CONTENT_TYPES
+
+# Persistenter HTTP-Cache für fetch
+from http_cache import create_http_cache
+
+# HTML→Markdown/JSON/Text-Extraktion für fetch
+from html_extract import extract_content
+
+# Domain-Whitelist als Hash-Sets (O(Labels) statt Schleife über alle Domains)
+from domain_matcher import DomainWhitelist
+
+# Append-only-Journal für die Auto-Whitelist
+from whitelist_journal import create_whitelist_journal
+
+# Paralleles Laden mehrerer URLs aus einem Prompt
+from multi_fetch import extract_urls, fetch_many
+
+# Gestreamte Downloads in die Sandbox
+from downloader import download_to_file, DirectoryUsage, DownloadError
 
 # Logging-Manager initialisieren (früh initialisieren!)
 logging_manager = get_logging_manager(
@@ -40,11 +106,6 @@ request_logger = logging_manager.create_request_logger()
 
 main_logger.info("🚀 LocalAgent-Pro Server wird initialisiert...")
 
-# Ollama-Client initialisieren
-main_logger.info("🤖 Initialisiere Ollama-Client...")
-ollama_client = create_ollama_client()
-main_logger.info("✅ Ollama-Client bereit")
-
 # Config laden
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 CONFIG_PATH = os.path.join(BASE_DIR, "config", "config.yaml")
@@ -63,6 +124,27 @@ except Exception as e:
     print(f"❌ Fehler beim Laden der Config: {e}")
     exit(1)
 
+# Log-Pipeline: Schreiben im Writer-Thread hinter einer begrenzten Queue
+logging_cfg = config.get("logging", {})
+logging_manager.configure_pipeline(
+    async_logging=logging_cfg.get("async", True),
+    queue_size=logging_cfg.get("queue_size", 10000),
+    queue_policy=logging_cfg.get("queue_policy", "drop"),
+)
+
+# Ollama-Client initialisieren (Keep-Alive-Pool, Retries, getrennte Timeouts)
+# Kein Verbindungstest beim Start: der Health-Monitor prüft im Hintergrund
+main_logger.info("🤖 Initialisiere Ollama-Client...")
+ollama_cfg = config.get("ollama", {})
+if ollama_cfg.get("backends"):
+    # Mehrere Hosts: Lastverteilung nach geladenem Modell und Auslastung
+    ollama_client = create_ollama_pool(ollama_cfg)
+else:
+    ollama_client = create_ollama_client(**ollama_client_kwargs(ollama_cfg))
+if ollama_cfg.get("health_interval_seconds", 15.0) > 0:
+    ollama_client.start_health_monitor(ollama_cfg.get("health_interval_seconds", 15.0))
+main_logger.info("✅ Ollama-Client bereit")
+
 # Konfiguration
 SANDBOX = config.get("sandbox", True)
 SANDBOX_PATH = config.get("sandbox_path", os.path.expanduser("~/localagent_sandbox"))
@@ -77,6 +159,25 @@ ASK_BEFORE_NEW_DOMAIN = config.get("ask_before_new_domain", False)
 llm_cfg = config.get("llm", {})
 LLM_MODEL = llm_cfg.get("model", "llama3.1")
 
+# Modell-Routing: ohne model_routing.enabled immer LLM_MODEL
+model_router = create_model_router(LLM_MODEL, config.get("model_routing", {}))
+
+# /v1/models aus den installierten Ollama-Modellen (TTL + Hintergrund-Refresh, nach pull_model invalidiert)
+model_catalog = create_model_catalog(ollama_client, ["localagent-pro"], [LLM_MODEL], config.get("model_catalog", {}))
+
+# Sitzungsmodus (opt-in): context aus /api/generate je Unterhaltung weiterreichen
+ollama_sessions = create_ollama_sessions(ollama_client, config.get("ollama_sessions", {}))
+
+# Interne Verwaltungsdaten (Blobs etc.) liegen versteckt im Sandbox-Verzeichnis
+INTERNAL_DIR_NAME = ".localagent"
+INTERNAL_DIR = os.path.join(SANDBOX_PATH, INTERNAL_DIR_NAME)
+
+# Blob-Store für deduplizierte Schreibvorgänge (optional)
+blob_store = create_blob_store(os.path.join(INTERNAL_DIR, "blobs"), config.get("blob_store", {}))
+
+# Snapshots vor write_file/delete_file (Standard: aktiv)
+snapshot_store = create_snapshot_store(os.path.join(INTERNAL_DIR, "snapshots"), config.get("snapshots", {}))
+
 # Logging-Konfiguration
 main_logger.info(f"🔒 Sandbox-Modus: {'✅ Aktiv' if SANDBOX else '❌ Deaktiviert'}")
 main_logger.info(f"📁 Sandbox-Pfad: {SANDBOX_PATH}")
@@ -86,6 +187,13 @@ if "*" in ALLOWED_DOMAINS:
     if AUTO_WHITELIST_ENABLED:
         main_logger.info(f"✅ Auto-Whitelist aktiviert: {AUTO_WHITELIST_FILE}")
 main_logger.info(f"🧠 LLM-Modell: {LLM_MODEL}")
+if blob_store:
+    main_logger.info(f"🔗 Blob-Store aktiviert: {blob_store.root} (ab {blob_store.min_size} bytes)")
+if snapshot_store:
+    main_logger.info(
+        f"📸 Snapshots aktiviert: {snapshot_store.root} "
+        f"(max. {snapshot_store.max_versions_per_file} Versionen/Datei, {snapshot_store.method})"
+    )
 main_logger.info(f"📱 OpenWebUI Port: {OPEN_WEBUI_PORT}")
 
 app = Flask(__name__)
@@ -99,10 +207,61 @@ request_count = Counter('localagent_requests_total', 'Total API requests', ['end
 request_duration = Histogram('localagent_request_duration_seconds', 'Request duration', ['endpoint'])
 active_requests = Gauge('localagent_active_requests', 'Currently active requests')
 ollama_calls = Counter('localagent_ollama_calls_total', 'Ollama API calls', ['model', 'status'])
+ollama_http_requests = Gauge('localagent_ollama_http_requests', 'HTTP requests sent to Ollama by outcome (cumulative)', ['kind'])
+model_routes = Counter('localagent_model_routes_total', 'Chat requests by serving model and routing reason', ['model', 'route'])
+model_latency_p95 = Gauge('localagent_model_latency_p95_seconds', 'p95 Ollama latency per model within the routing window', ['model'])
+ollama_backend_inflight = Gauge('localagent_ollama_backend_inflight', 'Requests in flight per Ollama backend (backend pool only)', ['backend'])
+ollama_up = Gauge('localagent_ollama_up', 'Ollama reachable according to the last health probe (1 = up, 0 = down/unknown)')
 shell_executions = Counter('localagent_shell_executions_total', 'Shell command executions', ['status'])
+shell_policy_decisions = Counter('localagent_shell_policy_decisions_total', 'Command policy decisions', ['decision', 'cache'])
 loop_detections = Counter('localagent_loop_detections_total', 'Loop protection activations')
 tool_executions = Counter('localagent_tool_executions_total', 'Tool executions', ['tool', 'status'])
 sandbox_operations = Counter('localagent_sandbox_operations_total', 'Sandbox file operations', ['operation'])
+shell_jobs_total = Counter('localagent_shell_jobs_total', 'Finished background shell jobs', ['status', 'exit_code'])
+shell_job_duration = Histogram(
+    'localagent_shell_job_duration_seconds', 'Background shell job runtime', ['status'],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+shell_jobs_running = Gauge('localagent_shell_jobs_running', 'Currently running background shell jobs')
+blob_writes_skipped = Counter('localagent_blob_writes_skipped_total', 'Writes skipped because content was unchanged')
+blob_writes_deduplicated = Counter('localagent_blob_writes_deduplicated_total', 'Writes served by an existing blob')
+blob_bytes_saved = Counter('localagent_blob_bytes_saved_total', 'Bytes not written thanks to the blob store', ['reason'])
+snapshot_operations = Counter('localagent_snapshot_operations_total', 'Snapshot operations', ['operation'])
+snapshot_bytes = Gauge('localagent_snapshot_bytes', 'Bytes held by retained snapshots')
+http_requests = Counter('localagent_http_requests_total', 'Outgoing HTTP requests (fetch)', ['status'])
+http_request_duration = Histogram('localagent_http_request_duration_seconds', 'Outgoing HTTP request duration')
+http_pool_connections = Gauge('localagent_http_pool_connections', 'HTTP pool connections since start', ['kind'])
+http_inflight = Gauge('localagent_http_inflight_requests', 'Outgoing HTTP requests in flight')
+http_circuits_open = Gauge('localagent_http_circuits_open', 'Hosts currently blocked by the circuit breaker')
+fetch_bytes = Counter('localagent_fetch_bytes_total', 'Fetch body bytes read or skipped by the byte cap', ['kind'])
+downloads = Counter('localagent_downloads_total', 'Download tool calls', ['status'])
+download_bytes = Counter('localagent_download_bytes_total', 'Bytes written by the download tool')
+fetch_cache_results = Counter('localagent_fetch_cache_total', 'HTTP cache lookups', ['result'])
+fetch_cache_bytes_saved = Counter('localagent_fetch_cache_bytes_saved_total', 'Body bytes served from the HTTP cache instead of the network')
+fetch_cache_size = Gauge('localagent_fetch_cache_bytes', 'Bytes held by the HTTP cache')
+embedding_texts = Counter('localagent_embedding_texts_total', 'Embedded texts by source', ['source'])
+embedding_batch_size = Histogram(
+    'localagent_embedding_batch_size', 'Texts per upstream embedding call',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+embedding_batch_duration = Histogram('localagent_embedding_batch_duration_seconds', 'Duration of upstream embedding calls')
+model_pulls_total = Counter('localagent_model_pulls_total', 'Finished model pulls', ['status'])
+model_pull_bytes = Counter('localagent_model_pull_bytes_total', 'Bytes of successfully pulled models')
+model_pulls_running = Gauge('localagent_model_pulls_running', 'Model pulls in progress')
+log_queue_depth = Gauge('localagent_log_queue_depth', 'Log records waiting for the writer thread')
+log_records_dropped = Gauge('localagent_log_records_dropped', 'Log records dropped because the log queue was full (cumulative)')
+ollama_sessions_active = Gauge('localagent_ollama_sessions', 'Conversations with a stored Ollama context (session mode)')
+ollama_session_turns = Gauge('localagent_ollama_session_turns', 'Session mode turns by context lookup result (cumulative)', ['result'])
+semantic_index_chunks = Gauge('localagent_semantic_index_chunks', 'Chunks held by the semantic index')
+semantic_search_duration = Histogram('localagent_semantic_search_duration_seconds', 'semantic_search latency incl. index refresh', ['phase'])
+if snapshot_store:
+    snapshot_bytes.set_function(lambda: snapshot_store.stats()["total_bytes"])
+log_queue_depth.set_function(lambda: logging_manager.stats()["queued"])
+log_records_dropped.set_function(lambda: logging_manager.stats()["dropped"])
+if ollama_sessions:
+    ollama_sessions_active.set_function(lambda: ollama_sessions.store.stats()["sessions"])
+    for _result in ("continued", "fresh", "mismatch"):
+        ollama_session_turns.labels(result=_result).set_function(lambda result=_result: ollama_sessions.store.stats()[result])
 
 # Session-Tracking für Rückfragen (einfache In-Memory-Lösung)
 pending_confirmations: Dict[str, Any] = {}
@@ -121,56 +280,177 @@ LOOP_DETECTION_WINDOW = 2  # Sekunden
 
 # Domain-Whitelist Cache (für Auto-Whitelist)
 domain_whitelist_cache: set = set()
+domain_whitelist = DomainWhitelist(ALLOWED_DOMAINS)
+
+# === HINTERGRUND-SHELL-JOBS ===
+def _record_shell_job(job) -> None:
+    """Exportiert Laufzeit und Exit-Code beendeter Jobs als Metriken"""
+    shell_jobs_total.labels(status=job.status, exit_code=str(job.exit_code)).inc()
+    shell_job_duration.labels(status=job.status).observe(job.runtime)
+
+# === SHELL-LIMITS: Begrenzte Ausgabe + ulimit für Kindprozesse ===
+shell_limits_cfg = config.get("shell_limits", {})
+SHELL_HEAD_BYTES = int(shell_limits_cfg.get("head_kb", 16) * 1024)
+SHELL_TAIL_BYTES = int(shell_limits_cfg.get("tail_kb", 16) * 1024)
+SHELL_SPILL_DIR = shell_limits_cfg.get("spill_dir") or os.path.join(SANDBOX_PATH, "shell_output")
+SHELL_KEEP_SPILL_FILES = shell_limits_cfg.get("keep_spill_files", 20)
+SHELL_SPILL_MAX_BYTES = int(shell_limits_cfg.get("spill_max_mb", 64) * 1024 * 1024)
+SHELL_RLIMITS = {
+    "cpu_seconds": 60,
+    "memory_mb": 2048,
+    "open_files": 256,
+    "processes": 512,
+    **shell_limits_cfg.get("rlimits", {})
+}
+# ulimit im Kommando statt preexec_fn (nach fork im Multi-Thread-Server nicht sicher).
+# run_shell schreibt direkt in die Spill-Dateien: file_size begrenzt deren Größe
+shell_limit_prefix = build_limit_prefix({"file_size_mb": SHELL_SPILL_MAX_BYTES / (1024 * 1024), **SHELL_RLIMITS})
+
+shell_jobs_cfg = config.get("shell_jobs", {})
+shell_job_manager = ShellJobManager(
+    max_concurrent=shell_jobs_cfg.get("max_concurrent", 4),
+    max_runtime=shell_jobs_cfg.get("max_runtime_seconds", 3600),
+    keep_finished=shell_jobs_cfg.get("keep_finished", 50),
+    drain_timeout=shell_jobs_cfg.get("drain_timeout_seconds", 5),
+    on_finish=_record_shell_job,
+    head_bytes=SHELL_HEAD_BYTES,
+    tail_bytes=SHELL_TAIL_BYTES,
+    spill_dir=SHELL_SPILL_DIR,
+    spill_max_bytes=SHELL_SPILL_MAX_BYTES,
+    # Lange Builds brauchen mehr CPU-Zeit als Einzelkommandos
+    limit_prefix=build_limit_prefix({**SHELL_RLIMITS, **shell_jobs_cfg.get("rlimits", {"cpu_seconds": None})})
+)
+shell_jobs_running.set_function(shell_job_manager.running_count)
+atexit.register(shell_job_manager.shutdown)
+
+# === COMMAND-POLICY: Ersetzt Substring-Blocklisten und Regex-Validierung ===
+command_policy = create_command_policy(config.get("shell_policy", {}))
+
+# === HTTP-POOL: Gemeinsame Keep-Alive-Verbindungen für fetch ===
+def _record_http_request(host: str, status: str, duration: float) -> None:
+    """Exportiert Status und Dauer ausgehender Requests als Metriken"""
+    http_requests.labels(status=status).inc()
+    http_request_duration.observe(duration)
+
+http_pool = create_http_pool(config.get("http_pool", {}), on_request=_record_http_request)
+http_pool_connections.labels(kind='created').set_function(lambda: http_pool.stats()["connections_created"])
+http_pool_connections.labels(kind='reused').set_function(lambda: http_pool.stats()["connections_reused"])
+http_inflight.set_function(lambda: http_pool.stats()["inflight"])
+http_circuits_open.set_function(lambda: http_pool.stats()["circuits_open"])
+for _kind in ("requests", "retries", "failures", "rejected"):
+    ollama_http_requests.labels(kind=_kind).set_function(lambda kind=_kind: ollama_client.stats()[kind])
+ollama_up.set_function(lambda: 1 if ollama_client.health()["status"] == "up" else 0)
+for _model in model_router.models:
+    model_latency_p95.labels(model=_model).set_function(lambda model=_model: model_router.p95(model) or 0)
+if ollama_cfg.get("backends"):
+    for _backend in ollama_client.backends:
+        ollama_backend_inflight.labels(backend=_backend.name).set_function(lambda backend=_backend: backend.inflight)
+
+# Modell-Downloads im Hintergrund (POST /models/pull), Katalog wird nach Erfolg erneuert
+def _record_model_pull(job) -> None:
+    """Exportiert Ergebnis und Größe beendeter Downloads als Metriken"""
+    model_pulls_total.labels(status=job.status).inc()
+    if job.status == "success":
+        model_pull_bytes.inc(job.total)
+
+model_pull_manager = create_model_pull_manager(ollama_client, config.get("model_pulls", {}), on_finish=_record_model_pull)
+model_pulls_running.set_function(model_pull_manager.running_count)
+atexit.register(model_pull_manager.shutdown)
+
+# === FETCH: Byte-Limit beim Download, Zeichen-Limit für die Ausgabe ===
+fetch_cfg = config.get("fetch", {})
+FETCH_MAX_BYTES = int(fetch_cfg.get("max_kb", 256) * 1024)
+FETCH_MAX_CHARS = fetch_cfg.get("max_chars", 10000)
+FETCH_CONTENT_TYPES = fetch_cfg.get("allowed_content_types", DEFAULT_CONTENT_TYPES)
+FETCH_EXTRACT = fetch_cfg.get("extract", "markdown")  # markdown | text | raw
+FETCH_MAX_URLS = fetch_cfg.get("max_urls", 10)
+FETCH_DEADLINE = fetch_cfg.get("deadline_seconds", 30.0)
+FETCH_PER_HOST = fetch_cfg.get("per_host", 2)
+FETCH_TOTAL_CHARS = fetch_cfg.get("total_chars", 30000)
+
+download_cfg = config.get("download", {})
+DOWNLOAD_MAX_BYTES = int(download_cfg.get("max_mb", 100) * 1024 * 1024)
+DOWNLOAD_QUOTA_BYTES = int(download_cfg["sandbox_quota_mb"] * 1024 * 1024) if download_cfg.get("sandbox_quota_mb") else None
+DOWNLOAD_CHUNK_SIZE = int(download_cfg.get("chunk_kb", 64) * 1024)
+DOWNLOAD_MAX_REDIRECTS = download_cfg.get("max_redirects", 5)
+# Sandbox-Belegung für das Kontingent nicht bei jedem Download neu aufsummieren
+sandbox_usage = DirectoryUsage(ttl=download_cfg.get("usage_cache_seconds", 30))
+
+# HTTP-Cache (ETag/Last-Modified/Cache-Control) unter .localagent/http_cache
+http_cache = create_http_cache(os.path.join(INTERNAL_DIR, "http_cache"), config.get("http_cache", {}))
+if http_cache:
+    fetch_cache_size.set_function(lambda: http_cache.stats()["total_bytes"])
+
+# === EMBEDDINGS: gleichzeitige Anfragen bündeln, Vektoren cachen ===
+embeddings_cfg = config.get("embeddings", {})
+EMBEDDING_MODEL = embeddings_cfg.get("model", "nomic-embed-text")
+
+def _record_embedding_batch(model: str, size: int, duration: float) -> None:
+    """Exportiert Größe und Dauer eines Upstream-Aufrufs als Metriken"""
+    embedding_batch_size.observe(size)
+    embedding_batch_duration.observe(duration)
+
+embedding_service = create_embedding_service(
+    lambda texts, model: ollama_client.embed(texts, model),
+    os.path.join(INTERNAL_DIR, "embeddings"),
+    embeddings_cfg,
+    on_batch=_record_embedding_batch,
+)
+
+# Semantischer Index (Tool semantic_search) unter .localagent/semantic_index
+semantic_cfg = config.get("semantic_index", {})
+SEMANTIC_TOP_K = semantic_cfg.get("top_k", 5)
+SEMANTIC_MIN_SCORE = semantic_cfg.get("min_score", 0.0)
+SEMANTIC_REFRESH_SECONDS = semantic_cfg.get("refresh_seconds", 30)
+semantic_index = create_semantic_index(
+    SANDBOX_PATH,
+    os.path.join(INTERNAL_DIR, "semantic_index"),
+    lambda texts: embedding_service.embed(texts, EMBEDDING_MODEL)[0],
+    EMBEDDING_MODEL,
+    semantic_cfg,
+)
+if semantic_index:
+    semantic_index_chunks.set_function(lambda: semantic_index.stats()["chunks"])
 
 # =================
 # HELPER FUNCTIONS
 # =================
 
+whitelist_journal = create_whitelist_journal(
+    os.path.join(BASE_DIR, AUTO_WHITELIST_FILE), config.get("auto_whitelist_journal", {})
+)
+
 def load_domain_whitelist():
-    """Lädt gespeicherte Domain-Whitelist aus Datei"""
+    """Lädt gespeicherte Domain-Whitelist (Snapshot + Journal)"""
     global domain_whitelist_cache
     
     if not AUTO_WHITELIST_ENABLED:
         return
     
-    whitelist_path = os.path.join(BASE_DIR, AUTO_WHITELIST_FILE)
-    
     try:
-        if os.path.exists(whitelist_path):
-            with open(whitelist_path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f) or {}
-                domain_whitelist_cache = set(data.get('approved_domains', []))
-                main_logger.info(f"📋 Domain-Whitelist geladen: {len(domain_whitelist_cache)} Domains")
+        domain_whitelist_cache = whitelist_journal.load()
+        main_logger.info(f"📋 Domain-Whitelist geladen: {len(domain_whitelist_cache)} Domains")
+        atexit.register(whitelist_journal.close)
     except Exception as e:
         main_logger.error(f"❌ Fehler beim Laden der Whitelist: {e}")
+    domain_whitelist.rebuild(ALLOWED_DOMAINS, domain_whitelist_cache)
+
+def get_domain_matcher():
+    """Aktueller Domain-Matcher; neu aufgebaut, wenn allowed_domains ersetzt wurde"""
+    if domain_whitelist.allowed_source is not ALLOWED_DOMAINS:
+        domain_whitelist.rebuild(ALLOWED_DOMAINS, domain_whitelist_cache if AUTO_WHITELIST_ENABLED else ())
+    return domain_whitelist.matcher
 
 def save_domain_to_whitelist(domain: str):
-    """Speichert Domain in Whitelist-Datei"""
+    """Hängt eine Domain an das Whitelist-Journal an (Kompaktierung in die YAML-Datei periodisch)"""
     if not AUTO_WHITELIST_ENABLED:
         return
     
-    whitelist_path = os.path.join(BASE_DIR, AUTO_WHITELIST_FILE)
-    
     try:
-        # Lade existierende Whitelist
-        if os.path.exists(whitelist_path):
-            with open(whitelist_path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f) or {}
-        else:
-            data = {'approved_domains': []}
-        
-        # Füge Domain hinzu (wenn noch nicht vorhanden)
-        if domain not in data['approved_domains']:
-            data['approved_domains'].append(domain)
-            data['approved_domains'].sort()
-            
-            # Speichere
-            os.makedirs(os.path.dirname(whitelist_path), exist_ok=True)
-            with open(whitelist_path, 'w', encoding='utf-8') as f:
-                yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
-            
+        if whitelist_journal.append(domain):
             # Update Cache
             domain_whitelist_cache.add(domain)
+            domain_whitelist.add(domain)
             
             tool_logger.info(f"✅ Domain zur Whitelist hinzugefügt: {domain}")
             main_logger.info(f"📝 Whitelist aktualisiert: {len(domain_whitelist_cache)} Domains")
@@ -199,6 +479,13 @@ def _resolve_path(path: str) -> str:
     tool_logger.debug(f"📁 Aufgelöster absoluter Pfad: {resolved}")
     return resolved
 
+def _write_text(rpath: str, content: str) -> None:
+    """Schreibt Text; nur ein Hardlink in den Snapshot-Store wird vorher getrennt, eigene Links bleiben"""
+    if snapshot_store and snapshot_store.is_linked(rpath):
+        os.remove(rpath)
+    with open(rpath, "w", encoding="utf-8") as f:
+        f.write(content)
+
 def read_file(path: str) -> str:
     """Liest Dateiinhalt"""
     tool_logger.info(f"📖 Tool 'read_file' aufgerufen: path={path}")
@@ -236,16 +523,38 @@ def write_file(path: str, content: str) -> str:
         tool_logger.debug(f"📝 Schreibe nach: {rpath}")
         tool_logger.debug(f"📄 Content-Vorschau: {truncate_long_content(content, 200)}")
         
-        with open(rpath, "w", encoding="utf-8") as f:
-            f.write(content)
+        if snapshot_store:
+            snapshot_store.snapshot(rpath, "write")
+            snapshot_operations.labels(operation='snapshot').inc()
+        
+        blob_result = None
+        try:
+            if blob_store:
+                blob_result = blob_store.write(rpath, content.encode("utf-8"))
+            else:
+                _write_text(rpath, content)
+        finally:
+            if snapshot_store:
+                snapshot_store.settle(rpath)
         
         # Metrics
         sandbox_operations.labels(operation='write').inc()
         tool_executions.labels(tool='write_file', status='success').inc()
         
+        location = f" (Sandbox: {rpath})" if SANDBOX else f" (Live: {rpath})"
+        
+        if blob_result and blob_result["skipped"]:
+            blob_writes_skipped.inc()
+            blob_bytes_saved.labels(reason='unchanged').inc(blob_result["bytes_saved"])
+            tool_logger.info(f"♻️ Datei unverändert, Schreiben übersprungen: {rpath} ({len(content)} Zeichen)")
+            return f"✅ Datei erstellt{location}\n♻️ Inhalt unverändert - Schreibvorgang übersprungen"
+        
+        if blob_result and blob_result["deduplicated"]:
+            blob_writes_deduplicated.inc()
+            blob_bytes_saved.labels(reason='deduplicated').inc(blob_result["bytes_saved"])
+        
         tool_logger.info(f"✅ Datei erfolgreich geschrieben: {rpath} ({len(content)} Zeichen)")
         
-        location = f" (Sandbox: {rpath})" if SANDBOX else f" (Live: {rpath})"
         return f"✅ Datei erstellt{location}\n📝 {len(content)} Zeichen geschrieben"
         
     except Exception as e:
@@ -269,8 +578,12 @@ def delete_file(path: str) -> str:
             tool_logger.warning(f"⚠️ Ist ein Verzeichnis: {rpath}")
             return f"❌ Ist ein Verzeichnis (nutze Shell-Kommando für Verzeichnisse): {rpath}"
         
-        # Lösche Datei
-        os.remove(rpath)
+        # Lösche Datei (mit Snapshot: in den Snapshot verschieben, kein Kopieren)
+        if snapshot_store:
+            snapshot_store.snapshot(rpath, "delete", move=True)
+            snapshot_operations.labels(operation='snapshot').inc()
+        else:
+            os.remove(rpath)
         tool_logger.info(f"✅ Datei erfolgreich gelöscht: {rpath}")
         
         location = f" (Sandbox: {rpath})" if SANDBOX else f" (Live: {rpath})"
@@ -280,6 +593,60 @@ def delete_file(path: str) -> str:
         tool_logger.error(f"❌ Fehler beim Löschen von {path}: {str(e)}", exc_info=True)
         return f"❌ Fehler beim Löschen: {str(e)}"
 
+def undo(path: Optional[str] = None) -> str:
+    """Macht die letzte Änderung an einer Datei (oder die letzte überhaupt) rückgängig"""
+    tool_logger.info(f"↩️ Tool 'undo' aufgerufen: path={path}")
+    
+    if not snapshot_store:
+        return "❌ Snapshots sind deaktiviert (config/config.yaml: snapshots.enabled)"
+    
+    try:
+        rpath = _resolve_path(path) if path else None
+        result = snapshot_store.undo(rpath)
+        
+        if not result:
+            tool_logger.warning(f"⚠️ Keine Version zum Rückgängigmachen: {path or '(global)'}")
+            return f"❌ Keine gesicherte Version gefunden: {path or 'letzte Änderung'}"
+        
+        snapshot_operations.labels(operation='undo').inc()
+        tool_executions.labels(tool='undo', status='success').inc()
+        return (
+            f"↩️ Änderung rückgängig gemacht: {result['path']}\n"
+            f"📸 Version {result['version']} ({result['operation']})"
+        )
+        
+    except Exception as e:
+        tool_executions.labels(tool='undo', status='error').inc()
+        tool_logger.error(f"❌ Fehler bei Undo von {path}: {str(e)}", exc_info=True)
+        return f"❌ Fehler bei Undo: {str(e)}"
+
+def restore_file(path: str, version: Optional[str] = None) -> str:
+    """Stellt eine gesicherte Version einer Datei wieder her"""
+    tool_logger.info(f"⏪ Tool 'restore_file' aufgerufen: path={path}, version={version}")
+    
+    if not snapshot_store:
+        return "❌ Snapshots sind deaktiviert (config/config.yaml: snapshots.enabled)"
+    
+    try:
+        rpath = _resolve_path(path)
+        result = snapshot_store.restore(rpath, version)
+        
+        if not result:
+            versions = snapshot_store.list_versions(rpath)
+            tool_logger.warning(f"⚠️ Version nicht gefunden: {rpath} ({version})")
+            available = ", ".join(v["version"] for v in versions) or "keine"
+            return f"❌ Version nicht gefunden: {path}\n📸 Verfügbare Versionen: {available}"
+        
+        snapshot_operations.labels(operation='restore').inc()
+        tool_executions.labels(tool='restore_file', status='success').inc()
+        state = "gelöscht (existierte nicht)" if result["absent"] else f"{result['size']} bytes"
+        return f"⏪ Version wiederhergestellt: {rpath}\n📸 Version {result['version']} - {state}"
+        
+    except Exception as e:
+        tool_executions.labels(tool='restore_file', status='error').inc()
+        tool_logger.error(f"❌ Fehler beim Wiederherstellen von {path}: {str(e)}", exc_info=True)
+        return f"❌ Fehler beim Wiederherstellen: {str(e)}"
+
 def list_files(path: str = ".") -> str:
     """Listet Verzeichnisinhalt auf"""
     tool_logger.info(f"📂 Tool 'list_files' aufgerufen: path={path}")
@@ -302,6 +669,8 @@ def list_files(path: str = ".") -> str:
         dir_count = 0
         
         for item in sorted(os.listdir(rpath)):
+            if item == INTERNAL_DIR_NAME:
+                continue
             item_path = os.path.join(rpath, item)
             if os.path.isdir(item_path):
                 entries.append(f"📁 {item}/")
@@ -327,10 +696,8 @@ def list_files(path: str = ".") -> str:
         tool_logger.error(f"❌ Fehler beim Auflisten von {path}: {str(e)}", exc_info=True)
         return f"❌ Fehler beim Auflisten: {str(e)}"
 
-def run_shell(cmd: str) -> str:
-    """Führt Shell-Kommando aus"""
-    tool_logger.info(f"💻 Tool 'run_shell' aufgerufen: cmd={cmd}")
-    
+def _shell_block_reason(cmd: str) -> Optional[str]:
+    """Prüft Sandbox-Modus und Sicherheitsregeln; liefert Blockier-Meldung oder None"""
     if SANDBOX:
         tool_logger.warning("🚫 Shell-Kommando blockiert (Sandbox-Modus aktiv)")
         shell_executions.labels(status='blocked_sandbox').inc()
@@ -342,42 +709,92 @@ def run_shell(cmd: str) -> str:
         shell_executions.labels(status='empty_command').inc()
         return "❌ Leeres Kommando"
     
+    # Sicherheitsprüfung: jedes Programm der Pipeline gegen die Policy
+    decision = command_policy.check(cmd)
+    shell_policy_decisions.labels(
+        decision='allowed' if decision["allowed"] else 'denied',
+        cache='hit' if decision["cached"] else 'miss'
+    ).inc()
+    if not decision["allowed"]:
+        tool_logger.warning(f"🚫 Gefährliches Kommando blockiert: {cmd} ({decision['reason']})")
+        shell_executions.labels(status='blocked_dangerous').inc()
+        return f"🚫 Gefährliches Kommando blockiert: {cmd}\n💡 Grund: {decision['reason']}"
+    
+    return None
+
+def run_shell(cmd: str) -> str:
+    """Führt Shell-Kommando aus"""
+    tool_logger.info(f"💻 Tool 'run_shell' aufgerufen: cmd={cmd}")
+    
+    block_reason = _shell_block_reason(cmd)
+    if block_reason:
+        return block_reason
+    
     try:
-        # Sicherheitsprüfungen
-        dangerous_cmds = ['rm -rf', 'sudo', 'su -', 'chmod +x', 'mkfs', 'dd if=', 'format']
-        if any(danger in cmd.lower() for danger in dangerous_cmds):
-            tool_logger.warning(f"🚫 Gefährliches Kommando blockiert: {cmd}")
-            shell_executions.labels(status='blocked_dangerous').inc()
-            return f"🚫 Gefährliches Kommando blockiert: {cmd}"
-        
         tool_logger.debug(f"⚙️ Führe aus: {cmd}")
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=30)
+        
+        # Ausgabe geht direkt in Spill-Dateien statt in den Server-Speicher;
+        # zurückgelesen werden nur Anfang und Ende
+        os.makedirs(SHELL_SPILL_DIR, exist_ok=True)
+        spill_paths = {
+            "stdout": new_spill_path(SHELL_SPILL_DIR, "shell", "stdout"),
+            "stderr": new_spill_path(SHELL_SPILL_DIR, "shell", "stderr"),
+        }
+        try:
+            with open(spill_paths["stdout"], "wb") as stdout_file, open(spill_paths["stderr"], "wb") as stderr_file:
+                result = subprocess.run(
+                    with_limits(cmd, shell_limit_prefix), shell=True, stdout=stdout_file, stderr=stderr_file,
+                    timeout=30
+                )
+            
+            captured = {}
+            for stream, spill_path in spill_paths.items():
+                captured[stream] = read_captured(spill_path, SHELL_HEAD_BYTES, SHELL_TAIL_BYTES)
+                if not captured[stream][2]:
+                    discard_spill(spill_path)
+        except BaseException:
+            for spill_path in spill_paths.values():
+                discard_spill(spill_path)
+            raise
+        # Nur eigene Spill-Dateien: job-*.log gehören dem Job-Manager (Aufräumen in _prune)
+        prune_spill_dir(SHELL_SPILL_DIR, SHELL_KEEP_SPILL_FILES, prefix="shell")
+        
+        stdout, stdout_size, stdout_truncated = captured["stdout"]
+        stderr, stderr_size, stderr_truncated = captured["stderr"]
         
         # Metrics
         if result.returncode == 0:
             shell_executions.labels(status='success').inc()
         else:
             shell_executions.labels(status='failed').inc()
+        if stdout_truncated or stderr_truncated:
+            shell_executions.labels(status='output_truncated').inc()
         
         tool_logger.info(
             f"✅ Shell-Kommando ausgeführt: exit_code={result.returncode}, "
-            f"stdout_length={len(result.stdout)}, stderr_length={len(result.stderr)}"
+            f"stdout_length={stdout_size}, stderr_length={stderr_size}"
         )
-        tool_logger.debug(f"📤 STDOUT: {truncate_long_content(result.stdout, 500)}")
-        if result.stderr:
-            tool_logger.debug(f"⚠️ STDERR: {truncate_long_content(result.stderr, 500)}")
+        tool_logger.debug(f"📤 STDOUT: {truncate_long_content(stdout, 500)}")
+        if stderr:
+            tool_logger.debug(f"⚠️ STDERR: {truncate_long_content(stderr, 500)}")
         
         output_parts = [f"💻 Shell-Kommando: {cmd}"]
         
-        if result.returncode == 0:
+        # Signal direkt (negativ) oder über die Shell gemeldet (128 + Signal)
+        killed_by = -result.returncode if result.returncode < 0 else result.returncode - 128 if result.returncode > 128 else None
+        if killed_by == signal.SIGXFSZ:
+            output_parts.append(f"❌ Abgebrochen: Ausgabe oder Datei größer als {_format_bytes(SHELL_SPILL_MAX_BYTES)}")
+        elif result.returncode == 0:
             output_parts.append("✅ Erfolgreich ausgeführt")
+        elif killed_by:
+            output_parts.append(f"❌ Abgebrochen durch Signal {killed_by} (Ressourcen-Limit?)")
         else:
             output_parts.append(f"❌ Exit Code: {result.returncode}")
         
-        if result.stdout:
-            output_parts.append(f"📤 STDOUT:\n{result.stdout}")
-        if result.stderr:
-            output_parts.append(f"⚠️ STDERR:\n{result.stderr}")
+        if stdout:
+            output_parts.append(f"📤 STDOUT:\n{stdout}")
+        if stderr:
+            output_parts.append(f"⚠️ STDERR:\n{stderr}")
         
         return "\n\n".join(output_parts)
         
@@ -390,8 +807,98 @@ def run_shell(cmd: str) -> str:
         shell_executions.labels(status='error').inc()
         return f"❌ Shell-Fehler: {str(e)}"
 
-def fetch(url: str) -> str:
-    """Lädt Webseiteninhalte"""
+def start_shell_job(cmd: str) -> str:
+    """Startet Shell-Kommando als Hintergrund-Job und liefert sofort die Job-ID"""
+    tool_logger.info(f"🚀 Tool 'start_shell_job' aufgerufen: cmd={cmd}")
+    
+    block_reason = _shell_block_reason(cmd)
+    if block_reason:
+        return block_reason
+    
+    try:
+        job = shell_job_manager.start(cmd)
+        shell_executions.labels(status='job_started').inc()
+        return (
+            f"🚀 Hintergrund-Job gestartet: {job.id}\n"
+            f"💻 Kommando: {cmd}\n"
+            f"📡 Live-Ausgabe: GET /jobs/{job.id}/stream\n"
+            f"🔄 Status/Polling: GET /jobs/{job.id}?stdout_offset=0\n"
+            f"🛑 Abbrechen: DELETE /jobs/{job.id}"
+        )
+    except RuntimeError as e:
+        tool_logger.warning(f"⚠️ Job abgelehnt: {e}")
+        shell_executions.labels(status='job_rejected').inc()
+        return f"⚠️ Job abgelehnt: {str(e)}"
+    except Exception as e:
+        tool_logger.error(f"❌ Job-Start fehlgeschlagen '{cmd}': {str(e)}", exc_info=True)
+        shell_executions.labels(status='error').inc()
+        return f"❌ Shell-Fehler: {str(e)}"
+
+def shell_job_status(job_id: str) -> str:
+    """Zeigt Status und bisherige Ausgabe eines Hintergrund-Jobs"""
+    tool_logger.info(f"🔄 Tool 'shell_job_status' aufgerufen: job_id={job_id}")
+    
+    data = shell_job_manager.read(job_id)
+    if data is None:
+        return f"❌ Job nicht gefunden: {job_id}"
+    
+    output_parts = [
+        f"💻 Job {job_id}: {data['cmd']}",
+        f"📊 Status: {data['status']} (Exit Code: {data['exit_code']}, Laufzeit: {data['runtime']:.1f}s)"
+    ]
+    if data["stdout"]:
+        output_parts.append(f"📤 STDOUT:\n{data['stdout']}")
+    if data["stderr"]:
+        output_parts.append(f"⚠️ STDERR:\n{data['stderr']}")
+    return "\n\n".join(output_parts)
+
+def cancel_shell_job(job_id: str) -> str:
+    """Bricht einen Hintergrund-Job ab (inkl. aller Kindprozesse)"""
+    tool_logger.info(f"🛑 Tool 'cancel_shell_job' aufgerufen: job_id={job_id}")
+    
+    job = shell_job_manager.cancel(job_id)
+    if job is None:
+        return f"❌ Job nicht gefunden: {job_id}"
+    return f"🛑 Job {job_id}: {job.status}"
+
+def _domain_allowed(domain: str) -> bool:
+    """Domain-Check mit Auto-Whitelist: allowed_domains (inkl. Subdomains), Auto-Whitelist und Wildcard in einem Lookup"""
+    matcher = get_domain_matcher()
+    match = matcher.match(domain)
+    
+    if match == "wildcard":
+        tool_logger.debug(f"✅ Wildcard aktiv - Domain erlaubt: {domain}")
+        
+        # Auto-Whitelist: Speichere Domain automatisch
+        if AUTO_WHITELIST_ENABLED and not matcher.is_approved(domain):
+            save_domain_to_whitelist(domain)
+            tool_logger.info(f"📝 Domain automatisch zur Whitelist hinzugefügt: {domain}")
+    elif match == "approved":
+        tool_logger.debug(f"✅ Domain aus Auto-Whitelist: {domain}")
+    elif match is None:
+        tool_logger.warning(f"🚫 Domain blockiert: {domain} (nicht in Whitelist)")
+    
+    return match is not None
+
+def _domain_blocked_message(domain: str) -> str:
+    return f"""🚫 **Domain blockiert: {domain}**
+
+⚠️ Diese Domain ist nicht in der Whitelist erlaubt.
+
+� **Erlaubte Domains:**
+{chr(10).join(f'   • {d}' for d in ALLOWED_DOMAINS)}
+
+💡 **Um eine Domain hinzuzufügen:**
+   1. Öffne `config/config.yaml`
+   2. Füge Domain zur `allowed_domains` Liste hinzu
+   3. Starte den Server neu
+
+🔒 **Sicherheitshinweis:**
+   Nur vertrauenswürdige Domains zur Whitelist hinzufügen!
+"""
+
+def fetch(url: str, max_chars: Optional[int] = None, cancel: Optional[threading.Event] = None) -> str:
+    """Lädt Webseiteninhalte (max_chars: Zeichenbudget, Standard fetch.max_chars; cancel bricht das Laden ab)"""
     tool_logger.info(f"🌐 Tool 'fetch' aufgerufen: url={url}")
     
     if not url.strip():
@@ -410,72 +917,68 @@ def fetch(url: str) -> str:
         
         tool_logger.debug(f"🔍 Extrahierte Domain: {domain} (Original: {domain_with_port})")
         
-        # === DOMAIN-CHECK MIT AUTO-WHITELIST ===
-        allowed = False
-        
-        # 1. Wildcard-Check
-        if "*" in ALLOWED_DOMAINS:
-            allowed = True
-            tool_logger.debug(f"✅ Wildcard aktiv - Domain erlaubt: {domain}")
-            
-            # Auto-Whitelist: Speichere Domain automatisch
-            if AUTO_WHITELIST_ENABLED and domain not in domain_whitelist_cache:
-                save_domain_to_whitelist(domain)
-                tool_logger.info(f"📝 Domain automatisch zur Whitelist hinzugefügt: {domain}")
-        
-        # 2. Explizite Whitelist-Check
-        else:
-            allowed = any(domain == d.lower() or domain.endswith('.' + d.lower()) 
-                         for d in ALLOWED_DOMAINS)
-        
-        # 3. Auto-Whitelist-Cache-Check
-        if not allowed and AUTO_WHITELIST_ENABLED:
-            if domain in domain_whitelist_cache:
-                allowed = True
-                tool_logger.debug(f"✅ Domain aus Auto-Whitelist: {domain}")
-        
-        if not allowed:
-            tool_logger.warning(f"🚫 Domain blockiert: {domain} (nicht in Whitelist)")
-            return f"""🚫 **Domain blockiert: {domain}**
-
-⚠️ Diese Domain ist nicht in der Whitelist erlaubt.
-
-� **Erlaubte Domains:**
-{chr(10).join(f'   • {d}' for d in ALLOWED_DOMAINS)}
-
-💡 **Um eine Domain hinzuzufügen:**
-   1. Öffne `config/config.yaml`
-   2. Füge Domain zur `allowed_domains` Liste hinzu
-   3. Starte den Server neu
-
-🔒 **Sicherheitshinweis:**
-   Nur vertrauenswürdige Domains zur Whitelist hinzufügen!
-"""
+        if not _domain_allowed(domain):
+            return _domain_blocked_message(domain)
         
         tool_logger.debug(f"✅ Domain erlaubt: {domain}")
-        headers = {'User-Agent': 'LocalAgent-Pro/1.0'}
         
         tool_logger.debug(f"📡 Sende HTTP GET Request an: {url}")
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        result = fetch_url(
+            http_pool, url, max_bytes=FETCH_MAX_BYTES, allowed_types=FETCH_CONTENT_TYPES, cache=http_cache,
+            cancel=cancel
+        )
+        if result["cache"]:
+            fetch_cache_results.labels(result=result["cache"]).inc()
+        if result["cache"] in ("hit", "revalidated", "stale"):
+            fetch_cache_bytes_saved.inc(result["bytes_read"])
+            tool_logger.debug(f"🗄️ Cache {result['cache']}: {url}")
+        else:
+            fetch_bytes.labels(kind='read').inc(result["bytes_read"])
+            fetch_bytes.labels(kind='skipped').inc(result["skipped_bytes"] or 0)
+        
+        if result["skipped_reason"]:
+            skipped = f"{result['skipped_bytes']} Bytes" if result["skipped_bytes"] is not None else "Inhalt"
+            return f"⚠️ {result['skipped_reason']}: {url}\n📊 Status: {result['status_code']} | {skipped} nicht geladen"
         
-        content_length = len(response.text)
+        text = result["text"]
         tool_logger.info(
             f"✅ Web-Request erfolgreich: {url} "
-            f"(Status: {response.status_code}, Größe: {content_length} Zeichen)"
+            f"(Status: {result['status_code']}, {result['bytes_read']} Bytes gelesen, "
+            f"{result['elapsed']:.2f}s, Encoding: {result['encoding']})"
         )
-        tool_logger.debug(f"📊 Response Headers: {dict(response.headers)}")
         
-        content = response.text[:10000]
-        if len(response.text) > 10000:
-            content += f"\n\n... (auf 10KB begrenzt, Original: {len(response.text)} Zeichen)"
-            tool_logger.debug(f"✂️ Content auf 10KB gekürzt (Original: {content_length} Zeichen)")
+        # Boilerplate (Skripte, Styles, Navigation) entfernen, bevor das Budget greift
+        max_chars = max_chars or FETCH_MAX_CHARS
+        extracted = extract_content(
+            text, result["content_type"], base_url=result["final_url"], max_chars=max_chars, mode=FETCH_EXTRACT
+        )
+        content = extracted["text"]
+        notes = []
+        if extracted["truncated"]:
+            notes.append(f"auf {max_chars} Zeichen begrenzt, geladen: {len(text)} Zeichen")
+        if result["truncated"]:
+            skipped = result["skipped_bytes"]
+            notes.append(
+                f"Download nach {result['bytes_read']} Bytes abgebrochen"
+                + (f", {skipped} Bytes nicht geladen" if skipped is not None else "")
+            )
+            tool_logger.debug(f"✂️ Download gekürzt: {url} ({skipped} Bytes übersprungen)")
+        if notes:
+            content += f"\n\n... ({'; '.join(notes)})"
         
-        return f"🌐 Webseite geladen: {url}\n📊 Status: {response.status_code}\n\n{content}"
+        cache_note = {"hit": " (aus Cache)", "revalidated": " (aus Cache, revalidiert)", "stale": " (veralteter Cache, Server nicht erreichbar)"}.get(result["cache"], "")
+        title = f"\n📄 Titel: {extracted['title']}" if extracted["title"] else ""
+        return f"🌐 Webseite geladen: {url}\n📊 Status: {result['status_code']}{cache_note}{title}\n\n{content}"
         
     except requests.exceptions.Timeout:
         tool_logger.error(f"⏰ Timeout bei Web-Request: {url}")
-        return f"❌ Web-Fehler: Timeout nach 15s"
+        return f"❌ Web-Fehler: Timeout nach {http_pool.read_timeout:.0f}s"
+    except (CircuitOpenError, HostBusyError) as e:
+        tool_logger.warning(f"⚡ Web-Request abgewiesen: {url} ({str(e)})")
+        return f"⚡ Web-Fehler: {str(e)}"
+    except FetchCancelled as e:
+        tool_logger.info(f"⏹️ {str(e)}")
+        return f"⏰ Web-Fehler: {str(e)}"
     except requests.exceptions.RequestException as e:
         tool_logger.error(f"❌ Web-Request-Fehler bei {url}: {str(e)}", exc_info=True)
         return f"❌ Web-Fehler: {str(e)}"
@@ -483,39 +986,171 @@ def fetch(url: str) -> str:
         tool_logger.error(f"❌ Unerwarteter Fehler bei Web-Request {url}: {str(e)}", exc_info=True)
         return f"❌ Web-Fehler: {str(e)}"
 
-# =================
-# TOOL-AUSWAHL LOGIK
-# =================
+def fetch_urls(urls: List[str]) -> str:
+    """Lädt mehrere URLs gleichzeitig; Ergebnisse in Prompt-Reihenfolge mit Status und Dauer"""
+    tool_logger.info(f"🌐 Tool 'fetch' für {len(urls)} URLs aufgerufen")
+    
+    # Nach der Gesamtfrist hören laufende Downloads auf zu lesen
+    cancel = threading.Event()
+    fetched = fetch_many(
+        lambda url, max_chars: fetch(url, max_chars, cancel=cancel), urls,
+        deadline=FETCH_DEADLINE,
+        max_workers=http_pool.max_per_host * 2,
+        per_host=FETCH_PER_HOST,
+        total_chars=FETCH_TOTAL_CHARS,
+        max_chars=FETCH_MAX_CHARS,
+        cancel=cancel,
+    )
+    
+    sections = []
+    ok = 0
+    for number, item in enumerate(fetched, 1):
+        if item["status"] == "ok" and item["result"].startswith("🌐 Webseite geladen"):
+            icon = "✅"
+            ok += 1
+        elif item["status"] == "timeout":
+            icon = "⏰"
+        else:
+            icon = "❌"
+        elapsed = f"{item['elapsed']:.2f}s" if item["elapsed"] is not None else f">{FETCH_DEADLINE:.0f}s"
+        sections.append(f"### [{number}/{len(fetched)}] {icon} {item['url']} ({elapsed})\n{item['result']}")
+    
+    return f"🌐 Web-Requests: {ok}/{len(fetched)} erfolgreich\n\n" + "\n\n".join(sections)
 
-def _is_valid_command(cmd: str) -> bool:
-    """
-    Prüft ob String ein gültiger Shell-Command ist
-    (nicht nur ein Pfad oder Dateiname)
-    """
-    tool_logger.debug(f"🔍 Validiere Command: {cmd}")
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def download(url: str, path: Optional[str] = None) -> str:
+    """Lädt eine URL gestreamt in eine Datei (Sandbox), setzt abgebrochene Downloads fort"""
+    tool_logger.info(f"⬇️ Tool 'download' aufgerufen: url={url}, path={path}")
     
-    # Nur Pfad? → KEIN Command
-    if cmd.startswith('/') and ' ' not in cmd:
-        tool_logger.debug(f"❌ Nur Pfad, kein Command: {cmd}")
-        return False
-    
-    # Nur Dateiname? → KEIN Command
-    if '.' in cmd and ' ' not in cmd and not any(c in cmd for c in ['|', '>', '<', '&']):
-        tool_logger.debug(f"❌ Nur Dateiname, kein Command: {cmd}")
-        return False
-    
-    # Valide Command-Patterns
-    valid_patterns = [
-        r'^(ls|pwd|cat|echo|grep|find|date|whoami|df|du|free|top|ps)\s',  # Standard-Commands mit Argumenten
-        r'^(ls|pwd|date|whoami)$',  # Standard-Commands ohne Argumente
-        r'\|',  # Pipes
-        r'>',   # Redirects
-        r'&&',  # Chain
-    ]
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
     
-    is_valid = any(re.search(pattern, cmd) for pattern in valid_patterns)
-    tool_logger.debug(f"{'✅' if is_valid else '❌'} Command-Validierung: {cmd} → {is_valid}")
-    return is_valid
+    domain = (urlparse(url).hostname or "").lower()
+    if not _domain_allowed(domain):
+        downloads.labels(status='blocked').inc()
+        return _domain_blocked_message(domain)
+    
+    # Dateiname aus der URL: "." und ".." würden auf ein Verzeichnis zeigen
+    filename = os.path.basename(urlparse(url).path.rstrip("/")) or "download.bin"
+    if filename in (".", ".."):
+        downloads.labels(status='blocked').inc()
+        return f"🚫 Ungültiger Dateiname in der URL: {filename}"
+    
+    rpath = _resolve_path(path or filename)
+    if os.path.isdir(rpath):
+        rpath = os.path.join(rpath, filename)
+    # Prüfung auf dem endgültigen Pfad (nach dem Anhängen des Dateinamens)
+    if SANDBOX and not os.path.realpath(rpath).startswith(os.path.realpath(SANDBOX_PATH) + os.sep):
+        downloads.labels(status='blocked').inc()
+        return f"🚫 Zielpfad außerhalb der Sandbox: {path or filename}"
+    
+    available = None
+    if SANDBOX and DOWNLOAD_QUOTA_BYTES is not None:
+        # Eigener Teildownload zählt nicht gegen das Kontingent (wird fortgesetzt)
+        part_size = os.path.getsize(rpath + ".part") if os.path.exists(rpath + ".part") else 0
+        available = max(DOWNLOAD_QUOTA_BYTES - sandbox_usage.get(SANDBOX_PATH) + part_size, 0)
+    
+    result = None
+    try:
+        if snapshot_store and os.path.isfile(rpath):
+            snapshot_store.snapshot(rpath, "download")
+            snapshot_operations.labels(operation='snapshot').inc()
+        result = download_to_file(
+            http_pool, url, rpath, max_bytes=DOWNLOAD_MAX_BYTES, available_bytes=available, chunk_size=DOWNLOAD_CHUNK_SIZE,
+            url_allowed=_domain_allowed, max_redirects=DOWNLOAD_MAX_REDIRECTS
+        )
+    except DownloadError as e:
+        downloads.labels(status='rejected').inc()
+        tool_logger.warning(f"🚫 Download abgelehnt: {url} ({str(e)})")
+        return f"🚫 Download abgelehnt: {url}\n💡 {str(e)}"
+    except requests.exceptions.RequestException as e:
+        downloads.labels(status='error').inc()
+        tool_logger.error(f"❌ Download-Fehler bei {url}: {str(e)}")
+        partial = os.path.getsize(rpath + ".part") if os.path.exists(rpath + ".part") else 0
+        hint = f"\n🔁 {_format_bytes(partial)} gespeichert - erneuter Aufruf setzt den Download fort" if partial else ""
+        return f"❌ Download-Fehler: {str(e)}{hint}"
+    except Exception as e:
+        downloads.labels(status='error').inc()
+        tool_logger.error(f"❌ Unerwarteter Fehler bei Download {url}: {str(e)}", exc_info=True)
+        return f"❌ Download-Fehler: {str(e)}"
+    finally:
+        if snapshot_store:
+            snapshot_store.settle(rpath)
+        if result is None:
+            # Abbruch: Größe der Teildatei unbekannt, beim nächsten Mal neu zählen
+            sandbox_usage.invalidate(SANDBOX_PATH)
+    
+    sandbox_usage.add(SANDBOX_PATH, result["bytes_written"])
+    downloads.labels(status='success').inc()
+    download_bytes.inc(result["bytes_written"])
+    sandbox_operations.labels(operation='write').inc()
+    tool_logger.info(
+        f"✅ Download abgeschlossen: {url} → {rpath} ({result['size']} Bytes, "
+        f"{_format_bytes(result['bytes_per_second'])}/s, {result['elapsed']:.2f}s)"
+    )
+    
+    location = f" (Sandbox: {rpath})" if SANDBOX else f" (Live: {rpath})"
+    resumed = f"\n🔁 Fortgesetzt ab {_format_bytes(result['resumed_from'])}" if result["resumed_from"] else ""
+    unverified = "" if result["verified"] else "\n⚠️ Server sendet keine Länge - Vollständigkeit nicht geprüft"
+    return (
+        f"⬇️ Download abgeschlossen{location}\n"
+        f"📊 {_format_bytes(result['size'])} in {result['elapsed']:.2f}s "
+        f"({_format_bytes(result['bytes_per_second'])}/s){resumed}{unverified}"
+    )
+
+def _chunk_preview(path: str, start_line: int, end_line: int, max_lines: int = 4) -> str:
+    """Erste Zeilen eines Treffers (direkt aus der Datei, nicht aus dem Index)"""
+    try:
+        with open(os.path.join(SANDBOX_PATH, path), "r", encoding="utf-8", errors="replace") as f:
+            lines = [line.rstrip("\n") for i, line in enumerate(f, 1) if start_line <= i < start_line + max_lines]
+    except OSError:
+        return ""
+    return "\n".join(f"    {line[:160]}" for line in lines if line.strip())
+
+def semantic_search(query: str, top_k: Optional[int] = None) -> str:
+    """Findet die zur Anfrage passendsten Abschnitte in den Sandbox-Dateien"""
+    tool_logger.info(f"🧭 Tool 'semantic_search' aufgerufen: query={truncate_long_content(query, 100)}")
+    
+    if semantic_index is None:
+        return "🔒 Semantische Suche ist deaktiviert (semantic_index.enabled)"
+    
+    # Abgleich im Hintergrund; gesucht wird auf dem aktuellen Stand des Index
+    error = semantic_index.last_error
+    building = semantic_index.refresh_in_background(
+        SEMANTIC_REFRESH_SECONDS,
+        on_done=lambda result: semantic_search_duration.labels(phase='update').observe(result["seconds"]),
+    )
+    if semantic_index.last_update is None and not semantic_index.stats()["chunks"]:
+        if error:
+            tool_executions.labels(tool='semantic_search', status='error').inc()
+            return f"❌ Semantische Suche fehlgeschlagen: {error}\n💡 Läuft das Embedding-Modell {EMBEDDING_MODEL} in Ollama?"
+        if building:
+            return "⏳ Index wird aufgebaut - die Sandbox wird gerade indiziert, bitte gleich erneut fragen"
+    
+    try:
+        started = time.time()
+        hits = semantic_index.search(query, top_k or SEMANTIC_TOP_K, SEMANTIC_MIN_SCORE)
+        semantic_search_duration.labels(phase='query').observe(time.time() - started)
+    except (SemanticIndexError, EmbeddingError, TimeoutError) as e:
+        tool_executions.labels(tool='semantic_search', status='error').inc()
+        tool_logger.error(f"❌ Semantische Suche fehlgeschlagen: {str(e)}")
+        return f"❌ Semantische Suche fehlgeschlagen: {str(e)}\n💡 Läuft das Embedding-Modell {EMBEDDING_MODEL} in Ollama?"
+    
+    tool_executions.labels(tool='semantic_search', status='success').inc()
+    if not hits:
+        return "🧭 Keine passenden Abschnitte gefunden"
+    
+    output_parts = [f"🧭 {len(hits)} passende Abschnitte:"]
+    for hit in hits:
+        entry = f"📄 {hit['path']}:{hit['start_line']}-{hit['end_line']} (Score {hit['score']:.2f})"
+        preview = _chunk_preview(hit["path"], hit["start_line"], hit["end_line"])
+        output_parts.append(f"{entry}\n{preview}" if preview else entry)
+    return "\n".join(output_parts)
 
 # =================
 # TOOL-AUSWAHL LOGIK
@@ -528,26 +1163,7 @@ def _is_valid_command(cmd: str) -> bool:
     """
     tool_logger.debug(f"🔍 Validiere Command: {cmd}")
     
-    # Nur Pfad? → KEIN Command
-    if cmd.startswith('/') and ' ' not in cmd:
-        tool_logger.debug(f"❌ Nur Pfad, kein Command: {cmd}")
-        return False
-    
-    # Nur Dateiname? → KEIN Command
-    if '.' in cmd and ' ' not in cmd and not any(c in cmd for c in ['|', '>', '<', '&']):
-        tool_logger.debug(f"❌ Nur Dateiname, kein Command: {cmd}")
-        return False
-    
-    # Valide Command-Patterns
-    valid_patterns = [
-        r'^(ls|pwd|cat|echo|grep|find|date|whoami|df|du|free|top|ps)\s',  # Standard-Commands mit Argumenten
-        r'^(ls|pwd|date|whoami)$',  # Standard-Commands ohne Argumente
-        r'\|',  # Pipes
-        r'>',   # Redirects
-        r'&&',  # Chain
-    ]
-    
-    is_valid = any(re.search(pattern, cmd) for pattern in valid_patterns)
+    is_valid = command_policy.is_command(cmd)
     tool_logger.debug(f"{'✅' if is_valid else '❌'} Command-Validierung: {cmd} → {is_valid}")
     return is_valid
 
@@ -594,9 +1210,41 @@ def analyze_and_execute(prompt: str) -> str:
     write_triggers = ['schreiben', 'schreib', 'write', 'erstellen', 'erstelle', 'create', 'speichern', 'speichere', 'save']
     delete_triggers = ['löschen', 'lösche', 'lösch', 'delete', 'remove', 'entfernen', 'entferne']
     
-    has_write_trigger = any(word in prompt_lower for word in write_triggers)
+    # Undo/Restore nur als ganze Wörter ("restore.sh" ist ein Dateiname)
+    undo_pattern = r'(?<![\w./-])(?:rückgängig|undo)(?![\w./-])'
+    restore_pattern = r'(?<![\w./-])(?:wiederherstellen|wieder\s+her|restore)(?![\w./-])'
+    has_undo_trigger = re.search(undo_pattern, prompt_lower) is not None
+    has_restore_trigger = re.search(restore_pattern, prompt_lower) is not None
+    
+    # "wiederherstellen" enthält "erstellen" und zählt nicht als Write-Trigger
+    write_text = re.sub(restore_pattern, ' ', prompt_lower)
+    has_write_trigger = any(word in write_text for word in write_triggers)
     has_delete_trigger = any(word in prompt_lower for word in delete_triggers)
     
+    # === SEMANTISCHE SUCHE ("Welche Datei behandelt X?") ===
+    # Explizit immer; als Frage nur am Anfang, ohne Dateinamen und ohne Write/Delete-Trigger
+    semantic_triggers = ['semantische suche', 'semantic search']
+    semantic_question = re.match(r'\s*(?:in\s+)?(?:welche[mnrs]?\s+datei(?:en)?|which\s+files?)\b', prompt_lower)
+    names_file = re.search(r'\b[\w\-/]+\.[a-z][a-z0-9]{0,4}\b', prompt_lower)
+    if any(trigger in prompt_lower for trigger in semantic_triggers) or (
+        semantic_question and not names_file and not (has_write_trigger or has_delete_trigger)
+    ):
+        return f"🧭 Semantische Suche:\n{semantic_search(prompt)}"
+    
+    # === UNDO / RESTORE (WRITE/DELETE haben Vorrang) ===
+    if (has_undo_trigger or has_restore_trigger) and not (has_write_trigger or has_delete_trigger):
+        file_match = re.search(r'\b([a-zA-Z0-9_.\-/]+\.[a-zA-Z0-9]+)\b', prompt)
+        filename = file_match.group(1).rstrip('"}\']') if file_match else None
+        
+        if has_restore_trigger and filename:
+            version_match = re.search(r'version\s+(\d+)', prompt, re.IGNORECASE)
+            result = restore_file(filename, version_match.group(1) if version_match else None)
+            return f"⏪ Datei wiederherstellen:\n{result}"
+        
+        if has_undo_trigger:
+            result = undo(filename)
+            return f"↩️ Rückgängig:\n{result}"
+    
     # === DATEI LESEN === (nur wenn KEIN WRITE/DELETE-Trigger)
     read_triggers = ['lesen', 'lies', 'read', 'zeigen', 'zeige', 'show', 'inhalt', 'anzeigen', 'öffne', 'open', 'cat']
     if any(word in prompt_lower for word in read_triggers) and not has_write_trigger and not has_delete_trigger:
@@ -709,6 +1357,10 @@ def analyze_and_execute(prompt: str) -> str:
     shell_triggers = ['führe aus', 'execute', 'run command', 'kommando ausführen', 'shell']
     has_shell_trigger = any(trigger in prompt_lower for trigger in shell_triggers)
     
+    # Hintergrund-Modus für lange Kommandos (Builds, Tests)
+    background_triggers = ['im hintergrund', 'background']
+    run_in_background = any(trigger in prompt_lower for trigger in background_triggers)
+    
     if shell_enabled and (has_shell_trigger or not require_trigger):
         # Nur bei EXPLIZITEN Triggern oder wenn Trigger-Requirement deaktiviert
         cmd_patterns = [
@@ -727,7 +1379,10 @@ def analyze_and_execute(prompt: str) -> str:
                 
                 # === COMMAND-VALIDIERUNG ===
                 if _is_valid_command(cmd):
-                    result = run_shell(cmd)
+                    if run_in_background:
+                        result = start_shell_job(cmd)
+                    else:
+                        result = run_shell(cmd)
                     results.append(f"💻 Shell-Kommando:\n{result}")
                     tool_logger.info(f"✅ Shell-Command validiert und ausgeführt: {cmd}")
                 else:
@@ -745,24 +1400,24 @@ def analyze_and_execute(prompt: str) -> str:
     
     # Web-Request (nur wenn explizit angefordert, nicht automatisch bei URLs)
     # AUSSCHLUSS: Localhost/127.0.0.1 URLs (interne Server-Aufrufe)
+    # Download in Datei: "Lade https://... herunter (nach pfad)" / "Download https://... to pfad"
+    download_match = re.search(
+        r'(?:download|herunterladen|lade)\s+(https?://(?!127\.0\.0\.1|localhost)\S+)'
+        r'(?:\s+herunter)?(?:\s+(?:nach|als|in|unter|to|as)\s+([\w./\-]+))?',
+        prompt, re.IGNORECASE
+    )
+    downloaded = bool(download_match) and ('download' in prompt_lower or 'herunter' in prompt_lower)
+    if downloaded:
+        result = download(download_match.group(1), download_match.group(2))
+        results.append(f"⬇️ Download:\n{result}")
+    
     web_triggers = ['hole', 'hol', 'fetch', 'lade', 'laden', 'abrufen', 'download', 'webseite', 'website']
-    if any(word in prompt_lower for word in web_triggers):
-        url_patterns = [
-            r'(https?://(?!127\.0\.0\.1|localhost)[^\s]+)',  # NICHT localhost/127.0.0.1
-            r'(www\.[^\s]+)',
-            r'(?:hole|fetch|lade)\s+([a-zA-Z0-9.-]+\.(?:com|org|net|de|edu|gov|io|co))'
-        ]
-        
-        for pattern in url_patterns:
-            url_match = re.search(pattern, prompt, re.IGNORECASE)
-            if url_match:
-                url = url_match.group(1)
-                # Zusätzliche Sicherheit: Ignoriere localhost auch in anderen Formen
-                if '127.0.0.1' in url or 'localhost' in url.lower():
-                    continue
-                result = fetch(url)
-                results.append(f"🌐 Web-Request:\n{result}")
-                break
+    if not downloaded and any(word in prompt_lower for word in web_triggers):
+        urls = extract_urls(prompt, max_urls=FETCH_MAX_URLS)
+        if len(urls) == 1:
+            results.append(f"🌐 Web-Request:\n{fetch(urls[0])}")
+        elif urls:
+            results.append(fetch_urls(urls))
     
     if not results:
         return """🤔 Keine spezifischen Tools erkannt. 
@@ -786,6 +1441,13 @@ def analyze_and_execute(prompt: str) -> str:
   - "Liste Verzeichnis /tmp auf"
   - "Ordner . anzeigen"
 
+• **Rückgängig / Wiederherstellen:**
+  - "Mache test.txt rückgängig"
+  - "Stelle test.txt wieder her"
+
+• **Semantische Suche:**
+  - "Welche Datei behandelt die Anmeldung?"
+
 • **Shell:**
   - "Führe Kommando 'ls -la' aus"
   - "Execute 'pwd'"
@@ -793,6 +1455,7 @@ def analyze_and_execute(prompt: str) -> str:
 • **Web:**
   - "Hole github.com"
   - "Lade Webseite example.com"
+  - "Lade https://example.com/data.zip herunter nach data/data.zip"
 
 🔒 **Sandbox-Modus aktiv** - Dateien werden sicher in der Sandbox erstellt."""
     
@@ -833,6 +1496,9 @@ def root():
         <div class="endpoint"><strong>GET /v1/models</strong> - Verfügbare Modelle</div>
         <div class="endpoint"><strong>POST /v1/chat/completions</strong> - Chat API (OpenAI-kompatibel)</div>
         <div class="endpoint"><strong>POST /test</strong> - Tool-Test Endpoint</div>
+        <div class="endpoint"><strong>POST /jobs</strong> - Hintergrund-Shell-Job (GET /jobs/&lt;id&gt;/stream, DELETE /jobs/&lt;id&gt;)</div>
+        <div class="endpoint"><strong>POST /models/pull</strong> - Modell-Download im Hintergrund (GET /models/pulls/&lt;id&gt;/stream, DELETE /models/pulls/&lt;id&gt;)</div>
+        <div class="endpoint"><strong>GET /snapshots?path=...</strong> - Dateiversionen (POST /snapshots/undo, /snapshots/restore)</div>
         
         <h2>🎯 OpenWebUI Integration</h2>
         <p><strong>API Base URL für OpenWebUI:</strong></p>
@@ -854,8 +1520,10 @@ def health():
     api_logger.debug("📡 Health Check angefordert")
     request_count.labels(endpoint='/health', status='success').inc()
     
+    # Zustand aus dem Health-Monitor, kein Live-Aufruf an Ollama
+    ollama_health = ollama_client.health()
     health_data = {
-        "status": "ok",
+        "status": "degraded" if ollama_health["status"] == "down" else "ok",
         "server_time": int(time.time()),
         "model": LLM_MODEL,
         "sandbox": SANDBOX,
@@ -863,7 +1531,8 @@ def health():
         "allowed_domains": ALLOWED_DOMAINS,
         "auto_whitelist_enabled": AUTO_WHITELIST_ENABLED,
         "auto_whitelist_count": len(domain_whitelist_cache) if AUTO_WHITELIST_ENABLED else 0,
-        "open_webui_port": OPEN_WEBUI_PORT
+        "open_webui_port": OPEN_WEBUI_PORT,
+        "ollama": ollama_health
     }
     
     api_logger.info("✅ Health Check erfolgreich")
@@ -879,12 +1548,180 @@ def get_whitelist():
         "wildcard_active": "*" in ALLOWED_DOMAINS,
         "approved_domains": sorted(list(domain_whitelist_cache)) if AUTO_WHITELIST_ENABLED else [],
         "count": len(domain_whitelist_cache) if AUTO_WHITELIST_ENABLED else 0,
-        "file": AUTO_WHITELIST_FILE if AUTO_WHITELIST_ENABLED else None
+        "file": AUTO_WHITELIST_FILE if AUTO_WHITELIST_ENABLED else None,
+        "matcher": domain_whitelist.stats(),
+        "journal": whitelist_journal.stats() if AUTO_WHITELIST_ENABLED else None
     }
     
     api_logger.info(f"✅ Whitelist gesendet: {whitelist_data['count']} Domains")
     return jsonify(whitelist_data)
 
+@app.route("/snapshots", methods=["GET"])
+def get_snapshots():
+    """Listet gesicherte Versionen einer Datei (?path=...)"""
+    api_logger.debug("📡 Snapshots angefordert")
+    
+    if not snapshot_store:
+        return jsonify({"enabled": False, "versions": []})
+    
+    path = request.args.get("path", "")
+    if not path:
+        return jsonify({"enabled": True, "stats": snapshot_store.stats()})
+    
+    rpath = _resolve_path(path)
+    return jsonify({"enabled": True, "path": rpath, "versions": snapshot_store.list_versions(rpath)})
+
+@app.route("/snapshots/restore", methods=["POST"])
+def post_snapshot_restore():
+    """Stellt eine Version wieder her ({"path": ..., "version": ...})"""
+    data: Dict[str, Any] = request.get_json(silent=True) or {}
+    path = data.get("path", "")
+    api_logger.info(f"⏪ Restore angefordert: {path} (Version {data.get('version')})")
+    
+    if not snapshot_store:
+        return jsonify({"error": "Snapshots deaktiviert"}), 409
+    if not path:
+        return jsonify({"error": "Kein Pfad angegeben"}), 400
+    
+    rpath = _resolve_path(path)
+    version = data.get("version")
+    result = snapshot_store.restore(rpath, str(version) if version is not None else None)
+    if not result:
+        return jsonify({"error": "Version nicht gefunden", "versions": snapshot_store.list_versions(rpath)}), 404
+    
+    snapshot_operations.labels(operation='restore').inc()
+    return jsonify({"path": rpath, "restored": result})
+
+@app.route("/snapshots/undo", methods=["POST"])
+def post_snapshot_undo():
+    """Macht die letzte Änderung rückgängig ({"path": ...} optional)"""
+    data: Dict[str, Any] = request.get_json(silent=True) or {}
+    path = data.get("path")
+    api_logger.info(f"↩️ Undo angefordert: {path or '(global)'}")
+    
+    if not snapshot_store:
+        return jsonify({"error": "Snapshots deaktiviert"}), 409
+    
+    result = snapshot_store.undo(_resolve_path(path) if path else None)
+    if not result:
+        return jsonify({"error": "Keine gesicherte Version gefunden"}), 404
+    
+    snapshot_operations.labels(operation='undo').inc()
+    return jsonify({"undone": result})
+
+@app.route("/jobs", methods=["GET"])
+def list_jobs():
+    """Listet Hintergrund-Shell-Jobs"""
+    api_logger.debug("📡 Job-Liste angefordert")
+    return jsonify({"jobs": shell_job_manager.list(), "running": shell_job_manager.running_count()})
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    """Startet einen Hintergrund-Shell-Job ({"cmd": "..."})"""
+    data: Dict[str, Any] = request.get_json(silent=True) or {}
+    cmd = data.get("cmd", "")
+    api_logger.info(f"🚀 Job-Start angefordert: {cmd}")
+    
+    shell_config = config.get("shell_execution", {})
+    if not shell_config.get("enabled", SANDBOX == False):
+        return jsonify({"error": "Shell-Kommandos sind deaktiviert"}), 403
+    
+    block_reason = _shell_block_reason(cmd)
+    if block_reason:
+        return jsonify({"error": block_reason}), 403
+    
+    try:
+        job = shell_job_manager.start(cmd)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 429
+    
+    shell_executions.labels(status='job_started').inc()
+    return jsonify(job.to_dict()), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id: str):
+    """Job-Status plus Ausgabe ab Offset (?stdout_offset=...&stderr_offset=...)"""
+    data = shell_job_manager.read(
+        job_id,
+        stdout_offset=request.args.get("stdout_offset", 0, type=int),
+        stderr_offset=request.args.get("stderr_offset", 0, type=int)
+    )
+    if data is None:
+        return jsonify({"error": "Job nicht gefunden"}), 404
+    return jsonify(data)
+
+@app.route("/jobs/<job_id>/stream", methods=["GET"])
+def stream_job(job_id: str):
+    """Live-Ausgabe eines Jobs als Server-Sent Events"""
+    if shell_job_manager.get(job_id) is None:
+        return jsonify({"error": "Job nicht gefunden"}), 404
+    
+    api_logger.info(f"📡 Job-Stream gestartet [{job_id}]")
+    
+    def generate_events():
+        for event in shell_job_manager.follow(job_id):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    
+    return Response(generate_events(), mimetype='text/event-stream')
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def delete_job(job_id: str):
+    """Bricht einen Job ab (Prozessgruppe wird beendet)"""
+    api_logger.info(f"🛑 Job-Abbruch angefordert [{job_id}]")
+    job = shell_job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job nicht gefunden"}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/models/pulls", methods=["GET"])
+def list_model_pulls():
+    """Listet Modell-Downloads"""
+    return jsonify({"pulls": model_pull_manager.list(), "running": model_pull_manager.running_count()})
+
+@app.route("/models/pull", methods=["POST"])
+def create_model_pull():
+    """Startet einen Modell-Download im Hintergrund ({"model": "...", "warm_up": bool})"""
+    data: Dict[str, Any] = request.get_json(silent=True) or {}
+    model = (data.get("model") or data.get("name") or "").strip()
+    if not model:
+        return jsonify({"error": "Kein Modell angegeben"}), 400
+    api_logger.info(f"📥 Modell-Download angefordert: {model}")
+    
+    try:
+        job = model_pull_manager.start(model, warm_up=data.get("warm_up"))
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 429
+    
+    return jsonify(model_pull_manager.status(job.id)), 202
+
+@app.route("/models/pulls/<job_id>", methods=["GET"])
+def get_model_pull(job_id: str):
+    """Status eines Downloads (Prozent, Bytes/s)"""
+    data = model_pull_manager.status(job_id)
+    if data is None:
+        return jsonify({"error": "Download nicht gefunden"}), 404
+    return jsonify(data)
+
+@app.route("/models/pulls/<job_id>/stream", methods=["GET"])
+def stream_model_pull(job_id: str):
+    """Fortschritt eines Downloads als Server-Sent Events"""
+    if model_pull_manager.get(job_id) is None:
+        return jsonify({"error": "Download nicht gefunden"}), 404
+    
+    def generate_events():
+        for event in model_pull_manager.follow(job_id):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    
+    return Response(generate_events(), mimetype='text/event-stream')
+
+@app.route("/models/pulls/<job_id>", methods=["DELETE"])
+def delete_model_pull(job_id: str):
+    """Bricht einen Download ab"""
+    job = model_pull_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Download nicht gefunden"}), 404
+    return jsonify(model_pull_manager.status(job_id))
+
 @app.route("/v1", methods=["GET"])
 def api_v1_info():
     """API v1 Info Endpoint"""
@@ -895,7 +1732,8 @@ def api_v1_info():
         "endpoints": {
             "health": "GET /health",
             "models": "GET /v1/models",
-            "chat_completions": "POST /v1/chat/completions"
+            "chat_completions": "POST /v1/chat/completions",
+            "embeddings": "POST /v1/embeddings"
         },
         "server": "LocalAgent-Pro",
         "ollama": "active",
@@ -906,29 +1744,35 @@ def api_v1_info():
 
 @app.route("/v1/models", methods=["GET"])
 def list_models():
-    """OpenAI-kompatible Models API"""
+    """OpenAI-kompatible Models API (gecacht, ETag/304)"""
     api_logger.debug("📡 Models-Liste angefordert")
     
-    models_data = {
-        "object": "list",
-        "data": [
-            {
-                "id": "localagent-pro",
-                "object": "model",
-                "created": int(time.time()),
-                "owned_by": "localagent-pro"
-            },
-            {
-                "id": LLM_MODEL,
-                "object": "model", 
-                "created": int(time.time()),
-                "owned_by": "localagent-pro"
-            }
-        ]
-    }
-    
-    api_logger.info(f"✅ Models-Liste gesendet: 2 Modelle (localagent-pro, {LLM_MODEL})")
-    return jsonify(models_data)
+    models_data, etag = model_catalog.get()
+    if etag in request.if_none_match:
+        request_count.labels(endpoint='/v1/models', status='not_modified').inc()
+        response = Response(status=304)
+    else:
+        request_count.labels(endpoint='/v1/models', status='success').inc()
+        api_logger.info(f"✅ Models-Liste gesendet: {len(models_data['data'])} Modelle")
+        response = jsonify(models_data)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+def conversation_id_for(data: Dict[str, Any], messages: List[Dict[str, str]]) -> Optional[str]:
+    """
+    Kennung der Unterhaltung für die Backend-Affinität im Ollama-Pool
+
+    Open WebUI sendet chat_id (bzw. den Header X-OpenWebUI-Chat-Id); sonst bleibt
+    die erste User-Nachricht über den ganzen Verlauf gleich.
+    """
+    chat_id = data.get("chat_id") or request.headers.get("X-OpenWebUI-Chat-Id")
+    if chat_id:
+        return str(chat_id)
+    for msg in messages:
+        if msg.get("role") == "user" and isinstance(msg.get("content"), str):
+            return hashlib.md5(f"{data.get('user', '')}:{msg['content']}".encode()).hexdigest()
+    return None
 
 @app.route("/v1/chat/completions", methods=["POST"])
 def chat_completions():
@@ -1031,6 +1875,9 @@ REGELN:
 2. Du erfindest KEINE weiteren Schritte.
 3. Content wird 1:1 übernommen - KEINE Kreativität!"""
         
+        # Ollama-Modell, das geantwortet hat (None bei Tool-Ergebnissen)
+        served_model: Optional[str] = None
+        
         # Letzten User-Prompt extrahieren
         user_prompt = ""
         for msg in reversed(messages):
@@ -1084,21 +1931,49 @@ REGELN:
                 api_logger.info(f"🤖 Generiere Antwort mit Ollama [{request_id}]")
                 
                 ollama_start = time.time()
-                ollama_response = ollama_client.generate(
-                    prompt=user_prompt,
-                    temperature=data.get("temperature", 0.7),
-                    max_tokens=data.get("max_tokens", 500)
+                conversation_id = conversation_id_for(data, messages)
+                # Ein in /v1/models gelistetes Ollama-Modell wird direkt bedient, sonst entscheidet das Routing
+                requested = model if model_catalog.has_model(model) else None
+                routed = model_router.run(
+                    user_prompt,
+                    lambda routed_model: ollama_sessions.generate(
+                        conversation_id,
+                        messages,
+                        user_prompt,
+                        routed_model,
+                        temperature=data.get("temperature", 0.7),
+                        max_tokens=data.get("max_tokens", 500)
+                    ) if ollama_sessions else ollama_client.generate(
+                        prompt=user_prompt,
+                        model=routed_model,
+                        temperature=data.get("temperature", 0.7),
+                        max_tokens=data.get("max_tokens", 500),
+                        conversation_id=conversation_id
+                    ),
+                    available=lambda: ollama_client.health()["circuit"] != "open",
+                    requested=requested
                 )
                 ollama_duration = time.time() - ollama_start
+                served_model = routed["model"]
+                ollama_calls.labels(model=served_model, status=routed["status"]).inc()
                 
-                if ollama_response:
-                    response_text = ollama_response
-                    ollama_calls.labels(model=LLM_MODEL, status='success').inc()
-                    api_logger.info(f"✅ Ollama-Antwort generiert [{request_id}]: {len(response_text)} Zeichen in {ollama_duration:.2f}s")
+                if routed["status"] == "success":
+                    response_text = routed["text"]
+                    model_routes.labels(model=served_model, route=routed["route"]).inc()
+                    api_logger.info(
+                        f"✅ Ollama-Antwort generiert [{request_id}]: {len(response_text)} Zeichen in {ollama_duration:.2f}s "
+                        f"({served_model}, Route: {routed['route']})"
+                    )
+                elif routed["status"] == "unavailable":
+                    # Circuit offen: sofort abgelehnt, ohne auf Timeouts zu warten
+                    response_text = "Ollama ist derzeit nicht erreichbar. Bitte versuche es in Kürze erneut."
+                    api_logger.warning(f"⚡ Ollama nicht erreichbar, Anfrage sofort abgelehnt [{request_id}]")
+                elif routed["status"] == "overloaded":
+                    response_text = "Alle Modelle sind gerade ausgelastet. Bitte versuche es in Kürze erneut."
+                    api_logger.warning(f"🔀 Alle Modelle ausgelastet [{request_id}]: {routed['attempts']}")
                 else:
                     response_text = "Es tut mir leid, ich konnte keine Antwort generieren. Bitte versuche es erneut."
-                    ollama_calls.labels(model=LLM_MODEL, status='failed').inc()
-                    api_logger.warning(f"⚠️ Ollama-Antwort leer [{request_id}]")
+                    api_logger.warning(f"⚠️ Ollama-Antwort leer [{request_id}]: {routed['attempts']}")
         
         # Streaming-Support prüfen
         stream = data.get("stream", False)
@@ -1123,13 +1998,18 @@ REGELN:
                             "finish_reason": None if i < len(chunks) - 1 else "stop"
                         }]
                     }
+                    if i == len(chunks) - 1 and served_model:
+                        chunk_data["served_model"] = served_model
                     yield f"data: {json.dumps(chunk_data)}\n\n"
                 
                 # Final chunk
                 yield "data: [DONE]\n\n"
             
             api_logger.info(f"✅ Stream gestartet [{request_id}]: {len(response_text.split())} Chunks")
-            return Response(generate_stream(), mimetype='text/event-stream')
+            stream_response = Response(generate_stream(), mimetype='text/event-stream')
+            if served_model:
+                stream_response.headers["X-LocalAgent-Served-Model"] = served_model
+            return stream_response
         
         # Non-streaming Response
         
@@ -1152,6 +2032,9 @@ REGELN:
                 "total_tokens": len(user_prompt.split()) + len(response_text.split())
             }
         }
+        if served_model:
+            # "model" bleibt der angefragte Name (Open WebUI ordnet Antworten danach zu)
+            response_obj["served_model"] = served_model
         
         api_logger.info(
             f"✅ Chat Completion erfolgreich [{request_id}]: "
@@ -1164,7 +2047,10 @@ REGELN:
         request_count.labels(endpoint='/v1/chat/completions', status='success').inc()
         active_requests.dec()
         
-        return jsonify(response_obj)
+        json_response = jsonify(response_obj)
+        if served_model:
+            json_response.headers["X-LocalAgent-Served-Model"] = served_model
+        return json_response
         
     except Exception as e:
         api_logger.error(f"❌ Chat Completion Fehler [{request_id}]: {str(e)}", exc_info=True)
@@ -1180,6 +2066,69 @@ REGELN:
             }
         }), 500
 
+@app.route("/v1/embeddings", methods=["POST"])
+def embeddings():
+    """OpenAI-kompatible Embeddings API (gebündelt an Ollama /api/embed)"""
+    request_id = str(uuid.uuid4())[:8]
+    start_time = time.time()
+    data: Dict[str, Any] = request.get_json(force=True, silent=True) or {}
+
+    texts = data.get("input")
+    if isinstance(texts, str):
+        texts = [texts]
+    if not texts or not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        request_count.labels(endpoint='/v1/embeddings', status='error').inc()
+        return jsonify({
+            "error": {
+                "message": "input muss ein String oder eine Liste von Strings sein (Token-Arrays werden nicht unterstützt)",
+                "type": "invalid_request_error"
+            }
+        }), 400
+
+    model = data.get("model")
+    if not model or model == "localagent-pro":
+        model = EMBEDDING_MODEL
+    api_logger.info(f"🧮 Embeddings [{request_id}]: {len(texts)} Texte mit {model}")
+
+    try:
+        vectors, cached = embedding_service.embed(texts, model)
+    except (EmbeddingError, TimeoutError) as e:
+        api_logger.error(f"❌ Embeddings [{request_id}] fehlgeschlagen: {e}")
+        request_count.labels(endpoint='/v1/embeddings', status='error').inc()
+        return jsonify({
+            "error": {
+                "message": f"Embeddings nicht verfügbar: {e}",
+                "type": "service_unavailable"
+            }
+        }), 503
+
+    embedding_texts.labels(source='cache').inc(cached)
+    embedding_texts.labels(source='ollama').inc(len(texts) - cached)
+
+    as_base64 = data.get("encoding_format") == "base64"
+    items = []
+    for index, vector in enumerate(vectors):
+        if as_base64:
+            # float32 little-endian wie bei OpenAI
+            values = array("f", vector)
+            if sys.byteorder == "big":
+                values.byteswap()
+            vector = base64.b64encode(values.tobytes()).decode("ascii")
+        items.append({"object": "embedding", "index": index, "embedding": vector})
+
+    # Grobe Token-Schätzung (Ollama meldet für /api/embed keine Zähler je Text)
+    tokens = sum(max(1, len(text) // 4) for text in texts)
+
+    request_duration.labels(endpoint='/v1/embeddings').observe(time.time() - start_time)
+    request_count.labels(endpoint='/v1/embeddings', status='success').inc()
+    api_logger.info(f"✅ Embeddings [{request_id}]: {len(texts)} Vektoren ({cached} aus dem Cache)")
+    return jsonify({
+        "object": "list",
+        "data": items,
+        "model": model,
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+    })
+
 @app.route("/test", methods=["GET", "POST"])
 def test_tool():
     """Test-Endpoint für direkte Tool-Tests (GET & POST)"""
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+Semantischer Index über die Sandbox für LocalAgent-Pro
+Zerlegt Textdateien in Abschnitte, berechnet Embeddings über Ollama und legt die
+normierten Vektoren als float32-Matrix in einer memory-mapped Datei ab. Die Suche
+ist ein Matrix-Vektor-Produkt (Kosinus) mit Top-k per argpartition, komplett auf
+der CPU. Aktualisierung inkrementell: unveränderte Dateien (mtime/Größe bzw.
+Hash) werden übersprungen, geänderte Abschnitte angehängt und alte verworfen.
+
+Dateien unter <index_dir>:
+    vectors.f32   Vektoren (Zeilen × dim), nur angehängt; Kompaktierung bei vielen toten Zeilen
+    rows.npy      je Zeile (Datei-ID, Startzeile, Endzeile); Datei-ID -1 = verworfen
+    files.json    Modell, Dimension und Dateitabelle (mtime, size, sha256, Zeilenbereich)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+DEFAULT_EXTENSIONS = [
+    ".py", ".md", ".txt", ".rst", ".json", ".yaml", ".yml", ".toml", ".ini", ".cfg", ".conf",
+    ".sh", ".js", ".ts", ".tsx", ".jsx", ".html", ".css", ".sql", ".go", ".rs", ".java",
+    ".c", ".h", ".cpp", ".hpp", ".rb", ".php", ".csv", ".xml",
+]
+
+# Mindestzahl verworfener Zeilen, ab der die Vektordatei neu geschrieben wird
+COMPACT_MIN_DEAD_ROWS = 1024
+
+
+class SemanticIndexError(Exception):
+    """Index konnte nicht aktualisiert werden (z.B. Embeddings nicht verfügbar)"""
+
+
+def chunk_text(text: str, max_chars: int = 1500, overlap_lines: int = 3) -> List[Tuple[int, int, str]]:
+    """
+    Zerlegt Text zeilenweise in Abschnitte von höchstens max_chars Zeichen
+
+    Returns:
+        Liste (Startzeile, Endzeile, Text), Zeilen 1-basiert und inklusive
+    """
+    lines = text.splitlines()
+    chunks: List[Tuple[int, int, str]] = []
+    start = 0
+    while start < len(lines):
+        end, size = start, 0
+        while end < len(lines) and (end == start or size + len(lines[end]) + 1 <= max_chars):
+            size += len(lines[end]) + 1
+            end += 1
+        body = "\n".join(lines[start:end])[:max_chars]
+        if body.strip():
+            chunks.append((start + 1, end, body))
+        if end >= len(lines):
+            break
+        start = max(start + 1, end - overlap_lines)
+    return chunks
+
+
+class SemanticIndex:
+    """Inkrementeller Vektorindex über ein Verzeichnis"""
+
+    def __init__(
+        self,
+        root: str,
+        index_dir: str,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        model: str,
+        extensions: Optional[List[str]] = None,
+        max_file_bytes: int = 1024 * 1024,
+        chunk_chars: int = 1500,
+        overlap_lines: int = 3,
+        embed_batch: int = 64
+    ):
+        """
+        Args:
+            root: Indiziertes Verzeichnis (Sandbox)
+            index_dir: Ablage des Index (wird beim Scan übersprungen)
+            embed_fn: embed_fn(texts) → ein Vektor pro Text (wirft bei Fehler)
+            model: Embedding-Modell (anderes Modell → Index wird neu aufgebaut)
+            extensions: Indizierte Dateiendungen
+            max_file_bytes: Größere Dateien werden übersprungen
+            chunk_chars: Max. Zeichen pro Abschnitt
+            overlap_lines: Überlappung benachbarter Abschnitte in Zeilen
+            embed_batch: Abschnitte pro embed_fn-Aufruf
+        """
+        self.root = os.path.abspath(root)
+        self.index_dir = os.path.abspath(index_dir)
+        self.embed_fn = embed_fn
+        self.model = model
+        self.extensions = {e.lower() for e in (extensions or DEFAULT_EXTENSIONS)}
+        self.max_file_bytes = max_file_bytes
+        self.chunk_chars = chunk_chars
+        self.overlap_lines = overlap_lines
+        self.embed_batch = embed_batch
+
+        self._vectors_path = os.path.join(self.index_dir, "vectors.f32")
+        self._rows_path = os.path.join(self.index_dir, "rows.npy")
+        self._files_path = os.path.join(self.index_dir, "files.json")
+
+        # _update_lock: nur ein Update gleichzeitig; _lock schützt den Zustand für Suchen
+        self._update_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.dim = 0
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._next_file_id = 0
+        self._rows = np.zeros((0, 3), dtype=np.int32)
+        self._matrix: Optional[np.ndarray] = None
+        self.last_update: Optional[float] = None
+        # Hintergrund-Abgleich (refresh_in_background) und dessen letzter Fehler
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+        # Abgelegter Index passt nicht (anderes Modell, unvollständig): beim ersten Update verwerfen
+        self._stale = False
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._load()
+
+    # ---------- Persistenz ----------
+
+    def _load(self) -> None:
+        try:
+            with open(self._files_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            rows = np.load(self._rows_path)
+        except (OSError, ValueError):
+            # Vektoren ohne Metadaten (Absturz beim ersten Aufbau) sind nicht zuordenbar
+            self._stale = os.path.exists(self._vectors_path)
+            return
+        if meta.get("model") != self.model:
+            tool_logger.info(f"🧭 Embedding-Modell geändert ({meta.get('model')} → {self.model}), Index wird neu aufgebaut")
+            self._stale = True
+            return
+
+        self.dim = meta["dim"]
+        self._files = meta["files"]
+        self._next_file_id = meta["next_file_id"]
+        self._rows = rows.astype(np.int32).reshape(-1, 3)
+
+        # Nach einem Absturz zwischen Anhängen und Speichern: überzählige Zeilen abschneiden
+        expected = len(self._rows) * self.dim * 4
+        if os.path.exists(self._vectors_path) and os.path.getsize(self._vectors_path) > expected:
+            os.truncate(self._vectors_path, expected)
+        self._remap()
+        tool_logger.info(f"🧭 Semantischer Index geladen: {len(self._files)} Dateien, {self.live_rows} Abschnitte")
+
+    def _remap(self) -> None:
+        """Öffnet die Vektordatei neu (nach Anhängen oder Kompaktierung)"""
+        if not len(self._rows) or not self.dim:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._rows), self.dim))
+
+    def _save(self) -> None:
+        tmp_rows = f"{self._rows_path}.tmp.npy"
+        np.save(tmp_rows, self._rows)
+        os.replace(tmp_rows, self._rows_path)
+        tmp_files = f"{self._files_path}.tmp"
+        with open(tmp_files, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dim": self.dim, "next_file_id": self._next_file_id, "files": self._files}, f)
+        os.replace(tmp_files, self._files_path)
+
+    def _reset(self) -> None:
+        for path in (self._vectors_path, self._rows_path, self._files_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.dim = 0
+        self._files = {}
+        self._rows = np.zeros((0, 3), dtype=np.int32)
+        self._matrix = None
+
+    # ---------- Aktualisierung ----------
+
+    @property
+    def live_rows(self) -> int:
+        return int(np.count_nonzero(self._rows[:, 0] >= 0)) if len(self._rows) else 0
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        """Indizierbare Dateien unter root (ohne versteckte Verzeichnisse und den Index selbst)"""
+        found: Dict[str, os.stat_result] = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [
+                d for d in dirnames
+                if not d.startswith(".") and os.path.join(dirpath, d) != self.index_dir
+            ]
+            for name in filenames:
+                if os.path.splitext(name)[1].lower() not in self.extensions:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if st.st_size <= self.max_file_bytes:
+                    found[os.path.relpath(path, self.root)] = st
+        return found
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embeddings in Blöcken von embed_batch, zeilenweise auf Länge 1 normiert"""
+        vectors: List[List[float]] = []
+        for i in range(0, len(texts), self.embed_batch):
+            vectors.extend(self.embed_fn(texts[i:i + self.embed_batch]))
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def add_chunks(
+        self,
+        relpath: str,
+        chunks: List[Tuple[int, int, str]],
+        vectors: np.ndarray,
+        mtime: float = 0.0,
+        size: int = 0,
+        digest: str = ""
+    ) -> None:
+        """
+        Ersetzt die Abschnitte einer Datei durch neue (Vektoren bereits normiert)
+
+        Wird von update() genutzt; speichert nicht (siehe save()).
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not self.dim:
+            self.dim = vectors.shape[1]
+        if vectors.shape[1] != self.dim:
+            raise SemanticIndexError(f"Vektordimension {vectors.shape[1]} passt nicht zum Index ({self.dim})")
+
+        rows = np.empty((len(chunks), 3), dtype=np.int32)
+        file_id = self._next_file_id
+        rows[:, 0] = file_id
+        rows[:, 1] = [c[0] for c in chunks]
+        rows[:, 2] = [c[1] for c in chunks]
+
+        with open(self._vectors_path, "ab") as f:
+            f.write(vectors.tobytes())
+
+        with self._lock:
+            self._drop(relpath)
+            first = len(self._rows)
+            self._rows = np.concatenate([self._rows, rows])
+            self._files[relpath] = {
+                "id": file_id, "mtime": mtime, "size": size, "sha256": digest,
+                "first": first, "count": len(chunks),
+            }
+            self._next_file_id += 1
+            self._remap()
+
+    def _drop(self, relpath: str) -> None:
+        """Markiert die Zeilen einer Datei als verworfen (erwartet _lock)"""
+        entry = self._files.pop(relpath, None)
+        if entry and entry["count"]:
+            self._rows[entry["first"]:entry["first"] + entry["count"], 0] = -1
+
+    def save(self) -> None:
+        with self._lock:
+            self._save()
+
+    def _compact(self) -> None:
+        """Schreibt die Vektordatei ohne verworfene Zeilen neu"""
+        live = np.flatnonzero(self._rows[:, 0] >= 0)
+        tmp = f"{self._vectors_path}.tmp"
+        with open(tmp, "wb") as f:
+            for start in range(0, len(live), 65536):
+                f.write(np.ascontiguousarray(self._matrix[live[start:start + 65536]]).tobytes())
+
+        with self._lock:
+            remap = np.full(len(self._rows), -1, dtype=np.int64)
+            remap[live] = np.arange(len(live))
+            for entry in self._files.values():
+                if entry["count"]:
+                    entry["first"] = int(remap[entry["first"]])
+            self._rows = self._rows[live]
+            os.replace(tmp, self._vectors_path)
+            self._remap()
+            self._save()
+        tool_logger.info(f"🧹 Semantischer Index kompaktiert: {len(live)} Abschnitte")
+
+    def update(self) -> Dict[str, Any]:
+        """
+        Gleicht den Index mit dem Verzeichnis ab
+
+        Returns:
+            Dict mit files, added, changed, unchanged, removed, chunks, skipped, seconds
+
+        Raises:
+            SemanticIndexError: Embeddings nicht verfügbar (bereits indizierte Dateien bleiben erhalten)
+        """
+        started = time.monotonic()
+        result = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0, "chunks": 0, "skipped": 0}
+        with self._update_lock:
+            if self._stale:
+                self._reset()
+                self._stale = False
+
+            found = self._scan()
+            with self._lock:
+                for relpath in [p for p in self._files if p not in found]:
+                    self._drop(relpath)
+                    result["removed"] += 1
+
+            try:
+                for relpath, st in sorted(found.items()):
+                    entry = self._files.get(relpath)
+                    if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+                        result["unchanged"] += 1
+                        continue
+                    try:
+                        with open(os.path.join(self.root, relpath), "rb") as f:
+                            data = f.read()
+                    except OSError:
+                        result["skipped"] += 1
+                        continue
+                    digest = hashlib.sha256(data).hexdigest()
+                    if entry and entry["sha256"] == digest:
+                        # Nur mtime geändert (touch, git checkout): Vektoren bleiben gültig
+                        entry["mtime"], entry["size"] = st.st_mtime, st.st_size
+                        result["unchanged"] += 1
+                        continue
+                    if b"\0" in data[:8192]:
+                        result["skipped"] += 1
+                        continue
+
+                    chunks = chunk_text(data.decode("utf-8", errors="replace"), self.chunk_chars, self.overlap_lines)
+                    if chunks:
+                        # Pfad voranstellen: "welche Datei macht X" trifft auch Dateinamen
+                        vectors = self._embed([f"{relpath}\n{body}" for _, _, body in chunks])
+                        self.add_chunks(relpath, chunks, vectors, st.st_mtime, st.st_size, digest)
+                    else:
+                        with self._lock:
+                            self._drop(relpath)
+                            self._files[relpath] = {
+                                "id": self._next_file_id, "mtime": st.st_mtime, "size": st.st_size,
+                                "sha256": digest, "first": len(self._rows), "count": 0,
+                            }
+                            self._next_file_id += 1
+                    result["changed" if entry else "added"] += 1
+                    result["chunks"] += len(chunks)
+            except Exception as e:
+                self.save()
+                raise SemanticIndexError(f"Index-Update abgebrochen: {e}") from e
+
+            dead = len(self._rows) - self.live_rows
+            if dead >= COMPACT_MIN_DEAD_ROWS and dead > self.live_rows:
+                self._compact()
+            else:
+                self.save()
+            self.last_update = time.time()
+
+        result["files"] = len(found)
+        result["seconds"] = round(time.monotonic() - started, 3)
+        if result["added"] or result["changed"] or result["removed"]:
+            tool_logger.info(
+                f"🧭 Index aktualisiert: +{result['added']} ~{result['changed']} -{result['removed']} Dateien, "
+                f"{result['chunks']} Abschnitte in {result['seconds']:.2f}s"
+            )
+        return result
+
+    def refresh_in_background(self, max_age: float, on_done: Optional[Callable[[Dict[str, Any]], None]] = None) -> bool:
+        """
+        Startet update() in einem Hintergrund-Thread, wenn der letzte Abgleich
+        älter als max_age ist; Suchen laufen währenddessen auf dem bisherigen Stand
+
+        Args:
+            max_age: Sekunden, die ein Abgleich gültig bleibt
+            on_done: Wird nach erfolgreichem Abgleich mit dessen Ergebnis aufgerufen
+
+        Returns:
+            True, solange ein Abgleich läuft (neu gestartet oder bereits aktiv)
+        """
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return True
+            if self.last_update is not None and time.time() - self.last_update < max_age:
+                return False
+            thread = threading.Thread(target=self._refresh, args=(on_done,), name="semantic-index", daemon=True)
+            self._refresh_thread = thread
+        thread.start()
+        return True
+
+    def _refresh(self, on_done: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        try:
+            result = self.update()
+        except Exception as e:
+            self.last_error = str(e)
+            tool_logger.error(f"❌ Hintergrund-Abgleich des semantischen Index fehlgeschlagen: {str(e)}")
+            return
+        self.last_error = None
+        if on_done:
+            on_done(result)
+
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> bool:
+        """Wartet auf einen laufenden Hintergrund-Abgleich; True wenn keiner (mehr) läuft"""
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    # ---------- Suche ----------
+
+    def search(self, query: str, top_k: int = 5, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Top-k Abschnitte nach Kosinus-Ähnlichkeit
+
+        Returns:
+            Liste von Dicts mit path, start_line, end_line, score (absteigend)
+        """
+        with self._lock:
+            matrix, rows = self._matrix, self._rows
+            paths = {entry["id"]: path for path, entry in self._files.items()}
+        if matrix is None or not len(rows):
+            return []
+
+        query_vector = self._embed([query])[0]
+        if len(query_vector) != matrix.shape[1]:
+            raise SemanticIndexError(f"Vektordimension {len(query_vector)} passt nicht zum Index ({matrix.shape[1]})")
+        return self.search_vector(query_vector, top_k, min_score, matrix, rows, paths)
+
+    def search_vector(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 5,
+        min_score: float = 0.0,
+        matrix: Optional[np.ndarray] = None,
+        rows: Optional[np.ndarray] = None,
+        paths: Optional[Dict[int, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Wie search(), mit bereits normiertem Anfragevektor"""
+        if matrix is None:
+            with self._lock:
+                matrix, rows = self._matrix, self._rows
+                paths = {entry["id"]: path for path, entry in self._files.items()}
+            if matrix is None:
+                return []
+
+        if top_k <= 0:
+            return []
+        scores = np.asarray(matrix @ np.asarray(query_vector, dtype=np.float32))
+        scores[rows[:, 0] < 0] = -np.inf
+        k = min(top_k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+
+        hits = []
+        for row in best:
+            score = float(scores[row])
+            path = paths.get(int(rows[row, 0]))
+            if path is None or score < min_score:
+                continue
+            hits.append({
+                "path": path, "start_line": int(rows[row, 1]), "end_line": int(rows[row, 2]),
+                "score": round(score, 4),
+            })
+        return hits
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "chunks": self.live_rows,
+                "dead_rows": len(self._rows) - self.live_rows,
+                "dim": self.dim,
+                "model": self.model,
+                "bytes": len(self._rows) * self.dim * 4,
+                "last_update": self.last_update,
+            }
+
+
+def create_semantic_index(
+    root: str,
+    index_dir: str,
+    embed_fn: Callable[[List[str]], List[List[float]]],
+    model: str,
+    cfg: Optional[Dict[str, Any]] = None
+) -> Optional[SemanticIndex]:
+    """Erstellt den Index aus dem Config-Abschnitt 'semantic_index' (None = deaktiviert)"""
+    cfg = cfg or {}
+    if not cfg.get("enabled", True):
+        return None
+    return SemanticIndex(
+        root,
+        index_dir,
+        embed_fn,
+        model,
+        extensions=cfg.get("extensions"),
+        max_file_bytes=int(cfg.get("max_file_kb", 1024) * 1024),
+        chunk_chars=cfg.get("chunk_chars", 1500),
+        overlap_lines=cfg.get("overlap_lines", 3),
+        embed_batch=cfg.get("embed_batch", 64),
+    )
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Hintergrund-Shell-Jobs für LocalAgent-Pro
+Startet Kommandos asynchron, puffert stdout/stderr mit Offsets und erlaubt Abbruch
+"""
+
+import codecs
+import os
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Any, List, Optional
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+    from src.shell_limits import (
+        OutputBuffer, DEFAULT_HEAD_BYTES, DEFAULT_TAIL_BYTES, DEFAULT_SPILL_MAX_BYTES, new_spill_path, discard_spill, with_limits
+    )
+except ImportError:
+    from logging_config import get_logging_manager
+    from shell_limits import (
+        OutputBuffer, DEFAULT_HEAD_BYTES, DEFAULT_TAIL_BYTES, DEFAULT_SPILL_MAX_BYTES, new_spill_path, discard_spill, with_limits
+    )
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+READ_CHUNK_SIZE = 4096
+
+
+def _utf8_complete(data: bytes) -> int:
+    """Länge des Anfangs von data, der mit einem vollständigen UTF-8-Zeichen endet"""
+    for back in range(1, min(len(data), 3) + 1):
+        byte = data[-back]
+        if byte & 0xC0 == 0x80:  # Folgebyte, weiter nach dem Startbyte suchen
+            continue
+        needed = 2 if byte & 0xE0 == 0xC0 else 3 if byte & 0xF0 == 0xE0 else 4 if byte & 0xF8 == 0xF0 else 1
+        return len(data) - back if needed > back else len(data)
+    return len(data)
+
+
+class ShellJob:
+    """Ein im Hintergrund laufendes Shell-Kommando"""
+
+    def __init__(self, job_id: str, cmd: str, process: subprocess.Popen, stdout: OutputBuffer, stderr: OutputBuffer):
+        self.id = job_id
+        self.cmd = cmd
+        self.process = process
+        self.stdout = stdout
+        self.stderr = stderr
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.exit_code: Optional[int] = None
+        self.status = "running"  # running | cancelling | success | failed | cancelled | timeout
+        self.changed = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        # "cancelling" läuft noch, bis der Waiter das Ende der Prozessgruppe einträgt
+        return self.status not in ("running", "cancelling")
+
+    @property
+    def runtime(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "cmd": self.cmd,
+            "pid": self.process.pid,
+            "status": self.status,
+            "exit_code": self.exit_code,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "runtime": round(self.runtime, 3),
+            "stdout_size": self.stdout.size,
+            "stderr_size": self.stderr.size,
+            "stdout_truncated": self.stdout.truncated,
+            "stderr_truncated": self.stderr.truncated,
+            "stdout_file": self.stdout.spill_path,
+            "stderr_file": self.stderr.spill_path,
+        }
+
+
+class ShellJobManager:
+    """Verwaltet Hintergrund-Jobs (Start, Abfrage, Streaming, Abbruch)"""
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_runtime: Optional[float] = 3600,
+        keep_finished: int = 50,
+        drain_timeout: float = 5.0,
+        on_finish: Optional[Callable[[ShellJob], None]] = None,
+        head_bytes: int = DEFAULT_HEAD_BYTES,
+        tail_bytes: int = DEFAULT_TAIL_BYTES,
+        spill_dir: Optional[str] = None,
+        spill_max_bytes: Optional[int] = DEFAULT_SPILL_MAX_BYTES,
+        limit_prefix: str = ""
+    ):
+        """
+        Initialisiert den Job-Manager
+
+        Args:
+            max_concurrent: Max. gleichzeitig laufende Jobs
+            max_runtime: Laufzeitgrenze in Sekunden (None = unbegrenzt)
+            keep_finished: Anzahl beendeter Jobs, die abrufbar bleiben
+            drain_timeout: Sekunden, die nach Ende des Kommandos auf offene Ausgabe-Pipes
+                gewartet wird (z.B. von Hintergrundprozessen), danach wird die Gruppe beendet
+            on_finish: Callback nach Job-Ende (z.B. für Metriken)
+            head_bytes: Im Speicher gehaltener Anfang der Ausgabe je Stream
+            tail_bytes: Im Speicher gehaltenes Ende der Ausgabe je Stream
+            spill_dir: Verzeichnis für die vollständige Ausgabe (None = keine Spill-Datei)
+            spill_max_bytes: Max. Größe einer Spill-Datei (None = unbegrenzt)
+            limit_prefix: ulimit-Zeilen vor dem Kommando (siehe shell_limits.build_limit_prefix)
+        """
+        self.max_concurrent = max_concurrent
+        self.max_runtime = max_runtime
+        self.keep_finished = keep_finished
+        self.drain_timeout = drain_timeout
+        self.on_finish = on_finish
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self.limit_prefix = limit_prefix
+        self._jobs: Dict[str, ShellJob] = {}
+        self._starting = 0  # Reservierte Plätze für Jobs, deren Prozess gerade startet
+        self._lock = threading.Lock()
+
+    def running_count(self) -> int:
+        with self._lock:
+            return self._running_locked()
+
+    def _running_locked(self) -> int:
+        return self._starting + sum(1 for job in self._jobs.values() if not job.done)
+
+    def start(self, cmd: str, cwd: Optional[str] = None) -> ShellJob:
+        """
+        Startet ein Kommando im Hintergrund
+
+        Raises:
+            RuntimeError: Wenn bereits max_concurrent Jobs laufen
+        """
+        with self._lock:
+            if self._running_locked() >= self.max_concurrent:
+                raise RuntimeError(f"Maximal {self.max_concurrent} gleichzeitige Jobs erlaubt")
+            self._starting += 1
+
+        try:
+            job_id = uuid.uuid4().hex[:12]
+            buffers = [
+                OutputBuffer(
+                    self.head_bytes,
+                    self.tail_bytes,
+                    new_spill_path(self.spill_dir, f"job-{job_id}", stream) if self.spill_dir else None,
+                    self.spill_max_bytes
+                )
+                for stream in ("stdout", "stderr")
+            ]
+
+            # Eigene Prozessgruppe, damit Abbruch auch Kindprozesse trifft
+            process = subprocess.Popen(
+                with_limits(cmd, self.limit_prefix),
+                shell=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=cwd,
+                start_new_session=True,
+            )
+        except BaseException:
+            with self._lock:
+                self._starting -= 1
+            raise
+
+        job = ShellJob(job_id, cmd, process, *buffers)
+        with self._lock:
+            self._starting -= 1
+            self._jobs[job.id] = job
+            self._prune()
+
+        readers = [
+            threading.Thread(target=self._pump, args=(job, process.stdout, job.stdout), daemon=True),
+            threading.Thread(target=self._pump, args=(job, process.stderr, job.stderr), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        threading.Thread(target=self._wait, args=(job, readers), daemon=True, name=f"job-{job.id}").start()
+
+        tool_logger.info(f"🚀 Hintergrund-Job gestartet [{job.id}]: {cmd} (PID {process.pid})")
+        return job
+
+    def _pump(self, job: ShellJob, pipe, buffer: OutputBuffer) -> None:
+        """Liest eine Pipe blockweise in den Puffer"""
+        try:
+            for chunk in iter(lambda: pipe.read1(READ_CHUNK_SIZE), b""):
+                with job.changed:
+                    buffer.append(chunk)
+                    job.changed.notify_all()
+        finally:
+            pipe.close()
+            with job.changed:
+                buffer.close()
+
+    def _wait(self, job: ShellJob, readers: List[threading.Thread]) -> None:
+        """Wartet auf Prozessende, erzwingt max_runtime und setzt den Status"""
+        deadline = job.started_at + self.max_runtime if self.max_runtime else None
+        timed_out = False
+        try:
+            exit_code = job.process.wait(timeout=self.max_runtime)
+        except subprocess.TimeoutExpired:
+            tool_logger.warning(f"⏰ Job [{job.id}] überschreitet {self.max_runtime}s, wird beendet")
+            self._kill(job)
+            exit_code = job.process.wait()
+            timed_out = True
+
+        # Hintergrundprozesse können die Pipes nach Ende des Kommandos offen halten
+        drain = self.drain_timeout if deadline is None else min(self.drain_timeout, max(deadline - time.time(), 0))
+        if not self._join(readers, drain):
+            tool_logger.warning(f"⚠️ Job [{job.id}]: Kindprozesse halten die Ausgabe offen, Prozessgruppe wird beendet")
+            self._kill(job, readers=readers)
+            if not self._join(readers, self.drain_timeout):
+                tool_logger.warning(f"⚠️ Job [{job.id}]: Ausgabe-Pipes nicht geschlossen, Lesen wird aufgegeben")
+
+        with job.changed:
+            job.exit_code = exit_code
+            job.finished_at = time.time()
+            # Endstatus erst nach Ende der Gruppe und geschlossenen Pipes
+            if job.status == "cancelling":
+                job.status = "cancelled"
+            elif timed_out:
+                job.status = "timeout"
+            else:
+                job.status = "success" if exit_code == 0 else "failed"
+            job.changed.notify_all()
+
+        tool_logger.info(
+            f"🏁 Job [{job.id}] beendet: {job.status} (exit_code={exit_code}, {job.runtime:.2f}s)"
+        )
+        if self.on_finish:
+            try:
+                self.on_finish(job)
+            except Exception as e:
+                tool_logger.error(f"❌ on_finish-Callback fehlgeschlagen [{job.id}]: {e}")
+
+    @staticmethod
+    def _join(threads: List[threading.Thread], timeout: float) -> bool:
+        """Wartet insgesamt höchstens timeout Sekunden; True, wenn alle beendet sind"""
+        deadline = time.time() + timeout
+        for thread in threads:
+            thread.join(max(deadline - time.time(), 0))
+        return not any(thread.is_alive() for thread in threads)
+
+    def _kill(self, job: ShellJob, grace: float = 2.0, readers: Optional[List[threading.Thread]] = None) -> None:
+        """Beendet die gesamte Prozessgruppe (SIGTERM, danach SIGKILL)"""
+        # start_new_session: die Gruppen-ID ist die PID des Kommandos, auch wenn es selbst schon beendet ist
+        pgid = job.process.pid
+        try:
+            os.killpg(pgid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+
+        deadline = time.time() + grace
+        try:
+            job.process.wait(timeout=grace)
+            # Nach Ende des Kommandos: Gruppe gilt als beendet, sobald die Pipes zu sind
+            if readers is None or self._join(readers, max(deadline - time.time(), 0)):
+                return
+        except subprocess.TimeoutExpired:
+            pass
+
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def cancel(self, job_id: str) -> Optional[ShellJob]:
+        """Bricht einen laufenden Job ab (Status "cancelling", bis der Waiter das Ende einträgt)"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with job.changed:
+            if job.status != "running":
+                return job
+            job.status = "cancelling"
+            job.changed.notify_all()
+
+        self._kill(job)
+        tool_logger.info(f"🛑 Job abgebrochen [{job.id}]: {job.cmd}")
+        return job
+
+    def get(self, job_id: str) -> Optional[ShellJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in sorted(jobs, key=lambda j: j.started_at)]
+
+    def read(self, job_id: str, stdout_offset: int = 0, stderr_offset: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Liefert neue Ausgabe ab den angegebenen Offsets (Polling)
+
+        Returns:
+            Job-Status plus stdout/stderr und die nächsten Offsets
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+
+        with job.changed:
+            stdout, next_stdout_offset = self._read_complete(job.stdout, stdout_offset)
+            stderr, next_stderr_offset = self._read_complete(job.stderr, stderr_offset)
+            data = job.to_dict()
+
+        data.update({
+            "stdout": stdout.decode("utf-8", errors="replace"),
+            "stderr": stderr.decode("utf-8", errors="replace"),
+            "next_stdout_offset": next_stdout_offset,
+            "next_stderr_offset": next_stderr_offset,
+        })
+        return data
+
+    @staticmethod
+    def _read_complete(buffer: OutputBuffer, offset: int):
+        """Wie buffer.read(), hält aber ein angefangenes UTF-8-Zeichen bis zum nächsten Abruf zurück"""
+        chunk, next_offset = buffer.read(offset)
+        if not buffer.closed:
+            held = len(chunk) - _utf8_complete(chunk)
+            chunk, next_offset = chunk[:len(chunk) - held], next_offset - held
+        return chunk, next_offset
+
+    def follow(self, job_id: str, heartbeat: float = 15.0):
+        """
+        Generator für Live-Streaming (SSE): liefert Ausgabe-Events bis zum Job-Ende
+
+        Yields:
+            Dicts mit type ("stdout" | "stderr" | "heartbeat" | "exit") und Daten
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+
+        offsets = {"stdout": 0, "stderr": 0}
+        # Inkrementell dekodieren: Blockgrenzen können UTF-8-Zeichen teilen
+        decoders = {stream: codecs.getincrementaldecoder("utf-8")(errors="replace") for stream in offsets}
+        while True:
+            with job.changed:
+                if not job.done and job.stdout.size == offsets["stdout"] and job.stderr.size == offsets["stderr"]:
+                    job.changed.wait(timeout=heartbeat)
+
+                events = []
+                for stream in ("stdout", "stderr"):
+                    buffer = getattr(job, stream)
+                    chunk, next_offset = buffer.read(offsets[stream])
+                    text = decoders[stream].decode(chunk, final=job.done)
+                    if text:
+                        events.append({
+                            "type": stream,
+                            "offset": offsets[stream],
+                            "data": text,
+                        })
+                    offsets[stream] = next_offset
+                done = job.done
+
+            if events:
+                yield from events
+            elif not done:
+                yield {"type": "heartbeat", "runtime": round(job.runtime, 3)}
+
+            if done:
+                yield {"type": "exit", **job.to_dict()}
+                return
+
+    def _prune(self) -> None:
+        """Entfernt die ältesten beendeten Jobs über keep_finished hinaus"""
+        finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.started_at)
+        for job in finished[:max(len(finished) - self.keep_finished, 0)]:
+            discard_spill(job.stdout.spill_path)
+            discard_spill(job.stderr.spill_path)
+            del self._jobs[job.id]
+
+    def shutdown(self) -> None:
+        """Bricht alle laufenden Jobs ab"""
+        with self._lock:
+            running = [job for job in self._jobs.values() if not job.done]
+        for job in running:
+            self.cancel(job.id)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Ausgabe- und Ressourcen-Limits für Shell-Kommandos in LocalAgent-Pro
+Begrenzte Ausgabe-Erfassung (Head + Tail) mit Spill-Datei und ulimit-Caps
+"""
+
+import os
+import time
+import uuid
+from typing import Dict, Any, Optional, Tuple
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+DEFAULT_HEAD_BYTES = 16 * 1024
+DEFAULT_TAIL_BYTES = 16 * 1024
+DEFAULT_SPILL_MAX_BYTES = 64 * 1024 * 1024
+
+# Config-Schlüssel → ulimit-Optionen (Wert in Config-Einheit, Faktor zur ulimit-Einheit).
+# Mehrere Optionen = Alternativen für verschiedene Shells (bash: -u, dash: -p)
+ULIMIT_KEYS = {
+    "cpu_seconds": (["-t"], 1),
+    "memory_mb": (["-v"], 1024),  # KiB, Adressraum (RLIMIT_AS)
+    "open_files": (["-n"], 1),
+    "processes": (["-u", "-p"], 1),  # Achtung: RLIMIT_NPROC zählt pro Benutzer, nicht pro Kommando
+    "file_size_mb": (["-f"], 2048),  # 512-Byte-Blöcke (POSIX-sh)
+}
+
+
+def truncation_marker(skipped: int, spill_path: Optional[str] = None, partial: bool = False) -> bytes:
+    """Marker für ausgelassene Bytes zwischen Head und Tail"""
+    hint = f", {'Anfang der Ausgabe' if partial else 'vollständige Ausgabe'}: {spill_path}" if spill_path else ""
+    return f"\n... [{skipped} Bytes ausgelassen{hint}] ...\n".encode("utf-8")
+
+
+class OutputBuffer:
+    """
+    Speicher-begrenzter Ausgabepuffer: behält die ersten head_bytes und die
+    letzten tail_bytes (Ringpuffer), schreibt optional alles in eine Spill-Datei.
+    Offsets beziehen sich immer auf den vollständigen Datenstrom.
+    """
+
+    def __init__(
+        self,
+        head_bytes: int = DEFAULT_HEAD_BYTES,
+        tail_bytes: int = DEFAULT_TAIL_BYTES,
+        spill_path: Optional[str] = None,
+        spill_max_bytes: Optional[int] = DEFAULT_SPILL_MAX_BYTES
+    ):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self.spill_truncated = False  # Spill-Datei enthält nur die ersten spill_max_bytes
+        self.size = 0  # Gesamtzahl bisher geschriebener Bytes
+        self.closed = False
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._spill = None
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path), exist_ok=True)
+            self._spill = open(spill_path, "wb")
+
+    @property
+    def tail_start(self) -> int:
+        """Absoluter Offset des ersten Bytes im Tail"""
+        return self.size - len(self._tail)
+
+    @property
+    def truncated(self) -> bool:
+        return self.tail_start > len(self._head)
+
+    @property
+    def skipped(self) -> int:
+        """Anzahl ausgelassener Bytes zwischen Head und Tail"""
+        return max(self.tail_start - len(self._head), 0)
+
+    def append(self, chunk: bytes) -> None:
+        if self._spill:
+            room = len(chunk) if self.spill_max_bytes is None else self.spill_max_bytes - self.size
+            self._spill.write(chunk[:max(room, 0)])
+            if room < len(chunk):
+                self.spill_truncated = True
+                self._spill.close()
+                self._spill = None
+        self.size += len(chunk)
+
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head.extend(chunk[:room])
+            chunk = chunk[room:]
+
+        if chunk:
+            self._tail.extend(chunk)
+            overflow = len(self._tail) - self.tail_bytes
+            if overflow > 0:
+                del self._tail[:overflow]
+
+    def read(self, offset: int = 0) -> Tuple[bytes, int]:
+        """
+        Liefert die Daten ab offset; ausgelassene Bereiche werden durch einen Marker ersetzt
+
+        Returns:
+            (Daten, nächster Offset)
+        """
+        offset = max(offset, 0)
+        out = bytearray()
+
+        if offset < len(self._head):
+            out.extend(self._head[offset:])
+            offset = len(self._head)
+
+        tail_start = self.tail_start
+        if offset < tail_start:
+            out.extend(truncation_marker(tail_start - offset, self.spill_path, self.spill_truncated))
+            offset = tail_start
+
+        out.extend(self._tail[offset - tail_start:])
+        return bytes(out), self.size
+
+    def getvalue(self) -> bytes:
+        return self.read(0)[0]
+
+    def close(self) -> None:
+        """Schließt die Spill-Datei; ohne Kürzung wird sie wieder entfernt"""
+        self.closed = True
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+            if not self.truncated:
+                discard_spill(self.spill_path)
+                self.spill_path = None
+
+
+def discard_spill(path: Optional[str]) -> None:
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def read_captured(path: str, head_bytes: int = DEFAULT_HEAD_BYTES, tail_bytes: int = DEFAULT_TAIL_BYTES) -> Tuple[str, int, bool]:
+    """
+    Liest Head und Tail einer Ausgabedatei, ohne sie komplett zu laden
+
+    Returns:
+        (Text, Gesamtgröße in Bytes, gekürzt?)
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if size <= head_bytes + tail_bytes:
+            data = f.read()
+            truncated = False
+        else:
+            head = f.read(head_bytes)
+            f.seek(size - tail_bytes)
+            tail = f.read(tail_bytes)
+            data = head + truncation_marker(size - head_bytes - tail_bytes, path) + tail
+            truncated = True
+
+    return data.decode("utf-8", errors="replace"), size, truncated
+
+
+def new_spill_path(spill_dir: str, prefix: str, stream: str) -> str:
+    """Eindeutiger Spill-Dateiname (sortierbar nach Zeit)"""
+    return os.path.join(spill_dir, f"{prefix}-{int(time.time())}-{uuid.uuid4().hex[:8]}.{stream}.log")
+
+
+def prune_spill_dir(spill_dir: str, keep: int, prefix: str = "") -> None:
+    """
+    Entfernt die ältesten Spill-Dateien über keep hinaus
+
+    Mit prefix zählen nur Dateien aus new_spill_path(spill_dir, prefix, ...);
+    andere (z.B. noch referenzierte Job-Ausgaben) bleiben unberührt.
+    """
+    try:
+        files = sorted(
+            (
+                os.path.join(spill_dir, name) for name in os.listdir(spill_dir)
+                if name.endswith(".log") and (not prefix or name.startswith(f"{prefix}-"))
+            ),
+            key=os.path.getmtime
+        )
+    except OSError:
+        return
+
+    for path in files[:max(len(files) - keep, 0)]:
+        discard_spill(path)
+
+
+def build_limit_prefix(limits: Optional[Dict[str, Any]]) -> str:
+    """
+    Erstellt ulimit-Zeilen, die dem Shell-Kommando vorangestellt werden
+
+    Die Limits setzt die Shell selbst vor dem Kommando; eine preexec_fn ist im
+    Multi-Thread-Server nicht fork-sicher. Ein Limit über einem bestehenden
+    Hard-Limit schlägt still fehl (das niedrigere Hard-Limit gilt dann weiter).
+
+    Args:
+        limits: Config-Abschnitt (cpu_seconds, memory_mb, open_files, processes, file_size_mb)
+
+    Returns:
+        Präfix für das Kommando ("" ohne Limits)
+    """
+    lines = []
+    for key, (options, factor) in ULIMIT_KEYS.items():
+        value = (limits or {}).get(key)
+        if value:
+            value = int(value * factor)
+            lines.append(" || ".join(f"ulimit {option} {value} 2>/dev/null" for option in options) + " || :")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def with_limits(cmd: str, prefix: str) -> str:
+    """Stellt dem Kommando die ulimit-Zeilen voran (eigene Zeile, damit das Kommando unverändert bleibt)"""
+    return f"{prefix}{cmd}" if prefix else cmd
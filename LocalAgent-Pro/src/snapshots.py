@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Copy-on-Write Snapshots für LocalAgent-Pro
+Versioniert Sandbox-Dateien vor write_file/delete_file per Hardlink oder Reflink
+"""
+
+import fcntl
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+except ImportError:
+    from logging_config import get_logging_manager
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+# Linux ioctl für Reflinks (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+# Marker-Datei für "Datei existierte vorher nicht"
+ABSENT_SUFFIX = "absent"
+META_FILE = "path"
+
+
+def _reflink(src: str, dst: str) -> None:
+    """Erzeugt eine Reflink-Kopie (wirft OSError, wenn das Dateisystem das nicht kann)"""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+class SnapshotStore:
+    """Verwaltet Datei-Versionen mit begrenzter Aufbewahrung"""
+
+    def __init__(
+        self,
+        root: str,
+        max_versions_per_file: int = 10,
+        max_total_bytes: int = 200 * 1024 * 1024,
+        method: str = "hardlink"
+    ):
+        """
+        Initialisiert den Snapshot-Store
+
+        Args:
+            root: Verzeichnis für Snapshots
+            max_versions_per_file: Max. Anzahl Versionen je Datei
+            max_total_bytes: Max. Gesamtgröße aller Versionen in Bytes
+            method: "hardlink" (Standard) oder "reflink"
+        """
+        self.root = root
+        self.max_versions_per_file = max_versions_per_file
+        self.max_total_bytes = max_total_bytes
+        self.method = method
+        self._lock = threading.RLock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._total_bytes = 0
+        self._history: List[str] = []  # Reihenfolge der Snapshots (Keys) für globales Undo
+        self._stats = {"snapshots": 0, "evictions": 0, "restores": 0, "undos": 0}
+
+    # === INDEX ===
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:20]
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Lädt den Index einmalig vom Dateisystem (lazy)"""
+        if self._index is not None:
+            return self._index
+
+        self._index = {}
+        self._total_bytes = 0
+        history = []
+        if os.path.isdir(self.root):
+            for key in os.listdir(self.root):
+                entry_dir = os.path.join(self.root, key)
+                try:
+                    with open(os.path.join(entry_dir, META_FILE), "r", encoding="utf-8") as f:
+                        original = f.read()
+                except OSError:
+                    continue
+
+                versions = []
+                for name in os.listdir(entry_dir):
+                    if name == META_FILE or name.endswith(".tmp"):
+                        continue
+                    version = self._parse_version(entry_dir, name)
+                    if version:
+                        versions.append(version)
+                        self._total_bytes += version["size"]
+
+                versions.sort(key=lambda v: v["timestamp"])
+                self._index[key] = {"path": original, "dir": entry_dir, "versions": versions}
+                history.extend((v["timestamp"], key) for v in versions)
+
+        self._history = [key for _, key in sorted(history)] + self._history
+        return self._index
+
+    @staticmethod
+    def _parse_version(entry_dir: str, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            timestamp, operation = name.split(".", 1)
+            timestamp_ns = int(timestamp)
+        except ValueError:
+            return None
+
+        file_path = os.path.join(entry_dir, name)
+        absent = operation.endswith(ABSENT_SUFFIX)
+        return {
+            "version": timestamp,
+            "timestamp": timestamp_ns,
+            "operation": operation.split(".")[0],
+            "absent": absent,
+            "size": 0 if absent else os.path.getsize(file_path),
+            "file": file_path,
+        }
+
+    def _entry(self, path: str) -> Dict[str, Any]:
+        index = self._load_index()
+        key = self._key(path)
+        if key not in index:
+            entry_dir = os.path.join(self.root, key)
+            os.makedirs(entry_dir, exist_ok=True)
+            with open(os.path.join(entry_dir, META_FILE), "w", encoding="utf-8") as f:
+                f.write(os.path.abspath(path))
+            index[key] = {"path": os.path.abspath(path), "dir": entry_dir, "versions": []}
+        return index[key]
+
+    # === SNAPSHOT ===
+
+    def _clone(self, src: str, dst: str) -> None:
+        """
+        Legt eine Version ohne Datenkopie an, wenn möglich
+
+        Hat die Datei schon eigene Hardlinks (st_nlink > 1), wird kopiert: ein
+        Hardlink in den Store müsste beim Schreiben getrennt werden und würde
+        damit auch die Links des Users von der Datei lösen.
+        """
+        if self.method == "reflink":
+            try:
+                _reflink(src, dst)
+                return
+            except OSError:
+                pass
+        elif os.stat(src).st_nlink == 1:
+            try:
+                os.link(src, dst)
+                return
+            except OSError:
+                pass
+        shutil.copy2(src, dst)
+
+    def snapshot(self, path: str, operation: str = "write", move: bool = False) -> Optional[str]:
+        """
+        Sichert den aktuellen Stand von path vor einer Änderung
+
+        Args:
+            path: Datei, die gleich verändert wird
+            operation: Art der Änderung ("write", "delete", "restore")
+            move: Datei in den Snapshot verschieben statt verlinken (für delete)
+
+        Returns:
+            Versions-ID oder None
+        """
+        if os.path.isdir(path):
+            return None
+
+        with self._lock:
+            entry = self._entry(path)
+            versions = entry["versions"]
+            exists = os.path.isfile(path)
+
+            # Unveränderter Stand ist bereits gesichert → nichts zu tun
+            if versions and not move:
+                latest = versions[-1]
+                if latest["absent"] and not exists:
+                    return latest["version"]
+                if exists and not latest["absent"]:
+                    try:
+                        if os.path.samefile(latest["file"], path):
+                            return latest["version"]
+                    except OSError:
+                        pass
+
+            timestamp_ns = time.time_ns()
+            if versions and timestamp_ns <= versions[-1]["timestamp"]:
+                timestamp_ns = versions[-1]["timestamp"] + 1
+
+            name = f"{timestamp_ns}.{operation}"
+            if not exists:
+                name += f".{ABSENT_SUFFIX}"
+            file_path = os.path.join(entry["dir"], name)
+
+            if not exists:
+                open(file_path, "wb").close()
+            elif move:
+                try:
+                    os.rename(path, file_path)
+                except OSError:
+                    shutil.copy2(path, file_path)
+                    os.remove(path)
+            else:
+                self._clone(path, file_path)
+
+            version = self._parse_version(entry["dir"], name)
+            versions.append(version)
+            self._history.append(self._key(path))
+            self._total_bytes += version["size"]
+            self._stats["snapshots"] += 1
+
+            self._enforce_retention(entry)
+            tool_logger.debug(f"📸 Snapshot erstellt: {path} ({operation}, Version {version['version']})")
+            return version["version"]
+
+    def is_linked(self, path: str) -> bool:
+        """True, wenn die neueste Version den Inode mit path teilt (vor In-Place-Schreiben trennen)"""
+        with self._lock:
+            entry = self._load_index().get(self._key(path))
+            if not entry or not entry["versions"] or entry["versions"][-1]["absent"]:
+                return False
+            try:
+                return os.path.samefile(entry["versions"][-1]["file"], path)
+            except OSError:
+                return False
+
+    def settle(self, path: str) -> None:
+        """
+        Nach dem Schreiben aufrufen (auch bei Fehlern oder übersprungenem Schreiben)
+
+        Eine Hardlink-Version ist nur sicher, wenn die Live-Datei danach ersetzt
+        wurde. Teilt die neueste Version noch den Inode mit path, hat sich nichts
+        geändert: die Version wird verworfen, damit spätere In-Place-Änderungen
+        (z.B. per Shell) nicht den Verlauf umschreiben.
+        """
+        with self._lock:
+            entry = self._load_index().get(self._key(path))
+            if not entry or not entry["versions"]:
+                return
+            latest = entry["versions"][-1]
+            if latest["absent"]:
+                return
+            try:
+                if not os.path.samefile(latest["file"], path):
+                    return
+            except OSError:
+                return
+
+            self._drop(entry, latest)
+            key = self._key(path)
+            for i in range(len(self._history) - 1, -1, -1):
+                if self._history[i] == key:
+                    del self._history[i]
+                    break
+            self._stats["snapshots"] -= 1
+            tool_logger.debug(f"📸 Snapshot verworfen, Datei unverändert: {path} (Version {latest['version']})")
+
+    def _drop(self, entry: Dict[str, Any], version: Dict[str, Any], evicted: bool = False) -> None:
+        entry["versions"].remove(version)
+        if evicted:
+            # Älteste Verlaufs-Referenz dieser Datei entfernen
+            key = os.path.basename(entry["dir"])
+            if key in self._history:
+                self._history.remove(key)
+        self._total_bytes -= version["size"]
+        try:
+            os.remove(version["file"])
+        except OSError:
+            pass
+
+    def _enforce_retention(self, entry: Dict[str, Any]) -> None:
+        """Entfernt alte Versionen nach Anzahl pro Datei und Gesamtgröße"""
+        while len(entry["versions"]) > self.max_versions_per_file:
+            self._drop(entry, entry["versions"][0], evicted=True)
+            self._stats["evictions"] += 1
+
+        if self._total_bytes <= self.max_total_bytes:
+            return
+
+        candidates = sorted(
+            ((v["timestamp"], id(v), e, v) for e in self._index.values() for v in e["versions"]),
+            key=lambda item: item[0]
+        )
+        for _, _, owner, version in candidates:
+            if self._total_bytes <= self.max_total_bytes:
+                break
+            self._drop(owner, version, evicted=True)
+            self._stats["evictions"] += 1
+
+    # === RESTORE / UNDO ===
+
+    def list_versions(self, path: str) -> List[Dict[str, Any]]:
+        """Listet gesicherte Versionen einer Datei (älteste zuerst)"""
+        with self._lock:
+            entry = self._load_index().get(self._key(path))
+            if not entry:
+                return []
+            return [
+                {k: v[k] for k in ("version", "timestamp", "operation", "absent", "size")}
+                for v in entry["versions"]
+            ]
+
+    def _apply(self, path: str, version: Dict[str, Any]) -> None:
+        """Setzt path auf den Stand einer Version (atomar per tmp + rename)"""
+        if version["absent"]:
+            if os.path.isfile(path):
+                os.remove(path)
+            return
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(path) or ".", f".{uuid.uuid4().hex}.restore")
+        shutil.copy2(version["file"], tmp_path)
+        os.replace(tmp_path, path)
+
+    def restore(self, path: str, version_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Stellt eine Version wieder her (der aktuelle Stand wird vorher gesichert)
+
+        Args:
+            path: Datei
+            version_id: Versions-ID (None = neueste)
+
+        Returns:
+            Wiederhergestellte Version oder None
+        """
+        with self._lock:
+            entry = self._load_index().get(self._key(path))
+            if not entry or not entry["versions"]:
+                return None
+
+            if version_id is None:
+                version = entry["versions"][-1]
+            else:
+                matches = [v for v in entry["versions"] if v["version"] == str(version_id)]
+                if not matches:
+                    return None
+                version = matches[0]
+
+            self.snapshot(path, operation="restore")
+            self._apply(path, version)
+            self._stats["restores"] += 1
+            tool_logger.info(f"⏪ Version wiederhergestellt: {path} (Version {version['version']})")
+            return {k: version[k] for k in ("version", "timestamp", "operation", "absent", "size")}
+
+    def undo(self, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Macht die letzte Änderung an path (oder global die letzte) rückgängig
+
+        Returns:
+            Dict mit path und verwendeter Version oder None
+        """
+        with self._lock:
+            index = self._load_index()
+
+            if path is None:
+                key = None
+                while self._history:
+                    candidate = self._history.pop()
+                    if index.get(candidate, {}).get("versions"):
+                        key = candidate
+                        break
+                if key is None:
+                    return None
+            else:
+                key = self._key(path)
+
+            entry = index.get(key)
+            if not entry or not entry["versions"]:
+                return None
+
+            version = entry["versions"][-1]
+            self._apply(entry["path"], version)
+            self._drop(entry, version)
+            if path is not None and key in self._history:
+                self._history.reverse()
+                self._history.remove(key)
+                self._history.reverse()
+
+            self._stats["undos"] += 1
+            tool_logger.info(f"↩️ Änderung rückgängig gemacht: {entry['path']} (Version {version['version']})")
+            return {"path": entry["path"], "version": version["version"], "operation": version["operation"]}
+
+    def stats(self) -> Dict[str, Any]:
+        """Liefert Zähler und aktuelle Größe des Snapshot-Stores"""
+        with self._lock:
+            self._load_index()
+            stats = dict(self._stats)
+            stats["total_bytes"] = self._total_bytes
+            stats["files"] = sum(1 for e in self._index.values() if e["versions"])
+            return stats
+
+
+def create_snapshot_store(root: str, snapshot_config: Optional[Dict[str, Any]] = None) -> Optional[SnapshotStore]:
+    """
+    Erstellt einen Snapshot-Store aus dem Config-Abschnitt `snapshots`
+
+    Returns:
+        SnapshotStore oder None, wenn deaktiviert
+    """
+    snapshot_config = snapshot_config or {}
+    if not snapshot_config.get("enabled", True):
+        return None
+
+    return SnapshotStore(
+        root=snapshot_config.get("path", root),
+        max_versions_per_file=snapshot_config.get("max_versions_per_file", 10),
+        max_total_bytes=int(snapshot_config.get("max_total_mb", 200) * 1024 * 1024),
+        method=snapshot_config.get("method", "hardlink"),
+    )
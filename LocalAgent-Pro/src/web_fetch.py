@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Streaming-Fetch für LocalAgent-Pro
+Prüft Content-Type und Content-Length vor dem Lesen, liest den Body blockweise
+bis zu einem Byte-Limit und dekodiert den Zeichensatz inkrementell
+"""
+
+import codecs
+import fnmatch
+import re
+import threading
+import time
+from typing import Dict, Any, Iterable, Optional
+
+import requests
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+    from src.http_pool import HttpPool
+    from src.http_cache import HttpCache
+except ImportError:
+    from logging_config import get_logging_manager
+    from http_pool import HttpPool
+    from http_cache import HttpCache
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+DEFAULT_MAX_BYTES = 256 * 1024
+DEFAULT_CHUNK_SIZE = 16 * 1024
+DEFAULT_CONTENT_TYPES = [
+    "text/*",
+    "application/json",
+    "application/*+json",
+    "application/xml",
+    "application/*+xml",
+    "application/javascript",
+    "application/x-yaml",
+]
+
+
+
+class FetchCancelled(requests.exceptions.RequestException):
+    """Laden wurde von außen abgebrochen (z.B. Gesamtfrist beim parallelen Laden)"""
+
+
+META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_\-:.]+)""", re.IGNORECASE)
+
+
+def parse_content_type(header: Optional[str]) -> tuple:
+    """'text/html; charset=UTF-8' → ('text/html', 'UTF-8')"""
+    if not header:
+        return "", None
+    parts = [p.strip() for p in header.split(";")]
+    charset = None
+    for param in parts[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value:
+            charset = value.strip().strip("\"'")
+    return parts[0].lower(), charset
+
+
+def _valid_codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_charset(first_chunk: bytes) -> Optional[str]:
+    """Sucht BOM oder <meta charset> am Anfang des Dokuments"""
+    if first_chunk.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    match = META_CHARSET.search(first_chunk[:4096])
+    return _valid_codec(match.group(1).decode("ascii", errors="ignore")) if match else None
+
+
+def content_type_allowed(content_type: str, allowed: Iterable[str]) -> bool:
+    # Ohne Content-Type wird gelesen und erst beim Dekodieren entschieden
+    return not content_type or any(fnmatch.fnmatch(content_type, pattern) for pattern in allowed)
+
+
+def _read_response(
+    response, url: str, max_bytes: int, allowed_types: Iterable[str], chunk_size: int, started: float,
+    cancel: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """Liest eine (bereits geöffnete) Streaming-Response bis max_bytes oder bis cancel gesetzt ist"""
+    content_type, charset = parse_content_type(response.headers.get("Content-Type"))
+    length_header = response.headers.get("Content-Length", "")
+    content_length = int(length_header) if length_header.isdigit() else None
+
+    result = {
+        "url": url,
+        "final_url": response.url,
+        "status_code": response.status_code,
+        "content_type": content_type,
+        "encoding": None,
+        "text": "",
+        "bytes_read": 0,
+        "content_length": content_length,
+        "truncated": False,
+        "skipped_bytes": 0,
+        "skipped_reason": None,
+    }
+
+    # Vorabprüfung: nicht unterstützte Inhalte werden gar nicht erst gelesen
+    if not content_type_allowed(content_type, allowed_types):
+        result["skipped_bytes"] = content_length
+        result["skipped_reason"] = f"Inhaltstyp {content_type} nicht unterstützt"
+        result["elapsed"] = time.monotonic() - started
+        tool_logger.info(f"⏭️ {url}: {result['skipped_reason']} ({content_length or '?'} Bytes nicht geladen)")
+        return result
+
+    if content_length is not None and content_length > max_bytes:
+        tool_logger.debug(f"✂️ Content-Length {content_length} > Limit {max_bytes}, lese nur den Anfang")
+
+    encoding = _valid_codec(charset)
+    decoder = None
+    parts = []
+    bytes_read = 0
+
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if cancel is not None and cancel.is_set():
+            raise FetchCancelled(f"Laden von {url} nach {bytes_read} Bytes abgebrochen")
+        if not chunk:
+            continue
+        if bytes_read + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - bytes_read]
+            result["truncated"] = True
+        if decoder is None:
+            encoding = encoding or sniff_charset(chunk) or "utf-8"
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        bytes_read += len(chunk)
+        parts.append(decoder.decode(chunk))
+        if result["truncated"]:
+            break
+
+    if decoder is not None:
+        # Bei Kürzung ein angeschnittenes Multibyte-Zeichen verwerfen statt ersetzen
+        if not result["truncated"]:
+            parts.append(decoder.decode(b"", final=True))
+
+    # Übersprungene Bytes: bezogen auf die Übertragung (ggf. komprimiert)
+    if result["truncated"] and content_length is not None:
+        result["skipped_bytes"] = max(content_length - response.raw.tell(), 0)
+    elif result["truncated"]:
+        result["skipped_bytes"] = None  # unbekannt (chunked ohne Content-Length)
+
+    result.update({
+        "encoding": encoding,
+        "text": "".join(parts),
+        "bytes_read": bytes_read,
+        "elapsed": time.monotonic() - started,
+    })
+    return result
+
+
+def fetch_url(
+    pool: HttpPool,
+    url: str,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    allowed_types: Iterable[str] = DEFAULT_CONTENT_TYPES,
+    headers: Optional[Dict[str, str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Optional[HttpCache] = None,
+    cancel: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """
+    Lädt eine URL gestreamt bis max_bytes
+
+    Args:
+        pool: HTTP-Pool für die Verbindung
+        url: Ziel-URL
+        max_bytes: Max. gelesene (dekomprimierte) Bytes, danach Abbruch
+        allowed_types: Erlaubte Content-Types (fnmatch-Muster)
+        headers: Zusätzliche Request-Header
+        chunk_size: Blockgröße beim Lesen
+        cache: Optionaler HTTP-Cache (frische Einträge ohne Netzwerk, sonst Revalidierung)
+        cancel: Gesetztes Event bricht Verbindungsaufbau bzw. Lesen ab (FetchCancelled)
+
+    Returns:
+        Dict mit status_code, content_type, encoding, text, bytes_read,
+        content_length, truncated, skipped_bytes, skipped_reason, elapsed
+        und cache (None | "hit" | "miss" | "revalidated" | "stale")
+
+    Raises:
+        FetchCancelled: cancel wurde gesetzt
+        requests.exceptions.RequestException: Netzwerk- oder HTTP-Fehler (raise_for_status)
+    """
+    started = time.monotonic()
+    request_headers = dict(headers or {})
+
+    entry = cache.lookup(url) if cache else None
+    # Ein mit kleinerem Limit gekürzter Eintrag reicht für ein größeres Limit nicht
+    if entry and entry["result"]["truncated"] and entry["max_bytes"] < max_bytes:
+        entry = None
+
+    if entry and entry["fresh"]:
+        cache.record("hit", entry["result"]["bytes_read"])
+        return {**entry["result"], "elapsed": time.monotonic() - started, "cache": "hit"}
+    if entry:
+        request_headers.update(entry["validators"])
+    if cancel is not None and cancel.is_set():
+        raise FetchCancelled(f"Laden von {url} abgebrochen")
+
+    try:
+        with pool.stream("GET", url, headers=request_headers) as response:
+            if entry and response.status_code == 304:
+                cache.revalidated(url, response.headers)
+                cache.record("revalidated", entry["result"]["bytes_read"])
+                return {**entry["result"], "elapsed": time.monotonic() - started, "cache": "revalidated"}
+
+            response.raise_for_status()
+            result = _read_response(response, url, max_bytes, allowed_types, chunk_size, started, cancel)
+    except FetchCancelled:
+        raise
+    except requests.exceptions.RequestException as e:
+        # Offline/Serverfehler: abgelaufenen Eintrag ausliefern statt Fehler
+        server_error = isinstance(e, requests.exceptions.HTTPError) and e.response is not None and e.response.status_code >= 500
+        if entry and cache.stale_if_error and (server_error or not isinstance(e, requests.exceptions.HTTPError)):
+            tool_logger.warning(f"🗄️ Liefere veralteten Cache-Eintrag für {url} ({str(e)})")
+            cache.record("stale", entry["result"]["bytes_read"])
+            return {**entry["result"], "elapsed": time.monotonic() - started, "cache": "stale"}
+        raise
+
+    if cache:
+        cache.record("miss")
+        if not result["skipped_reason"]:
+            cache.store(url, response.headers, result, max_bytes)
+    result["cache"] = "miss" if cache else None
+    return result
@@ -3,6 +3,15 @@ from urllib.parse import urlparse
 import os
 import yaml
 
+try:
+    from src.http_pool import create_http_pool, CircuitOpenError, HostBusyError
+    from src.web_fetch import fetch_url
+    from src.html_extract import extract_content
+except ImportError:
+    from http_pool import create_http_pool, CircuitOpenError, HostBusyError
+    from web_fetch import fetch_url
+    from html_extract import extract_content
+
 # Config laden
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "config.yaml")
 with open(CONFIG_PATH, "r", encoding="utf-8") as f:
@@ -10,6 +19,13 @@ with open(CONFIG_PATH, "r", encoding="utf-8") as f:
 
 ALLOWED_DOMAINS = config.get("allowed_domains", [])
 
+# Gemeinsame Keep-Alive-Verbindungen statt neuem TCP/TLS-Handshake pro Aufruf
+http_pool = create_http_pool(config.get("http_pool", {}))
+
+fetch_cfg = config.get("fetch", {})
+FETCH_MAX_BYTES = int(fetch_cfg.get("max_kb", 256) * 1024)
+FETCH_MAX_CHARS = fetch_cfg.get("max_chars", 10000)
+
 def fetch(url: str) -> str:
     """Lädt Webseiteninhalte ab (nur erlaubte Domains)"""
     if not url.strip():
@@ -39,20 +55,25 @@ def fetch(url: str) -> str:
             'Accept': 'text/html,application/xhtml+xml,text/plain,*/*',
         }
         
-        response = requests.get(url, headers=headers, timeout=15, allow_redirects=True)
-        response.raise_for_status()
+        # Gestreamt lesen, dann Boilerplate entfernen; das Zeichenbudget gilt für den Inhalt
+        result = fetch_url(http_pool, url, max_bytes=FETCH_MAX_BYTES, headers=headers)
+        if result["skipped_reason"]:
+            return f"⚠️ {result['skipped_reason']}: {url}"
         
-        # Content begrenzen (max 10KB für Performance)
-        content = response.text[:10000]
-        if len(response.text) > 10000:
-            content += f"\n\n... (Inhalt auf 10KB begrenzt, Original: {len(response.text)} Zeichen)"
+        extracted = extract_content(result["text"], result["content_type"], base_url=result["final_url"],
+                                    max_chars=FETCH_MAX_CHARS, mode=fetch_cfg.get("extract", "markdown"))
+        content = extracted["text"]
+        if extracted["truncated"] or result["truncated"]:
+            content += f"\n\n... (Inhalt auf {FETCH_MAX_CHARS} Zeichen begrenzt)"
         
         return f"🌐 Webseite geladen: {url}\n" \
-               f"📊 Status: {response.status_code} | Größe: {len(content)} Zeichen\n\n" \
+               f"📊 Status: {result['status_code']} | Größe: {len(content)} Zeichen\n\n" \
                f"{content}"
         
     except requests.exceptions.Timeout:
         return f"⏰ Timeout bei Anfrage: {url}"
+    except (CircuitOpenError, HostBusyError) as e:
+        return f"⚡ Host vorübergehend nicht erreichbar: {str(e)}"
     except requests.exceptions.ConnectionError:
         return f"🔌 Verbindungsfehler: {url}"
     except requests.exceptions.HTTPError as e:
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Journal für die Auto-Whitelist von LocalAgent-Pro
+Neue Domains werden an ein Append-only-Journal angehängt (fsync gebündelt im
+Hintergrund) und periodisch in den YAML-Snapshot kompaktiert. Beim Start wird
+Snapshot + Journal eingelesen. Mehrere Threads und Worker-Prozesse sind über
+Lock + flock abgesichert.
+"""
+
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Set
+
+import yaml
+
+# Dynamischer Import je nach Kontext
+try:
+    from src.logging_config import get_logging_manager
+    from src.domain_matcher import normalize_domain
+except ImportError:
+    from logging_config import get_logging_manager
+    from domain_matcher import normalize_domain
+
+logging_manager = get_logging_manager()
+tool_logger = logging_manager.get_logger("Tools")
+
+
+class WhitelistJournal:
+    """Append-only-Journal + YAML-Snapshot für genehmigte Domains"""
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        journal_path: Optional[str] = None,
+        flush_interval: float = 1.0,
+        compact_every: int = 500
+    ):
+        """
+        Initialisiert das Journal (ohne zu laden, siehe load())
+
+        Args:
+            snapshot_path: YAML-Datei mit 'approved_domains'
+            journal_path: Journal-Datei (Standard: <snapshot_path>.journal)
+            flush_interval: Max. Sekunden bis zum fsync angehängter Domains (0 = sofort)
+            compact_every: Journal-Einträge, ab denen in den Snapshot kompaktiert wird
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or f"{snapshot_path}.journal"
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+
+        self._lock = threading.Lock()
+        self._domains: Set[str] = set()
+        self._journal = None
+        self._journal_entries = 0
+        self._dirty = False
+        self._stats = {"appends": 0, "fsyncs": 0, "compactions": 0, "replayed": 0, "invalid": 0}
+
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    # === Dateizugriff ===
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exklusiver Lock über Prozessgrenzen (Lock-Datei neben dem Snapshot)"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+        with open(f"{self.snapshot_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        if not os.path.exists(self.snapshot_path):
+            return {}
+        with open(self.snapshot_path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+
+    def _read_journal(self) -> List[str]:
+        """Liest vollständige Journal-Zeilen (eine angeschnittene letzte Zeile wird ignoriert)"""
+        if not os.path.exists(self.journal_path):
+            return []
+        with open(self.journal_path, "r", encoding="utf-8", errors="replace") as f:
+            data = f.read()
+        lines = data.split("\n")
+        return [line for line in lines[:-1] if line]
+
+    def _add_valid(self, domains, target: Set[str]) -> int:
+        invalid = 0
+        for domain in domains:
+            normalized = normalize_domain(domain)
+            if normalized is None:
+                invalid += 1
+                tool_logger.warning(f"⚠️ Ungültiger Whitelist-Eintrag verworfen: {domain!r}")
+            else:
+                target.add(normalized)
+        return invalid
+
+    def _open_journal(self) -> None:
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    # === Öffentliche API ===
+
+    def load(self) -> Set[str]:
+        """
+        Lädt Snapshot und spielt das Journal ein; kompaktiert danach
+
+        Returns:
+            Menge der genehmigten (normalisierten) Domains
+        """
+        with self._lock, self._file_lock():
+            domains: Set[str] = set()
+            invalid = self._add_valid(self._read_snapshot().get("approved_domains") or [], domains)
+            journal = self._read_journal()
+            invalid += self._add_valid(journal, domains)
+            self._domains = domains
+            self._stats["replayed"] += len(journal)
+            self._stats["invalid"] += invalid
+            if journal or invalid:
+                self._compact_locked()
+
+        if self.flush_interval > 0 and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="whitelist-journal", daemon=True)
+            self._flusher.start()
+
+        tool_logger.info(
+            f"📋 Auto-Whitelist geladen: {len(domains)} Domains ({len(journal)} aus Journal, {invalid} ungültig)"
+        )
+        return set(domains)
+
+    def append(self, domain: str) -> bool:
+        """
+        Hängt eine Domain an das Journal an (fsync gebündelt)
+
+        Returns:
+            True wenn neu aufgenommen, False wenn bekannt oder ungültig
+        """
+        normalized = normalize_domain(domain)
+        if normalized is None:
+            tool_logger.warning(f"⚠️ Ungültige Domain nicht in Whitelist übernommen: {domain!r}")
+            return False
+
+        with self._lock:
+            if normalized in self._domains:
+                return False
+            with self._file_lock():
+                self._open_journal()
+                # Eine Zeile pro write(): mit O_APPEND atomar auch zwischen Prozessen
+                self._journal.write(normalized + "\n")
+                self._journal.flush()
+                if self.flush_interval <= 0:
+                    self._fsync_locked()
+                else:
+                    self._dirty = True
+            self._domains.add(normalized)
+            self._journal_entries += 1
+            self._stats["appends"] += 1
+            if self._journal_entries >= self.compact_every:
+                with self._file_lock():
+                    self._compact_locked()
+        return True
+
+    def __contains__(self, domain: str) -> bool:
+        return normalize_domain(domain) in self._domains
+
+    def domains(self) -> Set[str]:
+        with self._lock:
+            return set(self._domains)
+
+    def flush(self) -> None:
+        """Schreibt ausstehende Journal-Einträge mit fsync auf die Platte"""
+        with self._lock:
+            self._fsync_locked()
+
+    def _fsync_locked(self) -> None:
+        if self._journal is not None:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._stats["fsyncs"] += 1
+        self._dirty = False
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            if self._dirty:
+                try:
+                    self.flush()
+                except OSError as e:
+                    tool_logger.error(f"❌ Whitelist-Journal fsync fehlgeschlagen: {e}")
+
+    def compact(self) -> None:
+        """Übernimmt das Journal in den YAML-Snapshot und leert es"""
+        with self._lock, self._file_lock():
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        """Erwartet _lock und Datei-Lock"""
+        self._fsync_locked()
+        # Einträge anderer Worker seit dem letzten Laden mitnehmen
+        data = self._read_snapshot()
+        self._add_valid(data.get("approved_domains") or [], self._domains)
+        self._add_valid(self._read_journal(), self._domains)
+
+        # Übrige Schlüssel (z.B. loop_protection) bleiben erhalten
+        data["approved_domains"] = sorted(self._domains)
+        tmp = f"{self.snapshot_path}.tmp.{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            yaml.dump(data, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._journal_entries = 0
+        self._stats["compactions"] += 1
+        tool_logger.debug(f"🗜️ Whitelist kompaktiert: {len(self._domains)} Domains")
+
+    def close(self) -> None:
+        """Stoppt den Flush-Thread und kompaktiert ausstehende Einträge"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=self.flush_interval + 1)
+            self._flusher = None
+        with self._lock:
+            if self._journal_entries:
+                with self._file_lock():
+                    self._compact_locked()
+            elif self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "domains": len(self._domains), "journal_entries": self._journal_entries}
+
+
+def create_whitelist_journal(snapshot_path: str, cfg: Optional[Dict[str, Any]] = None) -> WhitelistJournal:
+    """Erstellt das Journal aus dem Config-Abschnitt 'auto_whitelist_journal'"""
+    cfg = cfg or {}
+    return WhitelistJournal(
+        snapshot_path,
+        flush_interval=cfg.get("flush_interval_seconds", 1.0),
+        compact_every=cfg.get("compact_every", 500),
+    )
@@ -3,6 +3,9 @@
 import pytest
 import tempfile
 import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -46,3 +49,96 @@ def app_client():
     app.config['TESTING'] = True
     with app.test_client() as client:
         yield client
+
+
+class _LocalHTTPHandler(BaseHTTPRequestHandler):
+    """Serves canned responses (GET/POST) from server.routes: path -> dict(status, headers, body, delay, chunks, chunked)."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.requests.append({"path": self.path, "method": self.command, "headers": dict(self.headers), "body": body})
+        route = self.server.routes.get(self.path.split("?")[0], {"status": 404, "body": b"not found"})
+        if callable(route):
+            route = route(self)
+        time.sleep(route.get("delay", 0))
+        response_body = route.get("body", b"")
+        if isinstance(response_body, str):
+            response_body = response_body.encode("utf-8")
+        self.send_response(route.get("status", 200))
+        if route.get("chunked"):
+            # Transfer-Encoding: chunked wie bei Ollama-Streams (ein Frame pro Eintrag in chunks)
+            headers = {"Transfer-Encoding": "chunked", **route.get("headers", {})}
+        else:
+            headers = {"Content-Length": str(len(response_body)), **route.get("headers", {})}
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if route.get("chunks"):
+            try:
+                for chunk in route["chunks"]:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if route.get("chunked") else chunk)
+                    self.wfile.flush()
+                    time.sleep(route.get("chunk_delay", 0))
+                if route.get("chunked"):
+                    self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.server.aborted.append(self.path)
+                self.close_connection = True
+        else:
+            self.wfile.write(response_body)
+
+    do_POST = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_http_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _LocalHTTPHandler)
+    server.daemon_threads = True
+    server.routes = {}
+    server.requests = []
+    server.aborted = []
+    server.url = lambda path="/": f"http://127.0.0.1:{server.server_address[1]}{path}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _stop_http_server(server):
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def http_server():
+    """Local HTTP/1.1 server with configurable routes (server.routes, server.requests)."""
+    server = _start_http_server()
+    yield server
+    _stop_http_server(server)
+
+
+@pytest.fixture
+def http_servers():
+    """Factory for several independent local HTTP servers: http_servers(n) -> list."""
+    started = []
+
+    def start(count):
+        servers = [_start_http_server() for _ in range(count)]
+        started.extend(servers)
+        return servers
+    yield start
+    for server in started:
+        _stop_http_server(server)
+
+
+@pytest.fixture
+def mock_ollama():
+    """Deterministic Ollama stand-in (src/mock_ollama.py), instant by default; adjust attributes per test."""
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+    from mock_ollama import MockOllama
+    with MockOllama() as server:
+        yield server
@@ -0,0 +1,159 @@
+"""Unit tests for the content-addressed blob store."""
+
+import errno
+import os
+import pytest
+import shutil
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import blob_store
+from blob_store import BlobStore, create_blob_store
+
+
+@pytest.fixture
+def fake_reflink(monkeypatch):
+    """Simulates FICLONE with a plain copy (tmpfs/ext4 have no reflinks)."""
+    monkeypatch.setattr(blob_store, "_reflink", shutil.copyfile)
+
+
+@pytest.fixture
+def no_reflink(monkeypatch):
+    def unsupported(src, dst):
+        raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+    monkeypatch.setattr(blob_store, "_reflink", unsupported)
+
+
+class TestBlobStore:
+    """Test deduplicated writes via BlobStore."""
+
+    def _store(self, temp_sandbox, **kwargs):
+        kwargs.setdefault("min_size", 0)
+        return BlobStore(str(temp_sandbox / ".localagent" / "blobs"), **kwargs)
+
+    @pytest.mark.unit
+    def test_first_write_creates_file(self, temp_sandbox):
+        """Test: First write stores the content."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "a.txt"
+
+        result = store.write(str(target), b"hello world")
+
+        assert target.read_bytes() == b"hello world"
+        assert result["skipped"] is False
+        assert result["deduplicated"] is False
+
+    @pytest.mark.unit
+    def test_identical_rewrite_is_skipped(self, temp_sandbox):
+        """Test: Rewriting identical content skips the write."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "a.txt"
+        store.write(str(target), b"same content")
+        mtime = target.stat().st_mtime_ns
+
+        result = store.write(str(target), b"same content")
+
+        assert result["skipped"] is True
+        assert result["bytes_saved"] == len(b"same content")
+        assert target.stat().st_mtime_ns == mtime
+        assert store.stats()["skipped_writes"] == 1
+
+    @pytest.mark.unit
+    def test_identical_plain_file_is_skipped(self, temp_sandbox):
+        """Test: Skip also works for files written outside the store."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "plain.txt"
+        target.write_bytes(b"external")
+
+        assert store.write(str(target), b"external")["skipped"] is True
+
+    @pytest.mark.unit
+    def test_same_content_is_deduplicated(self, temp_sandbox, fake_reflink):
+        """Test: Identical content in two files is stored once and cloned."""
+        store = self._store(temp_sandbox)
+        first = temp_sandbox / "one.txt"
+        second = temp_sandbox / "two.txt"
+
+        store.write(str(first), b"shared payload")
+        result = store.write(str(second), b"shared payload")
+
+        assert result["deduplicated"] is True
+        assert second.read_bytes() == b"shared payload"
+        assert first.stat().st_ino != second.stat().st_ino
+
+    @pytest.mark.unit
+    def test_in_place_edit_does_not_touch_other_copies(self, temp_sandbox, fake_reflink):
+        """Test: Files stay writable and editing one in place leaves the others and the blob intact."""
+        store = self._store(temp_sandbox)
+        first = temp_sandbox / "one.txt"
+        second = temp_sandbox / "two.txt"
+        result = store.write(str(first), b"shared payload")
+        store.write(str(second), b"shared payload")
+
+        assert os.access(first, os.W_OK)
+        with open(first, "ab") as f:
+            f.write(b"X")
+
+        assert second.read_bytes() == b"shared payload"
+        assert Path(store._blob_path(result["digest"])).read_bytes() == b"shared payload"
+        assert store.write(str(first), b"shared payload")["skipped"] is False
+
+    @pytest.mark.unit
+    def test_without_reflink_no_blobs_are_kept(self, temp_sandbox, no_reflink):
+        """Test: Without reflink support files are written directly and no blob copies pile up."""
+        store = self._store(temp_sandbox)
+        first = temp_sandbox / "one.txt"
+        second = temp_sandbox / "two.txt"
+
+        store.write(str(first), b"shared payload")
+        result = store.write(str(second), b"shared payload")
+
+        assert result["deduplicated"] is False
+        assert second.read_bytes() == b"shared payload"
+        assert [p for p in (temp_sandbox / ".localagent" / "blobs").rglob("*") if p.is_file()] == []
+        assert store.stats()["clone_fallbacks"] == 1
+
+    @pytest.mark.unit
+    def test_changed_content_does_not_touch_other_links(self, temp_sandbox, fake_reflink):
+        """Test: Overwriting one deduplicated file leaves the others intact."""
+        store = self._store(temp_sandbox)
+        first = temp_sandbox / "one.txt"
+        second = temp_sandbox / "two.txt"
+        store.write(str(first), b"shared payload")
+        store.write(str(second), b"shared payload")
+
+        store.write(str(first), b"new payload")
+
+        assert first.read_bytes() == b"new payload"
+        assert second.read_bytes() == b"shared payload"
+
+    @pytest.mark.unit
+    def test_small_content_written_directly(self, temp_sandbox):
+        """Test: Content below min_size bypasses the blob layer."""
+        store = self._store(temp_sandbox, min_size=1024)
+        target = temp_sandbox / "small.txt"
+
+        store.write(str(target), b"tiny")
+
+        assert target.stat().st_nlink == 1
+        assert not (temp_sandbox / ".localagent" / "blobs").exists()
+
+    @pytest.mark.unit
+    def test_gc_removes_orphaned_blobs(self, temp_sandbox, fake_reflink):
+        """Test: gc() drops blobs no file links to anymore."""
+        store = self._store(temp_sandbox, gc_interval=0)
+        target = temp_sandbox / "a.txt"
+        store.write(str(target), b"version 1")
+        store.write(str(target), b"version 2")
+
+        assert store.gc() == 1
+        assert target.read_bytes() == b"version 2"
+
+    @pytest.mark.unit
+    def test_create_blob_store_disabled_by_default(self, temp_sandbox):
+        """Test: Factory returns None unless enabled."""
+        assert create_blob_store(str(temp_sandbox), {}) is None
+        assert isinstance(create_blob_store(str(temp_sandbox), {"enabled": True}), BlobStore)
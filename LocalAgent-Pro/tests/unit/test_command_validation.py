@@ -200,3 +200,37 @@ class TestCommandValidation:
     def test_edge_command_with_multiple_args(self):
         """Test: grep -r 'pattern' /var/log is valid."""
         assert self._is_valid_command("grep -r 'pattern' /var/log") is True
+
+
+class TestCommandValidationTokenized:
+    """Test tokenizer-based validation (quotes, whitespace, operators)."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        import openwebui_agent_server
+        self._is_valid_command = openwebui_agent_server._is_valid_command
+    
+    @pytest.mark.unit
+    @pytest.mark.parametrize("cmd", [
+        "ls  -la",                       # doppelte Leerzeichen
+        "'ls' -la",                      # gequoteter Programmname
+        "grep 'a b' file.txt",
+        "ls 2>&1",                       # fd-Redirect
+        "cat a.txt || echo missing",
+        "ls |& grep err",
+        'echo "x > y"',                  # Operator im String zählt als Argument
+    ])
+    def test_tokenized_valid_commands(self, cmd):
+        """Test: Commands are recognised after shell tokenisation."""
+        assert self._is_valid_command(cmd) is True
+    
+    @pytest.mark.unit
+    @pytest.mark.parametrize("cmd", [
+        "echo 'unclosed",                # nicht parsebar
+        "README",
+        "hello world",
+        "$(ls)",                         # nur Substitution, kein Programm
+    ])
+    def test_tokenized_invalid_commands(self, cmd):
+        """Test: Unparseable or unknown strings are rejected."""
+        assert self._is_valid_command(cmd) is False
@@ -0,0 +1,134 @@
+"""Unit tests for the domain whitelist matcher."""
+
+import pytest
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from domain_matcher import DomainMatcher, DomainWhitelist, normalize_domain
+
+
+class TestNormalizeDomain:
+    """Test domain normalization."""
+
+    @pytest.mark.unit
+    def test_case_and_trailing_dot(self):
+        """Test: Domains are lowercased and the root dot is removed."""
+        assert normalize_domain("Docs.Python.ORG.") == "docs.python.org"
+
+    @pytest.mark.unit
+    def test_idna_encoded(self):
+        """Test: Unicode domains are converted to punycode."""
+        assert normalize_domain("bücher.example") == "xn--bcher-kva.example"
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("invalid", ['example.com"', "exa mple.com", "-bad.com", "a..b", "", None])
+    def test_invalid_entries_rejected(self, invalid):
+        """Test: Corrupted whitelist entries are rejected."""
+        assert normalize_domain(invalid) is None
+
+    @pytest.mark.unit
+    def test_ip_addresses_kept(self):
+        """Test: IPv4 addresses pass unchanged."""
+        assert normalize_domain("127.0.0.1") == "127.0.0.1"
+
+
+class TestDomainMatcher:
+    """Test allowed/approved/wildcard matching."""
+
+    @pytest.mark.unit
+    def test_allowed_includes_subdomains(self):
+        """Test: allowed_domains match the domain and all subdomains."""
+        matcher = DomainMatcher(["github.com"])
+
+        assert matcher.match("github.com") == "allowed"
+        assert matcher.match("api.github.com") == "allowed"
+        assert matcher.match("a.b.GITHUB.com") == "allowed"
+        assert matcher.match("evilgithub.com") is None
+        assert matcher.match("github.com.evil.org") is None
+
+    @pytest.mark.unit
+    def test_approved_is_exact(self):
+        """Test: Auto-whitelisted domains match only exactly."""
+        matcher = DomainMatcher([], ["example.org"])
+
+        assert matcher.match("example.org") == "approved"
+        assert matcher.match("sub.example.org") is None
+
+    @pytest.mark.unit
+    def test_unicode_query_matches_punycode_entry(self):
+        """Test: Unicode and punycode spellings of a domain are equivalent."""
+        matcher = DomainMatcher(["xn--bcher-kva.example"])
+        assert matcher.match("www.bücher.example") == "allowed"
+
+    @pytest.mark.unit
+    def test_wildcard(self):
+        """Test: '*' allows unknown domains but explicit entries still report their source."""
+        matcher = DomainMatcher(["*", "github.com"], ["example.org"])
+
+        assert matcher.match("anything.net") == "wildcard"
+        assert matcher.match("api.github.com") == "allowed"
+        assert matcher.is_approved("example.org")
+
+    @pytest.mark.unit
+    def test_invalid_entries_collected(self):
+        """Test: Invalid entries are skipped and reported."""
+        matcher = DomainMatcher(["github.com"], ["example.com", 'example.com"'])
+
+        assert matcher.invalid == ['example.com"']
+        assert matcher.match("example.com") == "approved"
+
+    @pytest.mark.unit
+    @pytest.mark.slow
+    def test_large_list_lookup(self):
+        """Test: Matching 100k entries stays fast (hash lookups, no linear scan)."""
+        approved = [f"domain{i}.example" for i in range(100_000)]
+        matcher = DomainMatcher(["github.com"], approved)
+
+        assert matcher.match("domain99999.example") == "approved"
+        assert matcher.match("domain100000.example") is None
+
+
+class TestDomainWhitelist:
+    """Test atomic rebuild and copy-on-write additions."""
+
+    @pytest.mark.unit
+    def test_add_does_not_mutate_old_snapshot(self):
+        """Test: add() swaps in a new matcher; readers keep a consistent snapshot."""
+        whitelist = DomainWhitelist(["github.com"])
+        before = whitelist.matcher
+
+        whitelist.add("example.org")
+
+        assert before.match("example.org") is None
+        assert whitelist.match("example.org") == "approved"
+
+    @pytest.mark.unit
+    def test_rebuild_replaces_matcher(self):
+        """Test: rebuild() swaps the whole whitelist and records its source."""
+        allowed = ["example.com"]
+        whitelist = DomainWhitelist(["github.com"])
+
+        whitelist.rebuild(allowed, [])
+
+        assert whitelist.allowed_source is allowed
+        assert whitelist.match("github.com") is None
+        assert whitelist.match("www.example.com") == "allowed"
+
+    @pytest.mark.unit
+    def test_concurrent_adds(self):
+        """Test: Concurrent additions are not lost."""
+        whitelist = DomainWhitelist()
+        threads = [
+            threading.Thread(target=lambda n=n: [whitelist.add(f"d{n}-{i}.example") for i in range(200)])
+            for n in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert whitelist.stats()["approved"] == 1600
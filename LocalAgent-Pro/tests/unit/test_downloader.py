@@ -0,0 +1,227 @@
+"""Unit tests for the streaming download tool."""
+
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from downloader import download_to_file, directory_usage, DirectoryUsage, DownloadError
+from http_pool import HttpPool
+
+PAYLOAD = bytes(range(256)) * 400  # 102400 Bytes, binär
+
+
+def _range_route(payload, etag='"v1"'):
+    """Route serving payload with Range/If-Range support."""
+    def route(handler):
+        headers = {"Content-Type": "application/octet-stream", "ETag": etag}
+        requested = handler.headers.get("Range")
+        if_range = handler.headers.get("If-Range")
+        if requested and (if_range is None or if_range == etag):
+            start = int(requested.split("=")[1].rstrip("-"))
+            if start >= len(payload):
+                return {"status": 416, "headers": {"Content-Range": f"bytes */{len(payload)}"}}
+            headers["Content-Range"] = f"bytes {start}-{len(payload) - 1}/{len(payload)}"
+            return {"status": 206, "body": payload[start:], "headers": headers}
+        return {"body": payload, "headers": headers}
+    return route
+
+
+class TestDownloadToFile:
+    """Test streaming, limits and resume."""
+
+    @pytest.mark.unit
+    def test_binary_download(self, http_server, tmp_path):
+        """Test: Binary content is written byte-exact with throughput stats."""
+        http_server.routes["/file.bin"] = _range_route(PAYLOAD)
+        dest = tmp_path / "file.bin"
+
+        result = download_to_file(HttpPool(), http_server.url("/file.bin"), str(dest), max_bytes=10**6, chunk_size=4096)
+
+        assert dest.read_bytes() == PAYLOAD
+        assert result["size"] == len(PAYLOAD) and result["resumed_from"] == 0
+        assert result["bytes_per_second"] > 0
+        assert not (tmp_path / "file.bin.part").exists()
+        assert http_server.requests[0]["headers"]["Accept-Encoding"] == "identity"
+
+    @pytest.mark.unit
+    def test_size_cap_rejected_before_reading(self, http_server, tmp_path):
+        """Test: A Content-Length above the cap is rejected and nothing is written."""
+        http_server.routes["/big"] = _range_route(PAYLOAD)
+
+        with pytest.raises(DownloadError, match="Größenlimit"):
+            download_to_file(HttpPool(), http_server.url("/big"), str(tmp_path / "big"), max_bytes=1000)
+
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.unit
+    def test_size_cap_without_content_length(self, http_server, tmp_path):
+        """Test: Streams without Content-Length are cut at the cap and discarded."""
+        http_server.routes["/chunked"] = {
+            "headers": {"Content-Length": "", "Connection": "close"},
+            "chunks": [b"x" * 1000] * 5,
+        }
+
+        with pytest.raises(DownloadError, match="Größenlimit"):
+            download_to_file(HttpPool(), http_server.url("/chunked"), str(tmp_path / "c"), max_bytes=2500, chunk_size=1000)
+
+        assert not (tmp_path / "c.part").exists()
+
+    @pytest.mark.unit
+    def test_missing_content_length_reported_unverified(self, http_server, tmp_path):
+        """Test: Close-delimited bodies are marked unverified, chunked and sized bodies are verified."""
+        http_server.routes["/close"] = {
+            "headers": {"Content-Length": "", "Connection": "close"},
+            "chunks": [b"x" * 1000] * 3,
+        }
+        http_server.routes["/chunked"] = {"chunked": True, "chunks": [b"y" * 1000] * 3}
+        http_server.routes["/file.bin"] = _range_route(PAYLOAD)
+
+        close = download_to_file(HttpPool(), http_server.url("/close"), str(tmp_path / "a"), max_bytes=10**6)
+        chunked = download_to_file(HttpPool(), http_server.url("/chunked"), str(tmp_path / "b"), max_bytes=10**6)
+        sized = download_to_file(HttpPool(), http_server.url("/file.bin"), str(tmp_path / "c"), max_bytes=10**6)
+
+        assert close["size"] == 3000 and close["verified"] is False
+        assert chunked["size"] == 3000 and chunked["verified"] is True
+        assert sized["verified"] is True
+
+    @pytest.mark.unit
+    def test_quota(self, http_server, tmp_path):
+        """Test: The sandbox quota is reported separately from the size cap."""
+        http_server.routes["/file.bin"] = _range_route(PAYLOAD)
+
+        with pytest.raises(DownloadError, match="Sandbox-Kontingent"):
+            download_to_file(HttpPool(), http_server.url("/file.bin"), str(tmp_path / "f"),
+                             max_bytes=10**6, available_bytes=50_000)
+
+    @pytest.mark.unit
+    def test_resume_with_range(self, http_server, tmp_path):
+        """Test: An interrupted download continues from the .part file via Range."""
+        http_server.routes["/file.bin"] = {
+            "headers": {"Content-Length": str(len(PAYLOAD)), "ETag": '"v1"'},
+            "chunks": [PAYLOAD[:30_000]],
+        }
+        dest = tmp_path / "file.bin"
+
+        with pytest.raises(requests.exceptions.RequestException):
+            download_to_file(HttpPool(read_timeout=0.3), http_server.url("/file.bin"), str(dest), max_bytes=10**6)
+        assert (tmp_path / "file.bin.part").stat().st_size == 30_000
+
+        http_server.routes["/file.bin"] = _range_route(PAYLOAD)
+        result = download_to_file(HttpPool(), http_server.url("/file.bin"), str(dest), max_bytes=10**6)
+
+        assert result["resumed_from"] == 30_000
+        assert result["bytes_written"] == len(PAYLOAD) - 30_000
+        assert dest.read_bytes() == PAYLOAD
+        assert http_server.requests[-1]["headers"]["Range"] == "bytes=30000-"
+        assert http_server.requests[-1]["headers"]["If-Range"] == '"v1"'
+
+    @pytest.mark.unit
+    def test_changed_file_restarts(self, http_server, tmp_path):
+        """Test: If the ETag changed, the server sends 200 and the download restarts."""
+        dest = tmp_path / "file.bin"
+        (tmp_path / "file.bin.part").write_bytes(b"stale" * 100)
+        (tmp_path / "file.bin.part.json").write_text(
+            '{"url": "%s", "etag": "\\"old\\""}' % http_server.url("/file.bin"))
+        http_server.routes["/file.bin"] = _range_route(PAYLOAD, etag='"new"')
+
+        result = download_to_file(HttpPool(), http_server.url("/file.bin"), str(dest), max_bytes=10**6)
+
+        assert result["resumed_from"] == 0
+        assert dest.read_bytes() == PAYLOAD
+
+
+    @pytest.mark.unit
+    def test_redirects_checked_per_hop(self, http_server, tmp_path):
+        """Test: Redirects are followed manually and every target host passes url_allowed."""
+        http_server.routes["/file.bin"] = _range_route(PAYLOAD)
+        http_server.routes["/old"] = {"status": 302, "headers": {"Location": "/file.bin"}}
+        http_server.routes["/away"] = {"status": 302, "headers": {"Location": "http://evil.invalid/x.bin"}}
+        allowed = lambda host: host == "127.0.0.1"
+
+        result = download_to_file(HttpPool(), http_server.url("/old"), str(tmp_path / "a.bin"), max_bytes=10**6, url_allowed=allowed)
+        assert result["size"] == len(PAYLOAD)
+
+        with pytest.raises(DownloadError, match="evil.invalid"):
+            download_to_file(HttpPool(), http_server.url("/away"), str(tmp_path / "b.bin"), max_bytes=10**6, url_allowed=allowed)
+        assert not (tmp_path / "b.bin").exists()
+
+
+class TestDirectoryUsage:
+    """Test sandbox usage accounting."""
+
+    @pytest.mark.unit
+    def test_hardlinks_counted_once(self, tmp_path):
+        """Test: Hardlinked files (blob store, snapshots) count once."""
+        (tmp_path / "a").write_bytes(b"x" * 100)
+        (tmp_path / "b").hardlink_to(tmp_path / "a")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "c").write_bytes(b"y" * 50)
+
+        assert directory_usage(str(tmp_path)) == 150
+
+    @pytest.mark.unit
+    def test_usage_cached_until_ttl(self, tmp_path):
+        """Test: DirectoryUsage walks the tree once per ttl and adds own downloads directly."""
+        (tmp_path / "a").write_bytes(b"x" * 100)
+        usage = DirectoryUsage(ttl=60)
+        assert usage.get(str(tmp_path)) == 100
+
+        (tmp_path / "b").write_bytes(b"y" * 50)
+        usage.add(str(tmp_path), 20)
+        assert usage.get(str(tmp_path)) == 120
+
+        usage.invalidate(str(tmp_path))
+        assert usage.get(str(tmp_path)) == 150
+
+
+class TestServerDownload:
+    """Test the server's download tool."""
+
+    @pytest.mark.unit
+    def test_download_tool_writes_into_sandbox(self, http_server, temp_sandbox):
+        """Test: download() stores the file in the sandbox and reports throughput."""
+        import openwebui_agent_server as server
+        http_server.routes["/data.bin"] = _range_route(PAYLOAD)
+
+        with patch.object(server, "ALLOWED_DOMAINS", ["127.0.0.1"]), \
+             patch.object(server, "SANDBOX", True), \
+             patch.object(server, "SANDBOX_PATH", str(temp_sandbox)):
+            result = server.download(http_server.url("/data.bin"), "downloads/data.bin")
+
+        assert "⬇️ Download abgeschlossen" in result and "/s)" in result
+        assert (temp_sandbox / "downloads" / "data.bin").read_bytes() == PAYLOAD
+
+    @pytest.mark.unit
+    def test_download_tool_blocks_domain_and_traversal(self, temp_sandbox):
+        """Test: Unlisted domains and paths escaping the sandbox are refused."""
+        import openwebui_agent_server as server
+
+        with patch.object(server, "ALLOWED_DOMAINS", ["example.com"]), \
+             patch.object(server, "SANDBOX", True), \
+             patch.object(server, "SANDBOX_PATH", str(temp_sandbox)):
+            assert "Domain blockiert" in server.download("https://evil.org/x.bin")
+            assert "außerhalb der Sandbox" in server.download("https://example.com/x.bin", "../../etc/x.bin")
+
+    @pytest.mark.unit
+    def test_download_tool_checks_final_path(self, temp_sandbox, tmp_path):
+        """Test: '.'/'..' URL basenames and symlinks behind the target directory are refused."""
+        import openwebui_agent_server as server
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        (temp_sandbox / "downloads").mkdir(exist_ok=True)
+        (temp_sandbox / "downloads" / "x.bin").symlink_to(outside / "x.bin")
+
+        with patch.object(server, "ALLOWED_DOMAINS", ["example.com"]), \
+             patch.object(server, "SANDBOX", True), \
+             patch.object(server, "SANDBOX_PATH", str(temp_sandbox)):
+            assert "Ungültiger Dateiname" in server.download("https://example.com/a/..", "downloads")
+            assert "Ungültiger Dateiname" in server.download("https://example.com/.")
+            assert "außerhalb der Sandbox" in server.download("https://example.com/x.bin", "downloads")
+
+        assert not (outside / "x.bin").exists()
@@ -0,0 +1,196 @@
+"""Tests for embeddings (micro-batching, cache, /v1/embeddings)."""
+
+import base64
+import json
+import pytest
+import struct
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from embeddings import (
+    EmbeddingBatcher, EmbeddingCache, EmbeddingService, EmbeddingError, embedding_key, create_embedding_service
+)
+from ollama_integration import OllamaClient
+
+
+def _vector(text):
+    return [float(len(text)), 1.0]
+
+
+def _embed_route(handler):
+    payload = json.loads(handler.server.requests[-1]["body"])
+    return {"body": json.dumps({"model": payload["model"], "embeddings": [_vector(t) for t in payload["input"]]})}
+
+
+@pytest.mark.unit
+class TestEmbeddingBatcher:
+    """Test micro-batching of concurrent requests."""
+
+    def test_concurrent_requests_share_one_upstream_call(self, http_server):
+        """Test: texts arriving within the wait window go to Ollama in one call."""
+        http_server.routes["/api/embed"] = _embed_route
+        client = OllamaClient(base_url=http_server.url(""), max_retries=0)
+        batcher = EmbeddingBatcher(client.embed, max_batch=64, max_wait=0.2)
+        results = {}
+
+        def worker(text):
+            results[text] = batcher.embed([text], "nomic-embed-text", timeout=5)[0]
+
+        threads = [threading.Thread(target=worker, args=("x" * n,)) for n in range(1, 6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(http_server.requests) == 1
+        assert len(json.loads(http_server.requests[0]["body"])["input"]) == 5
+        assert results["xxx"] == [3.0, 1.0]
+        assert batcher.stats()["batches"] == 1
+
+    def test_max_batch_splits_calls(self):
+        """Test: more texts than max_batch are sent in several calls."""
+        calls = []
+        batcher = EmbeddingBatcher(lambda texts, model: calls.append(texts) or [_vector(t) for t in texts],
+                                   max_batch=2, max_wait=0.05)
+
+        vectors = batcher.embed(["a", "bb", "ccc"], "m", timeout=5)
+
+        assert vectors == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0]]
+        assert [len(c) for c in calls] == [2, 1]
+
+    def test_duplicates_sent_once(self):
+        """Test: identical texts in one batch are embedded once."""
+        calls = []
+        batcher = EmbeddingBatcher(lambda texts, model: calls.append(texts) or [_vector(t) for t in texts],
+                                   max_wait=0.01)
+
+        vectors = batcher.embed(["a", "a", "b"], "m", timeout=5)
+
+        assert calls == [["a", "b"]]
+        assert vectors[0] == vectors[1]
+
+    def test_failure_propagates(self):
+        """Test: an upstream failure raises EmbeddingError for every waiting caller."""
+        batcher = EmbeddingBatcher(lambda texts, model: None, max_wait=0.01)
+
+        with pytest.raises(EmbeddingError):
+            batcher.embed(["a"], "m", timeout=5)
+
+    def test_worker_survives_broken_batch(self):
+        """Test: a failing callback or short vector list fails the batch, later batches still run."""
+        results = iter([
+            [_vector("a"), _vector("bb"), _vector("ccc")],
+            [_vector("a")],
+            [_vector("a"), _vector("bb")],
+        ])
+        batcher = EmbeddingBatcher(lambda texts, model: next(results), max_wait=0.01,
+                                   on_batch=lambda model, count, seconds: 1 / 0 if count == 3 else None)
+
+        with pytest.raises(EmbeddingError):
+            batcher.embed(["a", "bb", "ccc"], "m", timeout=5)  # on_batch wirft
+        with pytest.raises(EmbeddingError):
+            batcher.embed(["a", "bb"], "m", timeout=5)  # nur ein Vektor für zwei Texte
+
+        assert batcher.embed(["a", "bb"], "m", timeout=5) == [_vector("a"), _vector("bb")]
+
+
+@pytest.mark.unit
+class TestEmbeddingCache:
+    """Test memory LRU and disk cache."""
+
+    def test_cache_hit_skips_upstream(self):
+        """Test: a repeated text is answered from the cache."""
+        calls = []
+        batcher = EmbeddingBatcher(lambda texts, model: calls.append(texts) or [_vector(t) for t in texts],
+                                   max_wait=0.01)
+        service = EmbeddingService(batcher, EmbeddingCache(100))
+
+        service.embed(["hallo"], "m")
+        vectors, cached = service.embed(["hallo", "welt"], "m")
+
+        assert calls == [["hallo"], ["welt"]]
+        assert cached == 1
+        assert vectors == [[5.0, 1.0], [4.0, 1.0]]
+
+    def test_lru_eviction(self):
+        """Test: the least recently used vector is evicted first."""
+        cache = EmbeddingCache(max_entries=2)
+        cache.put("a", [1.0])
+        cache.put("b", [2.0])
+        cache.get("a")
+        cache.put("c", [3.0])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == [1.0]
+        assert cache.stats()["entries"] == 2
+
+    def test_disk_cache_survives_restart(self, tmp_path):
+        """Test: vectors written to disk are found by a new cache instance."""
+        key = embedding_key("m", "hallo")
+        EmbeddingCache(10, str(tmp_path)).put(key, [0.5, -1.25])
+
+        cache = EmbeddingCache(10, str(tmp_path))
+
+        assert cache.get(key) == [0.5, -1.25]
+        assert cache.stats()["disk_hits"] == 1
+
+    def test_factory_without_cache(self, tmp_path):
+        """Test: cache_entries 0 disables the cache."""
+        service = create_embedding_service(lambda texts, model: [], str(tmp_path), {"cache_entries": 0})
+        assert service.cache is None
+
+
+@pytest.mark.unit
+class TestEmbeddingsEndpoint:
+    """Test POST /v1/embeddings."""
+
+    def test_openai_response(self, app_client):
+        """Test: list input returns one embedding per text with the default model."""
+        import openwebui_agent_server as server
+
+        def embed(texts, model):
+            assert model == server.EMBEDDING_MODEL
+            return [_vector(t) for t in texts]
+
+        with patch.object(server.ollama_client, "embed", side_effect=embed):
+            response = app_client.post("/v1/embeddings", json={
+                "model": "localagent-pro", "input": ["endpoint-test-eins", "endpoint-test-zwei!"]
+            })
+
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data["object"] == "list"
+        assert [item["index"] for item in data["data"]] == [0, 1]
+        assert data["data"][1]["embedding"] == [19.0, 1.0]
+        assert data["usage"]["prompt_tokens"] > 0
+
+    def test_base64_encoding(self, app_client):
+        """Test: encoding_format base64 returns little-endian float32."""
+        import openwebui_agent_server as server
+
+        with patch.object(server.ollama_client, "embed", side_effect=lambda texts, model: [[1.5, -2.0] for _ in texts]):
+            response = app_client.post("/v1/embeddings", json={
+                "model": "base64-test-model", "input": "base64-test", "encoding_format": "base64"
+            })
+
+        encoded = response.get_json()["data"][0]["embedding"]
+        assert struct.unpack("<2f", base64.b64decode(encoded)) == (1.5, -2.0)
+
+    def test_token_input_rejected(self, app_client):
+        """Test: token arrays are rejected with 400."""
+        response = app_client.post("/v1/embeddings", json={"input": [[1, 2, 3]]})
+        assert response.status_code == 400
+
+    def test_upstream_failure_returns_503(self, app_client):
+        """Test: Ollama failures surface as 503."""
+        import openwebui_agent_server as server
+
+        with patch.object(server.ollama_client, "embed", return_value=None):
+            response = app_client.post("/v1/embeddings", json={"model": "failing-model", "input": "nicht gecacht"})
+
+        assert response.status_code == 503
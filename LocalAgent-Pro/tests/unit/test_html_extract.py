@@ -0,0 +1,148 @@
+"""Unit tests for HTML/JSON/text extraction used by fetch."""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from html_extract import extract_content, extract_html, HtmlExtractor
+
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Docs &amp; Guides</title>
+<style>body { color: red }</style><script>var tracking = 1;</script></head>
+<body>
+  <header><nav><a href="/">Home</a> <a href="/blog">Blog</a></nav></header>
+  <aside>Werbung</aside>
+  <h1>Installation</h1>
+  <p>Siehe   die <a href="/docs/setup">Anleitung</a> für   Details.</p>
+  <ul><li>Schritt eins</li><li>Schritt zwei</li></ul>
+  <pre>pip install x
+  --upgrade</pre>
+  <div hidden>versteckt</div>
+  <footer>Impressum</footer>
+</body></html>"""
+
+
+class TestHtmlExtraction:
+    """Test HTML → Markdown conversion."""
+
+    @pytest.mark.unit
+    def test_boilerplate_removed(self):
+        """Test: script, style, nav, header, footer, aside and hidden content are dropped."""
+        text = extract_html(PAGE)["text"]
+
+        for boilerplate in ("tracking", "color: red", "Home", "Blog", "Werbung", "Impressum", "versteckt"):
+            assert boilerplate not in text
+
+    @pytest.mark.unit
+    def test_headings_links_and_lists_kept(self):
+        """Test: Headings become '#', links keep absolute URLs, list items become '- '."""
+        result = extract_html(PAGE, base_url="https://example.com/start")
+
+        assert result["title"] == "Docs & Guides"
+        assert "# Installation" in result["text"]
+        assert "[Anleitung](https://example.com/docs/setup)" in result["text"]
+        assert "Siehe die [Anleitung](https://example.com/docs/setup) für Details." in result["text"]
+        assert "- Schritt eins\n- Schritt zwei" in result["text"]
+
+    @pytest.mark.unit
+    def test_preformatted_whitespace_kept(self):
+        """Test: <pre> keeps line breaks and indentation inside a code fence."""
+        text = extract_html(PAGE)["text"]
+        assert "```\npip install x\n  --upgrade\n```" in text
+
+    @pytest.mark.unit
+    def test_text_mode_without_markdown(self):
+        """Test: Text mode omits heading markers and link URLs."""
+        text = extract_html(PAGE, base_url="https://example.com/", markdown=False)["text"]
+        assert "Installation" in text and "#" not in text
+        assert "Anleitung" in text and "https://" not in text
+
+    @pytest.mark.unit
+    def test_main_content_preferred(self):
+        """Test: With a substantial <main>, surrounding content is dropped."""
+        body = "Inhalt " * 50
+        html = f"<html><body><div>Seitenleiste</div><main><p>{body}</p></main><div>Teaser</div></body></html>"
+        result = extract_html(html)
+
+        assert result["main"] is True
+        assert "Seitenleiste" not in result["text"] and "Teaser" not in result["text"]
+
+    @pytest.mark.unit
+    def test_header_inside_article_kept(self):
+        """Test: header/footer inside <article> are content; the page header and footer are dropped."""
+        body = "Inhalt " * 50
+        html = (
+            "<html><body><header>Logo Menü</header><article><header><h1>Artikeltitel</h1>"
+            f"<p>von Autorin</p></header><p>{body}</p><footer>Quellen: Buch</footer></article>"
+            "<footer>Impressum</footer></body></html>"
+        )
+        text = extract_html(html)["text"]
+
+        assert "# Artikeltitel" in text and "von Autorin" in text and "Quellen: Buch" in text
+        assert "Logo" not in text and "Impressum" not in text
+
+    @pytest.mark.unit
+    def test_unclosed_skip_tag_ends_with_parent(self):
+        """Test: A stray unclosed <nav> only drops content up to the end of its parent element."""
+        html = "<html><body><div><nav><a href='/'>Home</a></div><p>Weiter im Text</p><div>Ende</div></body></html>"
+        text = extract_html(html)["text"]
+
+        assert "Home" not in text
+        assert "Weiter im Text" in text and "Ende" in text
+
+    @pytest.mark.unit
+    def test_budget_stops_parsing(self):
+        """Test: Extraction is bounded by max_chars and flags truncation."""
+        html = "<html><body><main>" + "<p>Absatz mit Inhalt.</p>" * 5000 + "</main></body></html>"
+        result = extract_html(html, max_chars=1000)
+
+        assert len(result["text"]) <= 1000
+        assert result["truncated"] is True
+
+    @pytest.mark.unit
+    def test_incremental_feed_matches_single_feed(self):
+        """Test: Feeding the document in tiny chunks yields the same text."""
+        parser = HtmlExtractor(base_url="https://example.com/")
+        for i in range(0, len(PAGE), 7):
+            parser.feed(PAGE[i:i + 7])
+        parser.close()
+
+        assert parser.result()["text"] == extract_html(PAGE, base_url="https://example.com/")["text"]
+
+
+class TestContentDispatch:
+    """Test per content-type handling."""
+
+    @pytest.mark.unit
+    def test_json_pretty_printed(self):
+        """Test: JSON is indented when it fits the budget, compact otherwise."""
+        data = '{"name": "x", "items": [1, 2, 3]}'
+        assert extract_content(data, "application/json")["text"].startswith('{\n  "name": "x"')
+        assert extract_content(data, "application/json", max_chars=40)["text"] == '{"name":"x","items":[1,2,3]}'
+
+    @pytest.mark.unit
+    def test_invalid_json_passed_through(self):
+        """Test: Truncated JSON is returned as text instead of failing."""
+        result = extract_content('{"name": "x", "ite', "application/json")
+        assert result["text"] == '{"name": "x", "ite'
+
+    @pytest.mark.unit
+    def test_plain_text_normalized(self):
+        """Test: Plain text keeps content but collapses blank-line runs and CRLF."""
+        result = extract_content("Zeile 1  \r\n\r\n\r\n\r\nZeile 2", "text/plain")
+        assert result["format"] == "text"
+        assert result["text"] == "Zeile 1\n\nZeile 2"
+
+    @pytest.mark.unit
+    def test_html_sniffed_without_content_type(self):
+        """Test: HTML without Content-Type is detected by its doctype."""
+        assert extract_content(PAGE, "")["format"] == "markdown"
+
+    @pytest.mark.unit
+    def test_raw_mode(self):
+        """Test: Raw mode only applies the character budget."""
+        assert extract_content(PAGE, "text/html", max_chars=15, mode="raw")["text"] == PAGE[:15]
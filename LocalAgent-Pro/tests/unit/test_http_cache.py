@@ -0,0 +1,137 @@
+"""Unit tests for the on-disk HTTP cache used by fetch."""
+
+import pytest
+import sys
+from email.utils import formatdate
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from http_cache import HttpCache, freshness_lifetime
+from http_pool import HttpPool
+from web_fetch import fetch_url
+
+
+def _etag_route(etag, body, cache_control="max-age=0"):
+    """Route answering 304 when If-None-Match matches."""
+    def route(handler):
+        if handler.headers.get("If-None-Match") == etag:
+            return {"status": 304, "headers": {"ETag": etag, "Cache-Control": cache_control}}
+        return {"body": body, "headers": {"Content-Type": "text/plain", "ETag": etag, "Cache-Control": cache_control}}
+    return route
+
+
+class TestHttpCache:
+    """Test freshness, revalidation, eviction and stale-on-error."""
+
+    def _cache(self, temp_sandbox, **kwargs):
+        return HttpCache(str(temp_sandbox / "http_cache"), **kwargs)
+
+    @pytest.mark.unit
+    def test_fresh_entry_served_without_network(self, http_server, temp_sandbox):
+        """Test: max-age responses are served from disk while fresh."""
+        http_server.routes["/doc"] = {"body": "docs", "headers": {"Content-Type": "text/plain", "Cache-Control": "max-age=300"}}
+        cache = self._cache(temp_sandbox)
+        pool = HttpPool()
+
+        first = fetch_url(pool, http_server.url("/doc"), cache=cache)
+        second = fetch_url(pool, http_server.url("/doc"), cache=cache)
+
+        assert first["cache"] == "miss"
+        assert second["cache"] == "hit"
+        assert second["text"] == "docs"
+        assert len(http_server.requests) == 1
+        assert cache.stats()["bytes_saved"] == 4
+
+    @pytest.mark.unit
+    def test_revalidation_with_etag(self, http_server, temp_sandbox):
+        """Test: Stale entries are revalidated with If-None-Match and 304 reuses the body."""
+        http_server.routes["/etag"] = _etag_route('"v1"', "version one")
+        cache = self._cache(temp_sandbox)
+        pool = HttpPool()
+
+        fetch_url(pool, http_server.url("/etag"), cache=cache)
+        result = fetch_url(pool, http_server.url("/etag"), cache=cache)
+
+        assert result["cache"] == "revalidated"
+        assert result["text"] == "version one"
+        assert http_server.requests[1]["headers"]["If-None-Match"] == '"v1"'
+        assert cache.stats()["revalidated"] == 1
+
+    @pytest.mark.unit
+    def test_no_store_is_not_cached(self, http_server, temp_sandbox):
+        """Test: Cache-Control: no-store responses are never written."""
+        http_server.routes["/private"] = {"body": "secret", "headers": {"Content-Type": "text/plain", "Cache-Control": "no-store"}}
+        cache = self._cache(temp_sandbox)
+
+        fetch_url(HttpPool(), http_server.url("/private"), cache=cache)
+
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.unit
+    def test_stale_served_on_server_error(self, http_server, temp_sandbox):
+        """Test: With stale_if_error an expired entry is returned when the origin fails."""
+        cache = self._cache(temp_sandbox)
+        pool = HttpPool()
+        http_server.routes["/flaky"] = {"body": "cached copy", "headers": {"Content-Type": "text/plain", "Cache-Control": "max-age=0"}}
+        fetch_url(pool, http_server.url("/flaky"), cache=cache)
+
+        http_server.routes["/flaky"] = {"status": 503, "body": "down"}
+        result = fetch_url(pool, http_server.url("/flaky"), cache=cache)
+
+        assert result["cache"] == "stale"
+        assert result["text"] == "cached copy"
+
+    @pytest.mark.unit
+    def test_lru_eviction_bounds_size(self, http_server, temp_sandbox):
+        """Test: The least recently used entry is evicted above max_bytes."""
+        for name in ("a", "b", "c"):
+            http_server.routes[f"/{name}"] = {"body": name * 40, "headers": {"Content-Type": "text/plain", "Cache-Control": "max-age=300"}}
+        cache = self._cache(temp_sandbox, max_bytes=100)
+        pool = HttpPool()
+
+        fetch_url(pool, http_server.url("/a"), cache=cache)
+        fetch_url(pool, http_server.url("/b"), cache=cache)
+        fetch_url(pool, http_server.url("/a"), cache=cache)  # a zuletzt genutzt
+        fetch_url(pool, http_server.url("/c"), cache=cache)
+
+        assert cache.stats()["total_bytes"] <= 100
+        assert cache.lookup(http_server.url("/a")) is not None
+        assert cache.lookup(http_server.url("/b")) is None
+
+    @pytest.mark.unit
+    def test_entries_survive_restart(self, http_server, temp_sandbox):
+        """Test: A new cache instance reloads stored entries from disk."""
+        http_server.routes["/doc"] = {"body": "persisted", "headers": {"Content-Type": "text/plain", "Cache-Control": "max-age=300"}}
+        fetch_url(HttpPool(), http_server.url("/doc"), cache=self._cache(temp_sandbox))
+
+        reloaded = self._cache(temp_sandbox)
+        result = fetch_url(HttpPool(), http_server.url("/doc"), cache=reloaded)
+
+        assert result["cache"] == "hit"
+        assert result["text"] == "persisted"
+
+
+class TestFreshnessLifetime:
+    """Test RFC 9111 freshness calculation."""
+
+    @pytest.mark.unit
+    def test_max_age_wins_over_expires(self):
+        """Test: max-age takes precedence over Expires."""
+        headers = {"cache-control": "public, max-age=60", "expires": formatdate(0, usegmt=True)}
+        assert freshness_lifetime(headers, now=1000.0, heuristic_max=86400) == 60
+
+    @pytest.mark.unit
+    def test_invalid_expires_means_expired(self):
+        """Test: 'Expires: 0' is treated as already expired."""
+        assert freshness_lifetime({"expires": "0"}, now=1000.0, heuristic_max=86400) == 0
+
+    @pytest.mark.unit
+    def test_heuristic_from_last_modified(self):
+        """Test: Without explicit freshness 10% of the Last-Modified age is used, capped."""
+        now = 1_700_000_000.0
+        headers = {"date": formatdate(now, usegmt=True), "last-modified": formatdate(now - 1000, usegmt=True)}
+
+        assert freshness_lifetime(headers, now, heuristic_max=86400) == pytest.approx(100)
+        assert freshness_lifetime(headers, now, heuristic_max=50) == 50
@@ -0,0 +1,139 @@
+"""Unit tests for the pooled HTTP session and circuit breaker."""
+
+import pytest
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from http_pool import HttpPool, CircuitBreaker, CircuitOpenError, HostBusyError
+
+
+def _closed_port_url():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"http://127.0.0.1:{port}/"
+
+
+class TestHttpPool:
+    """Test connection reuse, host limits and metrics callback."""
+
+    @pytest.mark.unit
+    def test_keep_alive_reuses_connection(self, http_server):
+        """Test: Repeated requests to one host reuse a pooled connection."""
+        http_server.routes["/page"] = {"body": "hello"}
+        pool = HttpPool()
+
+        for _ in range(5):
+            assert pool.get(http_server.url("/page")).text == "hello"
+
+        stats = pool.stats()
+        assert stats["connections_created"] == 1
+        assert stats["connections_reused"] == 4
+
+    @pytest.mark.unit
+    def test_per_host_limit_rejects_when_busy(self, http_server):
+        """Test: More concurrent requests than max_per_host wait, then fail with HostBusyError."""
+        http_server.routes["/slow"] = {"body": "x", "delay": 0.5}
+        pool = HttpPool(max_per_host=1, connect_timeout=0.1, read_timeout=2)
+        worker = threading.Thread(target=pool.get, args=(http_server.url("/slow"),))
+        worker.start()
+        time.sleep(0.1)
+
+        with pytest.raises(HostBusyError):
+            pool.get(http_server.url("/slow"))
+        worker.join()
+
+    @pytest.mark.unit
+    def test_on_request_callback_reports_status(self, http_server):
+        """Test: on_request receives host, status and duration."""
+        http_server.routes["/missing"] = {"status": 404}
+        calls = []
+        pool = HttpPool(on_request=lambda host, status, duration: calls.append((host, status)))
+
+        pool.get(http_server.url("/missing"))
+
+        assert calls == [("127.0.0.1", "404")]
+
+
+class TestCircuitBreaker:
+    """Test fail-fast behaviour for failing hosts."""
+
+    @pytest.mark.unit
+    def test_opens_after_consecutive_failures(self):
+        """Test: After failure_threshold connection errors the host is rejected immediately."""
+        url = _closed_port_url()
+        pool = HttpPool(failure_threshold=2, reset_timeout=60)
+
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.ConnectionError):
+                pool.get(url)
+
+        with pytest.raises(CircuitOpenError):
+            pool.get(url)
+        assert pool.stats()["circuits_open"] == 1
+
+    @pytest.mark.unit
+    def test_read_timeout_counts_as_failure(self, http_server):
+        """Test: Read timeouts use the read timeout, not the connect timeout, and trip the breaker."""
+        http_server.routes["/hang"] = {"body": "late", "delay": 1}
+        pool = HttpPool(read_timeout=0.2, failure_threshold=1)
+
+        started = time.monotonic()
+        with pytest.raises(requests.exceptions.Timeout):
+            pool.get(http_server.url("/hang"))
+
+        assert time.monotonic() - started < 0.9
+        assert pool.breaker("127.0.0.1").state == "open"
+
+    @pytest.mark.unit
+    def test_half_open_allows_single_trial(self):
+        """Test: After reset_timeout exactly one trial call is let through."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        assert breaker.allow() is False
+
+        time.sleep(0.06)
+        assert breaker.allow() is True
+        assert breaker.allow() is False
+
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    @pytest.mark.unit
+    def test_error_in_with_block_settles_half_open_trial(self, http_server):
+        """Test: raise_for_status() on a half-open 404 closes the breaker instead of leaving the trial running."""
+        http_server.routes["/missing"] = {"status": 404}
+        pool = HttpPool(failure_threshold=1, reset_timeout=0.05)
+        breaker = pool.breaker("127.0.0.1")
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            with pool.stream("GET", http_server.url("/missing")) as response:
+                response.raise_for_status()
+
+        assert breaker.state == "closed"
+        assert pool.get(http_server.url("/missing")).status_code == 404
+
+    @pytest.mark.unit
+    def test_server_errors_count_as_failures(self, http_server):
+        """Test: 5xx responses trip the breaker and are reported with their status."""
+        http_server.routes["/broken"] = {"status": 503}
+        calls = []
+        pool = HttpPool(failure_threshold=2, reset_timeout=60, on_request=lambda host, status, duration: calls.append(status))
+
+        for _ in range(2):
+            pool.get(http_server.url("/broken"))
+
+        assert calls == ["503", "503"]
+        with pytest.raises(CircuitOpenError):
+            pool.get(http_server.url("/broken"))
@@ -0,0 +1,149 @@
+"""Tests for the queue-based log pipeline."""
+
+import logging
+import queue
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from logging_config import LoggingManager, BoundedQueueHandler
+
+
+@pytest.fixture
+def manager_factory(tmp_path):
+    """Creates LoggingManagers in tmp_path and restores the root logger afterwards."""
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    created = []
+
+    def create(**kwargs):
+        manager = LoggingManager(app_name="TestApp", log_dir=str(tmp_path), console_output=False, **kwargs)
+        created.append(manager)
+        return manager
+    yield create
+    for manager in created:
+        manager.shutdown()
+    root.handlers[:] = saved_handlers
+    root.setLevel(saved_level)
+
+
+def lines(path: Path, marker: str):
+    return [line for line in path.read_text(encoding="utf-8").splitlines() if marker in line]
+
+
+@pytest.mark.unit
+class TestLogPipeline:
+    """Test routing, single writes and shutdown flush."""
+
+    def test_each_record_once_per_file(self, manager_factory, tmp_path):
+        """Test: repeated create_*_logger calls do not duplicate lines; dedicated files get only their logger."""
+        manager = manager_factory()
+        tool_logger = manager.create_tool_logger()
+        for _ in range(3):
+            ollama_logger = manager.create_ollama_logger()
+
+        tool_logger.info("tool-zeile")
+        ollama_logger.info("ollama-zeile")
+        manager.get_logger("API").info("api-zeile")
+        manager.flush()
+
+        assert len(lines(tmp_path / "testapp.log", "tool-zeile")) == 1
+        assert len(lines(tmp_path / "testapp.log", "ollama-zeile")) == 1
+        assert len(lines(tmp_path / "tool_executions.log", "tool-zeile")) == 1
+        assert len(lines(tmp_path / "ollama_integration.log", "ollama-zeile")) == 1
+        assert lines(tmp_path / "tool_executions.log", "ollama-zeile") == []
+        assert lines(tmp_path / "ollama_integration.log", "api-zeile") == []
+
+    def test_written_by_background_thread(self, manager_factory):
+        """Test: the root logger only holds the queue handler; file I/O happens in the writer thread."""
+        manager = manager_factory()
+        root_handlers = logging.getLogger().handlers
+
+        assert any(isinstance(h, BoundedQueueHandler) for h in root_handlers)
+        assert not any(isinstance(h, logging.FileHandler) for h in root_handlers)
+        assert manager.stats()["async"] is True
+
+    def test_shutdown_flushes_queue(self, manager_factory, tmp_path):
+        """Test: records still queued at shutdown are written; later records are written synchronously."""
+        manager = manager_factory()
+        logger = manager.create_tool_logger()
+        for i in range(500):
+            logger.info(f"eintrag-{i}")
+
+        manager.shutdown()
+        logger.info("nach-shutdown")
+
+        assert len(lines(tmp_path / "tool_executions.log", "eintrag-")) == 500
+        assert len(lines(tmp_path / "tool_executions.log", "nach-shutdown")) == 1
+
+    def test_exception_text_preserved(self, manager_factory, tmp_path):
+        """Test: tracebacks are formatted before queueing and appear once."""
+        manager = manager_factory()
+        logger = manager.create_ollama_logger()
+        try:
+            raise ValueError("kaputt")
+        except ValueError:
+            logger.error("fehler-zeile", exc_info=True)
+        manager.flush()
+
+        text = (tmp_path / "ollama_integration.log").read_text(encoding="utf-8")
+        assert text.count("ValueError: kaputt") == 1
+
+    def test_sync_mode(self, manager_factory, tmp_path):
+        """Test: async_logging=False writes directly with the same routing."""
+        manager = manager_factory(async_logging=False)
+        manager.create_tool_logger().info("sync-zeile")
+
+        assert manager.stats()["async"] is False
+        assert len(lines(tmp_path / "tool_executions.log", "sync-zeile")) == 1
+
+    def test_configure_pipeline_switches_modes(self, manager_factory, tmp_path):
+        """Test: switching from async to sync keeps all records."""
+        manager = manager_factory()
+        logger = manager.create_tool_logger()
+        logger.info("vorher")
+
+        manager.configure_pipeline(async_logging=False)
+        logger.info("nachher")
+
+        assert len(lines(tmp_path / "tool_executions.log", "vorher")) == 1
+        assert len(lines(tmp_path / "tool_executions.log", "nachher")) == 1
+        with pytest.raises(ValueError):
+            manager.configure_pipeline(queue_policy="egal")
+
+
+@pytest.mark.unit
+class TestBoundedQueueHandler:
+    """Test the overflow policies."""
+
+    def _record(self, level=logging.INFO):
+        return logging.LogRecord("x", level, __file__, 1, "msg", None, None)
+
+    def test_drop_policy(self):
+        """Test: with a full queue INFO is dropped at once, WARNING waits and is dropped after the timeout."""
+        handler = BoundedQueueHandler(queue.Queue(2), policy="drop", block_timeout=0.05)
+        for _ in range(3):
+            handler.handle(self._record())
+
+        started = time.monotonic()
+        handler.handle(self._record(logging.WARNING))
+
+        assert handler.dropped == 2
+        assert time.monotonic() - started >= 0.05
+
+    def test_block_policy_waits_for_space(self):
+        """Test: block waits until the writer frees space instead of dropping."""
+        log_queue = queue.Queue(1)
+        handler = BoundedQueueHandler(log_queue, policy="block", block_timeout=2.0)
+        handler.handle(self._record())
+        threading.Timer(0.05, log_queue.get).start()
+
+        handler.handle(self._record())
+
+        assert handler.dropped == 0
+        assert log_queue.qsize() == 1
@@ -0,0 +1,209 @@
+"""Tests for the deterministic Ollama stand-in used by tests and benchmarks."""
+
+import pytest
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from ollama_integration import OllamaClient
+
+SRC = Path(__file__).parent.parent.parent / "src"
+
+
+def client_for(mock_ollama, **kwargs):
+    return OllamaClient(base_url=mock_ollama.url, default_model="llama3.1", max_retries=0, **kwargs)
+
+
+@pytest.mark.unit
+class TestMockOllamaApi:
+    """Test the endpoints through OllamaClient."""
+
+    def test_tags_show_ps(self, mock_ollama):
+        """Test: installed models, details from /api/show, loaded models after a request."""
+        client = client_for(mock_ollama)
+
+        names = [m["name"] for m in client.list_models()]
+        info = client.get_model_info("llama3.1")
+        assert client.running_models() == []
+        client.generate("Hallo")
+
+        assert names == ["llama3.1:latest", "llama3.2:3b", "nomic-embed-text:latest"]
+        assert info["model_info"]["llama.context_length"] == 8192
+        assert client.running_models() == ["llama3.1:latest"]
+
+    def test_deterministic_answers(self, mock_ollama):
+        """Test: the same prompt yields the same text; streaming and non-streaming agree."""
+        client = client_for(mock_ollama)
+
+        first = client.generate("Wie spät ist es?")
+        second = client.generate("Wie spät ist es?")
+        streamed = "".join(client.chat_stream([{"role": "user", "content": "Wie spät ist es?"}]))
+
+        assert first == second == streamed
+        assert len(first.split()) == 24
+        assert client.generate("Etwas anderes") != first
+
+    def test_unknown_model_404(self, mock_ollama):
+        """Test: unknown models return 404 like Ollama."""
+        response = requests.post(f"{mock_ollama.url}/api/chat", json={"model": "gibtsnicht", "messages": []})
+        assert response.status_code == 404
+        assert "not found" in response.json()["error"]
+
+    def test_generate_context_skips_prompt_eval(self, mock_ollama):
+        """Test: with context only the new prompt is evaluated."""
+        client = client_for(mock_ollama)
+
+        first = client.generate_with_context("eins zwei drei vier")
+        second = client.generate_with_context("fünf", context=first["context"])
+
+        assert first["prompt_eval_count"] == 4
+        assert second["prompt_eval_count"] == 1
+        assert second["context"][:len(first["context"])] == first["context"]
+
+    def test_embed(self, mock_ollama):
+        """Test: normalised, deterministic vectors per input text."""
+        client = client_for(mock_ollama)
+
+        vectors = client.embed(["a", "b", "a"], model="nomic-embed-text")
+
+        assert len(vectors) == 3 and len(vectors[0]) == 384
+        assert vectors[0] == vectors[2] != vectors[1]
+        assert abs(sum(v * v for v in vectors[0]) - 1.0) < 1e-6
+
+
+@pytest.mark.unit
+class TestMockOllamaTiming:
+    """Test configurable load delay, rates and concurrency."""
+
+    def test_rates_and_load_delay(self, mock_ollama):
+        """Test: load delay once per model, prompt eval and generation follow the configured rates."""
+        mock_ollama.load_delay = 0.2
+        mock_ollama.prompt_eval_rate = 100      # 10 Tokens → 0.1s
+        mock_ollama.tokens_per_second = 100     # 10 Tokens → 0.1s
+        mock_ollama.response_tokens = 10
+        prompt = " ".join(["wort"] * 10)
+
+        started = time.monotonic()
+        requests.post(f"{mock_ollama.url}/api/generate", json={"model": "llama3.1", "prompt": prompt, "stream": False})
+        cold = time.monotonic() - started
+        started = time.monotonic()
+        data = requests.post(f"{mock_ollama.url}/api/generate", json={"model": "llama3.1", "prompt": prompt, "stream": False}).json()
+        warm = time.monotonic() - started
+
+        assert 0.4 <= cold < 0.7
+        assert 0.2 <= warm < 0.4
+        assert data["load_duration"] == 0 and data["eval_count"] == 10
+        assert mock_ollama.stats()["loads"] == 1
+
+    def test_streaming_paced(self, mock_ollama):
+        """Test: streamed tokens arrive one by one at tokens_per_second."""
+        mock_ollama.tokens_per_second = 50
+        mock_ollama.response_tokens = 10
+        client = client_for(mock_ollama)
+
+        arrivals = []
+        started = time.monotonic()
+        for _ in client.chat_stream([{"role": "user", "content": "Hallo"}]):
+            arrivals.append(time.monotonic() - started)
+
+        assert len(arrivals) == 10
+        assert arrivals[0] < 0.1 and arrivals[-1] >= 0.18
+
+    def test_concurrency_limit_and_queue(self, mock_ollama):
+        """Test: at most max_concurrent requests run at once, beyond max_queue waiting ones get 503."""
+        mock_ollama.max_concurrent = 2
+        mock_ollama.max_queue = 1
+        mock_ollama.tokens_per_second = 40
+        mock_ollama.response_tokens = 8
+        statuses = []
+
+        def call():
+            response = requests.post(f"{mock_ollama.url}/api/generate", json={"model": "llama3.1", "prompt": "x", "stream": False})
+            statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        for thread in threads:
+            thread.join()
+
+        assert sorted(statuses) == [200, 200, 200, 503, 503]
+        assert mock_ollama.stats()["max_inflight"] == 2
+
+
+@pytest.mark.unit
+class TestMockOllamaErrors:
+    """Test error injection."""
+
+    def test_fail_next_is_retried(self, mock_ollama):
+        """Test: an injected 500 is retried by the client."""
+        mock_ollama.fail_next(1, status=500)
+        client = OllamaClient(base_url=mock_ollama.url, default_model="llama3.1", max_retries=1, backoff_base=0.01)
+
+        assert client.generate("Hallo")
+        assert client.stats()["retries"] == 1
+
+    def test_abort_mid_stream(self, mock_ollama):
+        """Test: after_tokens drops the connection mid-stream; the client does not retry."""
+        mock_ollama.fail_next(1, after_tokens=3, path="/api/chat")
+        client = OllamaClient(base_url=mock_ollama.url, default_model="llama3.1", max_retries=2, backoff_base=0.01)
+
+        received = []
+        with pytest.raises(requests.exceptions.RequestException):
+            for token in client.chat_stream([{"role": "user", "content": "Hallo"}]):
+                received.append(token)
+
+        assert len(received) == 3
+        assert mock_ollama.stats()["requests"]["/api/chat"] == 1
+
+    def test_error_rate_is_seeded(self):
+        """Test: random errors follow the seed (same seed, same failing requests)."""
+        from mock_ollama import MockOllama
+
+        def pattern(seed):
+            with MockOllama(error_rate=0.3, seed=seed) as mock:
+                return [
+                    requests.post(f"{mock.url}/api/generate", json={"model": "llama3.1", "prompt": "x", "stream": False}).status_code
+                    for _ in range(20)
+                ]
+
+        assert pattern(1) == pattern(1)
+        assert 500 in pattern(1)
+
+
+@pytest.mark.unit
+class TestMockOllamaStandalone:
+    """Test running the stand-in as a separate process."""
+
+    def test_process(self):
+        """Test: python src/mock_ollama.py serves /api/tags on the given port."""
+        import socket
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        process = subprocess.Popen(
+            [sys.executable, str(SRC / "mock_ollama.py"), "--port", str(port), "--models", "tinyllama"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        try:
+            deadline = time.monotonic() + 10
+            while True:
+                try:
+                    data = requests.get(f"http://127.0.0.1:{port}/api/tags", timeout=1).json()
+                    break
+                except requests.exceptions.ConnectionError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.05)
+            assert [m["name"] for m in data["models"]] == ["tinyllama:latest"]
+        finally:
+            process.terminate()
+            process.wait(timeout=5)
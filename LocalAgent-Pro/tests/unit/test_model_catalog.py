@@ -0,0 +1,180 @@
+"""Tests for the cached model catalogue behind /v1/models."""
+
+import json
+import pytest
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from model_catalog import ModelCatalog, model_details, create_model_catalog
+from ollama_integration import OllamaClient
+
+TAGS = [
+    {"name": "llama3.1:latest", "digest": "aaa", "size": 4_900_000_000, "modified_at": "2024-07-25T10:00:00.123456789+02:00",
+     "details": {"family": "llama", "parameter_size": "8.0B", "quantization_level": "Q4_K_M"}},
+    {"name": "nomic-embed-text:latest", "digest": "bbb", "size": 274_000_000, "modified_at": "2024-05-01T08:00:00Z",
+     "details": {"family": "nomic-bert"}},
+]
+SHOW = {
+    "llama3.1:latest": {"capabilities": ["completion", "tools"], "model_info": {"llama.context_length": 131072}},
+    "nomic-embed-text:latest": {"capabilities": ["embedding"], "model_info": {"nomic-bert.context_length": 2048}},
+}
+
+
+class FakeOllama:
+    def __init__(self, models=TAGS):
+        self.models = models
+        self.tags_calls = 0
+        self.show_calls = []
+        self.listeners = []
+
+    def list_models(self):
+        self.tags_calls += 1
+        return self.models
+
+    def get_model_info(self, model):
+        self.show_calls.append(model)
+        return SHOW.get(model)
+
+    def add_model_listener(self, callback):
+        self.listeners.append(callback)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.mark.unit
+class TestModelDetails:
+    """Test parsing of /api/show."""
+
+    def test_context_length_and_capabilities(self):
+        """Test: context length comes from model_info, capabilities are passed through."""
+        assert model_details(SHOW["llama3.1:latest"]) == {"capabilities": ["completion", "tools"], "context_length": 131072}
+
+    def test_num_ctx_fallback(self):
+        """Test: without model_info the Modelfile num_ctx is used."""
+        details = model_details({"parameters": "stop \"<|eot_id|>\"\nnum_ctx 8192"})
+        assert details == {"capabilities": [], "context_length": 8192}
+
+
+@pytest.mark.unit
+class TestModelCatalog:
+    """Test caching, refresh and ETag."""
+
+    def test_lists_real_models(self):
+        """Test: agent model first, then chat-capable Ollama models with details; embedding models are dropped."""
+        catalog = ModelCatalog(FakeOllama(), ["localagent-pro"], ["llama3.1"])
+
+        payload, etag = catalog.get()
+
+        ids = [m["id"] for m in payload["data"]]
+        assert ids == ["localagent-pro", "llama3.1:latest"]
+        assert catalog.has_model("llama3.1:latest")
+        assert not catalog.has_model("nomic-embed-text:latest") and not catalog.has_model("localagent-pro")
+        llama = payload["data"][1]
+        assert llama["context_length"] == 131072
+        assert llama["capabilities"] == ["completion", "tools"]
+        assert llama["created"] == 1721894400
+        assert etag
+
+    def test_cached_within_ttl(self):
+        """Test: repeated calls within the TTL do not hit Ollama; ETag stays the same."""
+        ollama = FakeOllama()
+        catalog = ModelCatalog(ollama, ["localagent-pro"], ttl=60)
+
+        _, first = catalog.get()
+        _, second = catalog.get()
+
+        assert ollama.tags_calls == 1
+        assert first == second
+
+    def test_show_only_for_new_digests(self):
+        """Test: /api/show is called again only when a model's digest changes."""
+        ollama = FakeOllama()
+        catalog = ModelCatalog(ollama, ["localagent-pro"], ttl=0)
+        catalog.refresh()
+        catalog.refresh()
+        assert len(ollama.show_calls) == 2
+
+        ollama.models = [dict(TAGS[0], digest="ccc"), TAGS[1]]
+        catalog.refresh()
+
+        assert ollama.show_calls[2:] == ["llama3.1:latest"]
+
+    def test_stale_served_while_refreshing(self):
+        """Test: an expired list is returned immediately and refreshed in the background."""
+        ollama = FakeOllama()
+        catalog = ModelCatalog(ollama, ["localagent-pro"], ttl=0.01)
+        catalog.get()
+        ollama.models = TAGS[1:]
+        time.sleep(0.02)
+
+        payload, _ = catalog.get()
+
+        assert len(payload["data"]) == 2
+        assert wait_for(lambda: len(catalog.get()[0]["data"]) == 1)
+
+    def test_ollama_down_keeps_last_list(self):
+        """Test: a failed refresh keeps the last known list and ETag."""
+        ollama = FakeOllama()
+        catalog = ModelCatalog(ollama, ["localagent-pro"])
+        _, etag = catalog.get()
+        ollama.models = None
+
+        assert catalog.refresh() is False
+        payload, same_etag = catalog.get()
+
+        assert same_etag == etag
+        assert len(payload["data"]) == 2
+
+    def test_fallback_without_ollama(self):
+        """Test: without any answer from Ollama the configured model is listed."""
+        catalog = ModelCatalog(FakeOllama(models=None), ["localagent-pro"], ["llama3.1"])
+
+        payload, _ = catalog.get()
+
+        assert [m["id"] for m in payload["data"]] == ["localagent-pro", "llama3.1"]
+        assert catalog.stats()["source"] == "fallback"
+
+    def test_pull_invalidates(self, http_server):
+        """Test: a successful pull_model refreshes the catalogue."""
+        http_server.routes["/api/tags"] = {"body": json.dumps({"models": TAGS[:1]})}
+        http_server.routes["/api/show"] = {"body": json.dumps(SHOW["llama3.1:latest"])}
+        http_server.routes["/api/pull"] = {"body": json.dumps({"status": "success"})}
+        client = OllamaClient(base_url=http_server.url(""), max_retries=0)
+        catalog = create_model_catalog(client, ["localagent-pro"], [], {"ttl_seconds": 3600, "refresh_interval_seconds": 0})
+        assert len(catalog.get()[0]["data"]) == 2
+
+        http_server.routes["/api/tags"] = {"body": json.dumps({"models": TAGS})}
+        assert client.pull_model("nomic-embed-text") is True
+
+        assert wait_for(lambda: len(catalog.get()[0]["data"]) == 3)
+
+
+@pytest.mark.unit
+class TestModelsEndpoint:
+    """Test GET /v1/models."""
+
+    def test_etag_not_modified(self, app_client):
+        """Test: If-None-Match with the current ETag returns 304 without body."""
+        import openwebui_agent_server as server
+        catalog = ModelCatalog(FakeOllama(), ["localagent-pro"])
+
+        with patch.object(server, "model_catalog", catalog):
+            first = app_client.get("/v1/models")
+            etag = first.headers["ETag"]
+            second = app_client.get("/v1/models", headers={"If-None-Match": etag})
+
+        assert first.status_code == 200
+        assert [m["id"] for m in first.get_json()["data"]][0] == "localagent-pro"
+        assert second.status_code == 304
+        assert second.data == b""
+        assert second.headers["ETag"] == etag
@@ -0,0 +1,142 @@
+"""Tests for background model pulls."""
+
+import json
+import pytest
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from model_pulls import ModelPullManager
+from ollama_integration import OllamaClient
+
+
+def progress_chunks(layers=2, steps=4, size=1000):
+    lines = [{"status": "pulling manifest"}]
+    for layer in range(layers):
+        for step in range(1, steps + 1):
+            lines.append({"status": f"pulling sha{layer}", "digest": f"sha256:{layer}", "total": size, "completed": size * step // steps})
+    lines += [{"status": "verifying sha256 digest"}, {"status": "writing manifest"}, {"status": "success"}]
+    return [(json.dumps(line) + "\n").encode() for line in lines]
+
+
+def wait_done(manager, job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return manager.status(job.id)
+
+
+@pytest.mark.unit
+class TestModelPullManager:
+    """Test pull jobs against a local Ollama stand-in."""
+
+    def _client(self, http_server):
+        return OllamaClient(base_url=http_server.url(""), max_retries=0)
+
+    def test_progress_and_success(self, http_server):
+        """Test: progress is aggregated across layers; listeners and on_finish run on success."""
+        http_server.routes["/api/pull"] = {"chunks": progress_chunks(), "chunked": True}
+        client = self._client(http_server)
+        changed, finished = [], []
+        client.add_model_listener(changed.append)
+        manager = ModelPullManager(client, on_finish=finished.append)
+
+        job = manager.start("llama3.2:3b")
+        data = wait_done(manager, job)
+
+        assert data["status"] == "success"
+        assert data["total"] == 2000 and data["completed"] == 2000
+        assert data["percent"] == 100.0
+        assert changed == ["llama3.2:3b"]
+        assert finished == [job]
+        assert json.loads(http_server.requests[0]["body"])["stream"] is True
+
+    def test_cancel(self, http_server):
+        """Test: cancelling stops the pull and closes the connection to Ollama."""
+        http_server.routes["/api/pull"] = {"chunks": progress_chunks(steps=200), "chunked": True, "chunk_delay": 0.02}
+        manager = ModelPullManager(self._client(http_server))
+
+        job = manager.start("big-model")
+        time.sleep(0.2)
+        manager.cancel(job.id)
+        data = wait_done(manager, job)
+
+        assert data["status"] == "cancelled"
+        assert data["completed"] < 1000  # erster Layer nicht fertig geladen
+
+    def test_concurrency_limit_and_dedup(self, http_server):
+        """Test: a second model beyond the limit is rejected, the same model reuses the job."""
+        http_server.routes["/api/pull"] = {"chunks": progress_chunks(steps=50), "chunked": True, "chunk_delay": 0.02}
+        manager = ModelPullManager(self._client(http_server), max_concurrent=1)
+
+        job = manager.start("model-a")
+        assert manager.start("model-a") is job
+        with pytest.raises(RuntimeError):
+            manager.start("model-b")
+        manager.cancel(job.id)
+        wait_done(manager, job)
+
+    def test_error_in_stream(self, http_server):
+        """Test: an error line from Ollama fails the job with its message."""
+        http_server.routes["/api/pull"] = {
+            "chunks": [b'{"status": "pulling manifest"}\n', b'{"error": "pull model manifest: file does not exist"}\n'],
+            "chunked": True,
+        }
+        manager = ModelPullManager(self._client(http_server))
+
+        data = wait_done(manager, manager.start("does-not-exist"))
+
+        assert data["status"] == "failed"
+        assert "file does not exist" in data["error"]
+
+    def test_warm_up_after_success(self, http_server):
+        """Test: warm_up loads the model with an empty prompt after the pull."""
+        http_server.routes["/api/pull"] = {"chunks": progress_chunks(layers=1, steps=1), "chunked": True}
+        http_server.routes["/api/generate"] = {"body": json.dumps({"done": True})}
+        manager = ModelPullManager(self._client(http_server), warm_up=True, keep_alive="10m")
+
+        data = wait_done(manager, manager.start("llama3.2:3b"))
+
+        assert data["status"] == "success" and data["warmed"] is True
+        payload = json.loads(http_server.requests[-1]["body"])
+        assert payload["prompt"] == "" and payload["keep_alive"] == "10m"
+
+    def test_follow_ends_with_done(self, http_server):
+        """Test: follow yields progress events and a final done event."""
+        http_server.routes["/api/pull"] = {"chunks": progress_chunks(steps=5), "chunked": True, "chunk_delay": 0.01}
+        manager = ModelPullManager(self._client(http_server))
+        job = manager.start("llama3.2:3b")
+
+        events = list(manager.follow(job.id, interval=0.01))
+
+        assert events[-1]["type"] == "done"
+        assert events[-1]["status"] == "success"
+        assert any(e["type"] == "progress" for e in events[:-1])
+
+
+@pytest.mark.unit
+class TestModelPullEndpoints:
+    """Test the /models/pull endpoints."""
+
+    def test_start_and_status(self, app_client, http_server):
+        """Test: POST starts a job (202), GET returns its status, unknown ids return 404."""
+        import openwebui_agent_server as server
+        http_server.routes["/api/pull"] = {"chunks": progress_chunks(), "chunked": True}
+        manager = ModelPullManager(OllamaClient(base_url=http_server.url(""), max_retries=0))
+
+        with patch.object(server, "model_pull_manager", manager):
+            response = app_client.post("/models/pull", json={"model": "llama3.2:3b"})
+            job_id = response.get_json()["id"]
+            wait_done(manager, manager.get(job_id))
+            status = app_client.get(f"/models/pulls/{job_id}")
+            missing = app_client.get("/models/pulls/unknown")
+            empty = app_client.post("/models/pull", json={})
+
+        assert response.status_code == 202
+        assert status.get_json()["status"] == "success"
+        assert missing.status_code == 404
+        assert empty.status_code == 400
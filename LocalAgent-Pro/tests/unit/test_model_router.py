@@ -0,0 +1,219 @@
+"""Unit tests for latency-aware model routing."""
+
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from model_router import ModelRouter, ModelSlots, create_model_router
+
+LONG_PROMPT = "Erkläre ausführlich " + "x" * 300
+
+
+class TestModelRouterPlan:
+    """Test the routing chain."""
+
+    @pytest.mark.unit
+    def test_short_prompt_goes_to_small_model(self):
+        """Test: Short, simple prompts start with the small model, then primary."""
+        router = ModelRouter("llama3.1", small_model="llama3.2:3b", small_max_chars=50)
+
+        assert router.plan("Hallo, wie geht's?") == [("llama3.2:3b", "small"), ("llama3.1", "primary")]
+        assert router.plan(LONG_PROMPT) == [("llama3.1", "primary")]
+        assert router.plan("```python\nprint(1)\n```")[0] == ("llama3.1", "primary")
+
+    @pytest.mark.unit
+    def test_high_p95_overflows_to_fallback(self):
+        """Test: A slow primary moves behind the fallbacks once enough samples exist."""
+        router = ModelRouter("llama3.1", fallback_models=["qwen2.5:3b"], p95_threshold=1.0, min_samples=3)
+        slots = router._slots["llama3.1"]
+
+        for latency in (2.0, 2.5):
+            slots.record(latency)
+        assert router.plan(LONG_PROMPT)[0] == ("llama3.1", "primary")
+
+        slots.record(3.0)
+        assert router.plan(LONG_PROMPT) == [("qwen2.5:3b", "p95"), ("llama3.1", "primary")]
+
+    @pytest.mark.unit
+    def test_p95_window_expires(self):
+        """Test: Old latency samples no longer count, so the primary gets traffic again."""
+        slots = ModelSlots(window_seconds=0.05)
+        slots.record(10.0)
+
+        assert slots.p95() == 10.0
+        time.sleep(0.06)
+        assert slots.p95() is None
+
+    @pytest.mark.unit
+    def test_p95_value(self):
+        """Test: p95 uses the nearest-rank method."""
+        slots = ModelSlots()
+        for latency in range(1, 101):
+            slots.record(float(latency))
+
+        assert slots.p95() == 95.0
+
+
+class TestModelRouterRun:
+    """Test execution along the chain."""
+
+    @pytest.mark.unit
+    def test_primary_serves(self):
+        """Test: Without pressure the primary answers and is reported."""
+        router = ModelRouter("llama3.1", fallback_models=["qwen2.5:3b"])
+
+        result = router.run(LONG_PROMPT, lambda model: f"von {model}")
+
+        assert result["status"] == "success"
+        assert result["model"] == "llama3.1"
+        assert result["route"] == "primary"
+        assert result["text"] == "von llama3.1"
+
+    @pytest.mark.unit
+    def test_failure_falls_back(self):
+        """Test: When the primary returns nothing the fallback answers."""
+        router = ModelRouter("llama3.1", fallback_models=["qwen2.5:3b"])
+
+        result = router.run(LONG_PROMPT, lambda model: None if model == "llama3.1" else "ok")
+
+        assert (result["model"], result["route"]) == ("qwen2.5:3b", "fallback")
+        assert [a["result"] for a in result["attempts"]] == ["failed", "success"]
+
+    @pytest.mark.unit
+    def test_slow_failures_trigger_p95_overflow(self):
+        """Test: Failed attempts count towards p95, so a slowly failing primary moves behind the fallback."""
+        router = ModelRouter("llama3.1", fallback_models=["qwen2.5:3b"], p95_threshold=0.05, min_samples=2)
+
+        def call(model):
+            if model == "llama3.1":
+                time.sleep(0.08)  # z.B. Timeout
+                return None
+            return "ok"
+
+        for _ in range(2):
+            router.run(LONG_PROMPT, call)
+
+        assert router.plan(LONG_PROMPT)[0] == ("qwen2.5:3b", "p95")
+        result = router.run(LONG_PROMPT, call)
+        assert [(a["model"], a["result"]) for a in result["attempts"]] == [("qwen2.5:3b", "success")]
+
+    @pytest.mark.unit
+    def test_small_model_failure_uses_primary(self):
+        """Test: A failing small model hands over to the primary (route stays primary)."""
+        router = ModelRouter("llama3.1", small_model="llama3.2:3b")
+
+        result = router.run("Hi", lambda model: None if model == "llama3.2:3b" else "ok")
+
+        assert (result["model"], result["route"]) == ("llama3.1", "primary")
+
+    @pytest.mark.unit
+    def test_queue_wait_overflows(self):
+        """Test: A saturated primary overflows after max_queue_wait."""
+        router = ModelRouter("llama3.1", fallback_models=["qwen2.5:3b"], max_concurrent=1, max_queue_wait=0.05)
+        release = threading.Event()
+        results = {}
+
+        def call(model):
+            if model == "llama3.1":
+                release.wait(2)
+            return model
+
+        blocker = threading.Thread(target=lambda: results.setdefault("first", router.run(LONG_PROMPT, call)))
+        blocker.start()
+        while router._slots["llama3.1"].inflight == 0:
+            time.sleep(0.005)
+
+        second = router.run(LONG_PROMPT, call)
+        release.set()
+        blocker.join()
+
+        assert results["first"]["model"] == "llama3.1"
+        assert (second["model"], second["route"]) == ("qwen2.5:3b", "queue")
+        assert second["attempts"][0] == {"model": "llama3.1", "result": "busy"}
+
+    @pytest.mark.unit
+    def test_all_busy_reports_overloaded(self):
+        """Test: If no model frees a slot in time the status is 'overloaded'."""
+        router = ModelRouter("llama3.1", max_concurrent=1, max_queue_wait=0.01)
+        router._slots["llama3.1"].inflight = 1
+
+        result = router.run(LONG_PROMPT, lambda model: "nie")
+
+        assert result["status"] == "overloaded"
+        assert result["text"] is None
+
+    @pytest.mark.unit
+    def test_unavailable_stops_chain(self):
+        """Test: With Ollama unreachable no further models are tried."""
+        router = ModelRouter("llama3.1", fallback_models=["qwen2.5:3b"])
+        calls = []
+
+        result = router.run(LONG_PROMPT, lambda model: calls.append(model), available=lambda: False)
+
+        assert result["status"] == "unavailable"
+        assert calls == ["llama3.1"]
+
+    @pytest.mark.unit
+    def test_disabled_config_routes_primary_only(self):
+        """Test: Without enabled the router only knows the primary model."""
+        router = create_model_router("llama3.1", {"small_model": "x", "fallback_models": ["y"]})
+
+        assert router.models == ["llama3.1"]
+        assert create_model_router("llama3.1", {"enabled": True, "fallback_models": ["y"]}).models == ["llama3.1", "y"]
+
+
+class TestServedModelInResponse:
+    """Test that the chat endpoint reports the serving model."""
+
+    @pytest.mark.unit
+    def test_response_contains_served_model(self, app_client):
+        """Test: served_model and header reflect the fallback that answered."""
+        import openwebui_agent_server as server
+        router = ModelRouter("llama3.1", fallback_models=["qwen2.5:3b"])
+
+        def generate(prompt, model=None, **kwargs):
+            return None if model == "llama3.1" else "Antwort vom Fallback"
+
+        with patch.object(server, "model_router", router), \
+             patch.object(server.ollama_client, "generate", side_effect=generate), \
+             patch.object(server.ollama_client, "health", return_value={"status": "up", "circuit": "closed"}):
+            response = app_client.post("/v1/chat/completions", json={
+                "model": "localagent-pro",
+                "messages": [{"role": "user", "content": "Erzähl mir etwas über Wale im Nordatlantik"}],
+            })
+
+        data = response.get_json()
+        assert data["choices"][0]["message"]["content"] == "Antwort vom Fallback"
+        assert data["served_model"] == "qwen2.5:3b"
+        assert data["model"] == "localagent-pro"
+        assert response.headers["X-LocalAgent-Served-Model"] == "qwen2.5:3b"
+
+    @pytest.mark.unit
+    def test_requested_ollama_model_is_served(self, app_client):
+        """Test: a listed Ollama model in data["model"] is used directly instead of the routing chain."""
+        import openwebui_agent_server as server
+        router = ModelRouter("llama3.1", fallback_models=["qwen2.5:3b"])
+        used = []
+
+        def generate(prompt, model=None, **kwargs):
+            used.append(model)
+            return f"Antwort von {model}"
+
+        with patch.object(server, "model_router", router), \
+             patch.object(server, "ollama_sessions", None), \
+             patch.object(server.model_catalog, "has_model", side_effect=lambda m: m == "mistral:7b"), \
+             patch.object(server.ollama_client, "generate", side_effect=generate), \
+             patch.object(server.ollama_client, "health", return_value={"status": "up", "circuit": "closed"}):
+            response = app_client.post("/v1/chat/completions", json={
+                "model": "mistral:7b",
+                "messages": [{"role": "user", "content": "Beschreibe die Wanderung der Buckelwale"}],
+            })
+
+        assert used == ["mistral:7b"]
+        assert response.get_json()["served_model"] == "mistral:7b"
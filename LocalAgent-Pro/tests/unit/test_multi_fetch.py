@@ -0,0 +1,149 @@
+"""Unit tests for concurrent multi-URL fetching."""
+
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from multi_fetch import extract_urls, fetch_many
+
+
+class TestExtractUrls:
+    """Test URL extraction from prompts."""
+
+    @pytest.mark.unit
+    def test_all_urls_in_prompt_order(self):
+        """Test: Every URL is found, in order, without trailing punctuation or duplicates."""
+        prompt = (
+            "Hole https://docs.python.org/3/library/re.html, dann www.github.com/foo "
+            "und https://example.com/a. Nochmal https://docs.python.org/3/library/re.html!"
+        )
+        assert extract_urls(prompt) == [
+            "https://docs.python.org/3/library/re.html",
+            "www.github.com/foo",
+            "https://example.com/a",
+        ]
+
+    @pytest.mark.unit
+    def test_overlapping_patterns_counted_once(self):
+        """Test: 'https://www.x' is not also reported as 'www.x'."""
+        assert extract_urls("Lade https://www.example.com/x") == ["https://www.example.com/x"]
+
+    @pytest.mark.unit
+    def test_localhost_excluded_and_limit(self):
+        """Test: Internal URLs are skipped and max_urls is enforced."""
+        prompt = "Hole http://localhost:8001/x " + " ".join(f"https://site{i}.org" for i in range(5))
+        assert extract_urls(prompt, max_urls=3) == ["https://site0.org", "https://site1.org", "https://site2.org"]
+
+
+class TestFetchMany:
+    """Test concurrency, deadline, per-host limits and budget."""
+
+    @pytest.mark.unit
+    def test_concurrent_and_ordered(self):
+        """Test: URLs are fetched in parallel but returned in prompt order."""
+        delays = {"https://a.org": 0.3, "https://b.org": 0.1, "https://c.org": 0.2}
+
+        def fake_fetch(url, max_chars):
+            time.sleep(delays[url])
+            return f"🌐 Webseite geladen: {url}"
+
+        started = time.monotonic()
+        results = fetch_many(fake_fetch, list(delays))
+
+        assert time.monotonic() - started < 0.55
+        assert [r["url"] for r in results] == list(delays)
+        assert all(r["status"] == "ok" and r["elapsed"] >= delays[r["url"]] for r in results)
+
+    @pytest.mark.unit
+    def test_deadline_marks_slow_urls(self):
+        """Test: URLs still running at the deadline are reported as timeout."""
+        def fake_fetch(url, max_chars):
+            time.sleep(1.0 if "slow" in url else 0)
+            return "ok"
+
+        results = fetch_many(fake_fetch, ["https://fast.org", "https://slow.org"], deadline=0.2)
+
+        assert [r["status"] for r in results] == ["ok", "timeout"]
+        assert results[1]["elapsed"] is None
+
+    @pytest.mark.unit
+    def test_deadline_cancels_running_fetches(self):
+        """Test: After the deadline the cancel event is set so running fetches stop reading."""
+        cancel = threading.Event()
+        stopped = threading.Event()
+
+        def fake_fetch(url, max_chars):
+            while not cancel.wait(0.01):
+                pass
+            stopped.set()
+            return "abgebrochen"
+
+        results = fetch_many(fake_fetch, ["https://slow.org"], deadline=0.1, cancel=cancel)
+
+        assert results[0]["status"] == "timeout"
+        assert stopped.wait(0.5)
+
+    @pytest.mark.unit
+    def test_per_host_limit(self):
+        """Test: At most per_host requests run against the same host."""
+        active = {"now": 0, "max": 0}
+        lock = threading.Lock()
+
+        def fake_fetch(url, max_chars):
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+            return "ok"
+
+        urls = [f"https://same.org/{i}" for i in range(6)]
+        results = fetch_many(fake_fetch, urls, per_host=2, max_workers=6)
+
+        assert all(r["status"] == "ok" for r in results)
+        assert active["max"] == 2
+
+    @pytest.mark.unit
+    def test_budget_shared(self):
+        """Test: The combined character budget is split across URLs."""
+        budgets = []
+        fetch_many(lambda url, max_chars: budgets.append(max_chars) or "ok",
+                   [f"https://s{i}.org" for i in range(4)], total_chars=8000, max_chars=10000)
+        assert budgets == [2000] * 4
+
+    @pytest.mark.unit
+    def test_exception_reported_per_url(self):
+        """Test: A failing URL does not affect the others."""
+        def fake_fetch(url, max_chars):
+            if "bad" in url:
+                raise RuntimeError("kaputt")
+            return "ok"
+
+        results = fetch_many(fake_fetch, ["https://bad.org", "https://good.org"])
+
+        assert results[0]["status"] == "error" and "kaputt" in results[0]["result"]
+        assert results[1]["status"] == "ok"
+
+
+class TestServerFetchUrls:
+    """Test the server's multi-URL tool output."""
+
+    @pytest.mark.unit
+    def test_fetch_urls_reports_each_url(self, http_server):
+        """Test: fetch_urls() lists every URL with status and timing in prompt order."""
+        import openwebui_agent_server as server
+        http_server.routes["/a"] = {"body": "Seite A", "headers": {"Content-Type": "text/plain"}}
+        http_server.routes["/b"] = {"status": 404, "body": "fehlt"}
+
+        with patch.object(server, "ALLOWED_DOMAINS", ["127.0.0.1"]):
+            result = server.fetch_urls([http_server.url("/a"), http_server.url("/b")])
+
+        assert result.startswith("🌐 Web-Requests: 1/2 erfolgreich")
+        assert result.index("[1/2] ✅") < result.index("Seite A") < result.index("[2/2] ❌")
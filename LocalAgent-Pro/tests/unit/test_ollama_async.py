@@ -0,0 +1,221 @@
+"""Unit tests for the asyncio Ollama client."""
+
+import asyncio
+import json
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+httpx = pytest.importorskip("httpx")
+
+from ollama_async import AsyncOllamaClient, CircuitOpenError
+
+CHAT_REPLY = {"model": "llama3.1", "message": {"role": "assistant", "content": "Hallo"}, "done": True,
+              "eval_count": 4, "eval_duration": 2e8}
+
+
+def _stream_route(pieces, field="message", chunk_delay=0.0):
+    lines = []
+    for piece in pieces:
+        data = {"message": {"content": piece}} if field == "message" else {"response": piece}
+        lines.append(json.dumps(data).encode() + b"\n")
+    lines.append(json.dumps({"done": True, "model": "llama3.1", "eval_count": len(pieces), "eval_duration": 1e9}).encode() + b"\n")
+    return {"chunked": True, "chunks": lines, "chunk_delay": chunk_delay}
+
+
+def _client(http_server, **kwargs):
+    kwargs.setdefault("backoff_base", 0.01)
+    return AsyncOllamaClient(base_url=http_server.url(""), default_model="llama3.1", **kwargs)
+
+
+class TestAsyncOllamaClient:
+    """Test the coroutine API."""
+
+    @pytest.mark.unit
+    def test_generate_and_list_models(self, http_server):
+        """Test: generate/list_models/get_model_info mirror the sync client."""
+        http_server.routes["/api/chat"] = {"body": json.dumps(CHAT_REPLY)}
+        http_server.routes["/api/tags"] = {"body": json.dumps({"models": [{"name": "llama3.1"}]})}
+        http_server.routes["/api/show"] = {"body": json.dumps({"details": {"family": "llama"}})}
+
+        async def run():
+            async with _client(http_server) as client:
+                return (await client.generate("Hi", system="kurz"), await client.list_models(),
+                        await client.get_model_info("llama3.1"))
+
+        text, models, info = asyncio.run(run())
+
+        assert text == "Hallo"
+        assert models == [{"name": "llama3.1"}]
+        assert info["details"]["family"] == "llama"
+        payload = json.loads(http_server.requests[0]["body"])
+        assert payload["messages"][0] == {"role": "system", "content": "kurz"}
+
+    @pytest.mark.unit
+    def test_concurrent_generations_share_pool(self, http_server):
+        """Test: Many concurrent generations run on one event loop."""
+        http_server.routes["/api/chat"] = {"body": json.dumps(CHAT_REPLY), "delay": 0.2}
+
+        async def run():
+            async with _client(http_server, pool_size=20) as client:
+                return await asyncio.gather(*(client.generate(f"Frage {i}") for i in range(20)))
+
+        started = time.monotonic()
+        results = asyncio.run(run())
+
+        assert results == ["Hallo"] * 20
+        assert time.monotonic() - started < 2.0
+
+    @pytest.mark.unit
+    def test_retry_on_5xx(self, http_server):
+        """Test: 5xx before an answer is retried with backoff."""
+        calls = {"n": 0}
+
+        def route(handler):
+            calls["n"] += 1
+            return {"status": 503, "body": "busy"} if calls["n"] == 1 else {"body": json.dumps(CHAT_REPLY)}
+        http_server.routes["/api/chat"] = route
+
+        async def run():
+            async with _client(http_server) as client:
+                return await client.chat([{"role": "user", "content": "Hi"}]), client.stats()
+
+        text, stats = asyncio.run(run())
+
+        assert text == "Hallo"
+        assert stats["retries"] == 1
+
+    @pytest.mark.unit
+    def test_circuit_open_fails_fast(self):
+        """Test: After repeated connection failures calls are rejected without connecting."""
+        async def run():
+            async with AsyncOllamaClient(base_url="http://127.0.0.1:9", max_retries=0, failure_threshold=1) as client:
+                assert await client.generate("Hi") is None
+                with pytest.raises(CircuitOpenError):
+                    await client._send("GET", "/api/tags")
+                return client.stats()
+
+        stats = asyncio.run(run())
+
+        assert stats["requests"] == 1
+        assert stats["rejected"] == 1
+
+
+    @pytest.mark.unit
+    def test_cancelled_requests_do_not_open_circuit(self, http_server):
+        """Test: Cancelling pending requests releases a half-open trial without counting failures."""
+        http_server.routes["/api/chat"] = {"body": json.dumps(CHAT_REPLY), "delay": 0.5}
+
+        async def run():
+            async with _client(http_server, failure_threshold=2, reset_timeout=0.01) as client:
+                tasks = [asyncio.create_task(client.chat([{"role": "user", "content": "Hi"}])) for _ in range(3)]
+                await asyncio.sleep(0.1)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                state_after_cancel, failures = client.breaker.state, client.breaker.failures
+
+                # Halb offen: abgebrochener Testaufruf blockiert den nächsten nicht
+                client.breaker.failure_threshold = 1
+                client.breaker.record_failure()
+                await asyncio.sleep(0.02)
+                task = asyncio.create_task(client.chat([{"role": "user", "content": "Hi"}]))
+                await asyncio.sleep(0.1)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                http_server.routes["/api/chat"] = {"body": json.dumps(CHAT_REPLY)}
+                return state_after_cancel, failures, await client.chat([{"role": "user", "content": "Hi"}]), client.breaker.state
+
+        state_after_cancel, failures, text, state = asyncio.run(run())
+
+        assert state_after_cancel == "closed" and failures == 0
+        assert text == "Hallo"
+        assert state == "closed"
+
+
+class TestAsyncOllamaStreams:
+    """Test async streaming iterators."""
+
+    @pytest.mark.unit
+    def test_chat_stream_yields_deltas_and_stats(self, http_server):
+        """Test: chat_stream yields content pieces and exposes final stats."""
+        http_server.routes["/api/chat"] = _stream_route(["Hal", "lo", "!"])
+
+        async def run():
+            async with _client(http_server) as client:
+                stream = client.chat_stream([{"role": "user", "content": "Hi"}])
+                pieces = [piece async for piece in stream]
+                return pieces, stream.stats
+
+        pieces, stats = asyncio.run(run())
+
+        assert pieces == ["Hal", "lo", "!"]
+        assert stats["eval_count"] == 3
+        assert stats["tokens_per_second"] == pytest.approx(3.0)
+
+    @pytest.mark.unit
+    def test_generate_stream(self, http_server):
+        """Test: generate_stream reads the 'response' field of /api/generate."""
+        http_server.routes["/api/generate"] = _stream_route(["a", "b"], field="response")
+
+        async def run():
+            async with _client(http_server) as client:
+                async with client.generate_stream("Hi", max_tokens=5) as stream:
+                    return await stream.text()
+
+        assert asyncio.run(run()) == "ab"
+        assert json.loads(http_server.requests[0]["body"])["options"]["num_predict"] == 5
+
+    @pytest.mark.unit
+    def test_cancellation_closes_stream(self, http_server):
+        """Test: Cancelling the consuming task closes the connection instead of reading on."""
+        http_server.routes["/api/chat"] = _stream_route([f"t{i}" for i in range(50)], chunk_delay=0.05)
+        received = []
+
+        async def consume(client):
+            async for piece in client.chat_stream([{"role": "user", "content": "Hi"}]):
+                received.append(piece)
+
+        async def run():
+            async with _client(http_server) as client:
+                task = asyncio.create_task(consume(client))
+                for _ in range(200):
+                    if len(received) >= 2:
+                        break
+                    await asyncio.sleep(0.01)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                return len(client.http._transport._pool.connections)
+
+        started = time.monotonic()
+        open_connections = asyncio.run(run())
+
+        assert 2 <= len(received) < 50
+        assert open_connections == 0
+        assert time.monotonic() - started < 1.5
+        # Ollama sieht den Abbruch als geschlossene Verbindung
+        for _ in range(100):
+            if http_server.aborted:
+                break
+            time.sleep(0.02)
+        assert http_server.aborted == ["/api/chat"]
+
+    @pytest.mark.unit
+    def test_stream_error_line_raises(self, http_server):
+        """Test: An error object inside the stream raises HTTPStatusError."""
+        http_server.routes["/api/chat"] = {
+            "chunked": True,
+            "chunks": [b'{"message": {"content": "x"}}\n', b'{"error": "model crashed"}\n'],
+        }
+
+        async def run():
+            async with _client(http_server) as client:
+                return [piece async for piece in client.chat_stream([{"role": "user", "content": "Hi"}])]
+
+        with pytest.raises(httpx.HTTPStatusError, match="model crashed"):
+            asyncio.run(run())
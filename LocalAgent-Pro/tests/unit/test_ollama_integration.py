@@ -0,0 +1,253 @@
+"""Unit tests for the pooled, retrying Ollama client."""
+
+import json
+import pytest
+import socket
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from ollama_integration import OllamaClient, CircuitOpenError
+
+CHAT_REPLY = {"message": {"role": "assistant", "content": "Hallo"}, "done": True, "eval_count": 3, "eval_duration": 1e8}
+
+
+def _client(http_server, **kwargs):
+    http_server.routes.setdefault("/api/tags", {"body": json.dumps({"models": [{"name": "llama3.1"}]})})
+    kwargs.setdefault("backoff_base", 0.01)
+    return OllamaClient(base_url=http_server.url(""), default_model="llama3.1", **kwargs)
+
+
+def _flaky(failures, status=503, reply=CHAT_REPLY):
+    """Route failing `failures` times with `status`, then answering normally."""
+    calls = {"n": 0}
+
+    def route(handler):
+        calls["n"] += 1
+        if calls["n"] <= failures:
+            return {"status": status, "body": "busy"}
+        return {"body": json.dumps(reply)}
+    return route
+
+
+def _closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def _ndjson(*parts):
+    return [json.dumps(part).encode() + b"\n" for part in parts]
+
+
+class TestOllamaClientRetries:
+    """Test session reuse, retries and timeouts."""
+
+    @pytest.mark.unit
+    def test_keep_alive_connection_reused(self, http_server):
+        """Test: Consecutive calls reuse one pooled connection."""
+        http_server.routes["/api/chat"] = {"body": json.dumps(CHAT_REPLY)}
+        client = _client(http_server)
+
+        for _ in range(3):
+            assert client.generate("Hi") == "Hallo"
+
+        pool = next(iter(client.session.get_adapter(http_server.url("/")).poolmanager.pools._container.values()))
+        assert pool.num_connections == 1
+        assert pool.num_requests == 3
+
+    @pytest.mark.unit
+    def test_retry_on_5xx(self, http_server):
+        """Test: Transient 5xx responses are retried with backoff."""
+        http_server.routes["/api/chat"] = _flaky(2)
+        client = _client(http_server, max_retries=2)
+
+        assert client.chat([{"role": "user", "content": "Hi"}]) == "Hallo"
+        assert client.stats()["retries"] == 2
+
+    @pytest.mark.unit
+    def test_gives_up_after_max_retries(self, http_server):
+        """Test: After max_retries the method still returns None as before."""
+        http_server.routes["/api/chat"] = _flaky(5)
+        client = _client(http_server, max_retries=1)
+
+        assert client.generate("Hi") is None
+        assert client.stats() == {"requests": 2, "retries": 1, "failures": 1, "rejected": 0}
+
+    @pytest.mark.unit
+    def test_no_retry_on_4xx(self, http_server):
+        """Test: Client errors (e.g. unknown model) are not retried."""
+        http_server.routes["/api/show"] = _flaky(5, status=404)
+        client = _client(http_server, max_retries=3)
+
+        assert client.get_model_info("missing") is None
+        assert client.stats()["retries"] == 0
+
+    @pytest.mark.unit
+    def test_connection_error_retried(self):
+        """Test: Connection refused is retried, then reported."""
+        client = OllamaClient(base_url=_closed_port_url(), max_retries=2, backoff_base=0.01)
+
+        assert client.list_models() is None
+        assert client.stats()["retries"] == 2
+
+    @pytest.mark.unit
+    def test_separate_timeouts(self, http_server):
+        """Test: connect and read timeouts are passed separately."""
+        http_server.routes["/api/chat"] = {"body": json.dumps(CHAT_REPLY), "delay": 0.5}
+        client = _client(http_server, connect_timeout=2.0, read_timeout=0.2, max_retries=3)
+
+        assert client.generate("Hi") is None
+        # ReadTimeout wird nicht wiederholt (Generierung könnte noch laufen)
+        assert client.stats()["retries"] == 0
+
+    @pytest.mark.unit
+    def test_backoff_jitter_bounded(self):
+        """Test: Backoff is randomized within the exponential bound and capped."""
+        client = OllamaClient.__new__(OllamaClient)
+        client.backoff_base, client.backoff_max = 0.5, 4.0
+
+        delays = [client._backoff(attempt) for attempt in range(10) for _ in range(20)]
+
+        assert all(0 <= delay <= 4.0 for delay in delays)
+        assert len(set(delays)) > 100
+
+
+class TestOllamaClientStreaming:
+    """Test streaming with retry only before the first token."""
+
+    @pytest.mark.unit
+    def test_stream_yields_tokens(self, http_server):
+        """Test: chat_stream yields content pieces; chat(stream=True) joins them."""
+        http_server.routes["/api/chat"] = {
+            "headers": {"Content-Length": "", "Connection": "close"},
+            "chunks": _ndjson({"message": {"content": "Hal"}}, {"message": {"content": "lo"}}, {"done": True, "eval_count": 2}),
+        }
+        client = _client(http_server)
+
+        assert list(client.chat_stream([{"role": "user", "content": "Hi"}])) == ["Hal", "lo"]
+
+    @pytest.mark.unit
+    def test_stream_retried_before_first_token(self, http_server):
+        """Test: A 5xx before streaming starts is retried."""
+        stream_reply = {"headers": {"Content-Length": "", "Connection": "close"},
+                        "chunks": _ndjson({"message": {"content": "ok"}}, {"done": True})}
+        calls = {"n": 0}
+
+        def route(handler):
+            calls["n"] += 1
+            return {"status": 502, "body": "bad gateway"} if calls["n"] == 1 else stream_reply
+        http_server.routes["/api/chat"] = route
+        client = _client(http_server)
+
+        assert client.chat([{"role": "user", "content": "Hi"}], stream=True) == "ok"
+        assert client.stats()["retries"] == 1
+
+    @pytest.mark.unit
+    def test_no_retry_after_tokens_streamed(self, http_server):
+        """Test: A stream breaking after the first token raises instead of retrying."""
+        http_server.routes["/api/chat"] = {
+            "headers": {"Content-Length": "10000"},
+            "chunks": _ndjson({"message": {"content": "Teil"}}),
+        }
+        client = _client(http_server, read_timeout=0.3, max_retries=3)
+        received = []
+
+        with pytest.raises(requests.exceptions.RequestException):
+            for piece in client.chat_stream([{"role": "user", "content": "Hi"}]):
+                received.append(piece)
+
+        assert received == ["Teil"]
+        assert client.stats()["retries"] == 0
+        assert sum(r["path"] == "/api/chat" for r in http_server.requests) == 1
+
+
+class TestOllamaHealth:
+    """Test the background health monitor and the circuit breaker."""
+
+    @pytest.mark.unit
+    def test_init_does_not_probe(self, http_server):
+        """Test: Creating the client makes no request (startup never blocks on Ollama)."""
+        client = _client(http_server)
+
+        assert http_server.requests == []
+        assert client.health()["status"] == "unknown"
+
+    @pytest.mark.unit
+    def test_check_health_updates_cached_state(self, http_server):
+        """Test: A probe records status, latency and model count; health() makes no call."""
+        client = _client(http_server)
+
+        assert client.check_health() is True
+        calls = len(http_server.requests)
+        health = client.health()
+
+        assert health["status"] == "up"
+        assert health["circuit"] == "closed"
+        assert health["models"] == 1
+        assert health["latency_ms"] is not None
+        assert len(http_server.requests) == calls
+
+    @pytest.mark.unit
+    def test_circuit_opens_and_fails_fast(self):
+        """Test: After failure_threshold failed requests further calls are rejected without connecting."""
+        client = OllamaClient(base_url=_closed_port_url(), max_retries=0, failure_threshold=2, reset_timeout=60)
+
+        assert client.generate("Hi") is None
+        assert client.generate("Hi") is None
+        assert client.health()["circuit"] == "open"
+        assert client.health()["status"] == "down"
+
+        started = time.monotonic()
+        with pytest.raises(CircuitOpenError):
+            client._request("GET", "/api/tags")
+        assert client.generate("Hi") is None
+        assert time.monotonic() - started < 0.1
+        assert client.stats()["rejected"] == 2
+        assert client.stats()["requests"] == 2
+
+    @pytest.mark.unit
+    def test_retries_count_as_one_failure(self, http_server):
+        """Test: Retries within one request do not open the circuit on their own."""
+        http_server.routes["/api/chat"] = _flaky(3)
+        client = _client(http_server, max_retries=3, failure_threshold=2)
+
+        assert client.generate("Hi") == "Hallo"
+        assert client.breaker.failures == 0
+        assert client.health()["circuit"] == "closed"
+
+    @pytest.mark.unit
+    def test_probe_closes_circuit_when_back(self, http_server):
+        """Test: A successful health probe closes an open circuit."""
+        http_server.routes["/api/chat"] = {"status": 503, "body": "down"}
+        client = _client(http_server, max_retries=0, failure_threshold=1, reset_timeout=60)
+        assert client.generate("Hi") is None
+        assert client.health()["circuit"] == "open"
+
+        assert client.check_health() is True
+
+        http_server.routes["/api/chat"] = {"body": json.dumps(CHAT_REPLY)}
+        assert client.health()["circuit"] == "closed"
+        assert client.generate("Hi") == "Hallo"
+
+    @pytest.mark.unit
+    def test_monitor_probes_in_background(self, http_server):
+        """Test: The monitor probes periodically and stops on close()."""
+        client = _client(http_server)
+
+        client.start_health_monitor(interval=0.05)
+        deadline = time.monotonic() + 2
+        while sum(r["path"] == "/api/tags" for r in http_server.requests) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        client.close()
+        probes = sum(r["path"] == "/api/tags" for r in http_server.requests)
+        time.sleep(0.15)
+
+        assert probes >= 2
+        assert client.health()["status"] == "up"
+        assert sum(r["path"] == "/api/tags" for r in http_server.requests) == probes
@@ -0,0 +1,163 @@
+"""Tests for Ollama context continuation (session mode)."""
+
+import json
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from ollama_sessions import SessionContextStore, OllamaSessions, history_fingerprint, create_ollama_sessions
+from ollama_integration import OllamaClient
+
+
+class FakeOllama:
+    """Answers with a growing context: previous context + one token per turn."""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    def generate_with_context(self, prompt, model=None, context=None, temperature=0.7, max_tokens=None, conversation_id=None):
+        self.calls.append({"prompt": prompt, "model": model, "context": context})
+        if self.fail:
+            return None
+        new_context = (context or []) + [len(self.calls)] * 3
+        return {"text": f"Antwort {len(self.calls)}", "context": new_context, "prompt_eval_count": 3, "prompt_eval_duration": 0.01}
+
+
+def turn(messages, prompt, answer=None):
+    messages = messages + [{"role": "user", "content": prompt}]
+    return messages if answer is None else messages + [{"role": "assistant", "content": answer}]
+
+
+@pytest.mark.unit
+class TestSessionContextStore:
+    """Test LRU, TTL and history matching."""
+
+    def test_continue_only_with_same_history(self):
+        """Test: the context is returned for the same model and history, otherwise dropped."""
+        store = SessionContextStore()
+        store.put("chat-1", "llama3.1", "fp", [1, 2, 3])
+
+        assert store.get("chat-1", "llama3.1", "other") is None
+        assert store.get("chat-1", "llama3.1", "fp") is None  # nach Abweichung verworfen
+
+        store.put("chat-1", "llama3.1", "fp", [1, 2, 3])
+        assert store.get("chat-1", "llama3.2:3b", "fp") is None
+
+        store.put("chat-1", "llama3.1", "fp", [1, 2, 3])
+        assert store.get("chat-1", "llama3.1", "fp") == [1, 2, 3]
+        assert store.stats()["mismatch"] == 2
+
+    def test_lru_eviction(self):
+        """Test: beyond max_sessions the least recently used conversation is dropped."""
+        store = SessionContextStore(max_sessions=2)
+        store.put("a", "m", "fp", [1])
+        store.put("b", "m", "fp", [2])
+        assert store.get("a", "m", "fp") == [1]
+        store.put("c", "m", "fp", [3])
+
+        assert store.get("b", "m", "fp") is None
+        assert store.get("a", "m", "fp") == [1]
+        assert store.stats()["evicted"] == 1
+
+    def test_ttl_expiry(self):
+        """Test: contexts expire after ttl seconds without a turn."""
+        store = SessionContextStore(ttl=0.05)
+        store.put("a", "m", "fp", [1])
+        time.sleep(0.08)
+
+        assert store.get("a", "m", "fp") is None
+        assert store.stats()["expired"] == 1
+
+    def test_too_long_not_stored(self):
+        """Test: a context above max_tokens is not stored and replaces the old one."""
+        store = SessionContextStore(max_tokens=4)
+        store.put("a", "m", "fp", [1, 2])
+
+        assert store.put("a", "m", "fp", [1, 2, 3, 4, 5]) is False
+        assert store.stats()["sessions"] == 0
+
+
+@pytest.mark.unit
+class TestOllamaSessions:
+    """Test context continuation across turns."""
+
+    def test_second_turn_continues_context(self):
+        """Test: the next turn sends the context returned by the previous one."""
+        ollama = FakeOllama()
+        sessions = OllamaSessions(ollama, SessionContextStore())
+
+        messages = turn([], "Hallo")
+        first = sessions.generate("chat-1", messages, "Hallo", "llama3.1")
+        messages = turn(turn(messages[:-1], "Hallo", first), "Und weiter?")
+        sessions.generate("chat-1", messages, "Und weiter?", "llama3.1")
+
+        assert ollama.calls[0]["context"] is None
+        assert ollama.calls[1]["context"] == [1, 1, 1]
+        assert sessions.store.stats()["continued"] == 1
+
+    def test_streamed_whitespace_still_matches(self):
+        """Test: answers returned with collapsed whitespace (streaming) still match the stored history."""
+        answer = "Zeile eins\n\nZeile  zwei"
+        assert history_fingerprint([{"role": "assistant", "content": answer}]) == \
+            history_fingerprint([{"role": "assistant", "content": "Zeile eins Zeile zwei"}])
+
+    def test_edited_history_starts_fresh(self):
+        """Test: a regenerated or edited previous message starts a new context."""
+        ollama = FakeOllama()
+        sessions = OllamaSessions(ollama, SessionContextStore())
+        sessions.generate("chat-1", turn([], "Hallo"), "Hallo", "llama3.1")
+
+        messages = turn(turn([], "Hallo", "eine andere Antwort"), "Und weiter?")
+        sessions.generate("chat-1", messages, "Und weiter?", "llama3.1")
+
+        assert ollama.calls[1]["context"] is None
+
+    def test_failure_discards_context(self):
+        """Test: a failed call drops the stored context so the next try starts fresh."""
+        ollama = FakeOllama()
+        sessions = OllamaSessions(ollama, SessionContextStore())
+        first = sessions.generate("chat-1", turn([], "Hallo"), "Hallo", "llama3.1")
+        messages = turn(turn([], "Hallo", first), "Und weiter?")
+
+        ollama.fail = True
+        assert sessions.generate("chat-1", messages, "Und weiter?", "llama3.1") is None
+        ollama.fail = False
+        sessions.generate("chat-1", messages, "Und weiter?", "llama3.1")
+
+        assert ollama.calls[2]["context"] is None
+
+    def test_without_conversation_id(self):
+        """Test: without a conversation id nothing is stored."""
+        ollama = FakeOllama()
+        sessions = OllamaSessions(ollama, SessionContextStore())
+
+        assert sessions.generate(None, turn([], "Hallo"), "Hallo", "llama3.1") == "Antwort 1"
+        assert sessions.store.stats()["sessions"] == 0
+
+    def test_disabled_by_default(self):
+        """Test: session mode is opt-in."""
+        assert create_ollama_sessions(FakeOllama(), {}) is None
+
+
+@pytest.mark.unit
+class TestGenerateWithContext:
+    """Test OllamaClient.generate_with_context against a local Ollama stand-in."""
+
+    def test_context_round_trip(self, http_server):
+        """Test: context is sent to /api/generate and the returned one is passed back."""
+        http_server.routes["/api/generate"] = {
+            "body": json.dumps({"response": "Hi", "context": [7, 8, 9], "prompt_eval_count": 2, "prompt_eval_duration": 5_000_000})
+        }
+        client = OllamaClient(base_url=http_server.url(""), max_retries=0)
+
+        result = client.generate_with_context("Hallo", model="llama3.1", context=[1, 2, 3], max_tokens=50)
+
+        payload = json.loads(http_server.requests[0]["body"])
+        assert payload["context"] == [1, 2, 3]
+        assert payload["stream"] is False and payload["options"]["num_predict"] == 50
+        assert result == {"text": "Hi", "context": [7, 8, 9], "prompt_eval_count": 2, "prompt_eval_duration": 0.005}
@@ -0,0 +1,253 @@
+"""Tests for the semantic sandbox index."""
+
+import hashlib
+import os
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+np = pytest.importorskip("numpy")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from semantic_index import SemanticIndex, SemanticIndexError, chunk_text, create_semantic_index
+
+
+def bag_of_words(texts, dim=64):
+    """Deterministic stand-in for an embedding model: hashed word counts."""
+    vectors = []
+    for text in texts:
+        vector = [0.0] * dim
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dim] += 1.0
+        vectors.append(vector)
+    return vectors
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return bag_of_words(texts)
+
+
+def make_index(tmp_path, embed_fn=None, **kwargs):
+    root = tmp_path / "sandbox"
+    root.mkdir(exist_ok=True)
+    return SemanticIndex(str(root), str(root / ".localagent" / "semantic_index"),
+                         embed_fn or CountingEmbedder(), "test-model", **kwargs)
+
+
+@pytest.mark.unit
+class TestChunkText:
+    """Test line-based chunking."""
+
+    def test_chunks_respect_size_and_lines(self):
+        """Test: chunks stay below max_chars and report 1-based line ranges."""
+        text = "\n".join(f"zeile {i} " + "x" * 40 for i in range(100))
+
+        chunks = chunk_text(text, max_chars=500, overlap_lines=2)
+
+        assert chunks[0][0] == 1
+        assert chunks[-1][1] == 100
+        assert all(len(body) <= 500 for _, _, body in chunks)
+        # Überlappung: nächster Abschnitt beginnt vor dem Ende des vorherigen
+        assert chunks[1][0] <= chunks[0][1]
+
+    def test_empty_text(self):
+        """Test: whitespace-only text yields no chunks."""
+        assert chunk_text("\n  \n") == []
+
+
+@pytest.mark.unit
+class TestSemanticIndex:
+    """Test incremental updates and search."""
+
+    def test_search_finds_matching_file(self, tmp_path):
+        """Test: the file sharing the query's words ranks first."""
+        index = make_index(tmp_path)
+        (tmp_path / "sandbox" / "auth.py").write_text("def login(user, password):\n    check password hash\n")
+        (tmp_path / "sandbox" / "report.md").write_text("Quarterly sales report with revenue tables\n")
+
+        index.update()
+        hits = index.search("password login check", top_k=2)
+
+        assert hits[0]["path"] == "auth.py"
+        assert hits[0]["start_line"] == 1
+        assert hits[0]["score"] > hits[1]["score"]
+
+    def test_unchanged_files_not_reembedded(self, tmp_path):
+        """Test: a second update without changes embeds nothing; touch without content change neither."""
+        embedder = CountingEmbedder()
+        index = make_index(tmp_path, embedder)
+        path = tmp_path / "sandbox" / "notes.txt"
+        path.write_text("alpha beta gamma\n")
+        index.update()
+        embedded = len(embedder.texts)
+
+        result = index.update()
+        os.utime(path, (1, 1))
+        touched = index.update()
+
+        assert result["unchanged"] == 1
+        assert touched["unchanged"] == 1
+        assert len(embedder.texts) == embedded
+
+    def test_changed_and_removed_files(self, tmp_path):
+        """Test: changed files replace their chunks, removed files disappear from results."""
+        index = make_index(tmp_path)
+        keep = tmp_path / "sandbox" / "keep.txt"
+        gone = tmp_path / "sandbox" / "gone.txt"
+        keep.write_text("old content about cats\n")
+        gone.write_text("content about dogs\n")
+        index.update()
+
+        keep.write_text("new content about rockets and engines\n")
+        gone.unlink()
+        result = index.update()
+        hits = index.search("rockets engines", top_k=5)
+
+        assert result["changed"] == 1 and result["removed"] == 1
+        assert [h["path"] for h in hits] == ["keep.txt"]
+        assert index.stats()["chunks"] == 1
+
+    def test_persisted_index_reloaded(self, tmp_path):
+        """Test: a new instance reuses the memory-mapped vectors without re-embedding."""
+        (tmp_path / "sandbox").mkdir()
+        (tmp_path / "sandbox" / "a.md").write_text("vector search with numpy memmap\n")
+        make_index(tmp_path).update()
+
+        embedder = CountingEmbedder()
+        index = make_index(tmp_path, embedder)
+        result = index.update()
+
+        assert result["unchanged"] == 1
+        assert embedder.texts == []
+        assert index.search("numpy memmap")[0]["path"] == "a.md"
+        assert embedder.texts == ["numpy memmap"]
+
+    def test_model_change_rebuilds(self, tmp_path):
+        """Test: a different embedding model discards the stored vectors."""
+        (tmp_path / "sandbox").mkdir()
+        (tmp_path / "sandbox" / "a.md").write_text("text\n")
+        make_index(tmp_path).update()
+
+        root = tmp_path / "sandbox"
+        index = SemanticIndex(str(root), str(root / ".localagent" / "semantic_index"), CountingEmbedder(), "other-model")
+        result = index.update()
+
+        assert result["added"] == 1
+
+    def test_skips_binary_and_internal_files(self, tmp_path):
+        """Test: binary files and the hidden index directory are not indexed."""
+        index = make_index(tmp_path)
+        (tmp_path / "sandbox" / "blob.txt").write_bytes(b"abc\0def")
+        (tmp_path / "sandbox" / "text.txt").write_text("hello world\n")
+
+        index.update()
+
+        assert {h["path"] for h in index.search("hello", top_k=10)} == {"text.txt"}
+
+    def test_compaction_keeps_results(self, tmp_path):
+        """Test: rewriting the vector file after many dead rows keeps search results intact."""
+        index = make_index(tmp_path, chunk_chars=20, overlap_lines=0)
+        path = tmp_path / "sandbox" / "big.txt"
+        path.write_text("\n".join(f"line {i} filler" for i in range(1500)))
+        (tmp_path / "sandbox" / "other.txt").write_text("unique zebra stripes\n")
+        index.update()
+
+        path.write_text("short replacement\n")
+        with patch("semantic_index.COMPACT_MIN_DEAD_ROWS", 10):
+            index.update()
+
+        stats = index.stats()
+        assert stats["dead_rows"] == 0
+        assert stats["chunks"] == 2
+        assert index.search("zebra stripes")[0]["path"] == "other.txt"
+
+    def test_embedding_failure_raises(self, tmp_path):
+        """Test: embedding errors surface as SemanticIndexError."""
+        def failing(texts):
+            raise RuntimeError("ollama down")
+
+        index = make_index(tmp_path, failing)
+        (tmp_path / "sandbox" / "a.txt").write_text("text\n")
+
+        with pytest.raises(SemanticIndexError):
+            index.update()
+
+    def test_factory_disabled(self, tmp_path):
+        """Test: enabled false returns None."""
+        assert create_semantic_index(str(tmp_path), str(tmp_path / "idx"), bag_of_words, "m", {"enabled": False}) is None
+
+
+@pytest.mark.unit
+class TestSemanticSearchTool:
+    """Test the semantic_search tool in the server."""
+
+    def test_tool_output(self, tmp_path):
+        """Test: the first query starts the build in the background; later queries list path, line range and preview."""
+        import threading
+        import openwebui_agent_server as server
+        root = tmp_path / "sandbox"
+        root.mkdir()
+        (root / "billing.py").write_text("def create_invoice(customer):\n    return invoice total\n")
+        started = threading.Event()
+
+        def gated_embed(texts):
+            started.wait(5)  # Aufbau erst nach der ersten Antwort abschließen
+            return bag_of_words(texts)
+
+        index = SemanticIndex(str(root), str(root / ".localagent" / "idx"), gated_embed, "test-model")
+
+        with patch.object(server, "semantic_index", index), patch.object(server, "SANDBOX_PATH", str(root)):
+            first = server.analyze_and_execute("Welche Datei erstellt die invoice für einen customer?")
+            started.set()
+            assert index.wait_for_refresh(5)
+            output = server.analyze_and_execute("Welche Datei erstellt die invoice für einen customer?")
+
+        assert "Index wird aufgebaut" in first
+        assert "billing.py:1-2" in output
+        assert "def create_invoice" in output
+
+    def test_refresh_does_not_block_search(self, tmp_path):
+        """Test: a running refresh leaves searches on the previous snapshot instead of waiting."""
+        import threading
+        import openwebui_agent_server as server
+        release = threading.Event()
+
+        def slow_embed(texts):
+            if any("late.txt" in text for text in texts):
+                release.wait(5)
+            return bag_of_words(texts)
+
+        index = make_index(tmp_path, slow_embed)
+        root = tmp_path / "sandbox"
+        (root / "billing.py").write_text("def create_invoice(customer):\n    return invoice total\n")
+        index.update()
+        (root / "late.txt").write_text("invoice notes\n")
+        index.last_update = 0
+
+        with patch.object(server, "semantic_index", index), patch.object(server, "SANDBOX_PATH", str(root)):
+            output = server.semantic_search("invoice customer")
+        release.set()
+
+        assert "billing.py" in output
+        assert index.wait_for_refresh(5)
+        assert index.stats()["files"] == 2
+
+    def test_question_trigger_is_narrow(self, tmp_path):
+        """Test: 'welche datei' inside a write request does not start a semantic search."""
+        import openwebui_agent_server as server
+
+        with patch.object(server, "semantic_search") as search, patch.object(server, "write_file") as write:
+            write.return_value = "Datei erstellt"
+            server.analyze_and_execute("Erstelle notes.txt mit welche datei ist wichtig")
+            server.analyze_and_execute("Welche Datei steht in config.yaml?")
+
+        assert write.called
+        assert not search.called
@@ -0,0 +1,188 @@
+"""Unit tests for background shell jobs."""
+
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from shell_jobs import ShellJobManager
+
+
+def _wait_done(manager, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job.done:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+class TestShellJobs:
+    """Test ShellJobManager start/poll/stream/cancel."""
+
+    @pytest.mark.unit
+    def test_start_returns_immediately(self):
+        """Test: start() does not wait for the command."""
+        manager = ShellJobManager()
+        started = time.time()
+
+        job = manager.start("sleep 1")
+
+        assert time.time() - started < 0.5
+        assert job.status == "running"
+        manager.cancel(job.id)
+
+    @pytest.mark.unit
+    def test_poll_with_offsets(self):
+        """Test: read() returns only new output after the given offset."""
+        manager = ShellJobManager()
+        job = manager.start("printf 'hello world'")
+        _wait_done(manager, job.id)
+
+        first = manager.read(job.id)
+        second = manager.read(job.id, stdout_offset=6)
+
+        assert first["stdout"] == "hello world"
+        assert first["next_stdout_offset"] == 11
+        assert second["stdout"] == "world"
+        assert first["status"] == "success"
+        assert first["exit_code"] == 0
+
+    @pytest.mark.unit
+    def test_failed_command_reports_exit_code(self):
+        """Test: Non-zero exit codes are recorded."""
+        manager = ShellJobManager()
+        job = _wait_done(manager, manager.start("echo oops >&2; exit 3").id)
+
+        assert job.status == "failed"
+        assert job.exit_code == 3
+        assert manager.read(job.id)["stderr"] == "oops\n"
+
+    @pytest.mark.unit
+    def test_cancel_kills_process_group(self):
+        """Test: cancel() terminates the shell and its children."""
+        manager = ShellJobManager()
+        job = manager.start("sleep 30 & sleep 30; wait")
+
+        manager.cancel(job.id)
+        job = _wait_done(manager, job.id, timeout=5)
+
+        assert job.status == "cancelled"
+
+    @pytest.mark.unit
+    def test_cancel_keeps_job_running_until_group_exits(self):
+        """Test: A job stays 'cancelling' (and counts as running) until the waiter reaped the group."""
+        manager = ShellJobManager()
+        job = manager.start("trap '' TERM; sleep 30")
+        time.sleep(0.2)
+
+        canceller = threading.Thread(target=manager.cancel, args=(job.id,))
+        canceller.start()
+        time.sleep(0.5)  # SIGTERM wird ignoriert, SIGKILL folgt erst nach der Gnadenfrist
+
+        assert job.status == "cancelling"
+        assert not job.done
+        assert manager.running_count() == 1
+
+        canceller.join()
+        job = _wait_done(manager, job.id, timeout=5)
+        assert job.status == "cancelled"
+        assert job.exit_code is not None
+        assert manager.running_count() == 0
+
+    @pytest.mark.unit
+    def test_max_runtime_marks_timeout(self):
+        """Test: Jobs exceeding max_runtime are killed and marked as timeout."""
+        manager = ShellJobManager(max_runtime=0.2)
+        job = _wait_done(manager, manager.start("sleep 30").id, timeout=5)
+
+        assert job.status == "timeout"
+
+    @pytest.mark.unit
+    def test_concurrency_limit(self):
+        """Test: Starting more than max_concurrent jobs is rejected."""
+        manager = ShellJobManager(max_concurrent=1)
+        job = manager.start("sleep 30")
+
+        with pytest.raises(RuntimeError):
+            manager.start("sleep 30")
+        manager.cancel(job.id)
+
+    @pytest.mark.unit
+    def test_concurrent_starts_respect_limit(self):
+        """Test: Parallel start() calls cannot exceed max_concurrent."""
+        manager = ShellJobManager(max_concurrent=2)
+        started, rejected = [], []
+        barrier = threading.Barrier(8)
+
+        def start():
+            barrier.wait()
+            try:
+                started.append(manager.start("sleep 30"))
+            except RuntimeError:
+                rejected.append(True)
+
+        threads = [threading.Thread(target=start) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(started) == 2 and len(rejected) == 6
+        manager.shutdown()
+
+    @pytest.mark.unit
+    def test_background_child_holding_output_is_killed(self):
+        """Test: A grandchild keeping stdout open does not keep the job running forever."""
+        manager = ShellJobManager(drain_timeout=0.2)
+        job = manager.start("sleep 30 & echo done")
+
+        job = _wait_done(manager, job.id, timeout=5)
+
+        assert job.status == "success"
+        assert manager.read(job.id)["stdout"] == "done\n"
+
+    @pytest.mark.unit
+    def test_multibyte_output_not_split(self):
+        """Test: UTF-8 characters split across reads are decoded intact."""
+        manager = ShellJobManager()
+        job = manager.start("printf '\\303'; sleep 0.3; printf '\\244 \\342\\202'; sleep 0.3; printf '\\254'")
+        time.sleep(0.15)
+
+        first = manager.read(job.id)
+        assert first["stdout"] == ""
+        assert first["next_stdout_offset"] == 0
+
+        events = list(manager.follow(job.id, heartbeat=0.05))
+        stdout = "".join(e["data"] for e in events if e["type"] == "stdout")
+        assert stdout == "ä €"
+        assert manager.read(job.id)["stdout"] == "ä €"
+
+    @pytest.mark.unit
+    def test_follow_streams_output_and_exit(self):
+        """Test: follow() yields output events and a final exit event."""
+        manager = ShellJobManager()
+        job = manager.start("echo one; sleep 0.1; echo two")
+
+        events = list(manager.follow(job.id, heartbeat=0.05))
+        stdout = "".join(e["data"] for e in events if e["type"] == "stdout")
+
+        assert stdout == "one\ntwo\n"
+        assert events[-1]["type"] == "exit"
+        assert events[-1]["exit_code"] == 0
+
+    @pytest.mark.unit
+    def test_on_finish_callback(self):
+        """Test: on_finish is called once with the finished job."""
+        finished = []
+        manager = ShellJobManager(on_finish=finished.append)
+        job = _wait_done(manager, manager.start("true").id)
+        time.sleep(0.05)
+
+        assert finished == [job]
+        assert manager.list()[0]["status"] == "success"
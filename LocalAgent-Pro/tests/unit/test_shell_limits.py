@@ -0,0 +1,204 @@
+"""Unit tests for bounded shell output capture and resource limits."""
+
+import os
+import pytest
+import signal
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from shell_limits import OutputBuffer, build_limit_prefix, with_limits, read_captured, new_spill_path, prune_spill_dir
+
+
+class TestOutputBuffer:
+    """Test head/tail ring buffer semantics."""
+
+    @pytest.mark.unit
+    def test_small_output_kept_completely(self):
+        """Test: Output below head+tail is returned unchanged."""
+        buffer = OutputBuffer(head_bytes=8, tail_bytes=8)
+        buffer.append(b"hello")
+
+        assert buffer.getvalue() == b"hello"
+        assert buffer.truncated is False
+
+    @pytest.mark.unit
+    def test_large_output_keeps_head_and_tail(self):
+        """Test: Middle part is dropped and replaced by a marker."""
+        buffer = OutputBuffer(head_bytes=4, tail_bytes=4)
+        for i in range(100):
+            buffer.append(b"%03d|" % i)
+
+        value = buffer.getvalue()
+
+        assert value.startswith(b"000|")
+        assert value.endswith(b"099|")
+        assert b"Bytes ausgelassen" in value
+        assert buffer.size == 400
+        assert buffer.skipped == 392
+
+    @pytest.mark.unit
+    def test_read_offsets_skip_dropped_region(self):
+        """Test: read() returns the next absolute offset even across dropped data."""
+        buffer = OutputBuffer(head_bytes=2, tail_bytes=2)
+        buffer.append(b"abcdefgh")
+
+        data, next_offset = buffer.read(6)
+        assert data == b"gh"
+        assert next_offset == 8
+
+        data, _ = buffer.read(3)
+        assert data.endswith(b"gh")
+        assert b"3 Bytes ausgelassen" in data
+
+    @pytest.mark.unit
+    def test_spill_file_capped(self, temp_sandbox):
+        """Test: The spill file stops growing at spill_max_bytes; offsets still count everything."""
+        spill = temp_sandbox / "out.log"
+        buffer = OutputBuffer(head_bytes=4, tail_bytes=4, spill_path=str(spill), spill_max_bytes=10)
+        for _ in range(5):
+            buffer.append(b"123456")
+        buffer.close()
+
+        assert spill.read_bytes() == b"1234561234"
+        assert buffer.spill_truncated is True
+        assert buffer.size == 30
+        assert b"Anfang der Ausgabe" in buffer.getvalue()
+
+    @pytest.mark.unit
+    def test_spill_file_kept_only_when_truncated(self, temp_sandbox):
+        """Test: Full output is spilled to disk, the file survives only if truncated."""
+        small = OutputBuffer(4, 4, str(temp_sandbox / "small.log"))
+        small.append(b"ok")
+        small.close()
+
+        large = OutputBuffer(4, 4, str(temp_sandbox / "large.log"))
+        large.append(b"x" * 100)
+        large.close()
+
+        assert not (temp_sandbox / "small.log").exists()
+        assert (temp_sandbox / "large.log").read_bytes() == b"x" * 100
+        assert str(temp_sandbox / "large.log").encode() in large.getvalue()
+
+
+class TestReadCaptured:
+    """Test head/tail reads from captured output files."""
+
+    @pytest.mark.unit
+    def test_read_captured_truncates_large_file(self, temp_sandbox):
+        """Test: Only head and tail of a large file are read."""
+        path = temp_sandbox / "out.log"
+        path.write_bytes(b"A" * 1000 + b"B" * 1000)
+
+        text, size, truncated = read_captured(str(path), head_bytes=10, tail_bytes=10)
+
+        assert size == 2000
+        assert truncated is True
+        assert text.startswith("A" * 10)
+        assert text.endswith("B" * 10)
+        assert len(text) < 200
+
+    @pytest.mark.unit
+    def test_prune_only_touches_own_prefix(self, temp_sandbox):
+        """Test: Pruning foreground spills keeps background job logs."""
+        job_log = new_spill_path(str(temp_sandbox), "job-abc", "stdout")
+        Path(job_log).write_bytes(b"job")
+        os.utime(job_log, (0, 0))  # älteste Datei im Verzeichnis
+        shell_logs = [new_spill_path(str(temp_sandbox), "shell", stream) for stream in ("stdout", "stderr", "stdout")]
+        for index, path in enumerate(shell_logs):
+            Path(path).write_bytes(b"x")
+            os.utime(path, (index + 1, index + 1))
+
+        prune_spill_dir(str(temp_sandbox), keep=1, prefix="shell")
+
+        assert os.path.exists(job_log)
+        assert [os.path.exists(path) for path in shell_logs] == [False, False, True]
+
+
+class TestResourceLimits:
+    """Test ulimit caps applied by the shell before the command."""
+
+    @pytest.mark.unit
+    def test_no_limits_returns_empty_prefix(self):
+        """Test: Without configured limits the command is left unchanged."""
+        assert build_limit_prefix({}) == ""
+        assert with_limits("ls", "") == "ls"
+
+    @pytest.mark.unit
+    def test_open_files_limit_applied(self):
+        """Test: open_files sets RLIMIT_NOFILE in the child."""
+        prefix = build_limit_prefix({"open_files": 64})
+
+        result = subprocess.run(with_limits("ulimit -n", prefix), shell=True, capture_output=True, text=True)
+
+        assert result.stdout.strip() == "64"
+
+    @pytest.mark.unit
+    def test_all_limits_accepted_by_sh(self):
+        """Test: Every configured limit is understood by /bin/sh (dash and bash differ for processes)."""
+        prefix = build_limit_prefix({"cpu_seconds": 30, "memory_mb": 4096, "open_files": 128, "processes": 4096, "file_size_mb": 8})
+
+        result = subprocess.run(with_limits("ulimit -t; ulimit -n; ulimit -f", prefix), shell=True, capture_output=True, text=True)
+
+        assert result.stdout.split() == ["30", "128", "16384"]
+        assert result.stderr == ""
+
+    @pytest.mark.unit
+    def test_file_size_limit_stops_writer(self, tmp_path):
+        """Test: file_size_mb stops output written to a file (spill cap)."""
+        prefix = build_limit_prefix({"file_size_mb": 1})
+
+        with open(tmp_path / "out.log", "wb") as out:
+            result = subprocess.run(with_limits("head -c 3000000 /dev/zero", prefix), shell=True, stdout=out)
+
+        assert result.returncode in (-signal.SIGXFSZ, 128 + signal.SIGXFSZ)
+        assert (tmp_path / "out.log").stat().st_size == 1024 * 1024
+
+    @pytest.mark.unit
+    @pytest.mark.slow
+    def test_cpu_limit_kills_busy_loop(self):
+        """Test: cpu_seconds terminates a CPU-bound child."""
+        prefix = build_limit_prefix({"cpu_seconds": 1})
+
+        result = subprocess.run(with_limits(f"exec {sys.executable} -c 'while True: pass'", prefix), shell=True, timeout=20)
+
+        assert result.returncode in (-signal.SIGXCPU, -signal.SIGKILL)
+
+
+class TestRunShellBoundedOutput:
+    """Test that run_shell() returns bounded output."""
+
+    @pytest.mark.unit
+    def test_run_shell_truncates_chatty_command(self, temp_sandbox):
+        """Test: Large stdout is cut to head/tail and spilled to a file."""
+        import openwebui_agent_server as server
+
+        with patch.object(server, "SANDBOX", False), \
+             patch.object(server, "SHELL_SPILL_DIR", str(temp_sandbox)), \
+             patch.object(server, "SHELL_HEAD_BYTES", 100), \
+             patch.object(server, "SHELL_TAIL_BYTES", 100):
+            result = server.run_shell("seq 1 100000")
+
+        assert "Bytes ausgelassen" in result
+        assert "100000" in result
+        assert len(result) < 2000
+        spilled = [name for name in os.listdir(temp_sandbox) if name.endswith(".stdout.log")]
+        assert len(spilled) == 1
+
+    @pytest.mark.unit
+    def test_run_shell_caps_spill_file(self, temp_sandbox):
+        """Test: Output beyond spill_max_mb aborts the command instead of filling the disk."""
+        import openwebui_agent_server as server
+
+        with patch.object(server, "SANDBOX", False), \
+             patch.object(server, "SHELL_SPILL_DIR", str(temp_sandbox)), \
+             patch.object(server, "shell_limit_prefix", build_limit_prefix({"file_size_mb": 1})):
+            result = server.run_shell("seq 1 10000000")
+
+        assert "Ausgabe oder Datei größer als" in result
+        spilled = [temp_sandbox / name for name in os.listdir(temp_sandbox) if name.endswith(".stdout.log")]
+        assert spilled[0].stat().st_size == 1024 * 1024
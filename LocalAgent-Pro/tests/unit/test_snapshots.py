@@ -0,0 +1,214 @@
+"""Unit tests for copy-on-write snapshots, undo and restore."""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from snapshots import SnapshotStore
+
+
+class TestSnapshotStore:
+    """Test SnapshotStore versioning and retention."""
+
+    def _store(self, temp_sandbox, **kwargs):
+        return SnapshotStore(str(temp_sandbox / ".localagent" / "snapshots"), **kwargs)
+
+    def _write(self, store, target, content):
+        """Mimic write_file: snapshot, then replace the file."""
+        store.snapshot(str(target), "write")
+        if target.exists():
+            target.unlink()
+        target.write_text(content)
+
+    @pytest.mark.unit
+    def test_snapshot_is_hardlink(self, temp_sandbox):
+        """Test: Snapshot shares the inode with the current file."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "a.txt"
+        target.write_text("v1")
+
+        store.snapshot(str(target), "write")
+
+        assert target.stat().st_nlink == 2
+
+    @pytest.mark.unit
+    def test_undo_restores_previous_content(self, temp_sandbox):
+        """Test: undo() brings back the content before the last write."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "a.txt"
+        target.write_text("v1")
+        self._write(store, target, "v2")
+
+        result = store.undo(str(target))
+
+        assert result is not None
+        assert target.read_text() == "v1"
+
+    @pytest.mark.unit
+    def test_undo_of_new_file_removes_it(self, temp_sandbox):
+        """Test: Undoing the creation of a file deletes it again."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "new.txt"
+        self._write(store, target, "created")
+
+        store.undo(str(target))
+
+        assert not target.exists()
+
+    @pytest.mark.unit
+    def test_delete_is_undoable(self, temp_sandbox):
+        """Test: A file moved into a snapshot on delete can be undone."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "a.txt"
+        target.write_text("keep me")
+
+        store.snapshot(str(target), "delete", move=True)
+        assert not target.exists()
+
+        store.undo()
+        assert target.read_text() == "keep me"
+
+    @pytest.mark.unit
+    def test_global_undo_uses_latest_change(self, temp_sandbox):
+        """Test: undo() without path reverts the most recently changed file."""
+        store = self._store(temp_sandbox)
+        first = temp_sandbox / "first.txt"
+        second = temp_sandbox / "second.txt"
+        first.write_text("f1")
+        second.write_text("s1")
+        self._write(store, first, "f2")
+        self._write(store, second, "s2")
+
+        result = store.undo()
+
+        assert result["path"] == str(second)
+        assert second.read_text() == "s1"
+        assert first.read_text() == "f2"
+
+    @pytest.mark.unit
+    def test_restore_specific_version_is_itself_undoable(self, temp_sandbox):
+        """Test: restore() picks a version and snapshots the current state first."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "a.txt"
+        target.write_text("v1")
+        self._write(store, target, "v2")
+        self._write(store, target, "v3")
+        oldest = store.list_versions(str(target))[0]["version"]
+
+        store.restore(str(target), oldest)
+        assert target.read_text() == "v1"
+
+        store.undo(str(target))
+        assert target.read_text() == "v3"
+
+    @pytest.mark.unit
+    def test_max_versions_per_file_evicts_oldest(self, temp_sandbox):
+        """Test: Retention keeps only the newest N versions."""
+        store = self._store(temp_sandbox, max_versions_per_file=2)
+        target = temp_sandbox / "a.txt"
+        for i in range(5):
+            self._write(store, target, f"v{i}")
+
+        assert len(store.list_versions(str(target))) == 2
+        assert store.stats()["evictions"] == 3
+
+    @pytest.mark.unit
+    def test_total_size_budget_evicts_globally(self, temp_sandbox):
+        """Test: Exceeding max_total_bytes drops the oldest versions of any file."""
+        store = self._store(temp_sandbox, max_total_bytes=150)
+        for name in ("a.txt", "b.txt", "c.txt"):
+            target = temp_sandbox / name
+            target.write_text("x" * 100)
+            self._write(store, target, "y")
+
+        assert store.stats()["total_bytes"] <= 150
+        assert store.list_versions(str(temp_sandbox / "a.txt")) == []
+        assert len(store.list_versions(str(temp_sandbox / "c.txt"))) == 1
+
+    @pytest.mark.unit
+    def test_index_survives_restart(self, temp_sandbox):
+        """Test: Versions are reloaded from disk by a new store instance."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "a.txt"
+        target.write_text("v1")
+        self._write(store, target, "v2")
+
+        reloaded = self._store(temp_sandbox)
+
+        assert len(reloaded.list_versions(str(target))) == 1
+        reloaded.undo(str(target))
+        assert target.read_text() == "v1"
+
+    @pytest.mark.unit
+    def test_settle_drops_snapshot_still_linked_to_live_file(self, temp_sandbox):
+        """Test: If the write is skipped or fails, no version stays hardlinked to the live file."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "a.txt"
+        target.write_text("v1")
+        self._write(store, target, "v2")
+
+        store.snapshot(str(target), "write")  # Schreiben danach übersprungen
+        store.settle(str(target))
+        with open(target, "a") as f:
+            f.write(" in place")
+
+        assert target.stat().st_nlink == 1
+        assert len(store.list_versions(str(target))) == 1
+        store.undo(str(target))
+        assert target.read_text() == "v1"
+
+    @pytest.mark.unit
+    def test_settle_keeps_snapshot_after_replace(self, temp_sandbox):
+        """Test: A successful write (new inode) keeps its version."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "a.txt"
+        target.write_text("v1")
+
+        self._write(store, target, "v2")
+        store.settle(str(target))
+
+        assert len(store.list_versions(str(target))) == 1
+
+    @pytest.mark.unit
+    def test_file_with_own_hardlinks_is_copied(self, temp_sandbox, tmp_path):
+        """Test: A file the user hardlinked elsewhere is copied, not linked into the store."""
+        store = self._store(temp_sandbox)
+        target = temp_sandbox / "a.txt"
+        target.write_text("v1")
+        (tmp_path / "user-link.txt").hardlink_to(target)
+
+        store.snapshot(str(target), "write")
+
+        assert target.stat().st_nlink == 2
+        assert store.is_linked(str(target)) is False
+
+
+class TestServerWriteSnapshots:
+    """Test write_file together with the snapshot store."""
+
+    @pytest.mark.unit
+    def test_write_keeps_user_hardlinks(self, temp_sandbox, tmp_path):
+        """Test: write_file updates a hardlinked file in place and stays undoable."""
+        from unittest.mock import patch
+        import openwebui_agent_server as server
+        store = SnapshotStore(str(tmp_path / "snapshots"))
+        target = temp_sandbox / "a.txt"
+        target.write_text("v1")
+        user_link = tmp_path / "user-link.txt"
+        user_link.hardlink_to(target)
+        plain = temp_sandbox / "b.txt"
+        plain.write_text("v1")
+
+        with patch.object(server, "snapshot_store", store), patch.object(server, "blob_store", None), \
+             patch.object(server, "SANDBOX", True), patch.object(server, "SANDBOX_PATH", str(temp_sandbox)):
+            server.write_file("a.txt", "v2")
+            server.write_file("b.txt", "v2")
+
+        assert user_link.read_text() == "v2"
+        assert plain.read_text() == "v2" and plain.stat().st_nlink == 1
+        store.undo(str(target))
+        store.undo(str(plain))
+        assert target.read_text() == "v1" and plain.read_text() == "v1"
@@ -159,3 +159,29 @@ class TestToolDetection:
         
         assert mock_read.called
         assert "/home/user/config.yaml" in mock_read.call_args[0][0]
+    
+    @pytest.mark.unit
+    @patch('openwebui_agent_server.restore_file')
+    @patch('openwebui_agent_server.write_file')
+    def test_restore_in_filename_is_write(self, mock_write, mock_restore):
+        """Test: 'Erstelle restore.sh ...' writes the file instead of restoring."""
+        from openwebui_agent_server import analyze_and_execute
+        
+        mock_write.return_value = "Datei erstellt"
+        analyze_and_execute("Erstelle restore.sh mit echo hallo")
+        
+        assert mock_write.called
+        assert not mock_restore.called
+    
+    @pytest.mark.unit
+    @patch('openwebui_agent_server.write_file')
+    @patch('openwebui_agent_server.restore_file')
+    def test_detect_restore_german(self, mock_restore, mock_write):
+        """Test: 'Stelle test.txt wieder her' restores without writing."""
+        from openwebui_agent_server import analyze_and_execute
+        
+        mock_restore.return_value = "wiederhergestellt"
+        analyze_and_execute("Bitte test.txt wiederherstellen, Version 3")
+        
+        assert mock_restore.call_args[0] == ("test.txt", "3")
+        assert not mock_write.called
@@ -0,0 +1,124 @@
+"""Unit tests for streaming fetch with byte cap and incremental decoding."""
+
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from http_pool import HttpPool
+from web_fetch import fetch_url, FetchCancelled
+
+
+class TestStreamingFetch:
+    """Test byte cap, content-type pre-check and charset handling."""
+
+    @pytest.mark.unit
+    def test_byte_cap_aborts_download(self, http_server):
+        """Test: Only max_bytes are read; the rest is reported as skipped."""
+        http_server.routes["/big"] = {"body": b"x" * 1_000_000, "headers": {"Content-Type": "text/plain"}}
+
+        result = fetch_url(HttpPool(), http_server.url("/big"), max_bytes=1000, chunk_size=500)
+
+        assert result["bytes_read"] == 1000
+        assert result["truncated"] is True
+        assert len(result["text"]) == 1000
+        assert 0 < result["skipped_bytes"] < 1_000_000
+
+    @pytest.mark.unit
+    def test_early_abort_does_not_wait_for_full_body(self, http_server):
+        """Test: A slow body is abandoned as soon as the cap is reached."""
+        chunks = [b"a" * 1000] * 20
+        http_server.routes["/slow"] = {
+            "body": b"".join(chunks), "chunks": chunks, "chunk_delay": 0.1,
+            "headers": {"Content-Type": "text/plain"},
+        }
+
+        started = time.monotonic()
+        result = fetch_url(HttpPool(), http_server.url("/slow"), max_bytes=1500, chunk_size=500)
+
+        assert result["truncated"] is True
+        assert time.monotonic() - started < 1.0
+
+    @pytest.mark.unit
+    def test_cancel_stops_reading(self, http_server):
+        """Test: Setting the cancel event stops a slow download at the next chunk."""
+        chunks = [b"a" * 1000] * 20
+        http_server.routes["/slow"] = {
+            "body": b"".join(chunks), "chunks": chunks, "chunk_delay": 0.1,
+            "headers": {"Content-Type": "text/plain"},
+        }
+        pool = HttpPool()
+        cancel = threading.Event()
+        threading.Timer(0.25, cancel.set).start()
+
+        started = time.monotonic()
+        with pytest.raises(FetchCancelled):
+            fetch_url(pool, http_server.url("/slow"), chunk_size=500, cancel=cancel)
+
+        assert time.monotonic() - started < 1.0
+        assert pool.breaker("127.0.0.1").state == "closed"
+
+    @pytest.mark.unit
+    def test_unsupported_content_type_is_not_read(self, http_server):
+        """Test: Binary content types are rejected from the headers alone."""
+        http_server.routes["/img"] = {"body": b"\x89PNG" + b"0" * 5000, "headers": {"Content-Type": "image/png"}}
+
+        result = fetch_url(HttpPool(), http_server.url("/img"))
+
+        assert result["text"] == ""
+        assert result["bytes_read"] == 0
+        assert result["skipped_bytes"] == 5004
+        assert "image/png" in result["skipped_reason"]
+
+    @pytest.mark.unit
+    def test_incremental_decoding_across_chunks(self, http_server):
+        """Test: Multibyte characters split across chunks decode correctly."""
+        body = "Grüße aus Köln – ✓".encode("utf-8")
+        http_server.routes["/utf8"] = {"body": body, "headers": {"Content-Type": "text/plain; charset=utf-8"}}
+
+        result = fetch_url(HttpPool(), http_server.url("/utf8"), chunk_size=1)
+
+        assert result["text"] == "Grüße aus Köln – ✓"
+
+    @pytest.mark.unit
+    def test_charset_from_header_and_meta(self, http_server):
+        """Test: Charset comes from Content-Type, else from <meta charset>."""
+        http_server.routes["/latin"] = {"body": "Größe".encode("latin-1"), "headers": {"Content-Type": "text/plain; charset=ISO-8859-1"}}
+        http_server.routes["/meta"] = {
+            "body": '<html><head><meta charset="windows-1252"></head><body>Café</body></html>'.encode("cp1252"),
+            "headers": {"Content-Type": "text/html"},
+        }
+        pool = HttpPool()
+
+        assert fetch_url(pool, http_server.url("/latin"))["text"] == "Größe"
+        meta = fetch_url(pool, http_server.url("/meta"))
+        assert "Café" in meta["text"]
+        assert meta["encoding"] == "cp1252"
+
+    @pytest.mark.unit
+    def test_cut_multibyte_character_is_dropped(self, http_server):
+        """Test: A character cut by the byte cap does not produce a replacement char."""
+        http_server.routes["/cut"] = {"body": "ääää".encode("utf-8"), "headers": {"Content-Type": "text/plain; charset=utf-8"}}
+
+        result = fetch_url(HttpPool(), http_server.url("/cut"), max_bytes=3)
+
+        assert result["text"] == "ä"
+
+    @pytest.mark.unit
+    def test_server_fetch_reports_skipped_bytes(self, http_server):
+        """Test: fetch() tool output mentions the aborted download."""
+        import openwebui_agent_server as server
+        http_server.routes["/big"] = {"body": b"y" * 100_000, "headers": {"Content-Type": "text/plain"}}
+
+        with patch.object(server, "ALLOWED_DOMAINS", ["127.0.0.1"]), \
+             patch.object(server, "FETCH_MAX_BYTES", 2000):
+            result = server.fetch(http_server.url("/big"))
+
+        assert "🌐 Webseite geladen" in result
+        assert "abgebrochen" in result
+        assert "nicht geladen" in result
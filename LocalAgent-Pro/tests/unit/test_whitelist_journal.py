@@ -0,0 +1,111 @@
+"""Unit tests for the auto-whitelist journal."""
+
+import pytest
+import sys
+import threading
+import yaml
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from whitelist_journal import WhitelistJournal
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "domain_whitelist.yaml"
+    path.write_text(yaml.dump({
+        "approved_domains": ["github.com", 'example.com"', "example.com"],
+        "loop_protection": {"enabled": True},
+    }))
+    return path
+
+
+class TestWhitelistJournal:
+    """Test append, replay and compaction."""
+
+    @pytest.mark.unit
+    def test_load_drops_invalid_entries(self, snapshot):
+        """Test: Corrupted entries are dropped and the snapshot rewritten without them."""
+        journal = WhitelistJournal(str(snapshot), flush_interval=0)
+
+        assert journal.load() == {"github.com", "example.com"}
+
+        data = yaml.safe_load(snapshot.read_text())
+        assert data["approved_domains"] == ["example.com", "github.com"]
+        assert data["loop_protection"] == {"enabled": True}
+
+    @pytest.mark.unit
+    def test_append_writes_journal_not_snapshot(self, snapshot):
+        """Test: New domains go to the journal; the YAML stays untouched until compaction."""
+        journal = WhitelistJournal(str(snapshot), flush_interval=0)
+        journal.load()
+        before = snapshot.read_text()
+
+        assert journal.append("Docs.Python.org") is True
+        assert journal.append("docs.python.org") is False
+
+        assert snapshot.read_text() == before
+        assert Path(journal.journal_path).read_text() == "docs.python.org\n"
+
+    @pytest.mark.unit
+    def test_replay_after_crash(self, snapshot):
+        """Test: A new instance replays the journal; a torn last line is ignored."""
+        journal = WhitelistJournal(str(snapshot), flush_interval=0)
+        journal.load()
+        journal.append("a.example")
+        journal.append("b.example")
+        with open(journal.journal_path, "a") as f:
+            f.write("c.exam")  # Absturz mitten im Schreiben
+
+        replayed = WhitelistJournal(str(snapshot), flush_interval=0).load()
+
+        assert {"a.example", "b.example"} <= replayed
+        assert "c.exam" not in replayed
+        assert "b.example" in yaml.safe_load(snapshot.read_text())["approved_domains"]
+        assert Path(journal.journal_path).read_text() == ""
+
+    @pytest.mark.unit
+    def test_compaction_after_threshold(self, snapshot):
+        """Test: The journal is folded into the snapshot after compact_every entries."""
+        journal = WhitelistJournal(str(snapshot), flush_interval=0, compact_every=3)
+        journal.load()
+        for name in ("a", "b", "c"):
+            journal.append(f"{name}.example")
+
+        assert journal.stats()["compactions"] == 2  # Start + Schwelle
+        assert "c.example" in yaml.safe_load(snapshot.read_text())["approved_domains"]
+        assert Path(journal.journal_path).read_text() == ""
+
+    @pytest.mark.unit
+    def test_batched_fsync_and_close(self, snapshot):
+        """Test: With a flush interval appends are fsynced in batches; close() compacts."""
+        journal = WhitelistJournal(str(snapshot), flush_interval=60)
+        journal.load()
+        for i in range(10):
+            journal.append(f"d{i}.example")
+
+        assert journal.stats()["fsyncs"] <= 1
+        journal.close()
+
+        assert "d9.example" in yaml.safe_load(snapshot.read_text())["approved_domains"]
+
+    @pytest.mark.unit
+    def test_concurrent_appends(self, snapshot):
+        """Test: Concurrent appends from many threads are all persisted."""
+        journal = WhitelistJournal(str(snapshot), flush_interval=60, compact_every=10_000)
+        journal.load()
+        threads = [
+            threading.Thread(target=lambda n=n: [journal.append(f"t{n}-{i}.example") for i in range(50)])
+            for n in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        journal.flush()
+
+        lines = Path(journal.journal_path).read_text().splitlines()
+        assert len(lines) == len(set(lines)) == 400
+        assert len(WhitelistJournal(str(snapshot), flush_interval=0).load()) == 402